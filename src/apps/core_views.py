@@ -4,7 +4,9 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse
 from apps.modulo_1.roles.models import Estudiante, Docente
+from apps.modulo_1.roles.perfil import obtener_perfil
 from apps.modulo_2.inscripciones.models import Inscripcion
+from core.replica import usar_replica
 
 
 def vite_client_stub(request):
@@ -68,114 +70,41 @@ def cursos_por_polo(request, polo_id):
     """
     Vista para mostrar los cursos de un Polo específico
     """
-    from apps.modulo_3.cursos.models import Curso, PoloCreativo
+    from apps.modulo_3.cursos.models import PoloCreativo
+    from apps.modulo_3.cursos.catalogo import obtener_catalogo, respuesta_catalogo
     from django.shortcuts import get_object_or_404
-    from django.db.models import Count, F, Q
 
     polo_seleccionado = get_object_or_404(PoloCreativo, id_polo=polo_id)
 
-    hoy_real = date.today()
-
-    cursos_scope = Q(comision__fk_id_polo=polo_seleccionado) | Q(
-        comision__modalidad='Virtual',
-        comision__fk_id_polo__isnull=True,
-    )
-
-    cursos = (
-        Curso.objects.filter(
-            estado='Abierto',
-            comision__publicada=True,
-        )
-        .filter(cursos_scope)
-        .prefetch_related('comision_set__inscripciones')
-        .order_by('orden', 'id_curso')
-        .distinct()
-    )
-
-    cursos_visibles = []
-
-    for curso in cursos:
-        curso.comisiones_abiertas = (
-            curso.comision_set.filter(
-                estado='Abierta',
-                publicada=True,
-            ).filter(
-                Q(fk_id_polo=polo_seleccionado) |
-                Q(modalidad='Virtual', fk_id_polo__isnull=True)
-            )
-            .exclude(Q(fecha_fin__isnull=False, fecha_fin__lte=hoy_real))
-            .annotate(
-                inscritos_count_annotated=Count(
-                    'inscripciones',
-                    filter=~Q(inscripciones__estado__in=['lista_espera', 'cancelada']),
-                )
-            )
-            .filter(inscritos_count_annotated__lt=F('cupo_maximo'))
-            .order_by('id_comision')
-        )
-
-        curso.comisiones_polo = list(
-            curso.comision_set.filter(
-                publicada=True,
-            ).filter(
-                Q(fk_id_polo=polo_seleccionado) |
-                Q(modalidad='Virtual', fk_id_polo__isnull=True)
-            )
-            .exclude(estado__in=['Cerrada', 'Finalizada'])
-            .exclude(Q(fecha_fin__isnull=False, fecha_fin__lte=hoy_real))
-            .order_by('id_comision')
-        )
-
-        tiene_cupo = bool(curso.comisiones_abiertas)
-        tiene_abiertas_sin_cupo = any(comision.estado == 'Abierta' for comision in curso.comisiones_polo) and not tiene_cupo
-        if tiene_cupo:
-            curso.disponibilidad = 'abierta'
-        elif tiene_abiertas_sin_cupo:
-            curso.disponibilidad = 'cerrada'
-        else:
-            curso.disponibilidad = 'proximamente'
-
-        if curso.comisiones_polo:
-            cursos_visibles.append(curso)
-
     context = {
         'polo_seleccionado': polo_seleccionado,
-        'cursos': cursos_visibles,
+        'cursos': obtener_catalogo(polo_seleccionado.id_polo),
         'user_authenticated': request.user.is_authenticated
     }
-    return render(request, 'cursos_por_polo.html', context)
+    return respuesta_catalogo(request, 'cursos_por_polo.html', context, polo_id=polo_seleccionado.id_polo)
 
 
 @login_required
 def dashboard(request):
     """Dashboard principal que redirige según el rol del usuario"""
-    from apps.modulo_1.usuario.models import Usuario
-    from apps.modulo_1.roles.models import UsuarioRol
-    
+    perfil = obtener_perfil(request.user)
+
     # Verificar si es administrador/staff
-    if request.user.is_staff or request.user.is_superuser:
+    if perfil.es_staff:
         return redirect('dashboard_admin')
     
     # Verificar roles de administrador o mesa de entrada
-    try:
-        usuario = Usuario.objects.get(persona__dni=request.user.username)
-        roles = UsuarioRol.objects.filter(usuario_id=usuario).values_list('rol_id__nombre', flat=True)
-        
+    if perfil.tiene_usuario:
         # Verificar si es empresa (Prioridad sobre estudiante)
-        if hasattr(usuario, 'empresa') or 'Empresa' in roles:
+        if perfil.es_empresa:
             return redirect('dashboard_empresa')
 
-        if 'Administrador' in roles or 'Mesa de Entrada' in roles:
+        if perfil.es_admin_o_mesa:
             return redirect('dashboard_admin')
-    except Usuario.DoesNotExist:
-        pass
     
     # Verificar si es estudiante
-    try:
-        estudiante = Estudiante.objects.get(usuario__persona__dni=request.user.username)
+    if perfil.es_estudiante:
         return redirect('dashboard_estudiante')
-    except Estudiante.DoesNotExist:
-        pass
     
     # Verificar si es docente (DESHABILITADO TEMPORALMENTE)
     # try:
@@ -191,17 +120,13 @@ def dashboard(request):
 @login_required
 def dashboard_empresa(request):
     from apps.modulo_1.usuario.models import Usuario
-    from apps.modulo_1.roles.models import UsuarioRol
     from apps.modulo_7.empresas.models import Empresa
 
-    try:
-        usuario = Usuario.objects.get(persona__dni=request.user.username)
-    except Usuario.DoesNotExist:
+    perfil = obtener_perfil(request.user)
+    if not (perfil.tiene_usuario and perfil.es_empresa):
         return redirect('dashboard')
 
-    roles = UsuarioRol.objects.filter(usuario_id=usuario).values_list('rol_id__nombre', flat=True)
-    if not (hasattr(usuario, 'empresa') or 'Empresa' in roles):
-        return redirect('dashboard')
+    usuario = Usuario.objects.select_related('persona').get(pk=perfil.usuario_id)
 
     empresa = Empresa.objects.filter(responsable=usuario).first()
     context = {
@@ -217,6 +142,7 @@ def dashboard_estudiante(request):
     try:
         from apps.modulo_3.cursos.models import Curso
         from apps.modulo_4.asistencia.models import RegistroAsistencia
+        from apps.modulo_4.asistencia.progreso import progreso_estudiante
         from django.db.models import Count, Q
         
         estudiante = Estudiante.objects.get(usuario__persona__dni=request.user.username)
@@ -236,15 +162,9 @@ def dashboard_estudiante(request):
             estado='pre_inscripto',
         ).order_by('-fecha_hora_inscripcion', '-id')
 
-        # Obtener inscripciones activas (confirmadas)
-        inscripciones = Inscripcion.objects.filter(
-            estudiante=estudiante,
-            estado='confirmado',
-            comision__publicada=True,
-        ).select_related('comision__fk_id_curso', 'comision__fk_id_polo')
-        
-        inscripciones_activas_count = inscripciones.count()
-        
+        # Progreso de las inscripciones confirmadas, en una lectura y sin escribir registros
+        progresos = progreso_estudiante(estudiante)
+
         # Procesar datos para el dashboard (Asistencia y Progreso)
         cursos_activos = []
         asistencia_promedio_total = 0
@@ -253,21 +173,12 @@ def dashboard_estudiante(request):
         cursos_en_progreso_count = 0
         hoy = date.today()
 
-        for inscripcion in inscripciones:
-            registro, _ = RegistroAsistencia.objects.get_or_create(inscripcion=inscripcion)
-            registro.calcular_porcentaje()
-
-            comision = inscripcion.comision
-            total_programadas = None
-            if hasattr(comision, 'get_total_clases_programadas'):
-                total_programadas = comision.get_total_clases_programadas(hasta=comision.fecha_fin)
-            if total_programadas is None:
-                total_programadas = registro.total_clases
-
-            total_clases = total_programadas
-            presentes = registro.clases_asistidas
-            porcentaje_asistencia = int(registro.porcentaje_asistencia)
-            curso_completado = porcentaje_asistencia >= 100 or registro.cumple_requisito_certificado
+        for progreso in progresos:
+            inscripcion = progreso.inscripcion
+            comision = progreso.comision
+            total_clases = progreso.total_clases
+            porcentaje_asistencia = progreso.porcentaje
+            curso_completado = progreso.completado
 
             if total_clases and total_clases > 0:
                 asistencia_promedio_total += porcentaje_asistencia
@@ -278,11 +189,7 @@ def dashboard_estudiante(request):
             else:
                 cursos_en_progreso_count += 1
 
-            es_finalizada = (
-                comision.estado == 'Finalizada'
-                or (comision.fecha_fin and comision.fecha_fin < hoy)
-            )
-            if es_finalizada:
+            if comision.estado == 'Finalizada':
                 continue
 
             if comision.fecha_inicio and comision.fecha_inicio > hoy:
@@ -292,28 +199,18 @@ def dashboard_estudiante(request):
             else:
                 estado_ui = 'En curso'
 
-            proxima_fecha = None
-            try:
-                fechas = comision.get_fechas_clase_programadas(hasta=comision.fecha_fin)
-                for f in fechas:
-                    if f >= hoy:
-                        proxima_fecha = f
-                        break
-            except Exception:
-                proxima_fecha = None
-
             cursos_activos.append({
                 'nombre': comision.fk_id_curso.nombre,
                 'comision': comision.id_comision,
                 'polo': comision.fk_id_polo.nombre if comision.fk_id_polo else 'Virtual',
                 'horarios': comision.dias_horarios,
-                'proxima_fecha': proxima_fecha,
+                'proxima_fecha': progreso.proxima_clase,
                 'asistencia': porcentaje_asistencia,
                 'total_clases': total_clases,
-                'presentes': presentes,
+                'presentes': progreso.asistidas,
                 'estado_ui': estado_ui,
                 'inscripcion_id': inscripcion.id,
-                'cumple_certificado': registro.cumple_requisito_certificado,
+                'cumple_certificado': progreso.cumple_certificado,
                 'completado': curso_completado,
             })
             
@@ -395,30 +292,26 @@ def dashboard_docente(request):
 @login_required
 def dashboard_admin(request):
     """Dashboard específico para administradores y mesa de entrada con estadísticas"""
-    from apps.modulo_1.usuario.models import Usuario
-    from apps.modulo_1.roles.models import UsuarioRol
+    from apps.modulo_1.usuario.models import Persona
     from django.utils import timezone
     from datetime import datetime
     
+    perfil = obtener_perfil(request.user)
+
     # Verificar si es staff o superuser (administrador Django)
-    es_admin_django = request.user.is_staff or request.user.is_superuser
+    es_admin_django = perfil.es_staff
     
     # Verificar si tiene rol de Administrador o Mesa de Entrada
-    es_admin_rol = False
-    try:
-        usuario = Usuario.objects.get(persona__dni=request.user.username)
-        roles = UsuarioRol.objects.filter(usuario_id=usuario).values_list('rol_id__nombre', flat=True)
-        es_admin_rol = 'Administrador' in roles or 'Mesa de Entrada' in roles
-    except Usuario.DoesNotExist:
-        pass
-    
-    if not (es_admin_django or es_admin_rol):
+    if not perfil.es_admin_o_mesa:
         return redirect('dashboard')
     
-    from apps.modulo_3.cursos.models import Curso, Comision
-    from apps.modulo_4.asistencia.models import Asistencia
+    from apps.modulo_3.cursos.agenda import INICIO_AGENDA_MIN, obtener_agenda
+    from apps.modulo_3.cursos.ciclo_vida import ciclo_desactualizado
+    from apps.modulo_3.cursos.models import AgendaComision, Curso, Comision
+    from apps.modulo_4.asistencia.models import ResumenAsistenciaComision
+    from apps.modulo_4.asistencia.resumen import ultimas_clases
     from django.core.paginator import Paginator
-    from django.db.models import Count, F, Q
+    from django.db.models import Count, F, Q, Sum
 
     hoy = timezone.now().date()
     hoy_real = hoy
@@ -431,8 +324,9 @@ def dashboard_admin(request):
         except ValueError:
             fecha_agenda = hoy_real
 
-    Comision.objects.filter(fecha_fin__lt=hoy_real).exclude(estado='Finalizada').update(estado='Finalizada')
-    
+    # El estado por fecha lo mantiene el comando actualizar_estado_comisiones (cron diario)
+    ciclo_comisiones_desactualizado = ciclo_desactualizado(hoy_real)
+
     # Estadísticas generales
     total_cursos = Curso.objects.count()
     total_estudiantes = Estudiante.objects.count()
@@ -442,7 +336,10 @@ def dashboard_admin(request):
     # Métricas de Hoy
     inscripciones_hoy_qs = Inscripcion.objects.filter(fecha_hora_inscripcion__date=hoy_real)
     inscripciones_hoy = inscripciones_hoy_qs.count()
-    asistencias_hoy = Asistencia.objects.filter(fecha_clase=hoy_real, presente=True).count()
+    # Presentes de hoy de las inscripciones confirmadas (las que cuenta el resumen diario)
+    asistencias_hoy = ResumenAsistenciaComision.objects.filter(fecha=hoy_real).aggregate(
+        total=Sum('presentes'),
+    )['total'] or 0
     
     # Cursos más populares (con más inscripciones)
     cursos_populares = Curso.objects.annotate(
@@ -450,18 +347,17 @@ def dashboard_admin(request):
     ).filter(total_inscripciones__gt=0).order_by('-total_inscripciones')[:5]
     
     # Estado de comisiones y Alertas de Cupo
-    # Para el dashboard, consideramos "Finalizada" también cuando ya pasó (o llegó) la fecha_fin,
-    # aunque el campo estado todavía no haya sido actualizado.
-    finalizadas_q = Q(estado='Finalizada') | Q(fecha_fin__isnull=False, fecha_fin__lte=hoy_real)
-
-    comisiones_finalizadas = Comision.objects.filter(finalizadas_q).count()
-    comisiones_abiertas = Comision.objects.filter(estado='Abierta').exclude(finalizadas_q).count()
-    comisiones_cerradas = Comision.objects.filter(estado='Cerrada').exclude(finalizadas_q).count()
+    por_estado = dict(Comision.objects.order_by().values_list('estado').annotate(total=Count('pk')))
+    comisiones_finalizadas = por_estado.get('Finalizada', 0)
+    comisiones_abiertas = por_estado.get('Abierta', 0)
+    comisiones_cerradas = por_estado.get('Cerrada', 0)
     
     # Alertas de Cupo (Comisiones abiertas con 5 o menos lugares)
     alertas_cupo = []
-    comisiones_activas = Comision.objects.filter(estado='Abierta').prefetch_related('inscripciones')
-    
+    comisiones_activas = Comision.objects.filter(estado='Abierta').select_related('fk_id_curso').annotate(
+        cupos_restantes=F('cupo_maximo') - F('total_confirmados') - F('total_preinscriptos'),
+    ).filter(cupos_restantes__gt=0, cupos_restantes__lte=5)
+
     for comision in comisiones_activas:
         if comision.cupos_disponibles <= 5 and comision.cupos_disponibles > 0:
             alertas_cupo.append({
@@ -486,20 +382,14 @@ def dashboard_admin(request):
     es_admin_completo = es_admin_django
     ciudad_mesa_entrada = None
     if not es_admin_django:
-        try:
-            usuario = Usuario.objects.get(persona__dni=request.user.username)
-            roles = UsuarioRol.objects.filter(usuario_id=usuario).values_list('rol_id__nombre', flat=True)
-            if 'Mesa de Entrada' in roles:
-                tipo_usuario = 'Mesa de Entrada'
-                es_admin_completo = False
-                from apps.modulo_1.usuario.models import Persona
-                ciudad_mesa_entrada = Persona.normalizar_ciudad(usuario.persona.ciudad_residencia)
-            elif 'Administrador' in roles:
-                tipo_usuario = 'Administrador'
-                puede_crear_usuarios = True
-                es_admin_completo = True
-        except Usuario.DoesNotExist:
-            pass
+        if perfil.es_mesa_entrada:
+            tipo_usuario = 'Mesa de Entrada'
+            es_admin_completo = False
+            ciudad_mesa_entrada = Persona.normalizar_ciudad(perfil.ciudad_residencia)
+        elif perfil.es_rol_admin:
+            tipo_usuario = 'Administrador'
+            puede_crear_usuarios = True
+            es_admin_completo = True
 
     if tipo_usuario == 'Mesa de Entrada':
         if ciudad_mesa_entrada:
@@ -516,57 +406,22 @@ def dashboard_admin(request):
             nuevas_preinscripciones = Inscripcion.objects.none()
             inscripciones_hoy = 0
 
-    dia_semana = fecha_agenda.weekday()
-
-    comisiones_hoy_qs = Comision.objects.select_related('fk_id_curso', 'fk_id_polo').exclude(
-        estado='Finalizada'
-    ).filter(
-        Q(fecha_inicio__isnull=True) | Q(fecha_inicio__lte=fecha_agenda),
-        Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=fecha_agenda),
-    )
-
-    comisiones_hoy_qs = comisiones_hoy_qs.order_by('fk_id_curso__nombre', 'id_comision')
-
+    # Agenda precalculada: horario, carril y color ya resueltos por día y alcance
     if tipo_usuario == 'Mesa de Entrada':
-        if ciudad_mesa_entrada:
-            comisiones_hoy_qs = comisiones_hoy_qs.filter(
-                Q(fk_id_polo__ciudad=ciudad_mesa_entrada) |
-                Q(modalidad='Virtual', fk_id_polo__isnull=True)
-            )
-        else:
-            comisiones_hoy_qs = Comision.objects.none()
-
-    comisiones_hoy = []
-    for comision in comisiones_hoy_qs:
-        dias = comision.get_dias_semana_indices()
-        if dias and dia_semana in dias:
-            comisiones_hoy.append(comision)
-    comisiones_hoy = comisiones_hoy[:50]
+        alcance_agenda = ciudad_mesa_entrada or None
+    else:
+        alcance_agenda = AgendaComision.ALCANCE_TODAS
+    if alcance_agenda:
+        clases_hoy = list(obtener_agenda(alcance_agenda, fecha_agenda)[:50])
+    else:
+        clases_hoy = []
+    comisiones_hoy = [clase.comision for clase in clases_hoy]
 
     comisiones_hoy_cards = []
     comision_ids_hoy = [int(c.id_comision) for c in comisiones_hoy]
 
-    series_por_comision = {}
-    if comision_ids_hoy:
-        series_raw = list(
-            Asistencia.objects.filter(
-                inscripcion__estado='confirmado',
-                inscripcion__comision_id__in=comision_ids_hoy,
-            ).values('inscripcion__comision_id', 'fecha_clase').annotate(
-                total=Count('pk'),
-                presentes=Count('pk', filter=Q(presente=True)),
-            ).order_by('fecha_clase')
-        )
-
-        for row in series_raw:
-            com_id = row.get('inscripcion__comision_id')
-            fecha = row.get('fecha_clase')
-            total = int(row.get('total') or 0)
-            presentes = int(row.get('presentes') or 0)
-            if com_id is None or fecha is None or total <= 0:
-                continue
-            porcentaje = round((presentes / total) * 100, 0)
-            series_por_comision.setdefault(int(com_id), []).append({'fecha': fecha, 'valor': max(min(int(porcentaje), 100), 0)})
+    # Últimas clases de cada comisión, leídas del resumen diario de asistencia
+    series_por_comision = ultimas_clases(comision_ids_hoy, cantidad=8)
 
     def _sparkline_points(valores, width=120, height=24, pad=2):
         valores = [max(min(int(v), 100), 0) for v in (valores or [])]
@@ -584,78 +439,21 @@ def dashboard_admin(request):
             pts.append(f"{x:.1f},{y:.1f}")
         return ' '.join(pts)
 
-    def _parse_time_range(texto, weekday=None):
-        import re
-        def _from_text(t):
-            t = (t or '').lower()
-            times = re.findall(r"\b([01]?\d|2[0-3])[:\.]([0-5]\d)\b", t)
-            if len(times) >= 2:
-                sh, sm = int(times[0][0]), int(times[0][1])
-                eh, em = int(times[1][0]), int(times[1][1])
-            else:
-                m = re.search(r"\b([01]?\d|2[0-3])\s*(?:hs|h)?\s*(?:a|\-|–|—)\s*([01]?\d|2[0-3])(?:[:\.]([0-5]\d))?\b", t)
-                if not m:
-                    return None
-                sh = int(m.group(1))
-                sm = 0
-                eh = int(m.group(2))
-                em = int(m.group(3) or 0)
-            start_min = (sh * 60) + sm
-            end_min = (eh * 60) + em
-            if end_min <= start_min:
-                end_min = start_min + 60
-            return {
-                'start_min': start_min,
-                'end_min': end_min,
-                'start_label': f"{sh:02d}:{sm:02d}",
-                'end_label': f"{eh:02d}:{em:02d}",
-            }
-
-        t_full = (texto or '').lower()
-        if weekday is not None:
-            tokens_map = {
-                0: ['lunes', 'lun', 'lu'],
-                1: ['martes', 'mar', 'ma'],
-                2: ['miércoles', 'miercoles', 'mié', 'mie', 'mi', 'x'],
-                3: ['jueves', 'jue', 'ju'],
-                4: ['viernes', 'vie', 'vi'],
-                5: ['sábado', 'sabado', 'sáb', 'sab', 'sa'],
-                6: ['domingo', 'dom'],
-            }
-            tokens = tokens_map.get(weekday) or []
-            if tokens:
-                parts = re.split(r"[.;\n]+", t_full)
-                for part in parts:
-                    if any(re.search(rf"\b{re.escape(tok)}\b", part) for tok in tokens):
-                        parsed = _from_text(part)
-                        if parsed:
-                            return parsed
-
-        return _from_text(t_full)
-
-    palette = ['#3b82f6', '#8b5cf6', '#10b981', '#f59e0b', '#ef4444', '#06b6d4']
     agenda_row_h = 40
-    agenda_start_min = 8 * 60
-    agenda_end_min = 22 * 60
 
     agenda_timed_items = []
     agenda_untimed_items = []
 
-    for comision in comisiones_hoy:
+    for clase in clases_hoy:
+        comision = clase.comision
         com_id = int(comision.id_comision)
-        serie = series_por_comision.get(com_id, [])
-        serie = sorted(serie, key=lambda x: x['fecha'])
-        ultimos = serie[-8:]
-        valores = [int(x['valor']) for x in ultimos]
+        valores = [clase_dictada.porcentaje for clase_dictada in series_por_comision.get(com_id, [])]
         puntos = _sparkline_points(valores)
         has_data = len(valores) > 0
 
-        color = palette[com_id % len(palette)]
-        time_range = _parse_time_range(comision.dias_horarios or '', dia_semana)
-
         card = {
             'comision': comision,
-            'color': color,
+            'color': clase.color,
             'sparkline_points': puntos,
             'sparkline_has_data': has_data,
             'sparkline_value': (valores[-1] if has_data else 0),
@@ -663,46 +461,29 @@ def dashboard_admin(request):
         }
         comisiones_hoy_cards.append(card)
 
-        if time_range:
-            start_min = max(int(time_range['start_min']), agenda_start_min)
-            end_min = min(int(time_range['end_min']), agenda_end_min)
-            if end_min <= start_min:
-                end_min = min(start_min + 60, agenda_end_min)
-
-            top = int(round(((start_min - agenda_start_min) / 60) * agenda_row_h, 0))
-            height = int(max(round(((end_min - start_min) / 60) * agenda_row_h, 0), 30))
+        if clase.inicio_min is not None:
+            top = int(round(((clase.inicio_min - INICIO_AGENDA_MIN) / 60) * agenda_row_h, 0))
+            height = int(max(round(((clase.fin_min - clase.inicio_min) / 60) * agenda_row_h, 0), 30))
 
             agenda_timed_items.append({
                 **card,
-                'start_min': start_min,
-                'end_min': end_min,
-                'start_label': time_range['start_label'],
-                'end_label': time_range['end_label'],
+                'start_min': clase.inicio_min,
+                'end_min': clase.fin_min,
+                'start_label': clase.inicio_etiqueta,
+                'end_label': clase.fin_etiqueta,
                 'top': top,
                 'height': height,
+                'lane': clase.carril,
             })
         else:
             agenda_untimed_items.append(card)
 
-    agenda_timed_items.sort(key=lambda x: (int(x.get('start_min') or 0), int(x.get('end_min') or 0)))
-    lane_ends = []
-    for ev in agenda_timed_items:
-        placed = False
-        for i, end_min in enumerate(lane_ends):
-            if int(ev['start_min']) >= int(end_min):
-                ev['lane'] = i
-                lane_ends[i] = int(ev['end_min'])
-                placed = True
-                break
-        if not placed:
-            ev['lane'] = len(lane_ends)
-            lane_ends.append(int(ev['end_min']))
-
-    total_lanes = max(len(lane_ends), 1)
+    agenda_timed_items.sort(key=lambda x: (x['start_min'], x['end_min']))
+    total_lanes = max([ev['lane'] + 1 for ev in agenda_timed_items] or [1])
     width_pct = round(100 / total_lanes, 4)
     for ev in agenda_timed_items:
         ev['width_pct'] = width_pct
-        ev['left_pct'] = round(int(ev.get('lane') or 0) * width_pct, 4)
+        ev['left_pct'] = round(ev['lane'] * width_pct, 4)
 
     agenda_hours = [f"{h:02d}:00" for h in range(8, 23)]
     agenda_timeline_height = max((len(agenda_hours) - 1) * agenda_row_h, 1)
@@ -859,6 +640,7 @@ def dashboard_admin(request):
         'comisiones_abiertas': comisiones_abiertas,
         'comisiones_cerradas': comisiones_cerradas,
         'comisiones_finalizadas': comisiones_finalizadas,
+        'ciclo_comisiones_desactualizado': ciclo_comisiones_desactualizado,
         'alertas_cupo': alertas_cupo,
         'tipo_usuario': tipo_usuario,
         'puede_crear_usuarios': puede_crear_usuarios,
@@ -873,21 +655,15 @@ def dashboard_admin(request):
 
 
 @login_required
+@usar_replica
 def api_estudiantes_por_curso(request):
     from django.http import JsonResponse
     from django.db.models import Count, Q
-    from apps.modulo_1.usuario.models import Usuario
-    from apps.modulo_1.roles.models import UsuarioRol
     from apps.modulo_3.cursos.models import Curso
 
-    if not (request.user.is_staff or request.user.is_superuser):
-        try:
-            usuario = Usuario.objects.get(persona__dni=request.user.username)
-            roles = UsuarioRol.objects.filter(usuario_id=usuario).values_list('rol_id__nombre', flat=True)
-            if 'Administrador' not in roles and 'Mesa de Entrada' not in roles:
-                return JsonResponse({'error': 'No autorizado.'}, status=403)
-        except Usuario.DoesNotExist:
-            return JsonResponse({'error': 'No autorizado.'}, status=403)
+    perfil = obtener_perfil(request.user)
+    if not perfil.es_admin_o_mesa:
+        return JsonResponse({'error': 'No autorizado.'}, status=403)
 
     curso_id = (request.GET.get('curso_id') or '').strip()
     if not curso_id:
@@ -901,16 +677,9 @@ def api_estudiantes_por_curso(request):
     tipo_usuario = 'Administrador'
     ciudad_mesa_entrada = None
 
-    if not (request.user.is_staff or request.user.is_superuser):
-        try:
-            usuario = Usuario.objects.get(persona__dni=request.user.username)
-            roles = UsuarioRol.objects.filter(usuario_id=usuario).values_list('rol_id__nombre', flat=True)
-            if 'Mesa de Entrada' in roles and 'Administrador' not in roles:
-                tipo_usuario = 'Mesa de Entrada'
-                from apps.modulo_1.usuario.models import Persona
-                ciudad_mesa_entrada = Persona.normalizar_ciudad(usuario.persona.ciudad_residencia)
-        except Usuario.DoesNotExist:
-            pass
+    if perfil.es_mesa_entrada and not perfil.es_admin_completo:
+        tipo_usuario = 'Mesa de Entrada'
+        ciudad_mesa_entrada = perfil.ciudad_mesa_entrada
 
     qs = Inscripcion.objects.filter(
         estado='confirmado',
@@ -0,0 +1,55 @@
+"""
+Matriz de roles para listados de personas (gestión de usuarios, exportaciones).
+
+``anotar_roles`` agrega a un queryset de Persona el primer Usuario asociado y un
+flag por rol resueltos con subconsultas EXISTS, de modo que una página o un lote
+de exportación se obtiene en una sola consulta sin importar la cantidad de filas.
+"""
+from django.db.models import Exists, OuterRef, Subquery
+
+from apps.modulo_1.usuario.models import Usuario
+
+from .models import Docente, Estudiante, UsuarioRol
+
+
+ETIQUETAS_ROLES = [
+    ('rol_estudiante', 'Estudiante'),
+    ('rol_empresa', 'Empresa'),
+    ('rol_administrador', 'Administrador'),
+    ('rol_mesa_entrada', 'Mesa de Entrada'),
+    ('rol_docente', 'Docente'),
+]
+
+
+def anotar_roles(personas):
+    """
+    Anota ``usuario_pk``, ``usuario_activo`` y los flags de ``ETIQUETAS_ROLES``.
+    Los roles de usuario se evalúan sobre el primer Usuario de la persona (menor pk).
+    """
+    from apps.modulo_7.empresas.models import Empresa
+
+    usuario_qs = Usuario.objects.filter(persona=OuterRef('pk')).order_by('pk')
+
+    def tiene_rol(nombre):
+        return Exists(UsuarioRol.objects.filter(usuario_id=OuterRef('usuario_pk'), rol_id__nombre=nombre))
+
+    return personas.annotate(
+        usuario_pk=Subquery(usuario_qs.values('pk')[:1]),
+        usuario_activo=Subquery(usuario_qs.values('activo')[:1]),
+    ).annotate(
+        rol_estudiante=Exists(Estudiante.objects.filter(usuario_id=OuterRef('usuario_pk'))),
+        rol_empresa=tiene_rol('Empresa') | Exists(Empresa.objects.filter(responsable_id=OuterRef('usuario_pk'))),
+        rol_administrador=tiene_rol('Administrador'),
+        rol_mesa_entrada=tiene_rol('Mesa de Entrada'),
+        rol_docente=Exists(Docente.objects.filter(id_persona=OuterRef('pk'))),
+    )
+
+
+def roles_anotados(persona):
+    """Etiquetas de los roles de una persona anotada con ``anotar_roles``"""
+    return [etiqueta for campo, etiqueta in ETIQUETAS_ROLES if getattr(persona, campo)]
+
+
+def texto_roles(persona):
+    roles = roles_anotados(persona)
+    return ', '.join(roles) if roles else 'Sin rol'
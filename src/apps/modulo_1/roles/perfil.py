@@ -0,0 +1,186 @@
+"""
+Resolución única de identidad y roles del usuario autenticado.
+
+El perfil se calcula una sola vez por request (queda memoizado sobre el
+objeto ``request.user``). Con PERFIL_ROLES_CACHE_TTL > 0 (solo con un cache
+compartido: con memoria local un cambio de roles no llegaría a los demás
+workers) además se guarda en el cache de Django. Un cambio en UsuarioRol,
+Docente, ComisionDocente, Persona, Usuario, Estudiante o Empresa descarta el
+perfil del usuario afectado; un cambio en Rol incrementa la versión global y
+descarta todos (ver signals.py).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from apps.modulo_1.usuario.models import Persona, Usuario
+from core.replica import lecturas_en_primaria
+
+
+_CACHE_VERSION_KEY = 'roles:perfil:version'
+_CACHE_KEY = 'roles:perfil:v{version}:{username}'
+_REQUEST_ATTR = '_perfil_roles'
+
+
+class PerfilRoles:
+    """Resumen inmutable de roles y permisos de un usuario"""
+
+    def __init__(self, es_staff=False, usuario_id=None, persona_id=None, ciudad_residencia=None,
+                 roles=(), es_estudiante=False, es_docente=False, comisiones_docente=(), es_empresa=False):
+        self.es_staff = es_staff
+        self.usuario_id = usuario_id
+        self.persona_id = persona_id
+        self.ciudad_residencia = ciudad_residencia
+        self.roles = frozenset(roles)
+        self.es_estudiante = es_estudiante
+        self.es_docente = es_docente
+        self.comisiones_docente = tuple(comisiones_docente)
+        self.es_empresa = es_empresa
+
+    @property
+    def tiene_usuario(self):
+        return self.usuario_id is not None
+
+    @property
+    def es_rol_admin(self):
+        return 'Administrador' in self.roles
+
+    @property
+    def es_mesa_entrada(self):
+        return 'Mesa de Entrada' in self.roles
+
+    @property
+    def es_docente_con_comisiones(self):
+        return self.es_docente and bool(self.comisiones_docente)
+
+    @property
+    def es_admin(self):
+        """Administrador, mesa de entrada o docente con comisiones asignadas"""
+        return self.es_staff or self.es_rol_admin or self.es_mesa_entrada or self.es_docente_con_comisiones
+
+    @property
+    def es_admin_o_mesa(self):
+        return self.es_staff or self.es_rol_admin or self.es_mesa_entrada
+
+    @property
+    def es_admin_completo(self):
+        return self.es_staff or self.es_rol_admin
+
+    @property
+    def ciudad_mesa_entrada(self):
+        """Ciudad de alcance si es Mesa de Entrada sin permisos de administrador"""
+        if self.es_staff or self.es_rol_admin or not self.es_mesa_entrada:
+            return None
+        return Persona.normalizar_ciudad(self.ciudad_residencia)
+
+    def to_dict(self):
+        return {
+            'usuario_id': self.usuario_id,
+            'persona_id': self.persona_id,
+            'ciudad_residencia': self.ciudad_residencia,
+            'roles': sorted(self.roles),
+            'es_estudiante': self.es_estudiante,
+            'es_docente': self.es_docente,
+            'comisiones_docente': list(self.comisiones_docente),
+            'es_empresa': self.es_empresa,
+        }
+
+
+def _version_actual():
+    version = cache.get(_CACHE_VERSION_KEY)
+    if version is None:
+        cache.add(_CACHE_VERSION_KEY, 1, timeout=None)
+        version = cache.get(_CACHE_VERSION_KEY) or 1
+    return version
+
+
+def invalidar_perfiles():
+    """Descarta todos los perfiles cacheados incrementando la versión global"""
+    try:
+        cache.incr(_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(_CACHE_VERSION_KEY, 2, timeout=None)
+
+
+def cache_perfiles_activo():
+    return getattr(settings, 'PERFIL_ROLES_CACHE_TTL', 0) > 0
+
+
+def invalidar_perfil(usernames):
+    """Descarta los perfiles cacheados de los usernames (DNI) indicados"""
+    if not cache_perfiles_activo():
+        return
+    version = _version_actual()
+    claves = [_CACHE_KEY.format(version=version, username=username) for username in usernames if username]
+    if claves:
+        cache.delete_many(claves)
+
+
+def _calcular_perfil_datos(username):
+    from apps.modulo_1.roles.models import Docente, Estudiante, UsuarioRol
+    from apps.modulo_3.cursos.models import ComisionDocente
+    from apps.modulo_7.empresas.models import Empresa
+
+    usuario = (
+        Usuario.objects.filter(persona__dni=username)
+        .annotate(
+            _es_estudiante=Exists(Estudiante.objects.filter(usuario=OuterRef('pk'))),
+            _es_docente=Exists(Docente.objects.filter(id_persona=OuterRef('persona_id'))),
+            _es_empresa=Exists(Empresa.objects.filter(responsable=OuterRef('pk'))),
+        )
+        .values('id', 'persona_id', 'persona__ciudad_residencia', '_es_estudiante', '_es_docente', '_es_empresa')
+        .order_by('id')
+        .first()
+    )
+    if usuario is None:
+        return {}
+
+    roles = list(UsuarioRol.objects.filter(usuario_id=usuario['id']).values_list('rol_id__nombre', flat=True))
+    comisiones = []
+    if usuario['_es_docente']:
+        comisiones = list(
+            ComisionDocente.objects.filter(fk_id_docente_id=usuario['id'])
+            .order_by('fk_id_comision_id')
+            .values_list('fk_id_comision_id', flat=True)
+        )
+
+    return {
+        'usuario_id': usuario['id'],
+        'persona_id': usuario['persona_id'],
+        'ciudad_residencia': usuario['persona__ciudad_residencia'],
+        'roles': roles,
+        'es_estudiante': bool(usuario['_es_estudiante']),
+        'es_docente': bool(usuario['_es_docente']),
+        'comisiones_docente': comisiones,
+        'es_empresa': bool(usuario['_es_empresa']) or 'Empresa' in roles,
+    }
+
+
+def obtener_perfil(user):
+    """
+    Retorna el PerfilRoles del usuario de Django.
+    Se resuelve una vez por request y, si el cache de perfiles está activo, se
+    reutiliza entre requests.
+    """
+    if user is None or not user.is_authenticated:
+        return PerfilRoles()
+
+    perfil = getattr(user, _REQUEST_ATTR, None)
+    if perfil is not None:
+        return perfil
+
+    username = user.get_username()
+    if not cache_perfiles_activo():
+        with lecturas_en_primaria():
+            datos = _calcular_perfil_datos(username)
+    else:
+        key = _CACHE_KEY.format(version=_version_actual(), username=username)
+        datos = cache.get(key)
+        if datos is None:
+            with lecturas_en_primaria():
+                datos = _calcular_perfil_datos(username)
+            cache.set(key, datos, timeout=settings.PERFIL_ROLES_CACHE_TTL)
+
+    perfil = PerfilRoles(es_staff=bool(user.is_staff or user.is_superuser), **datos)
+    setattr(user, _REQUEST_ATTR, perfil)
+    return perfil
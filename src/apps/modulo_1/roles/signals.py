@@ -1,4 +1,5 @@
-from django.db.models.signals import post_migrate
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
 from django.contrib.auth.models import Group, Permission
 from django.dispatch import receiver
 
@@ -23,4 +24,63 @@ def crear_roles_y_permisos(sender, **kwargs):
                     permiso = Permission.objects.get(codename=codename)
                     grupo.permissions.add(permiso)
                 except Permission.DoesNotExist:
-                    print(f"El permiso {codename} no existe.")
\ No newline at end of file
+                    print(f"El permiso {codename} no existe.")
+
+def _dnis_de_usuarios(usuario_ids):
+    from apps.modulo_1.usuario.models import Usuario
+
+    return list(Usuario.objects.filter(pk__in=usuario_ids).values_list('persona__dni', flat=True))
+
+
+def _dnis_de_personas(persona_ids):
+    from apps.modulo_1.usuario.models import Persona
+
+    return list(Persona.objects.filter(pk__in=persona_ids).values_list('dni', flat=True))
+
+
+# Usernames (DNI) cuyo perfil de roles depende de cada instancia
+_DNIS_AFECTADOS = {
+    'roles.UsuarioRol': lambda instancia: _dnis_de_usuarios([instancia.usuario_id_id]),
+    'roles.Docente': lambda instancia: _dnis_de_personas([instancia.id_persona_id]),
+    'roles.Estudiante': lambda instancia: _dnis_de_usuarios([instancia.usuario_id]),
+    'usuario.Persona': lambda instancia: [instancia.dni, getattr(instancia, '_dni_anterior', None)],
+    'usuario.Usuario': lambda instancia: _dnis_de_personas([instancia.persona_id]),
+    'cursos.ComisionDocente': lambda instancia: _dnis_de_usuarios([instancia.fk_id_docente_id]),
+    'empresas.Empresa': lambda instancia: _dnis_de_usuarios([instancia.responsable_id]),
+}
+
+
+def _invalidar_perfil_roles(sender, instance, **kwargs):
+    from apps.modulo_1.roles.perfil import cache_perfiles_activo, invalidar_perfil
+
+    if not cache_perfiles_activo():
+        return
+    dnis = _DNIS_AFECTADOS[sender._meta.label](instance)
+    # Ahora y otra vez al confirmar: un request concurrente puede volver a cachear el perfil anterior
+    invalidar_perfil(dnis)
+    transaction.on_commit(lambda: invalidar_perfil(dnis))
+
+
+def _invalidar_perfiles_roles(sender, **kwargs):
+    from apps.modulo_1.roles.perfil import invalidar_perfiles
+
+    invalidar_perfiles()
+
+
+@receiver(pre_save, sender='usuario.Persona')
+def _recordar_dni_anterior(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Si cambia el DNI, el perfil cacheado queda bajo el username anterior
+    from apps.modulo_1.roles.perfil import cache_perfiles_activo
+
+    if raw or instance.pk is None or not cache_perfiles_activo():
+        return
+    if update_fields is not None and 'dni' not in update_fields:
+        return
+    instance._dni_anterior = sender.objects.filter(pk=instance.pk).values_list('dni', flat=True).first()
+
+
+post_save.connect(_invalidar_perfiles_roles, sender='roles.Rol', dispatch_uid='perfil_roles_save_roles.Rol')
+post_delete.connect(_invalidar_perfiles_roles, sender='roles.Rol', dispatch_uid='perfil_roles_delete_roles.Rol')
+for _modelo in _DNIS_AFECTADOS:
+    post_save.connect(_invalidar_perfil_roles, sender=_modelo, dispatch_uid=f'perfil_roles_save_{_modelo}')
+    post_delete.connect(_invalidar_perfil_roles, sender=_modelo, dispatch_uid=f'perfil_roles_delete_{_modelo}')
@@ -1,11 +1,14 @@
 from datetime import date
 
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db import transaction
 from django.db.utils import IntegrityError
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from apps.modulo_1.roles.models import AutorizadoRetiro, Estudiante, Rol, Tutor, TutorEstudiante, UsuarioRol
+from apps.modulo_1.roles.perfil import obtener_perfil
 from apps.modulo_1.usuario.models import Persona, Usuario
 
 
@@ -102,6 +105,74 @@ class DashboardRoleRedirectTests(TestCase):
         self.assertEqual(response.url, reverse('dashboard_estudiante'))
 
 
+@override_settings(PERFIL_ROLES_CACHE_TTL=300)
+class PerfilRolesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        persona = Persona.objects.create(
+            dni='74000000',
+            nombre='Ana',
+            apellido='Mesa',
+            correo='mesa@test.com',
+            ciudad_residencia='Río Grande',
+        )
+        self.usuario = Usuario.objects.create(persona=persona, contrasena='pw')
+        self.rol_mesa = Rol.objects.create(nombre='Mesa de Entrada', descripcion='Mesa', jerarquia=2)
+        UsuarioRol.objects.create(usuario_id=self.usuario, rol_id=self.rol_mesa)
+        User.objects.create_user(username=persona.dni, password='pw')
+
+    def _user(self):
+        return User.objects.get(username='74000000')
+
+    def test_perfil_se_memoiza_en_el_usuario_del_request(self):
+        user = self._user()
+        perfil = obtener_perfil(user)
+        with self.assertNumQueries(0):
+            self.assertIs(obtener_perfil(user), perfil)
+        self.assertTrue(perfil.es_admin_o_mesa)
+        self.assertFalse(perfil.es_admin_completo)
+        self.assertEqual(perfil.ciudad_mesa_entrada, 'Rio Grande')
+
+    def test_perfil_se_reutiliza_entre_requests_desde_cache(self):
+        obtener_perfil(self._user())
+        user = self._user()
+        with self.assertNumQueries(0):
+            obtener_perfil(user)
+
+    def test_cambio_de_roles_invalida_el_perfil_cacheado(self):
+        self.assertFalse(obtener_perfil(self._user()).es_admin_completo)
+
+        rol_admin = Rol.objects.create(nombre='Administrador', descripcion='Admin', jerarquia=1)
+        UsuarioRol.objects.create(usuario_id=self.usuario, rol_id=rol_admin)
+
+        perfil = obtener_perfil(self._user())
+        self.assertTrue(perfil.es_admin_completo)
+        self.assertIsNone(perfil.ciudad_mesa_entrada)
+
+    def test_cambio_de_roles_de_un_usuario_invalida_solo_su_perfil(self):
+        otra = Persona.objects.create(dni='74000001', nombre='Otra', apellido='Persona', correo='otra@test.com')
+        otro_usuario = Usuario.objects.create(persona=otra, contrasena='pw')
+        User.objects.create_user(username=otra.dni, password='pw')
+        obtener_perfil(self._user())
+        self.assertFalse(obtener_perfil(User.objects.get(username=otra.dni)).es_admin_o_mesa)
+
+        otra.apellido = 'Editada'
+        otra.save()
+        UsuarioRol.objects.create(usuario_id=otro_usuario, rol_id=self.rol_mesa)
+
+        self.assertTrue(obtener_perfil(User.objects.get(username=otra.dni)).es_admin_o_mesa)
+        user = self._user()
+        with self.assertNumQueries(0):
+            obtener_perfil(user)
+
+    @override_settings(PERFIL_ROLES_CACHE_TTL=0)
+    def test_sin_cache_compartido_el_perfil_se_calcula_en_cada_request(self):
+        obtener_perfil(self._user())
+        user = self._user()
+        with self.assertNumQueries(2):
+            self.assertTrue(obtener_perfil(user).es_admin_o_mesa)
+
+
 class AutorizadoRetiroModelTests(TestCase):
     def setUp(self):
         self.password = 'pw'
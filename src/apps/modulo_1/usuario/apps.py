@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class UsuarioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.modulo_1.usuario'
+
+    def ready(self):
+        import apps.modulo_1.usuario.signals
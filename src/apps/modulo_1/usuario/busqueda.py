@@ -0,0 +1,128 @@
+"""
+Índice de búsqueda de Personas (typeahead de mesa de entrada y administración).
+
+Cada Persona tiene sus términos en ``TerminoBusquedaPersona``: palabras del nombre,
+del apellido y del correo normalizadas (minúsculas, sin acentos), el correo completo
+y el DNI solo con dígitos. La tabla se mantiene desde la señal ``post_save`` de
+Persona (o con ``indexar_personas`` tras un ``update()`` masivo).
+
+La búsqueda es por prefijo de cada palabra de la consulta, con un rango
+``termino >= x AND termino < x + '\\uffff'`` que aprovecha el índice en cualquier
+motor (un ``LIKE`` no siempre lo hace). Todas las palabras de la consulta deben
+coincidir con algún término de la persona.
+"""
+import re
+import unicodedata
+
+from django.db.models import Case, Exists, OuterRef, Q, Value, When
+
+from .models import Persona, TerminoBusquedaPersona
+
+
+MAX_PALABRAS_CONSULTA = 5
+_LARGO_TERMINO = TerminoBusquedaPersona._meta.get_field('termino').max_length
+_SEPARADORES = re.compile(r'[^0-9a-z]+')
+_SEPARADORES_DNI = re.compile(r'[\s.\-]+')
+
+
+def normalizar(texto):
+    """Minúsculas y sin acentos ('Ñandú' -> 'nandu')"""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(ch for ch in texto if not unicodedata.combining(ch)).lower()
+
+
+def palabras(texto):
+    return [palabra for palabra in _SEPARADORES.split(normalizar(texto)) if palabra]
+
+
+def terminos(nombre, apellido, dni, correo):
+    """Pares ``(campo, termino)`` a indexar para los datos de una persona"""
+    resultado = set()
+    for campo, valor in (
+        (TerminoBusquedaPersona.CAMPO_NOMBRE, nombre),
+        (TerminoBusquedaPersona.CAMPO_APELLIDO, apellido),
+    ):
+        resultado.update((campo, palabra) for palabra in palabras(valor))
+
+    dni = Persona.limpiar_dni(str(dni or ''))
+    if dni:
+        resultado.add((TerminoBusquedaPersona.CAMPO_DNI, dni))
+
+    correo = normalizar(correo).strip()
+    if correo:
+        resultado.add((TerminoBusquedaPersona.CAMPO_CORREO, correo))
+        resultado.update((TerminoBusquedaPersona.CAMPO_CORREO, palabra) for palabra in palabras(correo))
+
+    return {(campo, termino[:_LARGO_TERMINO]) for campo, termino in resultado}
+
+
+def indexar_personas(persona_ids=None):
+    """Regenera los términos de las personas indicadas (todas si es None)"""
+    personas = Persona.objects.all()
+    if persona_ids is not None:
+        personas = personas.filter(pk__in=list(persona_ids))
+
+    total = 0
+    for persona in personas.values('id', 'nombre', 'apellido', 'dni', 'correo').iterator(chunk_size=2000):
+        TerminoBusquedaPersona.objects.filter(persona_id=persona['id']).delete()
+        TerminoBusquedaPersona.objects.bulk_create([
+            TerminoBusquedaPersona(persona_id=persona['id'], campo=campo, termino=termino)
+            for campo, termino in terminos(persona['nombre'], persona['apellido'], persona['dni'], persona['correo'])
+        ])
+        total += 1
+    return total
+
+
+def palabras_consulta(consulta):
+    """Palabras normalizadas de la consulta; un DNI con puntos o guiones queda como una sola palabra"""
+    consulta = (consulta or '').strip()
+    sin_separadores = _SEPARADORES_DNI.sub('', consulta)
+    if sin_separadores.isdigit():
+        return [sin_separadores[:_LARGO_TERMINO]]
+    return [palabra[:_LARGO_TERMINO] for palabra in palabras(consulta)][:MAX_PALABRAS_CONSULTA]
+
+
+def _con_prefijo(palabra):
+    return TerminoBusquedaPersona.objects.filter(termino__gte=palabra, termino__lt=palabra + '\uffff')
+
+
+def filtro_personas(consulta, persona='pk'):
+    """
+    ``Q`` que filtra por la persona referida en ``persona`` (``'pk'`` para Persona,
+    ``'usuario__persona'`` para Estudiante, etc.). Sin palabras útiles no coincide nada.
+    """
+    campo = 'pk' if persona == 'pk' else f'{persona}_id'
+    filtro = Q()
+    lista = palabras_consulta(consulta)
+    if not lista:
+        return Q(pk__in=[])
+    for palabra in lista:
+        filtro &= Q(**{f'{campo}__in': _con_prefijo(palabra).values('persona_id')})
+    return filtro
+
+
+def buscar(queryset, consulta, persona='pk'):
+    """
+    Filtra ``queryset`` por la consulta y lo ordena por relevancia: DNI exacto primero,
+    luego cantidad de palabras que coinciden completas (no solo como prefijo).
+    """
+    campo = 'pk' if persona == 'pk' else f'{persona}_id'
+    lista = palabras_consulta(consulta)
+    queryset = queryset.filter(filtro_personas(consulta, persona))
+    if not lista:
+        return queryset
+
+    def _exacta(palabra, **extra):
+        return Exists(TerminoBusquedaPersona.objects.filter(persona_id=OuterRef(campo), termino=palabra, **extra))
+
+    relevancia = Value(0)
+    for palabra in lista:
+        relevancia = relevancia + Case(When(_exacta(palabra), then=Value(1)), default=Value(0))
+    relevancia = relevancia + Case(
+        When(_exacta(lista[0], campo=TerminoBusquedaPersona.CAMPO_DNI), then=Value(10)),
+        default=Value(0),
+    )
+    orden_persona = ['apellido', 'nombre'] if persona == 'pk' else [f'{persona}__apellido', f'{persona}__nombre']
+    return queryset.annotate(
+        relevancia_busqueda=relevancia,
+    ).order_by('-relevancia_busqueda', *orden_persona)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.modulo_1.usuario.busqueda import indexar_personas
+
+
+class Command(BaseCommand):
+    help = 'Regenera el índice de búsqueda de Personas (tras cargas masivas o update() directos)'
+
+    def handle(self, *args, **options):
+        total = indexar_personas()
+        self.stdout.write(f'Personas indexadas: {total}')
@@ -0,0 +1,80 @@
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Copia de la normalización de usuario/busqueda.py al momento de esta migración: los
+# cambios posteriores a los términos no deben cambiar lo que produce
+_LARGO_TERMINO = 100
+_SEPARADORES = re.compile(r'[^0-9a-z]+')
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(ch for ch in texto if not unicodedata.combining(ch)).lower()
+
+
+def _palabras(texto):
+    return [palabra for palabra in _SEPARADORES.split(_normalizar(texto)) if palabra]
+
+
+def terminos(nombre, apellido, dni, correo):
+    resultado = set()
+    for campo, valor in (('nombre', nombre), ('apellido', apellido)):
+        resultado.update((campo, palabra) for palabra in _palabras(valor))
+
+    dni = ''.join(ch for ch in str(dni or '') if ch.isdigit())
+    if dni:
+        resultado.add(('dni', dni))
+
+    correo = _normalizar(correo).strip()
+    if correo:
+        resultado.add(('correo', correo))
+        resultado.update(('correo', palabra) for palabra in _palabras(correo))
+
+    return {(campo, termino[:_LARGO_TERMINO]) for campo, termino in resultado}
+
+
+def indexar_personas(apps, schema_editor):
+    Persona = apps.get_model('usuario', 'Persona')
+    TerminoBusquedaPersona = apps.get_model('usuario', 'TerminoBusquedaPersona')
+    lote = []
+    for persona in Persona.objects.values('id', 'nombre', 'apellido', 'dni', 'correo').iterator(chunk_size=2000):
+        lote.extend(
+            TerminoBusquedaPersona(persona_id=persona['id'], campo=campo, termino=termino)
+            for campo, termino in terminos(persona['nombre'], persona['apellido'], persona['dni'], persona['correo'])
+        )
+        if len(lote) >= 5000:
+            TerminoBusquedaPersona.objects.bulk_create(lote)
+            lote = []
+    TerminoBusquedaPersona.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuario', '0003_alter_persona_telefono'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoBusquedaPersona',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('campo', models.CharField(choices=[('nombre', 'Nombre'), ('apellido', 'Apellido'), ('dni', 'DNI'), ('correo', 'Correo')], max_length=10)),
+                ('termino', models.CharField(max_length=100)),
+                ('persona', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos_busqueda', to='usuario.persona')),
+            ],
+            options={
+                'verbose_name': 'Término de búsqueda',
+                'verbose_name_plural': 'Términos de búsqueda',
+                'indexes': [
+                    models.Index(fields=['termino', 'persona'], name='usuario_termino_persona_idx'),
+                    models.Index(fields=['persona', 'termino'], name='usuario_persona_termino_idx'),
+                ],
+            },
+        ),
+        migrations.RunPython(indexar_personas, migrations.RunPython.noop),
+    ]
@@ -143,6 +143,39 @@ class Usuario(models.Model):
         return f"{self.persona.nombre} {self.persona.apellido}"
 
 
+class TerminoBusquedaPersona(models.Model):
+    """
+    Término normalizado (minúsculas, sin acentos) de una Persona para el buscador.
+    Se regenera al guardar la Persona (ver ``apps.modulo_1.usuario.busqueda``).
+    """
+    CAMPO_NOMBRE = 'nombre'
+    CAMPO_APELLIDO = 'apellido'
+    CAMPO_DNI = 'dni'
+    CAMPO_CORREO = 'correo'
+    CAMPOS = [
+        (CAMPO_NOMBRE, 'Nombre'),
+        (CAMPO_APELLIDO, 'Apellido'),
+        (CAMPO_DNI, 'DNI'),
+        (CAMPO_CORREO, 'Correo'),
+    ]
+
+    persona = models.ForeignKey(Persona, on_delete=models.CASCADE, related_name='terminos_busqueda')
+    campo = models.CharField(max_length=10, choices=CAMPOS)
+    termino = models.CharField(max_length=100)
+
+    class Meta:
+        verbose_name = "Término de búsqueda"
+        verbose_name_plural = "Términos de búsqueda"
+        indexes = [
+            # Búsqueda por prefijo (rango sobre termino) devolviendo solo persona_id
+            models.Index(fields=['termino', 'persona'], name='usuario_termino_persona_idx'),
+            models.Index(fields=['persona', 'termino'], name='usuario_persona_termino_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.persona_id}: {self.termino}"
+
+
 @receiver(post_delete, sender=Persona)
 def eliminar_usuario_auth_al_borrar_persona(sender, instance, **kwargs):
     User.objects.filter(username=instance.dni).delete()
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Persona
+
+
+@receiver(post_save, sender=Persona)
+def indexar_persona_para_busqueda(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .busqueda import indexar_personas
+
+    indexar_personas([instance.pk])
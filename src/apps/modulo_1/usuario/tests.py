@@ -5,6 +5,7 @@ from django.contrib.messages import get_messages
 from django.test import TestCase
 from django.urls import reverse
 
+from apps.modulo_1.usuario.busqueda import buscar, palabras_consulta
 from apps.modulo_1.roles.models import AutorizadoRetiro, Estudiante, Tutor, TutorEstudiante
 from apps.modulo_1.usuario.models import Persona, Usuario
 from apps.modulo_2.inscripciones.models import Inscripcion
@@ -252,3 +253,34 @@ class TutoresYAutorizadosFlowTests(TestCase):
         mensajes = [m.message for m in get_messages(response.wsgi_request)]
         self.assertIn('❌ No puedes eliminar tu único tutor siendo menor de 16 años.', mensajes)
         self.assertTrue(TutorEstudiante.objects.filter(id=relacion.id).exists())
+
+
+class BusquedaPersonasTests(TestCase):
+    def setUp(self):
+        self.maria = Persona.objects.create(dni='30111222', nombre='María José', apellido='Núñez', correo='mjose@gmail.com')
+        self.mario = Persona.objects.create(dni='30999888', nombre='Mario', apellido='Nunziata', correo='mario.n@gmail.com')
+        self.pedro = Persona.objects.create(dni='41222333', nombre='Pedro', apellido='Marín', correo='pedro@gmail.com')
+
+    def _buscar(self, consulta):
+        return list(buscar(Persona.objects.all(), consulta))
+
+    def test_busqueda_ignora_acentos_y_mayusculas(self):
+        self.assertEqual(self._buscar('NUNEZ'), [self.maria])
+        self.assertEqual(self._buscar('marin'), [self.pedro])
+
+    def test_todas_las_palabras_deben_coincidir_por_prefijo(self):
+        self.assertEqual(set(self._buscar('mar')), {self.maria, self.mario, self.pedro})
+        self.assertEqual(self._buscar('mar nun'), [self.mario, self.maria])
+        self.assertEqual(self._buscar('jose nu'), [self.maria])
+
+    def test_dni_por_prefijo_con_puntos_y_exacto_primero(self):
+        self.assertEqual(palabras_consulta('30.111.222'), ['30111222'])
+        self.assertEqual(set(self._buscar('30')), {self.maria, self.mario})
+        self.assertEqual(self._buscar('30.999.888'), [self.mario])
+
+    def test_el_indice_se_actualiza_al_guardar(self):
+        self.pedro.apellido = 'Gómez'
+        self.pedro.save()
+        self.assertEqual(self._buscar('marin'), [])
+        self.assertEqual(self._buscar('gomez'), [self.pedro])
+        self.assertEqual(self._buscar('pedro@gm'), [self.pedro])
@@ -2,27 +2,22 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Count, Avg
-from django.http import HttpResponse
-from django.conf import settings
-import os
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from datetime import datetime
 
 from apps.modulo_1.roles.models import Estudiante
 from apps.modulo_2.inscripciones.models import Inscripcion
 from apps.modulo_4.asistencia.models import Asistencia, RegistroAsistencia
+from apps.modulo_4.asistencia.progreso import progreso_estudiante, progreso_inscripciones
 from apps.modulo_3.cursos.models import Material
-
-try:
-    from reportlab.lib.pagesizes import letter, A4, landscape
-    from reportlab.lib.units import inch
-    from reportlab.lib import colors
-    from reportlab.pdfgen import canvas
-    from reportlab.platypus import Paragraph, Frame
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
+from apps.modulo_4.certificado.generador import (
+    REPORTLAB_AVAILABLE,
+    datos_certificado,
+    hash_contenido,
+    obtener_certificado,
+)
 
 
 @login_required
@@ -31,37 +26,16 @@ def mi_progreso(request):
     try:
         estudiante = Estudiante.objects.get(usuario__persona__dni=request.user.username)
         
-        # Obtener inscripciones confirmadas
-        inscripciones = Inscripcion.objects.filter(
-            estudiante=estudiante,
-            estado='confirmado',
-            comision__publicada=True,
-        ).select_related('comision__fk_id_curso')
-        
-        # Calcular progreso para cada inscripción
+        # Progreso de las inscripciones confirmadas (solo lectura: los registros los mantiene la escritura)
         inscripciones_con_progreso = []
-        for inscripcion in inscripciones:
-            # Obtener o crear registro de asistencia
-            registro, created = RegistroAsistencia.objects.get_or_create(
-                inscripcion=inscripcion
-            )
-
-            registro.calcular_porcentaje()
-
-            total_programadas = None
-            comision = inscripcion.comision
-            if hasattr(comision, 'get_total_clases_programadas'):
-                total_programadas = comision.get_total_clases_programadas(hasta=comision.fecha_fin)
-            if total_programadas is None:
-                total_programadas = registro.total_clases
-
-            inscripcion.progreso = int(registro.porcentaje_asistencia)
-            inscripcion.total_clases = total_programadas
-            inscripcion.asistencias_count = registro.clases_asistidas
-            inscripcion.cumple_certificado = registro.cumple_requisito_certificado
-            
+        for progreso in progreso_estudiante(estudiante):
+            inscripcion = progreso.inscripcion
+            inscripcion.progreso = progreso.porcentaje
+            inscripcion.total_clases = progreso.total_clases
+            inscripcion.asistencias_count = progreso.asistidas
+            inscripcion.cumple_certificado = progreso.cumple_certificado
             inscripciones_con_progreso.append(inscripcion)
-        
+
         context = {
             'estudiante': estudiante,
             'inscripciones': inscripciones_con_progreso,
@@ -105,17 +79,20 @@ def descargar_certificado(request, inscripcion_id):
     
     try:
         estudiante = Estudiante.objects.get(usuario__persona__dni=request.user.username)
-        inscripcion = get_object_or_404(Inscripcion, id=inscripcion_id, estudiante=estudiante, estado='confirmado')
+        inscripcion = get_object_or_404(
+            Inscripcion.objects.select_related('estudiante__usuario__persona', 'comision__fk_id_curso'),
+            id=inscripcion_id, estudiante=estudiante, estado='confirmado',
+        )
         
         # Verificar que el estudiante tenga acceso a este certificado
         if inscripcion.estudiante != estudiante:
             messages.error(request, '❌ No tienes permiso para descargar este certificado.')
             return redirect('usuario:mis_certificados')
         
-        # Obtener o crear registro de asistencia
-        registro, created = RegistroAsistencia.objects.get_or_create(inscripcion=inscripcion)
+        # Misma habilitación que muestra mi_progreso (sin registro se evalúa sin guardarlo)
+        progreso, = progreso_inscripciones(Inscripcion.objects.filter(pk=inscripcion.pk))
         
-        if not registro.cumple_requisito_certificado:
+        if not progreso.cumple_certificado:
             fecha_fin = inscripcion.comision.fecha_fin
             hoy = datetime.now().date()
             if fecha_fin and fecha_fin > hoy:
@@ -124,74 +101,16 @@ def descargar_certificado(request, inscripcion_id):
                 messages.error(request, '❌ No cumples con el requisito mínimo de 80% de asistencia para obtener el certificado.')
             return redirect('usuario:mi_progreso')
         
-        response = HttpResponse(content_type='application/pdf')
-        nombre_archivo = f"Certificado_{inscripcion.comision.fk_id_curso.nombre.replace(' ', '_')}_{estudiante.usuario.persona.dni}.pdf"
-        response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
-
-        page_size = landscape(A4)
-        page_width, page_height = page_size
-        pdf = canvas.Canvas(response, pagesize=page_size)
-
-        template_path = os.path.join(settings.STATIC_ROOT or settings.STATICFILES_DIRS[0], 'img', 'plantilla.png')
-        if not os.path.exists(template_path):
-            template_path = os.path.join(settings.BASE_DIR, 'stc', 'img', 'plantilla.png')
-
-        if os.path.exists(template_path):
-            pdf.drawImage(template_path, 0, 0, width=page_width, height=page_height, mask='auto')
-
-        img_w = 1091
-        img_h = 789
-
-        def sx(value):
-            return value / img_w * page_width
-
-        def sy(value):
-            return value / img_h * page_height
-
-        def frame_from_top(x, top, w, h):
-            return (sx(x), page_height - sy(top + h), sx(w), sy(h))
-
-        nombre = estudiante.usuario.persona.nombre_completo
-        dni = estudiante.usuario.persona.dni
-        curso = inscripcion.comision.fk_id_curso.nombre
-
-        styles = getSampleStyleSheet()
-        name_style = ParagraphStyle(
-            'CertName',
-            parent=styles['Normal'],
-            fontSize=26,
-            textColor=colors.HexColor('#333333'),
-            alignment=TA_CENTER,
-            leading=30,
-            fontName='Helvetica-Bold'
-        )
-        body_style = ParagraphStyle(
-            'CertBody',
-            parent=styles['Normal'],
-            fontSize=15.5,
-            textColor=colors.HexColor('#4b5563'),
-            alignment=TA_JUSTIFY,
-            leading=22
-        )
-
-        name_frame = Frame(*frame_from_top(140, 230, 810, 60), showBoundary=0)
-        body_frame = Frame(*frame_from_top(140, 310, 810, 140), showBoundary=0)
-
-        name_para = Paragraph(f"{nombre}, D.N.I {dni}", name_style)
-        body_text = (
-            f"ha asistido y aprobado el curso de <b>{curso}</b>, desarrollado en el marco de las actividades de "
-            "formación de los Polos Creativos, dependiente de la Agencia de Innovación de la Provincia de "
-            "Tierra del Fuego, Antártida e Islas del Atlántico Sur."
-        )
-        body_para = Paragraph(body_text, body_style)
-
-        name_frame.addFromList([name_para], pdf)
-        body_frame.addFromList([body_para], pdf)
-
-        pdf.showPage()
-        pdf.save()
+        # El certificado emitido se reutiliza mientras no cambie su contenido (hash = ETag)
+        etag = quote_etag(hash_contenido(datos_certificado(inscripcion)))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            emitido = obtener_certificado(inscripcion)
+            response = FileResponse(emitido.archivo.open('rb'), as_attachment=True, filename=emitido.nombre_archivo)
+        response.headers['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
         return response
-        
+
     except Estudiante.DoesNotExist:
         messages.error(request, 'No tienes perfil de estudiante.')
         return redirect('dashboard')
@@ -5,19 +5,13 @@ from django.db import transaction
 from django.utils import timezone
 
 from apps.modulo_1.usuario.models import Persona, Usuario
-from apps.modulo_1.roles.models import AutorizadoRetiro, Estudiante, Tutor, TutorEstudiante, UsuarioRol
+from apps.modulo_1.roles.models import AutorizadoRetiro, Estudiante, Tutor, TutorEstudiante
+from apps.modulo_1.roles.perfil import obtener_perfil
 
 def es_admin_o_mesa_entrada(user):
     if not user.is_authenticated:
         return False
-    if user.is_staff or user.is_superuser:
-        return True
-    try:
-        usuario = Usuario.objects.get(persona__dni=user.username)
-        roles = UsuarioRol.objects.filter(usuario_id=usuario).values_list('rol_id__nombre', flat=True)
-        return 'Mesa de Entrada' in roles or 'Administrador' in roles
-    except Usuario.DoesNotExist:
-        return False
+    return obtener_perfil(user).es_admin_o_mesa
 
 
 @login_required
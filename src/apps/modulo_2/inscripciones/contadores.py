@@ -0,0 +1,109 @@
+"""
+Contadores de cupo desnormalizados en Comision.
+
+Cada cambio de ``Inscripcion.estado`` (alta, cambio de estado, cambio de
+comisión o baja) se traduce en incrementos ``F() + n`` sobre las columnas
+``total_*`` de la comisión, dentro de la misma transacción que modifica la
+inscripción. Los caminos masivos (``bulk_update``/``update``) no disparan
+señales y deben llamar a ``ajustar_contadores`` explícitamente.
+
+Los cambios de confirmados o pre-inscriptos invalidan además el catálogo
+público (``apps.modulo_3.cursos.catalogo``) al confirmarse la transacción.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from apps.modulo_3.cursos.catalogo import invalidar_catalogo_comisiones
+from apps.modulo_3.cursos.models import Comision
+
+
+CAMPO_POR_ESTADO = {
+    'confirmado': 'total_confirmados',
+    'pre_inscripto': 'total_preinscriptos',
+    'lista_espera': 'total_lista_espera',
+    'cancelada': 'total_canceladas',
+}
+
+
+def _acumular(deltas, comision_id, estado, valor):
+    campo = CAMPO_POR_ESTADO.get(estado)
+    if comision_id is None or campo is None:
+        return
+    deltas[comision_id][campo] += valor
+
+
+def ajustar_contadores(cambios, comisiones_en_memoria=()):
+    """
+    Aplica una lista de cambios ``(comision_id_antes, estado_antes, comision_id_despues, estado_despues)``.
+    Un alta tiene ``estado_antes`` None y una baja ``estado_despues`` None. Las instancias de
+    ``comisiones_en_memoria`` reciben los mismos deltas para que no queden desactualizadas.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for comision_antes, estado_antes, comision_despues, estado_despues in cambios:
+        if comision_antes == comision_despues and estado_antes == estado_despues:
+            continue
+        _acumular(deltas, comision_antes, estado_antes, -1)
+        _acumular(deltas, comision_despues, estado_despues, 1)
+
+    en_memoria = defaultdict(list)
+    for comision in comisiones_en_memoria:
+        if comision is not None:
+            en_memoria[comision.pk].append(comision)
+
+    cambia_disponibilidad = []
+    for comision_id, campos in deltas.items():
+        campos = {campo: valor for campo, valor in campos.items() if valor}
+        if not campos:
+            continue
+        if 'total_confirmados' in campos or 'total_preinscriptos' in campos:
+            cambia_disponibilidad.append(comision_id)
+        Comision.objects.filter(pk=comision_id).update(
+            **{campo: F(campo) + valor for campo, valor in campos.items()}
+        )
+        for comision in en_memoria.get(comision_id, ()):
+            for campo, valor in campos.items():
+                setattr(comision, campo, getattr(comision, campo) + valor)
+
+    if cambia_disponibilidad:
+        transaction.on_commit(lambda: invalidar_catalogo_comisiones(cambia_disponibilidad))
+
+
+def _conteos_reales(comisiones_qs):
+    return comisiones_qs.annotate(
+        real_confirmados=Count('inscripciones', filter=Q(inscripciones__estado='confirmado')),
+        real_preinscriptos=Count('inscripciones', filter=Q(inscripciones__estado='pre_inscripto')),
+        real_lista_espera=Count('inscripciones', filter=Q(inscripciones__estado='lista_espera')),
+        real_canceladas=Count('inscripciones', filter=Q(inscripciones__estado='cancelada')),
+    ).order_by('pk')
+
+
+def reconciliar_contadores(comisiones_qs=None, corregir=True):
+    """
+    Compara los contadores con un conteo real de inscripciones.
+    Retorna la lista de comisiones con diferencias como (comision, {campo: (guardado, real)})
+    y, si ``corregir`` es True, las actualiza con un único ``bulk_update``.
+    """
+    if comisiones_qs is None:
+        comisiones_qs = Comision.objects.all()
+
+    diferencias = []
+    a_corregir = []
+    for comision in _conteos_reales(comisiones_qs):
+        detalle = {}
+        for estado, campo in CAMPO_POR_ESTADO.items():
+            real = getattr(comision, campo.replace('total_', 'real_'))
+            guardado = getattr(comision, campo)
+            if guardado != real:
+                detalle[campo] = (guardado, real)
+                setattr(comision, campo, real)
+        if detalle:
+            diferencias.append((comision, detalle))
+            a_corregir.append(comision)
+
+    if corregir and a_corregir:
+        with transaction.atomic():
+            Comision.objects.bulk_update(a_corregir, list(Comision.CAMPOS_CONTADORES), batch_size=500)
+        transaction.on_commit(lambda: invalidar_catalogo_comisiones([comision.pk for comision in a_corregir]))
+    return diferencias
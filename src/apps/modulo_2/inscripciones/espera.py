@@ -0,0 +1,109 @@
+"""
+Rebalanceo de pre-inscripciones y lista de espera por comisión.
+
+Las pre-inscripciones que exceden el cupo libre (cupo máximo menos
+confirmados) pasan a lista de espera, y la lista de espera se renumera de
+forma compacta (1..n) respetando el orden existente. Cada comisión se
+resuelve con una consulta rankeada por ``RowNumber`` y un único UPDATE.
+
+Se invoca desde los eventos que cambian el estado de una inscripción
+(alta, confirmación, baja) y desde el comando ``rebalancear_listas_espera``;
+las vistas de solo lectura no escriben.
+"""
+from django.db import transaction
+from django.db.models import Case, CharField, F, IntegerField, Q, Value, When, Window
+from django.db.models.functions import RowNumber
+
+from apps.modulo_3.cursos.models import Comision
+
+from .contadores import ajustar_contadores
+from .models import Inscripcion
+
+
+def _ranking(comision, estado, orden):
+    # Sin FOR UPDATE (incompatible con funciones de ventana): el bloqueo de la comisión serializa el rebalanceo
+    return list(
+        Inscripcion.objects.filter(comision=comision, estado=estado)
+        .annotate(posicion=Window(RowNumber(), order_by=orden))
+        .order_by('posicion')
+        .values_list('id', 'posicion', 'orden_lista_espera')
+    )
+
+
+def rebalancear_lista_espera(comision_locked):
+    """
+    Rebalancea una comisión ya bloqueada con ``select_for_update``.
+    Retorna la cantidad de inscripciones movidas a lista de espera.
+    """
+    # La comisión está bloqueada: se releen los contadores por si la instancia quedó desactualizada
+    comision_locked.refresh_from_db(fields=list(Comision.CAMPOS_CONTADORES))
+    cupos_para_preinscriptos = max(comision_locked.cupo_maximo - comision_locked.total_confirmados, 0)
+
+    preinscriptas = _ranking(
+        comision_locked, 'pre_inscripto',
+        [F('fecha_hora_inscripcion').asc(), F('id').asc()],
+    )
+    en_espera = _ranking(
+        comision_locked, 'lista_espera',
+        [F('orden_lista_espera').asc(nulls_last=True), F('fecha_hora_inscripcion').asc(), F('id').asc()],
+    )
+
+    a_mover = [fila for fila in preinscriptas if fila[1] > cupos_para_preinscriptos]
+    nuevo_orden = {}
+    for indice, (inscripcion_id, _, _) in enumerate(en_espera + a_mover, start=1):
+        nuevo_orden[inscripcion_id] = indice
+
+    reordenar = {
+        inscripcion_id: nuevo_orden[inscripcion_id]
+        for inscripcion_id, _, orden in en_espera + a_mover
+        if orden != nuevo_orden[inscripcion_id]
+    }
+    limpiar_orden = [
+        inscripcion_id for inscripcion_id, posicion, orden in preinscriptas
+        if posicion <= cupos_para_preinscriptos and orden is not None
+    ]
+    ids_mover = [inscripcion_id for inscripcion_id, _, _ in a_mover]
+
+    afectados = set(reordenar) | set(limpiar_orden) | set(ids_mover)
+    if not afectados:
+        return 0
+
+    Inscripcion.objects.filter(id__in=afectados).update(
+        estado=Case(
+            When(id__in=ids_mover, then=Value('lista_espera')),
+            default=F('estado'),
+            output_field=CharField(),
+        ),
+        orden_lista_espera=Case(
+            *[When(id=inscripcion_id, then=Value(orden)) for inscripcion_id, orden in reordenar.items()],
+            When(id__in=limpiar_orden, then=Value(None)),
+            default=F('orden_lista_espera'),
+            output_field=IntegerField(),
+        ),
+    )
+    if ids_mover:
+        ajustar_contadores(
+            [(comision_locked.pk, 'pre_inscripto', comision_locked.pk, 'lista_espera')] * len(ids_mover),
+            comisiones_en_memoria=[comision_locked],
+        )
+    return len(ids_mover)
+
+
+def comisiones_a_rebalancear(comisiones_qs=None):
+    """Comisiones con pre-inscripciones por encima del cupo libre, según los contadores"""
+    if comisiones_qs is None:
+        comisiones_qs = Comision.objects.all()
+    return comisiones_qs.filter(total_preinscriptos__gt=0).filter(
+        Q(total_confirmados__gte=F('cupo_maximo')) |
+        Q(total_preinscriptos__gt=F('cupo_maximo') - F('total_confirmados'))
+    )
+
+
+def rebalancear_comisiones(comision_ids):
+    """Rebalancea cada comisión en su propia transacción. Retorna el total de inscripciones movidas."""
+    movidas = 0
+    for comision_id in comision_ids:
+        with transaction.atomic():
+            comision_locked = Comision.objects.select_for_update().get(id_comision=comision_id)
+            movidas += rebalancear_lista_espera(comision_locked)
+    return movidas
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.modulo_2.inscripciones.espera import comisiones_a_rebalancear, rebalancear_comisiones
+from apps.modulo_3.cursos.models import Comision
+
+
+class Command(BaseCommand):
+    help = 'Mueve a lista de espera las pre-inscripciones que exceden el cupo y renumera las listas de espera'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Procesa todas las comisiones con pre-inscriptos o lista de espera, no solo las excedidas',
+        )
+
+    def handle(self, *args, **options):
+        if options['todas']:
+            qs = Comision.objects.filter(total_preinscriptos__gt=0) | Comision.objects.filter(total_lista_espera__gt=0)
+        else:
+            qs = comisiones_a_rebalancear()
+
+        comision_ids = list(qs.order_by('id_comision').values_list('id_comision', flat=True))
+        movidas = rebalancear_comisiones(comision_ids)
+        self.stdout.write(f'Comisiones procesadas: {len(comision_ids)}')
+        self.stdout.write(f'Inscripciones movidas a lista de espera: {movidas}')
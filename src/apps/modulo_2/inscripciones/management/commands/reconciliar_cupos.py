@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.modulo_2.inscripciones.contadores import reconciliar_contadores
+from apps.modulo_3.cursos.models import Comision
+
+
+class Command(BaseCommand):
+    help = 'Compara los contadores de cupo de cada comisión con las inscripciones reales y corrige diferencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Solo detecta diferencias sin corregirlas (termina con error si hay desvíos)',
+        )
+        parser.add_argument('--comision', type=int, help='Limitar a una comisión')
+
+    def handle(self, *args, **options):
+        qs = Comision.objects.all()
+        if options['comision']:
+            qs = qs.filter(id_comision=options['comision'])
+
+        verificar = options['verificar']
+        diferencias = reconciliar_contadores(qs, corregir=not verificar)
+
+        for comision, detalle in diferencias:
+            cambios = ', '.join(f'{campo}: {guardado} -> {real}' for campo, (guardado, real) in detalle.items())
+            self.stdout.write(f'Comisión #{comision.id_comision}: {cambios}')
+
+        if verificar and diferencias:
+            raise CommandError(f'{len(diferencias)} comisiones con contadores desactualizados')
+
+        accion = 'con diferencias' if verificar else 'corregidas'
+        self.stdout.write(f'Comisiones {accion}: {len(diferencias)}')
@@ -47,6 +47,18 @@ class Inscripcion(models.Model):
 
         return f"{estudiante_nombre} - {curso_nombre}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estado leído de la base, usado por las señales para mantener los contadores de cupo
+        instance._estado_original = (instance.__dict__.get('comision_id'), instance.__dict__.get('estado'))
+        return instance
+
+    @property
+    def estado_original(self):
+        """(comision_id, estado) tal como estaba en la base, o None si es nueva"""
+        return getattr(self, '_estado_original', None)
+
     @property
     def esta_en_lista_espera(self):
         """Verifica si está en lista de espera"""
@@ -1,10 +1,45 @@
 from django.apps import apps as django_apps
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from .contadores import ajustar_contadores, reconciliar_contadores
 from .models import Inscripcion
 
 
+def _comision_en_memoria(instance):
+    return instance._state.fields_cache.get('comision')
+
+
+@receiver(post_save, sender=Inscripcion)
+def actualizar_contadores_cupo(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {'estado', 'comision', 'comision_id'} & set(update_fields):
+        return
+
+    antes = (None, None) if created else instance.estado_original
+    if antes is None:
+        # Instancia no leída de la base: no se conoce el estado previo, se reconcilia la comisión
+        Comision = django_apps.get_model('cursos', 'Comision')
+        reconciliar_contadores(Comision.objects.filter(pk=instance.comision_id))
+        comision = _comision_en_memoria(instance)
+        if comision is not None:
+            comision.refresh_from_db(fields=list(Comision.CAMPOS_CONTADORES))
+    else:
+        ajustar_contadores(
+            [(antes[0], antes[1], instance.comision_id, instance.estado)],
+            comisiones_en_memoria=[_comision_en_memoria(instance)],
+        )
+    instance._estado_original = (instance.comision_id, instance.estado)
+
+
+@receiver(post_delete, sender=Inscripcion)
+def descontar_contadores_cupo(sender, instance, **kwargs):
+    comision_id, estado = instance.estado_original or (instance.comision_id, instance.estado)
+    ajustar_contadores(
+        [(comision_id, estado, None, None)],
+        comisiones_en_memoria=[_comision_en_memoria(instance)],
+    )
+
+
 @receiver(post_save, sender=Inscripcion)
 def asegurar_registro_asistencia(sender, instance, **kwargs):
     if instance.estado != 'confirmado':
@@ -12,4 +47,3 @@ def asegurar_registro_asistencia(sender, instance, **kwargs):
 
     RegistroAsistencia = django_apps.get_model('asistencia', 'RegistroAsistencia')
     RegistroAsistencia.objects.get_or_create(inscripcion=instance)
-
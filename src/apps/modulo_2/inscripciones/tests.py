@@ -84,6 +84,33 @@ class InscripcionesFlowTests(TestCase):
         inscripcion.refresh_from_db()
         self.assertEqual(inscripcion.estado, 'cancelada')
 
+    def test_cancelar_inscripcion_en_lista_espera_compacta_el_orden(self):
+        self.comision.cupo_maximo = 0
+        self.comision.save(update_fields=['cupo_maximo'])
+        inscripcion = Inscripcion.objects.create(
+            estudiante=self.estudiante, comision=self.comision, estado='lista_espera', orden_lista_espera=1,
+        )
+        otras = []
+        for orden, dni in ((2, '12345679'), (3, '12345680')):
+            persona = Persona.objects.create(dni=dni, nombre='Otro', apellido='Test', correo=f'{dni}@test.com')
+            estudiante = Estudiante.objects.create(
+                usuario=Usuario.objects.create(persona=persona, contrasena='x'),
+                nivel_estudios='SE',
+                institucion_actual='Colegio',
+            )
+            otras.append(Inscripcion.objects.create(
+                estudiante=estudiante, comision=self.comision, estado='lista_espera', orden_lista_espera=orden,
+            ))
+
+        self.client.post(reverse('inscripciones:cancelar', args=[inscripcion.id]), secure=True)
+
+        inscripcion.refresh_from_db()
+        self.assertEqual((inscripcion.estado, inscripcion.orden_lista_espera), ('cancelada', None))
+        self.assertEqual(
+            list(Inscripcion.objects.filter(pk__in=[otra.pk for otra in otras]).order_by('pk').values_list('orden_lista_espera', flat=True)),
+            [1, 2],
+        )
+
     def test_confirmado_en_comision_finalizada_puede_inscribirse_a_nueva_comision_mismo_curso(self):
         comision_pasada = Comision.objects.create(
             fk_id_curso=self.curso,
@@ -209,3 +236,75 @@ class InscripcionesFlowTests(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertRedirects(response, reverse('landing'))
         self.assertFalse(Inscripcion.objects.filter(estudiante=self.estudiante, comision=comision_b).exists())
+
+
+class ContadoresCupoTests(TestCase):
+    def setUp(self):
+        self.curso = Curso.objects.create(nombre='Curso Cupos', estado='Abierto', orden=1)
+        self.comision = Comision.objects.create(fk_id_curso=self.curso, estado='Abierta', cupo_maximo=3)
+        self.otra_comision = Comision.objects.create(fk_id_curso=self.curso, estado='Abierta', cupo_maximo=3)
+        self.estudiantes = []
+        for i in range(3):
+            persona = Persona.objects.create(dni=f'7000000{i}', nombre='Est', apellido=str(i), correo=f'e{i}@test.com')
+            usuario = Usuario.objects.create(persona=persona, contrasena='x')
+            self.estudiantes.append(
+                Estudiante.objects.create(usuario=usuario, nivel_estudios='SE', institucion_actual='Colegio')
+            )
+
+    def _contadores(self, comision):
+        comision.refresh_from_db()
+        return (
+            comision.total_confirmados,
+            comision.total_preinscriptos,
+            comision.total_lista_espera,
+            comision.total_canceladas,
+        )
+
+    def test_contadores_siguen_altas_cambios_y_bajas(self):
+        confirmada = Inscripcion.objects.create(estudiante=self.estudiantes[0], comision=self.comision, estado='confirmado')
+        pre = Inscripcion.objects.create(estudiante=self.estudiantes[1], comision=self.comision, estado='pre_inscripto')
+        Inscripcion.objects.create(estudiante=self.estudiantes[2], comision=self.comision, estado='lista_espera')
+        self.assertEqual(self._contadores(self.comision), (1, 1, 1, 0))
+        self.assertEqual(self.comision.cupos_disponibles, 1)
+
+        pre = Inscripcion.objects.get(pk=pre.pk)
+        pre.estado = 'confirmado'
+        pre.save(update_fields=['estado'])
+        confirmada.estado = 'cancelada'
+        confirmada.save()
+        self.assertEqual(self._contadores(self.comision), (1, 0, 1, 1))
+
+        pre.comision = self.otra_comision
+        pre.save()
+        self.assertEqual(self._contadores(self.comision), (0, 0, 1, 1))
+        self.assertEqual(self._contadores(self.otra_comision), (1, 0, 0, 0))
+
+        pre.delete()
+        self.assertEqual(self._contadores(self.otra_comision), (0, 0, 0, 0))
+
+    def test_guardar_comision_vieja_no_pisa_contadores(self):
+        comision_vieja = Comision.objects.get(pk=self.comision.pk)
+        Inscripcion.objects.create(estudiante=self.estudiantes[0], comision=self.comision, estado='confirmado')
+
+        comision_vieja.lugar = 'Aula 2'
+        comision_vieja.save()
+        self.assertEqual(self._contadores(self.comision), (1, 0, 0, 0))
+        self.assertEqual(self.comision.lugar, 'Aula 2')
+
+    def test_reconciliar_detecta_y_corrige_desvios(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        Inscripcion.objects.create(estudiante=self.estudiantes[0], comision=self.comision, estado='confirmado')
+        Comision.objects.filter(pk=self.comision.pk).update(total_confirmados=5, total_canceladas=2)
+
+        with self.assertRaises(CommandError):
+            call_command('reconciliar_cupos', '--verificar', stdout=StringIO())
+        self.assertEqual(self._contadores(self.comision), (5, 0, 0, 2))
+
+        salida = StringIO()
+        call_command('reconciliar_cupos', stdout=salida)
+        self.assertIn('Comisiones corregidas: 1', salida.getvalue())
+        self.assertEqual(self._contadores(self.comision), (1, 0, 0, 0))
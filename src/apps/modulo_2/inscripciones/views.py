@@ -3,8 +3,8 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
 from django.db.models import Max
-from datetime import date
 
+from .espera import rebalancear_lista_espera
 from .models import Inscripcion
 from apps.modulo_3.cursos.models import Comision
 from apps.modulo_1.usuario.models import Persona, Usuario
@@ -42,7 +42,6 @@ def formulario_inscripcion(request, comision_id):
             
             # Verificar inscripción en otra comisión del mismo curso
             curso = comision.fk_id_curso
-            hoy = date.today()
             existentes = list(
                 Inscripcion.objects.filter(
                     estudiante=estudiante_check,
@@ -62,7 +61,7 @@ def formulario_inscripcion(request, comision_id):
             bloquea = False
             for insc in existentes:
                 com = insc.comision
-                if com.estado == 'Finalizada' or (com.fecha_fin and com.fecha_fin < hoy):
+                if com.estado == 'Finalizada':
                     continue
                 if solapa((com.fecha_inicio, com.fecha_fin), rango_objetivo):
                     bloquea = True
@@ -195,7 +194,6 @@ def formulario_inscripcion(request, comision_id):
 
                 # Verificar inscripción en otra comisión del mismo curso
                 curso = comision.fk_id_curso
-                hoy = date.today()
                 existentes = list(
                     Inscripcion.objects.filter(
                         estudiante=estudiante,
@@ -215,7 +213,7 @@ def formulario_inscripcion(request, comision_id):
                 bloquea = False
                 for insc in existentes:
                     com = insc.comision
-                    if com.estado == 'Finalizada' or (com.fecha_fin and com.fecha_fin < hoy):
+                    if com.estado == 'Finalizada':
                         continue
                     if solapa((com.fecha_inicio, com.fecha_fin), rango_objetivo):
                         bloquea = True
@@ -332,9 +330,15 @@ def cancelar_inscripcion(request, inscripcion_id):
     )
     
     if request.method == 'POST':
-        # 2. Cambiar estado
-        inscripcion.estado = 'cancelada'
-        inscripcion.save()
+        # 2. Cambiar estado y compactar la lista de espera de la comisión
+        with transaction.atomic():
+            comision_locked = Comision.objects.select_for_update().get(id_comision=inscripcion.comision_id)
+            inscripcion = Inscripcion.objects.select_for_update().select_related('comision__fk_id_curso').get(pk=inscripcion.pk)
+            if inscripcion.estado != 'cancelada':
+                inscripcion.estado = 'cancelada'
+                inscripcion.orden_lista_espera = None
+                inscripcion.save(update_fields=['estado', 'orden_lista_espera'])
+                rebalancear_lista_espera(comision_locked)
         
         # 3. Mensaje de éxito
         curso_nombre = inscripcion.comision.fk_id_curso.nombre
@@ -1,5 +1,4 @@
 from django.contrib import admin
-from django.db.models import Count, Q
 from .models import Curso, Comision, ComisionDocente, Material, PoloCreativo
 
 # Inline para poder asignar docentes directamente desde la Comision
@@ -17,21 +16,20 @@ class ComisionAdmin(admin.ModelAdmin):
     readonly_fields = ('get_inscritos', 'get_cupos_disponibles', 'get_porcentaje_ocupacion')
     autocomplete_fields = ['fk_id_curso']
     
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'cupo_maximo' in form.changed_data:
+            from apps.modulo_2.inscripciones.espera import rebalancear_comisiones
+
+            rebalancear_comisiones([obj.pk])
+
     def get_queryset(self, request):
-        qs = super().get_queryset(request).select_related('fk_id_curso')
-        # Optimizacion N+1: Anotar conteo de inscritos directamente en la query
-        qs = qs.annotate(
-            inscritos_count_annotated=Count(
-                'inscripciones',
-                filter=~Q(inscripciones__estado__in=['lista_espera', 'cancelada'])
-            )
-        )
-        return qs
+        # Los inscritos salen de los contadores de la comisión, sin consultas extra
+        return super().get_queryset(request).select_related('fk_id_curso')
     
     @admin.display(description='Cupos (Disponibles/Total)')
     def get_cupos_info(self, obj):
-        # Usar valor anotado si existe, sino fallback a property (que hace query)
-        inscritos = getattr(obj, 'inscritos_count_annotated', obj.inscritos_count)
+        inscritos = obj.inscritos_count
         disponibles = obj.cupo_maximo - inscritos
         
         total = obj.cupo_maximo
@@ -44,18 +42,18 @@ class ComisionAdmin(admin.ModelAdmin):
     
     @admin.display(description='Estudiantes Inscritos')
     def get_inscritos(self, obj):
-        return getattr(obj, 'inscritos_count_annotated', obj.inscritos_count)
+        return obj.inscritos_count
     
     @admin.display(description='Cupos Disponibles')
     def get_cupos_disponibles(self, obj):
-        inscritos = getattr(obj, 'inscritos_count_annotated', obj.inscritos_count)
+        inscritos = obj.inscritos_count
         return obj.cupo_maximo - inscritos
     
     @admin.display(description='% Ocupación')
     def get_porcentaje_ocupacion(self, obj):
         if obj.cupo_maximo == 0:
             return "0%"
-        inscritos = getattr(obj, 'inscritos_count_annotated', obj.inscritos_count)
+        inscritos = obj.inscritos_count
         porcentaje = int((inscritos / obj.cupo_maximo) * 100)
         return f"{porcentaje}%"
 
@@ -0,0 +1,222 @@
+"""
+Agenda diaria precalculada del dashboard de administración.
+
+Para cada fecha se guarda en ``AgendaComision`` una fila por comisión con clase ese
+día y por alcance (``'*'`` para administración y una por ciudad para Mesa de
+Entrada), con el horario ya interpretado de ``dias_horarios``, el carril en que se
+dibuja y su color. Leer la agenda de un día (o de una semana) es una consulta por
+rango sobre el índice (alcance, fecha).
+
+Los días se construyen al escribir, nunca al leer: cuando cambia una comisión se
+descartan los días de su rango de fechas y se vuelven a armar los de la ventana
+próxima (hoy y AGENDA_DIAS_CONSTRUIDOS días más), y el ciclo diario
+(``actualizar_estado_comisiones``) arma la ventana del día. Un día que no está
+construido (fechas pasadas o lejanas) se calcula en memoria sin guardarlo.
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from . import calendario
+from .models import AgendaComision, AgendaDia, Comision, PoloCreativo
+
+
+PALETA = ['#3b82f6', '#8b5cf6', '#10b981', '#f59e0b', '#ef4444', '#06b6d4']
+INICIO_AGENDA_MIN = 8 * 60
+FIN_AGENDA_MIN = 22 * 60
+
+_MAX_DIAS_INVALIDACION = 3660
+
+
+def ciudades():
+    return [ciudad for ciudad, _ in PoloCreativo.CIUDADES]
+
+
+def _fechas(desde, hasta):
+    return [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+
+
+def _comisiones_en_rango(desde, hasta):
+    """Comisiones no finalizadas con alguna fecha dentro del rango (una sola consulta)"""
+    return list(
+        Comision.objects.exclude(estado='Finalizada').filter(
+            Q(fecha_inicio__isnull=True) | Q(fecha_inicio__lte=hasta),
+            Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=desde),
+            dias_semana_mascara__gt=0,
+        ).order_by('fk_id_curso__nombre', 'id_comision').values(
+            'id_comision', 'dias_horarios', 'dias_semana_mascara', 'fecha_inicio', 'fecha_fin',
+            'modalidad', 'fk_id_polo_id', 'fk_id_polo__ciudad',
+        )
+    )
+
+
+def _alcances(comision):
+    alcances = [AgendaComision.ALCANCE_TODAS]
+    if comision['fk_id_polo_id'] is not None:
+        alcances.append(comision['fk_id_polo__ciudad'])
+    elif comision['modalidad'] == 'Virtual':
+        alcances.extend(ciudades())
+    return alcances
+
+
+def _clase(comision, fecha):
+    clase = {
+        'comision_id': comision['id_comision'],
+        'color': PALETA[comision['id_comision'] % len(PALETA)],
+        'inicio_min': None,
+        'fin_min': None,
+        'inicio_etiqueta': '',
+        'fin_etiqueta': '',
+        'carril': 0,
+    }
+    rango = calendario.rango_horario_del_dia(comision['dias_horarios'] or '', fecha.weekday())
+    if rango:
+        inicio = max(int(rango['start_min']), INICIO_AGENDA_MIN)
+        fin = min(int(rango['end_min']), FIN_AGENDA_MIN)
+        if fin <= inicio:
+            fin = min(inicio + 60, FIN_AGENDA_MIN)
+        clase.update(
+            inicio_min=inicio,
+            fin_min=fin,
+            inicio_etiqueta=rango['start_label'],
+            fin_etiqueta=rango['end_label'],
+        )
+    return clase
+
+
+def _asignar_carriles(clases):
+    """Primer carril libre para cada clase con horario, en orden de inicio"""
+    con_horario = sorted(
+        (clase for clase in clases if clase['inicio_min'] is not None),
+        key=lambda clase: (clase['inicio_min'], clase['fin_min']),
+    )
+    fines = []
+    for clase in con_horario:
+        for carril, fin in enumerate(fines):
+            if clase['inicio_min'] >= fin:
+                clase['carril'] = carril
+                fines[carril] = clase['fin_min']
+                break
+        else:
+            clase['carril'] = len(fines)
+            fines.append(clase['fin_min'])
+
+
+def _clases_por_dia(comisiones, fechas):
+    """{(fecha, alcance): [clase, ...]} con los carriles ya asignados"""
+    por_dia = {}
+    for fecha in fechas:
+        bit = 1 << fecha.weekday()
+        for comision in comisiones:
+            if not comision['dias_semana_mascara'] & bit:
+                continue
+            if comision['fecha_inicio'] and comision['fecha_inicio'] > fecha:
+                continue
+            if comision['fecha_fin'] and comision['fecha_fin'] < fecha:
+                continue
+            for alcance in _alcances(comision):
+                por_dia.setdefault((fecha, alcance), []).append(_clase(comision, fecha))
+
+    for clases in por_dia.values():
+        _asignar_carriles(clases)
+    return por_dia
+
+
+def construir_dias(fechas):
+    """(Re)construye la agenda de las fechas indicadas. Retorna la cantidad de filas creadas."""
+    fechas = sorted(set(fechas))
+    if not fechas:
+        return 0
+
+    por_dia = _clases_por_dia(_comisiones_en_rango(fechas[0], fechas[-1]), fechas)
+    filas = [
+        AgendaComision(dia_id=fecha, fecha=fecha, alcance=alcance, **clase)
+        for (fecha, alcance), clases in por_dia.items()
+        for clase in clases
+    ]
+
+    with transaction.atomic():
+        AgendaDia.objects.filter(fecha__in=fechas).delete()
+        AgendaDia.objects.bulk_create([AgendaDia(fecha=fecha) for fecha in fechas], ignore_conflicts=True)
+        AgendaComision.objects.bulk_create(filas, batch_size=500, ignore_conflicts=True)
+    return len(filas)
+
+
+def ventana_construida(hoy=None):
+    """Fechas que se mantienen construidas: hoy y los AGENDA_DIAS_CONSTRUIDOS días siguientes"""
+    hoy = hoy or date.today()
+    return _fechas(hoy, hoy + timedelta(days=settings.AGENDA_DIAS_CONSTRUIDOS))
+
+
+def preparar_agenda(hoy=None):
+    """Construye la ventana próxima (ciclo diario). Retorna la cantidad de filas creadas."""
+    return construir_dias(ventana_construida(hoy))
+
+
+def _calcular_en_memoria(alcance, fechas):
+    """Clases (``AgendaComision`` sin guardar) de días no construidos"""
+    por_dia = _clases_por_dia(_comisiones_en_rango(fechas[0], fechas[-1]), fechas)
+    clases = [
+        AgendaComision(fecha=fecha, alcance=alcance, **clase)
+        for (fecha, alcance_dia), clases_dia in por_dia.items() if alcance_dia == alcance
+        for clase in clases_dia
+    ]
+    comisiones = Comision.objects.select_related('fk_id_curso', 'fk_id_polo').in_bulk(
+        {clase.comision_id for clase in clases}
+    )
+    for clase in clases:
+        clase.comision = comisiones[clase.comision_id]
+    return clases
+
+
+def obtener_agenda(alcance, desde, hasta=None):
+    """
+    Clases del alcance entre ``desde`` y ``hasta`` (inclusive), ordenadas por fecha y curso.
+    Los días construidos se leen de ``AgendaComision``; los demás se calculan sin escribir.
+    """
+    hasta = hasta or desde
+    construidos = set(AgendaDia.objects.filter(fecha__range=(desde, hasta)).values_list('fecha', flat=True))
+    clases = list(
+        AgendaComision.objects.filter(alcance=alcance, fecha__range=(desde, hasta)).select_related(
+            'comision__fk_id_curso', 'comision__fk_id_polo',
+        ).order_by('fecha', 'comision__fk_id_curso__nombre', 'comision_id')
+    ) if construidos else []
+
+    faltantes = [fecha for fecha in _fechas(desde, hasta) if fecha not in construidos]
+    if faltantes:
+        clases.extend(_calcular_en_memoria(alcance, faltantes))
+        clases.sort(key=lambda clase: (clase.fecha, clase.comision.fk_id_curso.nombre or '', clase.comision_id))
+    return clases
+
+
+def invalidar_agenda(desde=None, hasta=None):
+    """Descarta los días construidos del rango (sin límites: todos)"""
+    dias = AgendaDia.objects.all()
+    if desde is not None:
+        dias = dias.filter(fecha__gte=desde)
+    if hasta is not None:
+        dias = dias.filter(fecha__lte=hasta)
+    dias.delete()
+
+
+def actualizar_agenda_rangos(rangos, hoy=None):
+    """
+    Descarta los días de los rangos ``(fecha_inicio, fecha_fin)`` de comisiones (un extremo
+    nulo deja el rango abierto de ese lado) y vuelve a construir los que caen en la ventana.
+    """
+    rangos = list(rangos)
+    if not rangos:
+        return
+    inicios = [inicio for inicio, _ in rangos]
+    fines = [fin for _, fin in rangos]
+    desde = None if any(inicio is None for inicio in inicios) else min(inicios)
+    hasta = None if any(fin is None for fin in fines) else max(fines)
+    if desde is not None and hasta is not None and (hasta - desde).days > _MAX_DIAS_INVALIDACION:
+        desde = hasta = None
+    invalidar_agenda(desde, hasta)
+    construir_dias([
+        fecha for fecha in ventana_construida(hoy)
+        if (desde is None or fecha >= desde) and (hasta is None or fecha <= hasta)
+    ])
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CursosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.modulo_3.cursos'
+
+    def ready(self):
+        import apps.modulo_3.cursos.signals
@@ -0,0 +1,141 @@
+"""
+Calendario compilado de una comisión.
+
+El texto libre de ``Comision.dias_horarios`` se compila una sola vez (al
+guardar) en una máscara de bits de días de semana (bit 0 = lunes ... bit 6 =
+domingo) y una lista de rangos horarios "HH:MM-HH:MM". Con la máscara, la
+cantidad de clases entre dos fechas y la próxima fecha de clase se calculan
+aritméticamente, sin recorrer el calendario día por día.
+"""
+import re
+import unicodedata
+from datetime import timedelta
+
+
+DIAS_TOKENS = (
+    {'lunes', 'lun', 'lu'},
+    {'martes', 'mar', 'ma'},
+    {'miercoles', 'mie', 'mi', 'x'},
+    {'jueves', 'jue', 'ju'},
+    {'viernes', 'vie', 'vi'},
+    {'sabado', 'sab', 'sa'},
+    {'domingo', 'dom'},
+)
+
+_RANGO_HORARIO = re.compile(
+    r'(\d{1,2})(?:[:.h](\d{2}))?\s*(?:hs?\.?)?\s*(?:-|–|a|al|hasta)\s*(\d{1,2})(?:[:.h](\d{2}))?'
+)
+
+
+def normalizar_texto(texto):
+    if not texto:
+        return ''
+    normalized = unicodedata.normalize('NFKD', texto)
+    normalized = ''.join(ch for ch in normalized if not unicodedata.combining(ch))
+    return normalized.lower()
+
+
+def _hora(horas, minutos):
+    horas = int(horas)
+    minutos = int(minutos or 0)
+    if horas > 23 or minutos > 59:
+        return None
+    return f"{horas:02d}:{minutos:02d}"
+
+
+def _rangos(texto):
+    """Rangos (desde, hasta) "HH:MM" válidos del texto ya normalizado, en orden de aparición"""
+    for h_desde, m_desde, h_hasta, m_hasta in _RANGO_HORARIO.findall(texto):
+        desde = _hora(h_desde, m_desde)
+        hasta = _hora(h_hasta, m_hasta)
+        if desde and hasta and desde < hasta:
+            yield desde, hasta
+
+
+def compilar_dias_horarios(texto):
+    """Retorna (mascara_dias, rangos_horarios) a partir del texto libre de días y horarios"""
+    texto = normalizar_texto(texto)
+    if not texto:
+        return 0, []
+
+    tokens = set(re.findall(r'[a-z]+', texto))
+    mascara = 0
+    for indice, nombres in enumerate(DIAS_TOKENS):
+        if nombres & tokens:
+            mascara |= 1 << indice
+
+    rangos = []
+    for desde, hasta in _rangos(texto):
+        rango = f"{desde}-{hasta}"
+        if rango not in rangos:
+            rangos.append(rango)
+
+    return mascara, rangos
+
+
+def dias_desde_mascara(mascara):
+    return {indice for indice in range(7) if mascara & (1 << indice)}
+
+
+def contar_clases(mascara, desde, hasta):
+    """Cantidad de fechas entre ``desde`` y ``hasta`` (inclusive) cuyo día de semana está en la máscara"""
+    if not mascara or not desde or not hasta or hasta < desde:
+        return 0
+
+    dias_totales = (hasta - desde).days + 1
+    semanas, resto = divmod(dias_totales, 7)
+    total = semanas * bin(mascara).count('1')
+
+    inicio = desde.weekday()
+    for desplazamiento in range(resto):
+        if mascara & (1 << ((inicio + desplazamiento) % 7)):
+            total += 1
+    return total
+
+
+def proxima_clase(mascara, desde, hasta=None):
+    """Primera fecha >= ``desde`` con clase, o None si no hay clases hasta ``hasta``"""
+    if not mascara or not desde:
+        return None
+
+    inicio = desde.weekday()
+    for desplazamiento in range(7):
+        if mascara & (1 << ((inicio + desplazamiento) % 7)):
+            fecha = desde + timedelta(days=desplazamiento)
+            if hasta and fecha > hasta:
+                return None
+            return fecha
+    return None
+
+
+def _minutos(hora):
+    horas, minutos = hora.split(':')
+    return int(horas) * 60 + int(minutos)
+
+
+def rango_horario_del_dia(texto, weekday=None):
+    """
+    Horario de clase para un día de semana a partir del texto libre, con los mismos días
+    y rangos que ``compilar_dias_horarios``: primero el tramo que menciona ese día
+    ("Lunes 10:00-12:00; Jueves 18 a 20") y si no, el primer rango del texto.
+    Retorna un dict con minutos y etiquetas, o None.
+    """
+    texto = normalizar_texto(texto)
+    rango = None
+    if weekday is not None and 0 <= weekday < len(DIAS_TOKENS):
+        # Tramos separados por ; , salto de línea o un punto que no sea parte de una hora
+        for parte in re.split(r'[;,\n]+|\.(?!\d)', texto):
+            if DIAS_TOKENS[weekday] & set(re.findall(r'[a-z]+', parte)):
+                rango = next(_rangos(parte), None)
+                if rango:
+                    break
+    rango = rango or next(_rangos(texto), None)
+    if rango is None:
+        return None
+    desde, hasta = rango
+    return {
+        'start_min': _minutos(desde),
+        'end_min': _minutos(hasta),
+        'start_label': desde,
+        'end_label': hasta,
+    }
@@ -0,0 +1,219 @@
+"""
+Catálogo público de cursos (modelo de lectura cacheado).
+
+Cada catálogo (el de un polo o el general de ``CursoListView``) se arma con una
+sola consulta de comisiones publicadas, agrupadas luego por curso,
+y se guarda en cache como objetos simples (``SimpleNamespace``) con la disponibilidad ya
+resuelta a partir de los contadores de la comisión.
+
+Invalidación por versiones: cada polo tiene su versión, el catálogo general la
+suya (cambia con cualquier polo) y hay una global para lo que afecta a todos
+(cursos, comisiones virtuales sin polo). Las versiones son marcas de tiempo, de
+modo que también sirven como ``Last-Modified``. Se renuevan desde las señales
+de Curso y Comisión, desde ``ajustar_contadores`` cuando cambian los inscriptos
+y desde ``ciclo_vida`` cuando una comisión cambia de estado por fecha.
+
+Para visitantes anónimos la página completa se cachea con el token CSRF como
+marcador (se reemplaza en cada respuesta) y se responde con ETag/Last-Modified.
+
+Todo lo anterior requiere un cache compartido entre workers (CACHE_BACKEND): con la
+memoria local por proceso una invalidación llegaría a un solo worker. Sin él
+CATALOGO_CACHE_TTL queda en 0 y el catálogo se arma en cada request, sin ETag.
+"""
+import hashlib
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import Comision, Curso
+
+
+_VERSION_GLOBAL = 'catalogo:version'
+_VERSION_POLO = 'catalogo:version:polo:{polo_id}'
+_VERSION_GENERAL = 'catalogo:version:general'
+_CLAVE_DATOS = 'catalogo:datos:{alcance}:{version}'
+_CLAVE_PAGINA = 'catalogo:pagina:{template}:{alcance}:{version}'
+
+MARCADOR_CSRF = 'catalogo-csrf-marcador-7f3a9c'
+
+_ETIQUETA_ESTADO_CURSO = dict(Curso._meta.get_field('estado').choices)
+
+
+def _ttl():
+    return getattr(settings, 'CATALOGO_CACHE_TTL', 0)
+
+
+def cache_catalogo_activo():
+    return _ttl() > 0
+
+
+def _version(clave):
+    version = cache.get(clave)
+    if version is None:
+        cache.add(clave, time.time(), timeout=None)
+        version = cache.get(clave) or time.time()
+    return version
+
+
+def invalidar_catalogo(polo_ids=None):
+    """
+    Renueva la versión de los polos indicados. Sin polos (o si alguno es None, es
+    decir una comisión virtual sin polo) se renueva la versión global.
+    """
+    if not cache_catalogo_activo():
+        return
+    ahora = time.time()
+    polo_ids = set(polo_ids) if polo_ids is not None else {None}
+    if None in polo_ids:
+        cache.set(_VERSION_GLOBAL, ahora, timeout=None)
+        polo_ids.discard(None)
+    if polo_ids:
+        cache.set_many({_VERSION_POLO.format(polo_id=polo_id): ahora for polo_id in polo_ids}, timeout=None)
+        cache.set(_VERSION_GENERAL, ahora, timeout=None)
+
+
+def invalidar_catalogo_comisiones(comision_ids):
+    """Invalida los catálogos de los polos de las comisiones indicadas"""
+    comision_ids = [comision_id for comision_id in comision_ids if comision_id is not None]
+    if comision_ids:
+        invalidar_catalogo(Comision.objects.filter(pk__in=comision_ids).values_list('fk_id_polo_id', flat=True))
+
+
+def _versiones(polo_id=None):
+    if polo_id is None:
+        return [_version(_VERSION_GLOBAL), _version(_VERSION_GENERAL)]
+    return [_version(_VERSION_GLOBAL), _version(_VERSION_POLO.format(polo_id=polo_id))]
+
+
+def _alcance(polo_id):
+    return f'polo-{polo_id}' if polo_id is not None else 'general'
+
+
+def _comision(fila):
+    inscritos = fila['total_confirmados'] + fila['total_preinscriptos']
+    return SimpleNamespace(
+        id_comision=fila['id_comision'],
+        estado=fila['estado'],
+        modalidad=fila['modalidad'],
+        dias_horarios=fila['dias_horarios'],
+        lugar=fila['lugar'],
+        fecha_inicio=fila['fecha_inicio'],
+        fecha_fin=fila['fecha_fin'],
+        cupo_maximo=fila['cupo_maximo'],
+        inscritos_count=inscritos,
+        cupo_lleno=inscritos >= fila['cupo_maximo'],
+    )
+
+
+def _curso(fila):
+    return SimpleNamespace(
+        id_curso=fila['fk_id_curso_id'],
+        nombre=fila['fk_id_curso__nombre'],
+        descripcion=fila['fk_id_curso__descripcion'],
+        edad_minima=fila['fk_id_curso__edad_minima'],
+        edad_maxima=fila['fk_id_curso__edad_maxima'],
+        requisitos=fila['fk_id_curso__requisitos'],
+        estado=fila['fk_id_curso__estado'],
+        get_estado_display=_ETIQUETA_ESTADO_CURSO.get(fila['fk_id_curso__estado'], fila['fk_id_curso__estado']),
+        comisiones_polo=[],
+        comisiones_abiertas=[],
+        disponibilidad='proximamente',
+    )
+
+
+def construir_catalogo(polo_id=None):
+    """
+    Lista de cursos abiertos con al menos una comisión publicada.
+    Con ``polo_id`` se limita al polo y a las comisiones virtuales sin polo que sigan
+    vigentes (ni cerradas ni finalizadas; el estado lo mantiene ``ciclo_vida``). Cada curso trae
+    ``comisiones_polo`` (las comisiones del alcance), ``comisiones_abiertas`` (abiertas
+    con cupo) y ``disponibilidad`` ('abierta', 'cerrada' o 'proximamente').
+    """
+    comisiones = Comision.objects.filter(publicada=True, fk_id_curso__estado='Abierto')
+    if polo_id is not None:
+        comisiones = comisiones.filter(
+            Q(fk_id_polo_id=polo_id) | Q(modalidad='Virtual', fk_id_polo__isnull=True)
+        ).exclude(
+            estado__in=['Cerrada', 'Finalizada'],
+        )
+
+    filas = comisiones.order_by('fk_id_curso__orden', 'fk_id_curso_id', 'id_comision').values(
+        'id_comision', 'estado', 'modalidad', 'dias_horarios', 'lugar', 'fecha_inicio', 'fecha_fin',
+        'cupo_maximo', 'total_confirmados', 'total_preinscriptos',
+        'fk_id_curso_id', 'fk_id_curso__nombre', 'fk_id_curso__descripcion', 'fk_id_curso__edad_minima',
+        'fk_id_curso__edad_maxima', 'fk_id_curso__requisitos', 'fk_id_curso__estado',
+    )
+
+    cursos = {}
+    for fila in filas:
+        curso = cursos.get(fila['fk_id_curso_id'])
+        if curso is None:
+            curso = cursos[fila['fk_id_curso_id']] = _curso(fila)
+        comision = _comision(fila)
+        curso.comisiones_polo.append(comision)
+        if comision.estado == 'Abierta' and not comision.cupo_lleno:
+            curso.comisiones_abiertas.append(comision)
+
+    for curso in cursos.values():
+        if curso.comisiones_abiertas:
+            curso.disponibilidad = 'abierta'
+        elif any(comision.estado == 'Abierta' for comision in curso.comisiones_polo):
+            curso.disponibilidad = 'cerrada'
+    return list(cursos.values())
+
+
+def obtener_catalogo(polo_id=None):
+    """Catálogo cacheado (ver ``construir_catalogo``)"""
+    if not cache_catalogo_activo():
+        return construir_catalogo(polo_id)
+    clave = _CLAVE_DATOS.format(
+        alcance=_alcance(polo_id),
+        version='-'.join(repr(version) for version in _versiones(polo_id)),
+    )
+    catalogo = cache.get(clave)
+    if catalogo is None:
+        catalogo = construir_catalogo(polo_id)
+        cache.set(clave, catalogo, timeout=_ttl())
+    return catalogo
+
+
+def respuesta_catalogo(request, template_name, contexto, polo_id=None):
+    """
+    Renderiza una página del catálogo. Para visitantes anónimos sin mensajes pendientes
+    la página se cachea completa y se responde con ETag/Last-Modified (304 si no cambió).
+    """
+    if not cache_catalogo_activo() or request.user.is_authenticated or len(get_messages(request)):
+        return render(request, template_name, contexto)
+
+    alcance = _alcance(polo_id)
+    versiones = _versiones(polo_id)
+    version = '-'.join(repr(v) for v in versiones)
+    ultima_modificacion = int(max(versiones))
+    # El ETag incluye la cookie CSRF: la página embebe un token derivado de ella
+    etag = quote_etag(hashlib.sha1(
+        f"{template_name}|{alcance}|{version}|{request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')}".encode('utf-8')
+    ).hexdigest())
+
+    respuesta = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+    if respuesta is None:
+        clave = _CLAVE_PAGINA.format(template=template_name, alcance=alcance, version=version)
+        html = cache.get(clave)
+        if html is None:
+            html = render_to_string(template_name, {**contexto, 'csrf_token': MARCADOR_CSRF}, request=request)
+            cache.set(clave, html, timeout=_ttl())
+        respuesta = HttpResponse(html.replace(MARCADOR_CSRF, get_token(request)))
+
+    respuesta.headers['ETag'] = etag
+    respuesta.headers['Last-Modified'] = http_date(ultima_modificacion)
+    patch_cache_control(respuesta, no_cache=True)
+    return respuesta
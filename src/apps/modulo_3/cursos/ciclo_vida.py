@@ -0,0 +1,99 @@
+"""
+Ciclo de vida de las comisiones según sus fechas.
+
+``actualizar_estados`` se ejecuta una vez por día (comando
+``actualizar_estado_comisiones`` desde cron) y es idempotente:
+
+* Las comisiones "Cerrada" cuya ``fecha_inicio`` ya llegó pasan a "En proceso".
+  Las "Abierta" siguen abiertas mientras duran, para admitir inscripciones tardías.
+* Las comisiones cuya ``fecha_fin`` ya pasó pasan a "Finalizada". En ese momento se
+  recalculan por última vez los registros de asistencia de sus inscripciones
+  confirmadas, que fijan la habilitación del certificado.
+
+Cada corrida arma la agenda de los próximos días y deja una marca en
+``EjecucionCicloComisiones``. Las vistas confían en ``estado`` sin repetir
+predicados de fecha; ``ciclo_desactualizado`` permite avisar si el cron dejó de
+correr.
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Max
+
+from .agenda import preparar_agenda
+from .models import Comision, EjecucionCicloComisiones
+
+
+def ultima_ejecucion():
+    """Fecha de la última corrida del ciclo, o None si nunca corrió"""
+    return EjecucionCicloComisiones.objects.aggregate(ultima=Max('fecha'))['ultima']
+
+
+def ciclo_desactualizado(hoy=None, tolerancia_dias=1):
+    """True si el ciclo no corrió en los últimos ``tolerancia_dias`` días"""
+    hoy = hoy or date.today()
+    ultima = ultima_ejecucion()
+    return ultima is None or ultima < hoy - timedelta(days=tolerancia_dias)
+
+
+def comisiones_a_iniciar(hoy):
+    return Comision.objects.filter(estado='Cerrada', fecha_inicio__isnull=False, fecha_inicio__lte=hoy).exclude(
+        fecha_fin__lt=hoy,
+    )
+
+
+def comisiones_a_finalizar(hoy):
+    return Comision.objects.filter(fecha_fin__isnull=False, fecha_fin__lt=hoy).exclude(estado='Finalizada')
+
+
+def _congelar_asistencia(comision_ids, hoy):
+    from apps.modulo_2.inscripciones.models import Inscripcion
+    from apps.modulo_4.asistencia.agregacion import recalcular_registros
+
+    return recalcular_registros(
+        Inscripcion.objects.filter(comision_id__in=comision_ids, estado='confirmado'),
+        hoy=hoy,
+    )
+
+
+def _notificar_cambios(comision_ids):
+    from apps.modulo_5.estadistica.materializacion import marcar_desactualizadas
+
+    from .agenda import invalidar_agenda
+    from .catalogo import invalidar_catalogo_comisiones
+
+    # update() no dispara post_save: se avisa a los modelos de lectura que dependen del estado
+    marcar_desactualizadas(comision_ids)
+    transaction.on_commit(lambda: invalidar_catalogo_comisiones(comision_ids))
+    # Las finalizadas dejan de figurar en la agenda desde hoy (la ventana se rearma al terminar)
+    transaction.on_commit(lambda: invalidar_agenda(desde=date.today()))
+
+
+def actualizar_estados(hoy=None, forzar=False):
+    """
+    Aplica las transiciones del día. Si ya corrió para ``hoy`` y no se fuerza, no hace nada.
+    Retorna la ``EjecucionCicloComisiones`` del día y si se procesó en esta llamada.
+    """
+    hoy = hoy or date.today()
+    ejecucion = EjecucionCicloComisiones.objects.filter(fecha=hoy).first()
+    if ejecucion is not None and not forzar:
+        return ejecucion, False
+
+    with transaction.atomic():
+        a_iniciar = list(comisiones_a_iniciar(hoy).select_for_update().values_list('pk', flat=True))
+        a_finalizar = list(comisiones_a_finalizar(hoy).select_for_update().values_list('pk', flat=True))
+
+        if a_iniciar:
+            Comision.objects.filter(pk__in=a_iniciar).update(estado='En proceso')
+        if a_finalizar:
+            Comision.objects.filter(pk__in=a_finalizar).update(estado='Finalizada')
+            _congelar_asistencia(a_finalizar, hoy)
+        if a_iniciar or a_finalizar:
+            _notificar_cambios(a_iniciar + a_finalizar)
+
+        ejecucion = ejecucion or EjecucionCicloComisiones(fecha=hoy)
+        ejecucion.iniciadas += len(a_iniciar)
+        ejecucion.finalizadas += len(a_finalizar)
+        ejecucion.save()
+        transaction.on_commit(lambda: preparar_agenda(hoy))
+    return ejecucion, True
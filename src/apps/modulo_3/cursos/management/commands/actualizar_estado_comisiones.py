@@ -0,0 +1,31 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.modulo_3.cursos.ciclo_vida import actualizar_estados
+
+
+class Command(BaseCommand):
+    help = (
+        'Actualiza el estado de las comisiones según sus fechas (En proceso / Finalizada). '
+        'Pensado para cron diario; volver a ejecutarlo el mismo día no hace nada salvo con --forzar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help='Fecha de referencia YYYY-MM-DD (por defecto hoy)')
+        parser.add_argument('--forzar', action='store_true', help='Procesa aunque ya se haya ejecutado para esa fecha')
+
+    def handle(self, *args, **options):
+        hoy = None
+        if options['fecha']:
+            try:
+                hoy = date.fromisoformat(options['fecha'])
+            except ValueError:
+                raise CommandError('La fecha debe tener formato YYYY-MM-DD')
+
+        ejecucion, procesada = actualizar_estados(hoy=hoy, forzar=options['forzar'])
+        if not procesada:
+            self.stdout.write(f'El ciclo ya se ejecutó para {ejecucion.fecha} (usar --forzar para repetirlo).')
+            return
+        self.stdout.write(f'Comisiones pasadas a En proceso: {ejecucion.iniciadas}')
+        self.stdout.write(f'Comisiones finalizadas: {ejecucion.finalizadas}')
@@ -0,0 +1,88 @@
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+# Copia del compilador de cursos/calendario.py al momento de esta migración: los cambios
+# posteriores al parser o a la máscara no deben cambiar lo que produce
+DIAS_TOKENS = (
+    {'lunes', 'lun', 'lu'},
+    {'martes', 'mar', 'ma'},
+    {'miercoles', 'mie', 'mi', 'x'},
+    {'jueves', 'jue', 'ju'},
+    {'viernes', 'vie', 'vi'},
+    {'sabado', 'sab', 'sa'},
+    {'domingo', 'dom'},
+)
+
+_RANGO_HORARIO = re.compile(
+    r'(\d{1,2})(?:[:.h](\d{2}))?\s*(?:hs?\.?)?\s*(?:-|–|a|al|hasta)\s*(\d{1,2})(?:[:.h](\d{2}))?'
+)
+
+
+def _normalizar_texto(texto):
+    if not texto:
+        return ''
+    normalized = unicodedata.normalize('NFKD', texto)
+    normalized = ''.join(ch for ch in normalized if not unicodedata.combining(ch))
+    return normalized.lower()
+
+
+def _hora(horas, minutos):
+    horas = int(horas)
+    minutos = int(minutos or 0)
+    if horas > 23 or minutos > 59:
+        return None
+    return f"{horas:02d}:{minutos:02d}"
+
+
+def compilar_dias_horarios(texto):
+    texto = _normalizar_texto(texto)
+    if not texto:
+        return 0, []
+
+    tokens = set(re.findall(r'[a-z]+', texto))
+    mascara = 0
+    for indice, nombres in enumerate(DIAS_TOKENS):
+        if nombres & tokens:
+            mascara |= 1 << indice
+
+    rangos = []
+    for h_desde, m_desde, h_hasta, m_hasta in _RANGO_HORARIO.findall(texto):
+        desde = _hora(h_desde, m_desde)
+        hasta = _hora(h_hasta, m_hasta)
+        if desde and hasta and desde < hasta:
+            rango = f"{desde}-{hasta}"
+            if rango not in rangos:
+                rangos.append(rango)
+
+    return mascara, rangos
+
+
+def compilar_calendarios_existentes(apps, schema_editor):
+    Comision = apps.get_model('cursos', 'Comision')
+    comisiones = list(Comision.objects.only('id_comision', 'dias_horarios'))
+    for comision in comisiones:
+        comision.dias_semana_mascara, comision.horarios_compilados = compilar_dias_horarios(comision.dias_horarios)
+    Comision.objects.bulk_update(comisiones, ['dias_semana_mascara', 'horarios_compilados'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('cursos', '0005_comision_publicada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comision',
+            name='dias_semana_mascara',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Días de Clase (máscara)'),
+        ),
+        migrations.AddField(
+            model_name='comision',
+            name='horarios_compilados',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Horarios Compilados'),
+        ),
+        migrations.RunPython(compilar_calendarios_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+CAMPOS = {
+    'confirmado': 'total_confirmados',
+    'pre_inscripto': 'total_preinscriptos',
+    'lista_espera': 'total_lista_espera',
+    'cancelada': 'total_canceladas',
+}
+
+
+def inicializar_contadores(apps, schema_editor):
+    Comision = apps.get_model('cursos', 'Comision')
+    comisiones = list(Comision.objects.annotate(**{
+        f'real_{estado}': Count('inscripciones', filter=Q(inscripciones__estado=estado))
+        for estado in CAMPOS
+    }))
+    for comision in comisiones:
+        for estado, campo in CAMPOS.items():
+            setattr(comision, campo, getattr(comision, f'real_{estado}'))
+    Comision.objects.bulk_update(comisiones, list(CAMPOS.values()), batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('cursos', '0006_comision_calendario_compilado'),
+        ('inscripciones', '0002_alter_inscripcion_estado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comision',
+            name='total_confirmados',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Confirmados'),
+        ),
+        migrations.AddField(
+            model_name='comision',
+            name='total_preinscriptos',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Pre-Inscriptos'),
+        ),
+        migrations.AddField(
+            model_name='comision',
+            name='total_lista_espera',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='En Lista de Espera'),
+        ),
+        migrations.AddField(
+            model_name='comision',
+            name='total_canceladas',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Canceladas'),
+        ),
+        migrations.RunPython(inicializar_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cursos', '0007_comision_contadores_cupo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EjecucionCicloComisiones',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True, verbose_name='Fecha procesada')),
+                ('ejecutada_el', models.DateTimeField(auto_now=True, verbose_name='Ejecutada el')),
+                ('iniciadas', models.PositiveIntegerField(default=0, verbose_name='Comisiones pasadas a En proceso')),
+                ('finalizadas', models.PositiveIntegerField(default=0, verbose_name='Comisiones finalizadas')),
+            ],
+            options={
+                'verbose_name': 'Ejecución del ciclo de comisiones',
+                'verbose_name_plural': 'Ejecuciones del ciclo de comisiones',
+                'ordering': ['-fecha'],
+            },
+        ),
+    ]
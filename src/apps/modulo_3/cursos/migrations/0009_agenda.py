@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cursos', '0008_ejecucionciclocomisiones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgendaDia',
+            fields=[
+                ('fecha', models.DateField(primary_key=True, serialize=False, verbose_name='Fecha')),
+                ('construida_el', models.DateTimeField(auto_now=True, verbose_name='Construida el')),
+            ],
+            options={
+                'verbose_name': 'Agenda del día',
+                'verbose_name_plural': 'Agendas por día',
+            },
+        ),
+        migrations.CreateModel(
+            name='AgendaComision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('alcance', models.CharField(max_length=50, verbose_name='Alcance')),
+                ('inicio_min', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Inicio (minutos)')),
+                ('fin_min', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Fin (minutos)')),
+                ('inicio_etiqueta', models.CharField(blank=True, default='', max_length=5)),
+                ('fin_etiqueta', models.CharField(blank=True, default='', max_length=5)),
+                ('carril', models.PositiveSmallIntegerField(default=0, verbose_name='Carril')),
+                ('color', models.CharField(max_length=7, verbose_name='Color')),
+                ('comision', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='agenda', to='cursos.comision')),
+                ('dia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='clases', to='cursos.agendadia')),
+            ],
+            options={
+                'verbose_name': 'Clase en agenda',
+                'verbose_name_plural': 'Clases en agenda',
+                'indexes': [models.Index(fields=['alcance', 'fecha'], name='agenda_alcance_fecha_idx')],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'alcance', 'comision'), name='agenda_fecha_alcance_comision_uniq')],
+            },
+        ),
+    ]
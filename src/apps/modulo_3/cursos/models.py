@@ -4,9 +4,7 @@ from django.core.exceptions import ValidationError
 from django.db import models
 
 from apps.modulo_1.usuario.models import Usuario
-
-import re
-import unicodedata
+from apps.modulo_3.cursos import calendario
 
 
 class PoloCreativo(models.Model):
@@ -86,6 +84,18 @@ class Comision(models.Model):
     estado = models.CharField(max_length=15, choices=OPCIONES_ESTADO_COMISION, default='Abierta', verbose_name="Estado") 
     publicada = models.BooleanField(default=False, verbose_name="Publicada")
 
+    # Calendario compilado a partir de dias_horarios (ver calendario.py)
+    dias_semana_mascara = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="Días de Clase (máscara)")
+    horarios_compilados = models.JSONField(default=list, blank=True, editable=False, verbose_name="Horarios Compilados")
+
+    CAMPOS_CONTADORES = ('total_confirmados', 'total_preinscriptos', 'total_lista_espera', 'total_canceladas')
+
+    # Contadores de inscripciones por estado, mantenidos por apps.modulo_2.inscripciones.contadores
+    total_confirmados = models.PositiveIntegerField(default=0, editable=False, verbose_name="Confirmados")
+    total_preinscriptos = models.PositiveIntegerField(default=0, editable=False, verbose_name="Pre-Inscriptos")
+    total_lista_espera = models.PositiveIntegerField(default=0, editable=False, verbose_name="En Lista de Espera")
+    total_canceladas = models.PositiveIntegerField(default=0, editable=False, verbose_name="Canceladas")
+
     docentes = models.ManyToManyField(
         Usuario, 
         through='ComisionDocente',
@@ -94,38 +104,40 @@ class Comision(models.Model):
 
     @staticmethod
     def _normalizar_texto(texto):
-        if not texto:
-            return ''
-        normalized = unicodedata.normalize('NFKD', texto)
-        normalized = ''.join(ch for ch in normalized if not unicodedata.combining(ch))
-        return normalized.lower()
+        return calendario.normalizar_texto(texto)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        datos = instance.__dict__
+        instance._polo_original = datos.get('fk_id_polo_id')
+        instance._fechas_originales = (datos.get('fecha_inicio'), datos.get('fecha_fin'))
+        if 'dias_horarios' in datos and 'dias_semana_mascara' in datos and 'horarios_compilados' in datos:
+            instance._calendario_compilado = (
+                datos['dias_horarios'],
+                datos['dias_semana_mascara'],
+                list(datos['horarios_compilados'] or []),
+            )
+        return instance
+
+    def compilar_calendario(self):
+        """Compila ``dias_horarios`` (si cambió) y actualiza los campos persistidos"""
+        compilado = getattr(self, '_calendario_compilado', None)
+        if compilado is None or compilado[0] != self.dias_horarios:
+            mascara, rangos = calendario.compilar_dias_horarios(self.dias_horarios)
+            compilado = (self.dias_horarios, mascara, rangos)
+            self._calendario_compilado = compilado
+        self.dias_semana_mascara = compilado[1]
+        self.horarios_compilados = compilado[2]
+        return compilado[1]
+
+    def get_dias_semana_mascara(self):
+        return self.compilar_calendario()
 
     def get_dias_semana_indices(self):
-        texto = self._normalizar_texto(self.dias_horarios or '')
-        if not texto:
-            return set()
-
-        tokens = set(re.findall(r"[a-z]+", texto))
-        dias = set()
-
-        if {'lunes', 'lun', 'lu'} & tokens:
-            dias.add(0)
-        if {'martes', 'mar', 'ma'} & tokens:
-            dias.add(1)
-        if {'miercoles', 'miércoles', 'mie', 'mi', 'x'} & tokens:
-            dias.add(2)
-        if {'jueves', 'jue', 'ju'} & tokens:
-            dias.add(3)
-        if {'viernes', 'vie', 'vi'} & tokens:
-            dias.add(4)
-        if {'sabado', 'sábado', 'sab', 'sa'} & tokens:
-            dias.add(5)
-        if {'domingo', 'dom'} & tokens:
-            dias.add(6)
-
-        return dias
+        return calendario.dias_desde_mascara(self.get_dias_semana_mascara())
 
-    def get_fechas_clase_programadas(self, hasta=None):
+    def _rango_calendario(self, hasta=None):
         fecha_inicio = self.fecha_inicio
         if not fecha_inicio:
             try:
@@ -139,31 +151,58 @@ class Comision(models.Model):
                 fecha_inicio = None
 
         if not fecha_inicio:
-            return []
+            return None, None
 
         fecha_fin = self.fecha_fin or (hasta or date.today())
         if hasta and fecha_fin > hasta:
             fecha_fin = hasta
         if fecha_fin < fecha_inicio:
-            return []
+            return None, None
+        return fecha_inicio, fecha_fin
 
-        dias = self.get_dias_semana_indices()
-        if not dias:
+    def get_fechas_clase_programadas(self, hasta=None):
+        mascara = self.get_dias_semana_mascara()
+        if not mascara:
+            return []
+        fecha_inicio, fecha_fin = self._rango_calendario(hasta=hasta)
+        if not fecha_inicio:
             return []
 
         fechas = []
-        current = fecha_inicio
-        while current <= fecha_fin:
-            if current.weekday() in dias:
-                fechas.append(current)
-            current = current + timedelta(days=1)
+        fecha = calendario.proxima_clase(mascara, fecha_inicio, fecha_fin)
+        while fecha:
+            fechas.append(fecha)
+            fecha = calendario.proxima_clase(mascara, fecha + timedelta(days=1), fecha_fin)
         return fechas
 
     def get_total_clases_programadas(self, hasta=None):
-        fechas = self.get_fechas_clase_programadas(hasta=hasta)
-        if not fechas:
+        mascara = self.get_dias_semana_mascara()
+        if not mascara:
+            return None
+        fecha_inicio, fecha_fin = self._rango_calendario(hasta=hasta)
+        if not fecha_inicio:
             return None
-        return len(fechas)
+        return calendario.contar_clases(mascara, fecha_inicio, fecha_fin) or None
+
+    def get_proxima_clase(self, desde=None):
+        """Próxima fecha de clase a partir de ``desde`` (hoy por defecto) dentro del período de la comisión"""
+        desde = desde or date.today()
+        if self.fecha_inicio and desde < self.fecha_inicio:
+            desde = self.fecha_inicio
+        return calendario.proxima_clase(self.get_dias_semana_mascara(), desde, self.fecha_fin)
+
+    def save(self, *args, **kwargs):
+        self.compilar_calendario()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'dias_horarios' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'dias_semana_mascara', 'horarios_compilados'}
+        elif update_fields is None and not self._state.adding and not kwargs.get('force_insert'):
+            # Los contadores se mantienen con UPDATE ... F() + n; una instancia vieja no debe pisarlos
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.CAMPOS_CONTADORES
+            ]
+        super().save(*args, **kwargs)
 
     def clean(self):
         super().clean()
@@ -179,11 +218,11 @@ class Comision(models.Model):
     
     @property
     def inscritos_count(self):
-        return self.inscripciones.exclude(estado__in=['lista_espera', 'cancelada']).count()
+        return self.total_confirmados + self.total_preinscriptos
 
     @property
     def lista_espera_count(self):
-        return self.inscripciones.filter(estado='lista_espera').count()
+        return self.total_lista_espera
 
     @property
     def tiene_lista_espera(self):
@@ -191,7 +230,7 @@ class Comision(models.Model):
     
     @property
     def cupos_disponibles(self):
-        """Calcula cupos disponibles en tiempo real"""
+        """Cupos disponibles según los contadores de la comisión"""
         return max(self.cupo_maximo - self.inscritos_count, 0)
     
     @property
@@ -251,3 +290,69 @@ class Material(models.Model):
             raise ValidationError({'archivo': 'Debe subir un archivo para materiales de tipo archivo.'})
         if self.tipo == 'enlace' and not self.enlace:
             raise ValidationError({'enlace': 'Debe proporcionar un enlace para materiales de tipo enlace.'})
+
+
+class EjecucionCicloComisiones(models.Model):
+    """
+    Marca de cada corrida del ciclo de vida de comisiones (comando
+    ``actualizar_estado_comisiones``). La fecha más reciente indica hasta qué día
+    el campo ``estado`` de las comisiones está al día.
+    """
+    fecha = models.DateField(unique=True, verbose_name="Fecha procesada")
+    ejecutada_el = models.DateTimeField(auto_now=True, verbose_name="Ejecutada el")
+    iniciadas = models.PositiveIntegerField(default=0, verbose_name="Comisiones pasadas a En proceso")
+    finalizadas = models.PositiveIntegerField(default=0, verbose_name="Comisiones finalizadas")
+
+    class Meta:
+        verbose_name = "Ejecución del ciclo de comisiones"
+        verbose_name_plural = "Ejecuciones del ciclo de comisiones"
+        ordering = ['-fecha']
+
+    def __str__(self):
+        return f"{self.fecha}: {self.iniciadas} iniciadas, {self.finalizadas} finalizadas"
+
+
+class AgendaDia(models.Model):
+    """Fecha cuya agenda ya está construida en ``AgendaComision`` (ver agenda.py)"""
+    fecha = models.DateField(primary_key=True, verbose_name="Fecha")
+    construida_el = models.DateTimeField(auto_now=True, verbose_name="Construida el")
+
+    class Meta:
+        verbose_name = "Agenda del día"
+        verbose_name_plural = "Agendas por día"
+
+    def __str__(self):
+        return str(self.fecha)
+
+
+class AgendaComision(models.Model):
+    """
+    Clase de una comisión en la agenda de un día, para un alcance: ``'*'`` (todas las
+    ciudades, vista de administración) o una ciudad (vista de Mesa de Entrada, que incluye
+    las comisiones virtuales sin polo). El carril se calcula dentro de cada alcance.
+    """
+    ALCANCE_TODAS = '*'
+
+    dia = models.ForeignKey(AgendaDia, on_delete=models.CASCADE, related_name='clases')
+    fecha = models.DateField(verbose_name="Fecha")
+    alcance = models.CharField(max_length=50, verbose_name="Alcance")
+    comision = models.ForeignKey(Comision, on_delete=models.CASCADE, related_name='agenda')
+    inicio_min = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Inicio (minutos)")
+    fin_min = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Fin (minutos)")
+    inicio_etiqueta = models.CharField(max_length=5, blank=True, default='')
+    fin_etiqueta = models.CharField(max_length=5, blank=True, default='')
+    carril = models.PositiveSmallIntegerField(default=0, verbose_name="Carril")
+    color = models.CharField(max_length=7, verbose_name="Color")
+
+    class Meta:
+        verbose_name = "Clase en agenda"
+        verbose_name_plural = "Clases en agenda"
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'alcance', 'comision'], name='agenda_fecha_alcance_comision_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['alcance', 'fecha'], name='agenda_alcance_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} [{self.alcance}] {self.comision_id}"
@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .agenda import actualizar_agenda_rangos
+from .catalogo import invalidar_catalogo
+from .models import Comision, Curso
+
+
+@receiver(post_save, sender=Curso)
+@receiver(post_delete, sender=Curso)
+def invalidar_catalogo_por_curso(sender, instance, **kwargs):
+    transaction.on_commit(invalidar_catalogo)
+
+
+@receiver(post_save, sender=Comision)
+@receiver(post_delete, sender=Comision)
+def invalidar_catalogo_por_comision(sender, instance, **kwargs):
+    # Si la comisión cambió de polo, el catálogo del polo anterior también cambia
+    polos = {instance.fk_id_polo_id, getattr(instance, '_polo_original', instance.fk_id_polo_id)}
+    transaction.on_commit(lambda: invalidar_catalogo(polos))
+
+
+@receiver(post_save, sender=Comision)
+@receiver(post_delete, sender=Comision)
+def invalidar_agenda_por_comision(sender, instance, **kwargs):
+    # Se rearman los días del rango nuevo y del anterior (si cambiaron las fechas)
+    rangos = {(instance.fecha_inicio, instance.fecha_fin)}
+    if hasattr(instance, '_fechas_originales'):
+        rangos.add(instance._fechas_originales)
+    transaction.on_commit(lambda: actualizar_agenda_rangos(rangos))
@@ -1,18 +1,28 @@
 import re
 from datetime import date, timedelta
 
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from apps.modulo_1.roles.models import Estudiante
 from apps.modulo_1.usuario.models import Persona, Usuario
 from apps.modulo_2.inscripciones.models import Inscripcion
-from apps.modulo_3.cursos.models import Comision, Curso, PoloCreativo
+from apps.modulo_3.cursos import calendario
+from apps.modulo_3.cursos.agenda import construir_dias, obtener_agenda
+from apps.modulo_3.cursos.catalogo import MARCADOR_CSRF, construir_catalogo
+from apps.modulo_3.cursos.ciclo_vida import actualizar_estados, ciclo_desactualizado
+from apps.modulo_3.cursos.models import (
+    AgendaComision, AgendaDia, Comision, Curso, EjecucionCicloComisiones, PoloCreativo,
+)
+from apps.modulo_4.asistencia.models import Asistencia, RegistroAsistencia
 
 
 class CursosViewsTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.polo = PoloCreativo.objects.create(
             nombre='Polo Test',
             ciudad='Ushuaia',
@@ -204,3 +214,293 @@ class CursosViewsTests(TestCase):
         html = response.content.decode('utf-8')
         self.assertRegex(html, r"Curso Virtual Global[\s\S]*?Virtual")
         self.assertRegex(html, r"Disponibles:\s*99/100")
+
+
+@override_settings(CATALOGO_CACHE_TTL=3600)
+class CatalogoPublicoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.polo = PoloCreativo.objects.create(nombre='Polo Catálogo', ciudad='Ushuaia', direccion='Test 1', activo=True)
+        self.curso = Curso.objects.create(nombre='Curso Catálogo', estado='Abierto', orden=1)
+        hoy = date.today()
+        self.comision = Comision.objects.create(
+            fk_id_curso=self.curso,
+            fk_id_polo=self.polo,
+            dias_horarios='Martes 10:00 - 12:00',
+            fecha_inicio=hoy,
+            fecha_fin=hoy + timedelta(days=30),
+            estado='Abierta',
+            cupo_maximo=1,
+            publicada=True,
+        )
+        Comision.objects.create(
+            fk_id_curso=Curso.objects.create(nombre='Curso Otro', estado='Abierto', orden=2),
+            fk_id_polo=self.polo,
+            dias_horarios='Jueves 10:00 - 12:00',
+            fecha_inicio=hoy,
+            fecha_fin=hoy + timedelta(days=30),
+            estado='Abierta',
+            publicada=True,
+        )
+        self.url = reverse('cursos_por_polo', args=[self.polo.id_polo])
+
+    def _estudiante(self):
+        persona = Persona.objects.create(
+            dni='11222333', nombre='Eva', apellido='Test', correo='eva@test.com', ciudad_residencia='Ushuaia',
+        )
+        usuario = Usuario.objects.create(persona=persona, contrasena='x')
+        return Estudiante.objects.create(usuario=usuario, nivel_estudios='SE', institucion_actual='Colegio')
+
+    def test_construir_catalogo_usa_una_sola_consulta(self):
+        with self.assertNumQueries(1):
+            cursos = construir_catalogo(self.polo.id_polo)
+        self.assertEqual([c.nombre for c in cursos], ['Curso Catálogo', 'Curso Otro'])
+        self.assertEqual(cursos[0].disponibilidad, 'abierta')
+
+    def test_anonimo_recibe_etag_y_304_si_no_cambio(self):
+        response = self.client.get(self.url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response.headers)
+        self.assertIn('Last-Modified', response.headers)
+        html = response.content.decode('utf-8')
+        self.assertNotIn(MARCADOR_CSRF, html)
+        self.assertIn('Curso Catálogo', html)
+
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = response.cookies[settings.CSRF_COOKIE_NAME].value
+        response = self.client.get(self.url, secure=True)
+        etag = response.headers['ETag']
+        response = self.client.get(self.url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_cupo_lleno_invalida_el_catalogo(self):
+        self.client.get(self.url, secure=True)
+        etag = self.client.get(self.url, secure=True).headers['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Inscripcion.objects.create(estudiante=self._estudiante(), comision=self.comision, estado='confirmado')
+
+        response = self.client.get(self.url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        curso = next(c for c in response.context['cursos'] if c.nombre == 'Curso Catálogo')
+        self.assertEqual(curso.disponibilidad, 'cerrada')
+        self.assertEqual(curso.comisiones_abiertas, [])
+
+    def test_editar_comision_invalida_el_catalogo(self):
+        self.assertEqual(len(construir_catalogo(self.polo.id_polo)), 2)
+        self.client.get(self.url, secure=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.comision.publicada = False
+            self.comision.save()
+
+        response = self.client.get(self.url, secure=True)
+        self.assertEqual([c.nombre for c in response.context['cursos']], ['Curso Otro'])
+
+    @override_settings(CATALOGO_CACHE_TTL=0)
+    def test_sin_cache_compartido_el_catalogo_se_arma_en_cada_request(self):
+        response = self.client.get(self.url, secure=True)
+        self.assertNotIn('ETag', response.headers)
+
+        # Sin invalidación (como en otro worker): el cambio se ve igual en el siguiente request
+        Comision.objects.filter(pk=self.comision.pk).update(publicada=False)
+        response = self.client.get(self.url, secure=True)
+        self.assertEqual([c.nombre for c in response.context['cursos']], ['Curso Otro'])
+
+
+class CalendarioComisionTests(TestCase):
+    def setUp(self):
+        self.curso = Curso.objects.create(nombre='Curso Calendario', estado='Abierto', orden=1)
+
+    def test_guardar_compila_dias_y_horarios(self):
+        comision = Comision.objects.create(
+            fk_id_curso=self.curso,
+            dias_horarios='Lunes y Miércoles 18:00 - 21:00, Sábado 9 a 12hs',
+            fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 3, 31),
+        )
+        comision.refresh_from_db()
+        self.assertEqual(comision.dias_semana_mascara, 0b0100101)
+        self.assertEqual(comision.horarios_compilados, ['18:00-21:00', '09:00-12:00'])
+        self.assertEqual(comision.get_dias_semana_indices(), {0, 2, 5})
+
+        comision.dias_horarios = 'Martes 10:00 - 12:00'
+        comision.save(update_fields=['dias_horarios'])
+        comision.refresh_from_db()
+        self.assertEqual(comision.dias_semana_mascara, 0b0000010)
+
+    def test_horario_del_dia_sale_de_los_rangos_compilados(self):
+        for texto, esperados in (
+            ('Lunes y Miércoles 18:00 - 21:00, Sábado 9 a 12hs', {0: '18:00-21:00', 2: '18:00-21:00', 5: '09:00-12:00'}),
+            ('Lunes 10.30 a 12; Jueves 18hs - 20hs', {0: '10:30-12:00', 3: '18:00-20:00'}),
+        ):
+            mascara, rangos = calendario.compilar_dias_horarios(texto)
+            self.assertEqual(calendario.dias_desde_mascara(mascara), set(esperados))
+            for dia, esperado in esperados.items():
+                rango = calendario.rango_horario_del_dia(texto, dia)
+                self.assertEqual(f"{rango['start_label']}-{rango['end_label']}", esperado)
+                self.assertIn(esperado, rangos)
+        self.assertIsNone(calendario.rango_horario_del_dia('Lunes (a confirmar)', 0))
+
+    def test_total_y_proxima_clase_coinciden_con_recorrido_diario(self):
+        comision = Comision.objects.create(
+            fk_id_curso=self.curso,
+            dias_horarios='Lun, Mie y Vie',
+            fecha_inicio=date(2025, 1, 3),
+            fecha_fin=date(2025, 6, 17),
+        )
+        dias = {0, 2, 4}
+        for hasta in (date(2025, 1, 3), date(2025, 1, 10), date(2025, 2, 28), date(2025, 6, 17)):
+            esperado = sum(
+                1 for n in range((hasta - comision.fecha_inicio).days + 1)
+                if (comision.fecha_inicio + timedelta(days=n)).weekday() in dias
+            )
+            self.assertEqual(comision.get_total_clases_programadas(hasta=hasta), esperado)
+            self.assertEqual(len(comision.get_fechas_clase_programadas(hasta=hasta)), esperado)
+
+        self.assertEqual(comision.get_proxima_clase(desde=date(2024, 12, 1)), date(2025, 1, 3))
+        self.assertEqual(comision.get_proxima_clase(desde=date(2025, 1, 4)), date(2025, 1, 6))
+        self.assertEqual(comision.get_proxima_clase(desde=date(2025, 6, 17)), None)
+        self.assertEqual(comision.get_proxima_clase(desde=date(2025, 6, 16)), date(2025, 6, 16))
+
+
+class CicloVidaComisionTests(TestCase):
+    def setUp(self):
+        self.hoy = date(2025, 3, 10)
+        self.curso = Curso.objects.create(nombre='Curso Ciclo', estado='Abierto', orden=1)
+
+    def _comision(self, estado, inicio, fin):
+        return Comision.objects.create(
+            fk_id_curso=self.curso,
+            dias_horarios='Lunes 10:00 - 12:00',
+            fecha_inicio=inicio,
+            fecha_fin=fin,
+            estado=estado,
+            publicada=True,
+        )
+
+    def test_transiciones_por_fecha_e_idempotencia(self):
+        cerrada_iniciada = self._comision('Cerrada', date(2025, 3, 3), date(2025, 3, 31))
+        abierta_iniciada = self._comision('Abierta', date(2025, 3, 3), date(2025, 3, 31))
+        terminada = self._comision('En proceso', date(2025, 2, 3), date(2025, 3, 3))
+        termina_hoy = self._comision('Abierta', date(2025, 2, 3), self.hoy)
+        self.assertTrue(ciclo_desactualizado(self.hoy))
+
+        ejecucion, procesada = actualizar_estados(hoy=self.hoy)
+        self.assertTrue(procesada)
+        self.assertEqual((ejecucion.iniciadas, ejecucion.finalizadas), (1, 1))
+        estados = dict(Comision.objects.values_list('pk', 'estado'))
+        self.assertEqual(estados[cerrada_iniciada.pk], 'En proceso')
+        self.assertEqual(estados[abierta_iniciada.pk], 'Abierta')
+        self.assertEqual(estados[terminada.pk], 'Finalizada')
+        self.assertEqual(estados[termina_hoy.pk], 'Abierta')
+        self.assertFalse(ciclo_desactualizado(self.hoy))
+
+        Comision.objects.filter(pk=termina_hoy.pk).update(fecha_fin=date(2025, 3, 1))
+        with self.assertNumQueries(1):
+            _, procesada = actualizar_estados(hoy=self.hoy)
+        self.assertFalse(procesada)
+
+        ejecucion, procesada = actualizar_estados(hoy=self.hoy, forzar=True)
+        self.assertTrue(procesada)
+        self.assertEqual(ejecucion.finalizadas, 2)
+        self.assertEqual(EjecucionCicloComisiones.objects.count(), 1)
+
+    def test_finalizar_congela_habilitacion_del_certificado(self):
+        comision = self._comision('En proceso', date(2025, 3, 3), date(2025, 3, 3))
+        persona = Persona.objects.create(dni='44000001', nombre='Ana', apellido='Ciclo', correo='ana.ciclo@test.com')
+        usuario = Usuario.objects.create(persona=persona, contrasena='x')
+        estudiante = Estudiante.objects.create(usuario=usuario, nivel_estudios='SE', institucion_actual='Colegio')
+        inscripcion = Inscripcion.objects.create(estudiante=estudiante, comision=comision, estado='confirmado')
+        Asistencia.objects.create(inscripcion=inscripcion, fecha_clase=date(2025, 3, 3), presente=True)
+        RegistroAsistencia.objects.filter(inscripcion=inscripcion).update(cumple_requisito_certificado=False)
+
+        actualizar_estados(hoy=self.hoy)
+
+        comision.refresh_from_db()
+        self.assertEqual(comision.estado, 'Finalizada')
+        self.assertTrue(RegistroAsistencia.objects.get(inscripcion=inscripcion).cumple_requisito_certificado)
+
+
+class AgendaComisionesTests(TestCase):
+    def setUp(self):
+        self.lunes = date(2025, 3, 10)
+        self.curso = Curso.objects.create(nombre='Curso Agenda', estado='Abierto', orden=1)
+        self.polo = PoloCreativo.objects.create(nombre='Polo Ushuaia', ciudad='Ushuaia', direccion='Calle 1')
+
+    def _comision(self, dias_horarios, **extra):
+        datos = {
+            'fk_id_curso': self.curso,
+            'dias_horarios': dias_horarios,
+            'fecha_inicio': date(2025, 3, 1),
+            'fecha_fin': date(2025, 3, 31),
+            'estado': 'Abierta',
+            'fk_id_polo': self.polo,
+        }
+        datos.update(extra)
+        return Comision.objects.create(**datos)
+
+    def test_carriles_alcances_y_lectura_por_rango(self):
+        manana = self._comision('Lunes 10:00 - 12:00')
+        superpuesta = self._comision('Lunes 11:00 - 13:00')
+        tarde = self._comision('Lunes 12:00 - 14:00. Miércoles 18:00 - 20:00')
+        virtual = self._comision('Lunes 19:00 - 21:00', modalidad='Virtual', fk_id_polo=None)
+        self._comision('Martes 10:00 - 12:00')
+
+        # Un día fuera de la ventana construida se calcula en memoria, sin escribir
+        clases = {clase.comision_id: clase for clase in obtener_agenda(AgendaComision.ALCANCE_TODAS, self.lunes)}
+        self.assertFalse(AgendaDia.objects.exists())
+        self.assertEqual(set(clases), {manana.pk, superpuesta.pk, tarde.pk, virtual.pk})
+        self.assertEqual(clases[manana.pk].carril, 0)
+        self.assertEqual(clases[superpuesta.pk].carril, 1)
+        self.assertEqual(clases[tarde.pk].carril, 0)
+        self.assertEqual((clases[tarde.pk].inicio_etiqueta, clases[tarde.pk].fin_etiqueta), ('12:00', '14:00'))
+        self.assertEqual(clases[tarde.pk].comision.fk_id_curso, self.curso)
+
+        # La comisión virtual sin polo aparece en todas las ciudades
+        self.assertEqual(len(obtener_agenda('Rio Grande', self.lunes)), 1)
+        self.assertEqual(len(obtener_agenda('Ushuaia', self.lunes)), 4)
+
+        # Con los días construidos, leer una semana es una sola consulta por rango
+        semana_fechas = [self.lunes + timedelta(days=i) for i in range(7)]
+        construir_dias(semana_fechas)
+        with self.assertNumQueries(2):
+            semana = obtener_agenda('Ushuaia', self.lunes, semana_fechas[-1])
+        self.assertEqual(
+            [(clase.fecha, clase.comision_id) for clase in semana],
+            [(clase.fecha, clase.comision_id) for clase in obtener_agenda('Ushuaia', self.lunes, semana_fechas[-1])],
+        )
+        miercoles = [clase for clase in semana if clase.fecha == self.lunes + timedelta(days=2)]
+        self.assertEqual([(clase.comision_id, clase.inicio_etiqueta) for clase in miercoles], [(tarde.pk, '18:00')])
+
+    def test_guardar_comision_rearma_la_ventana_proxima(self):
+        hoy = date.today()
+        dia = calendario.DIAS_TOKENS[hoy.weekday()]
+        nombre_dia = sorted(dia, key=len)[-1].capitalize()
+        with self.captureOnCommitCallbacks(execute=True):
+            comision = self._comision(
+                f'{nombre_dia} 10:00 - 12:00', fecha_inicio=hoy - timedelta(days=7), fecha_fin=hoy + timedelta(days=60),
+            )
+        lejano = hoy + timedelta(days=settings.AGENDA_DIAS_CONSTRUIDOS + 7)
+        self.assertTrue(AgendaDia.objects.filter(fecha=hoy).exists())
+        self.assertFalse(AgendaDia.objects.filter(fecha=lejano).exists())
+
+        comision = Comision.objects.get(pk=comision.pk)
+        comision.dias_horarios = f'{nombre_dia} 15:00 - 17:00'
+        with self.captureOnCommitCallbacks(execute=True):
+            comision.save()
+        with self.assertNumQueries(2):
+            clase, = obtener_agenda(AgendaComision.ALCANCE_TODAS, hoy)
+        self.assertEqual(clase.inicio_etiqueta, '15:00')
+        self.assertEqual(obtener_agenda(AgendaComision.ALCANCE_TODAS, lejano)[0].inicio_etiqueta, '15:00')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            comision.delete()
+        self.assertEqual(obtener_agenda(AgendaComision.ALCANCE_TODAS, hoy), [])
+        self.assertTrue(AgendaDia.objects.filter(fecha=hoy).exists())
+
+    def test_ciclo_diario_arma_la_ventana(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            actualizar_estados(hoy=self.lunes)
+        self.assertEqual(AgendaDia.objects.count(), settings.AGENDA_DIAS_CONSTRUIDOS + 1)
+        self.assertEqual(AgendaDia.objects.order_by('fecha').first().fecha, self.lunes)
\ No newline at end of file
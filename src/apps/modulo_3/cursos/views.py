@@ -3,7 +3,7 @@ from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.urls import reverse_lazy
-from django.db.models import Count, F, Max, Q
+from .catalogo import obtener_catalogo, respuesta_catalogo
 from .models import Curso, Comision
 from apps.modulo_1.roles.models import Estudiante
 from apps.modulo_2.inscripciones.models import Inscripcion
@@ -11,29 +11,15 @@ from apps.modulo_2.inscripciones.models import Inscripcion
 
 class CursoListView(ListView):
     """Vista pública de cursos disponibles"""
-    model = Curso
     template_name = 'cursos/lista.html'
     context_object_name = 'cursos'
-    
+
     def get_queryset(self):
-        return Curso.objects.filter(estado='Abierto', comision__publicada=True).distinct()
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        # Agregar comisiones abiertas para cada curso
-        for curso in context['cursos']:
-            curso.comisiones_abiertas = curso.comision_set.filter(
-                estado='Abierta',
-                publicada=True,
-            ).annotate(
-                inscritos_count_annotated=Count(
-                    'inscripciones',
-                    filter=~Q(inscripciones__estado__in=['lista_espera', 'cancelada']),
-                )
-            ).filter(
-                inscritos_count_annotated__lt=F('cupo_maximo')
-            ).order_by('id_comision')
-        return context
+        # Catálogo cacheado: cursos abiertos con sus comisiones abiertas y con cupo ya resueltas
+        return obtener_catalogo()
+
+    def render_to_response(self, context, **response_kwargs):
+        return respuesta_catalogo(self.request, self.get_template_names()[0], context)
 
 
 # -----------------------------------------------------------------------------
@@ -1,6 +1,7 @@
 from django import forms
 from .models import Docente
 from apps.modulo_1.usuario.models import Persona, Usuario
+from apps.modulo_1.usuario.busqueda import indexar_personas
 
 class DocenteForm(forms.ModelForm):
     """
@@ -65,6 +66,8 @@ class DocenteForm(forms.ModelForm):
             # Actualizando
             Persona.objects.filter(pk=self.instance.usuario.persona.pk).update(**datos_persona)
             persona = self.instance.usuario.persona
+            # update() no dispara post_save: reindexar para el buscador
+            indexar_personas([persona.pk])
         else:
             # Creando nuevo
             persona = Persona.objects.create(**datos_persona)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Asistencia, RegistroAsistencia
+from .models import Asistencia, RegistroAsistencia, ResumenAsistenciaComision
 
 
 @admin.register(Asistencia)
@@ -50,3 +50,11 @@ class RegistroAsistenciaAdmin(admin.ModelAdmin):
         for registro in queryset:
             registro.calcular_porcentaje()
         self.message_user(request, f'Se recalcularon {queryset.count()} registros.')
+
+
+@admin.register(ResumenAsistenciaComision)
+class ResumenAsistenciaComisionAdmin(admin.ModelAdmin):
+    list_display = ('comision', 'fecha', 'inscritos', 'presentes', 'ausentes')
+    list_filter = ('comision__fk_id_curso',)
+    date_hierarchy = 'fecha'
+    readonly_fields = ('comision', 'fecha', 'inscritos', 'presentes', 'ausentes')
@@ -0,0 +1,294 @@
+"""
+Motor incremental de agregación de asistencias.
+
+Cada alta, cambio o baja de una Asistencia se traduce en un delta sobre el
+contador ``clases_asistidas`` de su RegistroAsistencia. Los totales de clases
+se calculan una sola vez por comisión y se aplican a todos los registros
+afectados con un único ``bulk_update``.
+
+Fuera de un lote los cambios se aplican inmediatamente. Dentro de
+``lote_asistencias()`` se acumulan y se aplican una sola vez al cerrar el
+bloque, dentro de la misma transacción (p.ej. una toma de asistencia completa).
+
+Al aplicar un lote también se recalculan los grupos (comisión, fecha) tocados del
+resumen diario por comisión (ver resumen.py).
+"""
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from apps.modulo_2.inscripciones.models import Inscripcion
+from apps.modulo_5.estadistica.materializacion import marcar_desactualizadas
+
+from .resumen import actualizar_resumen
+
+
+PORCENTAJE_MINIMO_CERTIFICADO = 80
+
+# Marca un estado previo que no se conoce (la instancia no se leyó de la base)
+DESCONOCIDO = object()
+
+_estado = threading.local()
+
+
+class LoteAsistencias:
+    """Acumula deltas de asistencia hasta que se aplican en bloque"""
+
+    def __init__(self):
+        self.deltas = defaultdict(int)
+        self.inscripciones = set()
+        self.recontar = set()
+        self.crear_faltantes = set()
+        self.comisiones_con_fechas_nuevas = set()
+        self.clases = defaultdict(set)
+        self.resumen_completo = set()
+
+    def registrar(self, inscripcion_id, comision_id, antes, despues):
+        """
+        Registra un cambio de asistencia.
+        ``antes`` y ``despues`` son tuplas (fecha_clase, presente), None si la fila
+        no existía / fue eliminada, o DESCONOCIDO si no se conoce el estado previo.
+        """
+        hoy = date.today()
+        self.inscripciones.add(inscripcion_id)
+        if despues is not None:
+            self.crear_faltantes.add(inscripcion_id)
+
+        if antes is DESCONOCIDO:
+            self.recontar.add(inscripcion_id)
+            if comision_id is not None:
+                self.comisiones_con_fechas_nuevas.add(comision_id)
+                self.resumen_completo.add(comision_id)
+            return
+
+        self.deltas[inscripcion_id] += _aporte(despues, hoy) - _aporte(antes, hoy)
+
+        fecha_antes = antes[0] if antes else None
+        fecha_despues = despues[0] if despues else None
+        if comision_id is not None and fecha_antes != fecha_despues:
+            self.comisiones_con_fechas_nuevas.add(comision_id)
+        if comision_id is not None:
+            self.clases[comision_id].update(fecha for fecha in (fecha_antes, fecha_despues) if fecha)
+
+    @property
+    def vacio(self):
+        return not self.inscripciones
+
+    def aplicar(self):
+        if self.vacio:
+            return []
+        registros = _aplicar_lote(self)
+        actualizar_resumen(self.clases, self.resumen_completo)
+        self.deltas.clear()
+        self.inscripciones.clear()
+        self.recontar.clear()
+        self.crear_faltantes.clear()
+        self.comisiones_con_fechas_nuevas.clear()
+        self.clases.clear()
+        self.resumen_completo.clear()
+        return registros
+
+
+def _aporte(estado, hoy):
+    if not estado:
+        return 0
+    fecha_clase, presente = estado
+    return 1 if presente and fecha_clase and fecha_clase <= hoy else 0
+
+
+def _lote_actual():
+    return getattr(_estado, 'lote', None)
+
+
+@contextmanager
+def lote_asistencias():
+    """
+    Difiere la actualización de RegistroAsistencia hasta el final del bloque.
+    El bloque corre en una transacción; los deltas se aplican antes del commit.
+    Los lotes anidados se integran en el lote exterior.
+    """
+    if _lote_actual() is not None:
+        yield _lote_actual()
+        return
+
+    lote = LoteAsistencias()
+    _estado.lote = lote
+    try:
+        with transaction.atomic():
+            yield lote
+            lote.aplicar()
+    finally:
+        _estado.lote = None
+
+
+def registrar_cambio(inscripcion_id, comision_id, antes, despues):
+    """Punto de entrada de las señales: aplica ya o acumula en el lote activo"""
+    lote = _lote_actual()
+    if lote is not None:
+        lote.registrar(inscripcion_id, comision_id, antes, despues)
+        return
+
+    lote = LoteAsistencias()
+    lote.registrar(inscripcion_id, comision_id, antes, despues)
+    lote.aplicar()
+
+
+def _fechas_dependen_de_asistencias(comision):
+    """Sin programación (o sin fecha de inicio) el total surge de las fechas registradas"""
+    return not comision.fecha_inicio or not comision.get_dias_semana_indices()
+
+
+def _total_por_fechas_registradas(comision, hasta):
+    from .models import Asistencia
+
+    return Asistencia.objects.filter(
+        inscripcion__comision=comision,
+        fecha_clase__lte=hasta,
+    ).values('fecha_clase').distinct().count()
+
+
+def totales_comision(comision, hoy=None):
+    """
+    Retorna (total_clases_hasta_hoy, total_clases_curso).
+    total_clases_curso es None mientras la comisión no haya finalizado.
+    """
+    hoy = hoy or date.today()
+
+    total_clases = comision.get_total_clases_programadas(hasta=hoy)
+    if total_clases is None:
+        total_clases = _total_por_fechas_registradas(comision, hoy)
+
+    total_curso = None
+    if comision.fecha_fin and comision.fecha_fin <= hoy:
+        total_curso = comision.get_total_clases_programadas(hasta=comision.fecha_fin)
+        if total_curso is None:
+            total_curso = _total_por_fechas_registradas(comision, comision.fecha_fin)
+
+    return total_clases, total_curso
+
+
+def aplicar_totales(registro, total_clases, total_curso):
+    """Actualiza porcentaje y requisito de certificado a partir de los contadores"""
+    registro.total_clases = total_clases
+    if total_clases > 0:
+        registro.porcentaje_asistencia = (registro.clases_asistidas / total_clases) * 100
+    else:
+        registro.porcentaje_asistencia = 0
+
+    cumple_certificado = False
+    if total_curso:
+        porcentaje_certificado = (registro.clases_asistidas / total_curso) * 100
+        cumple_certificado = PORCENTAJE_MINIMO_CERTIFICADO <= porcentaje_certificado <= 100
+    registro.cumple_requisito_certificado = cumple_certificado
+    return registro
+
+
+def _contar_asistidas(inscripcion_ids, hoy):
+    from .models import Asistencia
+
+    filas = Asistencia.objects.filter(
+        inscripcion_id__in=inscripcion_ids,
+        presente=True,
+        fecha_clase__lte=hoy,
+    ).values('inscripcion_id').annotate(total=Count('pk'))
+    return {fila['inscripcion_id']: fila['total'] for fila in filas}
+
+
+def _aplicar_lote(lote):
+    from .models import RegistroAsistencia
+
+    hoy = date.today()
+    inscripciones = {
+        insc.id: insc
+        for insc in Inscripcion.objects.filter(id__in=lote.inscripciones).select_related('comision')
+    }
+    if not inscripciones:
+        return []
+
+    comisiones = {insc.comision_id: insc.comision for insc in inscripciones.values()}
+    comisiones_completas = {
+        comision_id
+        for comision_id in lote.comisiones_con_fechas_nuevas
+        if comision_id in comisiones and _fechas_dependen_de_asistencias(comisiones[comision_id])
+    }
+    totales = {comision_id: totales_comision(comision, hoy) for comision_id, comision in comisiones.items()}
+
+    filtro = Q(inscripcion_id__in=inscripciones.keys())
+    if comisiones_completas:
+        filtro |= Q(inscripcion__comision_id__in=comisiones_completas)
+    registros = list(RegistroAsistencia.objects.select_for_update().filter(filtro).select_related('inscripcion'))
+
+    faltantes = (set(inscripciones) & lote.crear_faltantes) - {registro.inscripcion_id for registro in registros}
+    asistidas = {}
+    if faltantes or lote.recontar:
+        asistidas = _contar_asistidas(faltantes | lote.recontar, hoy)
+
+    if faltantes:
+        nuevos = []
+        for inscripcion_id in faltantes:
+            registro = RegistroAsistencia(
+                inscripcion=inscripciones[inscripcion_id],
+                clases_asistidas=asistidas.get(inscripcion_id, 0),
+            )
+            aplicar_totales(registro, *totales[inscripciones[inscripcion_id].comision_id])
+            nuevos.append(registro)
+        RegistroAsistencia.objects.bulk_create(nuevos, ignore_conflicts=True)
+
+    for registro in registros:
+        if registro.inscripcion_id in lote.recontar:
+            registro.clases_asistidas = asistidas.get(registro.inscripcion_id, 0)
+        else:
+            registro.clases_asistidas = max(registro.clases_asistidas + lote.deltas.get(registro.inscripcion_id, 0), 0)
+        aplicar_totales(registro, *totales[registro.inscripcion.comision_id])
+
+    if registros:
+        RegistroAsistencia.objects.bulk_update(
+            registros,
+            ['total_clases', 'clases_asistidas', 'porcentaje_asistencia', 'cumple_requisito_certificado'],
+        )
+    marcar_desactualizadas(comisiones)
+    return registros
+
+
+def recalcular_registros(inscripciones_qs, hoy=None):
+    """
+    Recalcula desde cero los registros de las inscripciones indicadas.
+    Usado para reconciliar contadores; hace una consulta de conteo por lote, no por inscripción.
+    """
+    from .models import RegistroAsistencia
+
+    hoy = hoy or date.today()
+    inscripciones = list(inscripciones_qs.select_related('comision'))
+    if not inscripciones:
+        return 0
+
+    asistidas = _contar_asistidas([insc.id for insc in inscripciones], hoy)
+    totales = {}
+    existentes = {
+        registro.inscripcion_id: registro
+        for registro in RegistroAsistencia.objects.filter(inscripcion__in=inscripciones)
+    }
+
+    nuevos, actualizados = [], []
+    for inscripcion in inscripciones:
+        if inscripcion.comision_id not in totales:
+            totales[inscripcion.comision_id] = totales_comision(inscripcion.comision, hoy)
+        registro = existentes.get(inscripcion.id) or RegistroAsistencia(inscripcion=inscripcion)
+        registro.clases_asistidas = asistidas.get(inscripcion.id, 0)
+        aplicar_totales(registro, *totales[inscripcion.comision_id])
+        (actualizados if registro.pk else nuevos).append(registro)
+
+    with transaction.atomic():
+        if nuevos:
+            RegistroAsistencia.objects.bulk_create(nuevos, ignore_conflicts=True)
+        if actualizados:
+            RegistroAsistencia.objects.bulk_update(
+                actualizados,
+                ['total_clases', 'clases_asistidas', 'porcentaje_asistencia', 'cumple_requisito_certificado'],
+            )
+        marcar_desactualizadas(totales)
+    return len(inscripciones)
@@ -6,10 +6,29 @@ from apps.modulo_2.inscripciones.models import Inscripcion
 class Command(BaseCommand):
     help = 'Crea RegistroAsistencia faltantes para inscripciones confirmadas'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recalcular',
+            action='store_true',
+            help='Recalcula desde cero los contadores de todos los registros (reconciliación)',
+        )
+        parser.add_argument('--lote', type=int, default=500, help='Inscripciones por lote al recalcular')
+
     def handle(self, *args, **options):
         RegistroAsistencia = self._get_model_registro()
 
         qs = Inscripcion.objects.filter(estado='confirmado')
+
+        if options['recalcular']:
+            from apps.modulo_4.asistencia.agregacion import recalcular_registros
+
+            ids = list(qs.order_by('id').values_list('id', flat=True))
+            procesados = 0
+            for inicio in range(0, len(ids), options['lote']):
+                procesados += recalcular_registros(Inscripcion.objects.filter(id__in=ids[inicio:inicio + options['lote']]))
+            self.stdout.write(f'Registros recalculados: {procesados}')
+            return
+
         creados = 0
         existentes = 0
 
@@ -27,4 +46,3 @@ class Command(BaseCommand):
         from django.apps import apps as django_apps
 
         return django_apps.get_model('asistencia', 'RegistroAsistencia')
-
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.modulo_3.cursos.models import Comision
+from apps.modulo_4.asistencia.resumen import recalcular_resumen
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el resumen diario de asistencia por comisión a partir de las asistencias registradas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comision', type=int, action='append', help='ID de comisión (repetible); por defecto todas')
+        parser.add_argument('--lote', type=int, default=200, help='Comisiones por lote')
+
+    def handle(self, *args, **options):
+        comisiones = Comision.objects.order_by('pk')
+        if options['comision']:
+            comisiones = comisiones.filter(pk__in=options['comision'])
+        ids = list(comisiones.values_list('pk', flat=True))
+
+        filas = 0
+        for inicio in range(0, len(ids), options['lote']):
+            filas += recalcular_resumen(ids[inicio:inicio + options['lote']])
+        self.stdout.write(f'Comisiones procesadas: {len(ids)}')
+        self.stdout.write(f'Filas de resumen: {filas}')
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def calcular_resumen(apps, schema_editor):
+    Asistencia = apps.get_model('asistencia', 'Asistencia')
+    ResumenAsistenciaComision = apps.get_model('asistencia', 'ResumenAsistenciaComision')
+
+    filas = Asistencia.objects.filter(inscripcion__estado='confirmado').values(
+        'inscripcion__comision_id', 'fecha_clase',
+    ).annotate(
+        inscritos=Count('pk'),
+        presentes=Count('pk', filter=Q(presente=True)),
+    ).order_by()
+    ResumenAsistenciaComision.objects.bulk_create(
+        (
+            ResumenAsistenciaComision(
+                comision_id=fila['inscripcion__comision_id'],
+                fecha=fila['fecha_clase'],
+                inscritos=fila['inscritos'],
+                presentes=fila['presentes'],
+                ausentes=fila['inscritos'] - fila['presentes'],
+            )
+            for fila in filas.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asistencia', '0001_initial'),
+        ('cursos', '0009_agenda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenAsistenciaComision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha de la Clase')),
+                ('inscritos', models.PositiveIntegerField(default=0, verbose_name='Inscriptos con asistencia tomada')),
+                ('presentes', models.PositiveIntegerField(default=0, verbose_name='Presentes')),
+                ('ausentes', models.PositiveIntegerField(default=0, verbose_name='Ausentes')),
+                ('comision', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumen_asistencia', to='cursos.comision', verbose_name='Comisión')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Asistencia por Comisión',
+                'verbose_name_plural': 'Resúmenes de Asistencia por Comisión',
+                'ordering': ['comision', '-fecha'],
+                'indexes': [models.Index(fields=['fecha'], name='resumen_asistencia_fecha')],
+                'constraints': [models.UniqueConstraint(fields=('comision', 'fecha'), name='resumen_asistencia_comision_fecha')],
+            },
+        ),
+        migrations.RunPython(calcular_resumen, migrations.RunPython.noop),
+    ]
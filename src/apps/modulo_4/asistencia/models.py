@@ -37,24 +37,45 @@ class Asistencia(models.Model):
             nombre = f"Inscripcion#{self.inscripcion_id}"
         return f"{nombre} - {self.fecha_clase} - {estado}"
 
+    @staticmethod
+    def validar_fecha_para_comision(comision, fecha_clase):
+        """Valida que la fecha caiga dentro del calendario de la comisión y no sea futura"""
+        # Los contadores suman cada asistencia al guardarla: una clase futura no contaría nunca
+        if fecha_clase and fecha_clase > date.today():
+            raise ValidationError({
+                'fecha_clase': "No se puede registrar la asistencia de una clase que todavía no se dictó."
+            })
+        if comision.fecha_inicio and fecha_clase < comision.fecha_inicio:
+            raise ValidationError({
+                'fecha_clase': f"La fecha de asistencia no puede ser anterior al inicio del curso ({comision.fecha_inicio})"
+            })
+        if comision.fecha_fin and fecha_clase > comision.fecha_fin:
+            raise ValidationError({
+                'fecha_clase': f"La fecha de asistencia no puede ser posterior al fin del curso ({comision.fecha_fin})"
+            })
+        dias = comision.get_dias_semana_indices() if hasattr(comision, 'get_dias_semana_indices') else set()
+        if dias and fecha_clase and fecha_clase.weekday() not in dias:
+            raise ValidationError({
+                'fecha_clase': "La fecha de asistencia no coincide con los días establecidos para la comisión."
+            })
+
     def clean(self):
         super().clean()
         if self.inscripcion_id and self.inscripcion.comision:
-            comision = self.inscripcion.comision
-            if comision.fecha_inicio and self.fecha_clase < comision.fecha_inicio:
-                raise ValidationError({
-                    'fecha_clase': f"La fecha de asistencia no puede ser anterior al inicio del curso ({comision.fecha_inicio})"
-                })
-            if comision.fecha_fin and self.fecha_clase > comision.fecha_fin:
-                raise ValidationError({
-                    'fecha_clase': f"La fecha de asistencia no puede ser posterior al fin del curso ({comision.fecha_fin})"
-                })
-            dias = comision.get_dias_semana_indices() if hasattr(comision, 'get_dias_semana_indices') else set()
-            if dias and self.fecha_clase and self.fecha_clase.weekday() not in dias:
-                raise ValidationError({
-                    'fecha_clase': "La fecha de asistencia no coincide con los días establecidos para la comisión."
-                })
+            self.validar_fecha_para_comision(self.inscripcion.comision, self.fecha_clase)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estado leído de la base, usado por las señales para calcular deltas
+        instance._estado_original = (instance.__dict__.get('fecha_clase'), instance.__dict__.get('presente'))
+        return instance
+
+    @property
+    def estado_original(self):
+        """(fecha_clase, presente) tal como estaba en la base, o None si es nueva"""
+        return getattr(self, '_estado_original', None)
+
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
@@ -126,4 +147,40 @@ class RegistroAsistencia(models.Model):
         except Exception:
             nombre = f"Inscripcion#{self.inscripcion_id}"
         return f"{nombre} - {self.porcentaje_asistencia}%"
-    
\ No newline at end of file
+    
+
+class ResumenAsistenciaComision(models.Model):
+    """
+    Asistencia de una comisión en una fecha de clase, sobre las inscripciones
+    confirmadas. Se mantiene junto con cada escritura de Asistencia (ver resumen.py).
+    """
+    comision = models.ForeignKey(
+        'cursos.Comision',
+        on_delete=models.CASCADE,
+        related_name='resumen_asistencia',
+        verbose_name="Comisión"
+    )
+    fecha = models.DateField(verbose_name="Fecha de la Clase")
+    inscritos = models.PositiveIntegerField(default=0, verbose_name="Inscriptos con asistencia tomada")
+    presentes = models.PositiveIntegerField(default=0, verbose_name="Presentes")
+    ausentes = models.PositiveIntegerField(default=0, verbose_name="Ausentes")
+
+    class Meta:
+        verbose_name = "Resumen de Asistencia por Comisión"
+        verbose_name_plural = "Resúmenes de Asistencia por Comisión"
+        constraints = [
+            models.UniqueConstraint(fields=['comision', 'fecha'], name='resumen_asistencia_comision_fecha'),
+        ]
+        indexes = [
+            models.Index(fields=['fecha'], name='resumen_asistencia_fecha'),
+        ]
+        ordering = ['comision', '-fecha']
+
+    @property
+    def porcentaje(self):
+        if not self.inscritos:
+            return 0
+        return max(min(int(round((self.presentes / self.inscritos) * 100, 0)), 100), 0)
+
+    def __str__(self):
+        return f"Comisión {self.comision_id} - {self.fecha} - {self.presentes}/{self.inscritos}"
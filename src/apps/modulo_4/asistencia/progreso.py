@@ -0,0 +1,162 @@
+"""
+Progreso de un estudiante en sus cursos (mi_progreso y dashboard del estudiante).
+
+Es de solo lectura: los RegistroAsistencia los mantiene el camino de escritura
+(confirmación de la inscripción, cada asistencia vía agregacion.py y el cierre de la
+comisión en el ciclo diario). Acá solo se leen, junto con las inscripciones, en una
+consulta; los totales de clases y la próxima clase salen del calendario compilado de
+la comisión, en memoria.
+
+Las comisiones sin programación (o sin clases programadas a la fecha) cuentan las
+fechas registradas, como ``agregacion.totales_comision``: se leen en una sola
+consulta adicional para todas ellas.
+"""
+from bisect import bisect_right
+from datetime import date
+
+from django.db.models import Count
+
+from apps.modulo_2.inscripciones.models import Inscripcion
+from apps.modulo_3.cursos import calendario
+
+from .agregacion import aplicar_totales
+
+
+class ProgresoInscripcion:
+    """Progreso de una inscripción, calculado sin escribir en la base"""
+
+    def __init__(self, inscripcion, total_clases, clases_a_la_fecha, asistidas, cumple_certificado, proxima_clase):
+        self.inscripcion = inscripcion
+        self.comision = inscripcion.comision
+        self.total_clases = total_clases
+        self.clases_a_la_fecha = clases_a_la_fecha
+        self.asistidas = asistidas
+        self.cumple_certificado = cumple_certificado
+        self.proxima_clase = proxima_clase
+
+    @property
+    def porcentaje(self):
+        """Asistencia sobre las clases dictadas a la fecha (como RegistroAsistencia.porcentaje_asistencia)"""
+        if not self.clases_a_la_fecha:
+            return 0
+        return int(round((self.asistidas / self.clases_a_la_fecha) * 100, 2))
+
+    @property
+    def completado(self):
+        return self.porcentaje >= 100 or self.cumple_certificado
+
+
+def _programadas(comision, inicio, hasta):
+    """``Comision.get_total_clases_programadas(hasta)`` con el inicio ya resuelto"""
+    mascara = comision.get_dias_semana_mascara()
+    if not mascara or not inicio:
+        return None
+    fin = comision.fecha_fin or hasta
+    if fin > hasta:
+        fin = hasta
+    if fin < inicio:
+        return None
+    return calendario.contar_clases(mascara, inicio, fin) or None
+
+
+def _necesita_fechas_registradas(comision, hoy):
+    if not comision.fecha_inicio or _programadas(comision, comision.fecha_inicio, hoy) is None:
+        return True
+    return bool(comision.fecha_fin and comision.fecha_fin <= hoy
+                and _programadas(comision, comision.fecha_inicio, comision.fecha_fin) is None)
+
+
+def _fechas_registradas(comision_ids):
+    """Fechas distintas con asistencia por comisión, ordenadas (una consulta)"""
+    from .models import Asistencia
+
+    if not comision_ids:
+        return {}
+    fechas = {}
+    for comision_id, fecha in Asistencia.objects.filter(
+        inscripcion__comision_id__in=comision_ids,
+    ).values_list('inscripcion__comision_id', 'fecha_clase').distinct().order_by('inscripcion__comision_id', 'fecha_clase'):
+        fechas.setdefault(comision_id, []).append(fecha)
+    return fechas
+
+
+def _totales(comision, fechas, hoy):
+    """(total del curso, total a la fecha, total para el certificado) como ``totales_comision``"""
+    inicio = comision.fecha_inicio or (fechas[0] if fechas else None)
+
+    def hasta(limite):
+        programadas = _programadas(comision, inicio, limite)
+        return programadas if programadas is not None else bisect_right(fechas, limite)
+
+    a_la_fecha = hasta(hoy)
+    total_curso = None
+    if comision.fecha_fin and comision.fecha_fin <= hoy:
+        total_curso = hasta(comision.fecha_fin)
+    total = _programadas(comision, inicio, comision.fecha_fin or hoy)
+    return (total if total is not None else a_la_fecha), a_la_fecha, total_curso
+
+
+def _asistidas_sin_registro(inscripcion_ids, hoy):
+    from .models import Asistencia
+
+    if not inscripcion_ids:
+        return {}
+    return dict(
+        Asistencia.objects.filter(
+            inscripcion_id__in=inscripcion_ids,
+            presente=True,
+            fecha_clase__lte=hoy,
+        ).values('inscripcion_id').annotate(total=Count('pk')).values_list('inscripcion_id', 'total')
+    )
+
+
+def progreso_inscripciones(inscripciones, hoy=None):
+    """Lista de ``ProgresoInscripcion`` para un queryset de inscripciones"""
+    from .models import RegistroAsistencia
+
+    hoy = hoy or date.today()
+    inscripciones = list(inscripciones.select_related(
+        'comision__fk_id_curso', 'comision__fk_id_polo', 'registro_asistencia',
+    ))
+
+    comisiones = {inscripcion.comision_id: inscripcion.comision for inscripcion in inscripciones}
+    fechas = _fechas_registradas([
+        comision_id for comision_id, comision in comisiones.items()
+        if _necesita_fechas_registradas(comision, hoy)
+    ])
+    totales = {comision_id: _totales(comision, fechas.get(comision_id, []), hoy) for comision_id, comision in comisiones.items()}
+
+    sin_registro = [
+        inscripcion.id for inscripcion in inscripciones
+        if not hasattr(inscripcion, 'registro_asistencia')
+    ]
+    asistidas_sin_registro = _asistidas_sin_registro(sin_registro, hoy)
+
+    resultado = []
+    for inscripcion in inscripciones:
+        total, a_la_fecha, total_curso = totales[inscripcion.comision_id]
+        registro = getattr(inscripcion, 'registro_asistencia', None)
+        if registro is None:
+            # Inscripción sin registro (datos previos a la señal): se evalúa sin guardarlo
+            registro = aplicar_totales(
+                RegistroAsistencia(clases_asistidas=asistidas_sin_registro.get(inscripcion.id, 0)),
+                a_la_fecha,
+                total_curso,
+            )
+        resultado.append(ProgresoInscripcion(
+            inscripcion,
+            total_clases=total,
+            clases_a_la_fecha=a_la_fecha,
+            asistidas=registro.clases_asistidas,
+            cumple_certificado=registro.cumple_requisito_certificado,
+            proxima_clase=inscripcion.comision.get_proxima_clase(desde=hoy),
+        ))
+    return resultado
+
+
+def progreso_estudiante(estudiante, hoy=None):
+    """Progreso de las inscripciones confirmadas del estudiante en comisiones publicadas"""
+    return progreso_inscripciones(
+        Inscripcion.objects.filter(estudiante=estudiante, estado='confirmado', comision__publicada=True),
+        hoy=hoy,
+    )
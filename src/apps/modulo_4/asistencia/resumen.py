@@ -0,0 +1,131 @@
+"""
+Resumen diario de asistencia por comisión.
+
+``ResumenAsistenciaComision`` guarda, por (comisión, fecha de clase), cuántas
+inscripciones confirmadas tienen la asistencia tomada y cuántas estuvieron presentes.
+Las escrituras de Asistencia (señales y tomas completas, vía ``LoteAsistencias``)
+recalculan en la misma transacción solo los grupos que tocaron; los cambios de estado
+o de comisión de una inscripción recalculan las comisiones involucradas.
+
+Las series de "últimas N clases" del dashboard y los historiales se leen de esta
+tabla en lugar de agrupar la tabla de asistencias en cada request.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+
+
+ESTADOS_CONTABILIZADOS = ('confirmado',)
+
+
+def _agrupar(asistencias):
+    return asistencias.filter(
+        inscripcion__estado__in=ESTADOS_CONTABILIZADOS,
+    ).values('inscripcion__comision_id', 'fecha_clase').annotate(
+        inscritos=Count('pk'),
+        presentes=Count('pk', filter=Q(presente=True)),
+    ).order_by()
+
+
+def recalcular_resumen(comision_ids, fechas=None):
+    """
+    Recalcula el resumen de las comisiones indicadas, solo en ``fechas`` si se
+    indican (todas las fechas si es None). Retorna la cantidad de filas vigentes.
+    """
+    from .models import Asistencia, ResumenAsistenciaComision
+
+    comision_ids = {comision_id for comision_id in comision_ids if comision_id is not None}
+    if not comision_ids:
+        return 0
+
+    asistencias = Asistencia.objects.filter(inscripcion__comision_id__in=comision_ids)
+    vigentes = ResumenAsistenciaComision.objects.filter(comision_id__in=comision_ids)
+    if fechas is not None:
+        fechas = set(fechas)
+        if not fechas:
+            return 0
+        asistencias = asistencias.filter(fecha_clase__in=fechas)
+        vigentes = vigentes.filter(fecha__in=fechas)
+
+    filas = [
+        ResumenAsistenciaComision(
+            comision_id=fila['inscripcion__comision_id'],
+            fecha=fila['fecha_clase'],
+            inscritos=fila['inscritos'],
+            presentes=fila['presentes'],
+            ausentes=fila['inscritos'] - fila['presentes'],
+        )
+        for fila in _agrupar(asistencias)
+    ]
+
+    with transaction.atomic():
+        claves = {(fila.comision_id, fila.fecha) for fila in filas}
+        existentes = list(vigentes.select_for_update().values_list('pk', 'comision_id', 'fecha'))
+        upsert = connection.features.supports_update_conflicts_with_target
+        # Sin upsert se reemplazan todas las filas del rango; con upsert solo se borran las que quedaron vacías
+        a_borrar = [
+            pk for pk, comision_id, fecha in existentes
+            if not upsert or (comision_id, fecha) not in claves
+        ]
+        if a_borrar:
+            ResumenAsistenciaComision.objects.filter(pk__in=a_borrar).delete()
+        if upsert:
+            ResumenAsistenciaComision.objects.bulk_create(
+                filas,
+                update_conflicts=True,
+                unique_fields=['comision', 'fecha'],
+                update_fields=['inscritos', 'presentes', 'ausentes'],
+            )
+        else:
+            ResumenAsistenciaComision.objects.bulk_create(filas)
+    return len(filas)
+
+
+def actualizar_resumen(clases, comisiones_completas=()):
+    """
+    Aplica los cambios acumulados por un lote de asistencias: ``clases`` mapea
+    comision_id -> fechas tocadas; ``comisiones_completas`` se recalculan enteras.
+    """
+    comisiones_completas = set(comisiones_completas)
+    if comisiones_completas:
+        recalcular_resumen(comisiones_completas)
+
+    pendientes = {
+        comision_id: fechas
+        for comision_id, fechas in clases.items()
+        if comision_id not in comisiones_completas and fechas
+    }
+    # Una toma de asistencia toca una sola fecha de una comisión: una consulta
+    fechas = set().union(*pendientes.values()) if pendientes else set()
+    if pendientes:
+        recalcular_resumen(pendientes, fechas)
+
+
+def ultimas_clases(comision_ids, cantidad=8):
+    """
+    Últimas ``cantidad`` clases con asistencia de cada comisión, en orden cronológico:
+    ``{comision_id: [ResumenAsistenciaComision, ...]}``.
+    """
+    from .models import ResumenAsistenciaComision
+
+    comision_ids = list(comision_ids)
+    if not comision_ids:
+        return {}
+
+    filas = ResumenAsistenciaComision.objects.filter(comision_id__in=comision_ids).annotate(
+        orden_reciente=Window(RowNumber(), partition_by=F('comision_id'), order_by=F('fecha').desc()),
+    ).filter(orden_reciente__lte=cantidad).order_by('comision_id', 'fecha')
+
+    series = {}
+    for fila in filas:
+        series.setdefault(fila.comision_id, []).append(fila)
+    return series
+
+
+def fechas_con_asistencia(comision):
+    """Fechas de clase con asistencia tomada, de la más reciente a la más antigua"""
+    from .models import ResumenAsistenciaComision
+
+    return list(
+        ResumenAsistenciaComision.objects.filter(comision=comision).order_by('-fecha').values_list('fecha', flat=True)
+    )
@@ -1,7 +1,7 @@
-from datetime import date
-
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
+from .agregacion import DESCONOCIDO, recalcular_registros, registrar_cambio
+from .resumen import ESTADOS_CONTABILIZADOS, recalcular_resumen
 from .models import Asistencia, RegistroAsistencia
 from apps.modulo_2.inscripciones.models import Inscripcion
 
@@ -11,125 +11,64 @@ def actualizar_registro_asistencia(inscripcion):
     Actualiza el RegistroAsistencia para una inscripción específica
     basándose en todas las asistencias registradas
     """
-    # Obtener o crear el registro de asistencia
-    registro, created = RegistroAsistencia.objects.get_or_create(
-        inscripcion=inscripcion
-    )
-    
-    comision = inscripcion.comision
-
-    total_programadas_hasta_hoy = comision.get_total_clases_programadas(hasta=date.today()) if hasattr(comision, 'get_total_clases_programadas') else None
-    if total_programadas_hasta_hoy is not None:
-        total_clases = total_programadas_hasta_hoy
-    else:
-        total_clases = Asistencia.objects.filter(
-            inscripcion__comision=comision,
-            fecha_clase__lte=date.today(),
-        ).values('fecha_clase').distinct().count()
-
-    clases_asistidas = Asistencia.objects.filter(
-        inscripcion=inscripcion,
-        presente=True,
-        fecha_clase__lte=date.today(),
-    ).count()
-
-    registro.total_clases = total_clases
-    registro.clases_asistidas = clases_asistidas
-
-    if total_clases > 0:
-        registro.porcentaje_asistencia = (clases_asistidas / total_clases) * 100
-    else:
-        registro.porcentaje_asistencia = 0
-
-    cumple_certificado = False
-    if comision.fecha_fin and comision.fecha_fin <= date.today():
-        total_programadas_curso = comision.get_total_clases_programadas(hasta=comision.fecha_fin) if hasattr(comision, 'get_total_clases_programadas') else None
-        if total_programadas_curso is None:
-            total_programadas_curso = Asistencia.objects.filter(
-                inscripcion__comision=comision,
-                fecha_clase__lte=comision.fecha_fin,
-            ).values('fecha_clase').distinct().count()
+    recalcular_registros(Inscripcion.objects.filter(pk=inscripcion.pk))
+    return RegistroAsistencia.objects.get(inscripcion=inscripcion)
 
-        if total_programadas_curso > 0:
-            porcentaje_certificado = (clases_asistidas / total_programadas_curso) * 100
-            cumple_certificado = 80 <= porcentaje_certificado <= 100
 
-    registro.cumple_requisito_certificado = cumple_certificado
-    
-    # Guardar el registro actualizado
-    registro.save()
-    
-    return registro
+def _comision_id(instance):
+    try:
+        return instance.inscripcion.comision_id
+    except Inscripcion.DoesNotExist:
+        return None
 
 
 @receiver(post_save, sender=Asistencia)
 def actualizar_registro_despues_guardar(sender, instance, created, **kwargs):
     """
     Señal que se ejecuta después de guardar una Asistencia.
-    Si es una fecha nueva para la comisión, actualiza a TODOS los alumnos.
-    Si no, solo actualiza al alumno afectado.
+    Traduce el cambio en un delta para el motor de agregación; si es una fecha
+    nueva para una comisión sin programación, el motor actualiza a toda la comisión.
     """
-    # Siempre actualizar al alumno actual
-    actualizar_registro_asistencia(instance.inscripcion)
-    
-    comision = instance.inscripcion.comision
-    total_programadas = comision.get_total_clases_programadas(hasta=date.today()) if hasattr(comision, 'get_total_clases_programadas') else None
-    if total_programadas is not None:
-        return
-
     if created:
-        # Verificar si es la primera asistencia registrada para esta fecha en la comisión
-        # Count > 1 significa que ya existían registros para esta fecha (la fecha ya estaba contabilizada)
-        registros_misma_fecha = Asistencia.objects.filter(
-            inscripcion__comision=comision,
-            fecha_clase=instance.fecha_clase
-        ).count()
-        
-        # Si es el primer registro (count == 1), la cantidad total de clases aumentó.
-        # Debemos actualizar a todos los DEMÁS alumnos de la comisión.
-        if registros_misma_fecha == 1:
-            otras_inscripciones = Inscripcion.objects.filter(
-                comision=comision
-            ).exclude(id=instance.inscripcion.id)
-            
-            for inscripcion in otras_inscripciones:
-                actualizar_registro_asistencia(inscripcion)
+        antes = None
+    else:
+        antes = instance.estado_original or DESCONOCIDO
+    despues = (instance.fecha_clase, instance.presente)
+    registrar_cambio(instance.inscripcion_id, _comision_id(instance), antes, despues)
+    instance._estado_original = despues
 
 
 @receiver(post_delete, sender=Asistencia)
 def actualizar_registro_despues_eliminar(sender, instance, **kwargs):
     """
     Señal que se ejecuta después de eliminar una Asistencia.
-    Si se eliminó el último registro de una fecha para la comisión, actualiza a TODOS.
     """
-    try:
-        inscripcion = instance.inscripcion
-    except Inscripcion.DoesNotExist:
-        return
-
-    try:
-        actualizar_registro_asistencia(inscripcion)
-    except Inscripcion.DoesNotExist:
-        return
+    antes = instance.estado_original or (instance.fecha_clase, instance.presente)
+    registrar_cambio(instance.inscripcion_id, _comision_id(instance), antes, None)
 
-    try:
-        comision = inscripcion.comision
-    except Exception:
-        return
 
-    total_programadas = comision.get_total_clases_programadas(hasta=date.today()) if hasattr(comision, 'get_total_clases_programadas') else None
-    if total_programadas is not None:
-        return
+@receiver(pre_save, sender=Inscripcion)
+def recordar_inscripcion_anterior(sender, instance, **kwargs):
+    # El estado previo se toma antes de que las señales de cupo lo actualicen
+    instance._resumen_antes = None if instance._state.adding else (instance.estado_original or DESCONOCIDO)
 
-    queda_alguien = Asistencia.objects.filter(
-        inscripcion__comision=comision,
-        fecha_clase=instance.fecha_clase
-    ).exists()
 
-    if not queda_alguien:
-        otras_inscripciones = Inscripcion.objects.filter(
-            comision=comision
-        ).exclude(id=inscripcion.id)
-
-        for inscripcion_otro in otras_inscripciones:
-            actualizar_registro_asistencia(inscripcion_otro)
+@receiver(post_save, sender=Inscripcion)
+def actualizar_resumen_por_inscripcion(sender, instance, created, **kwargs):
+    """
+    Si la inscripción entra o sale de las contabilizadas (o cambia de comisión),
+    sus asistencias cambian de grupo en el resumen diario de las comisiones involucradas.
+    """
+    antes = getattr(instance, '_resumen_antes', None)
+    if created or antes is None:
+        return
+    if antes is DESCONOCIDO:
+        recalcular_resumen([instance.comision_id])
+        return
+    comision_anterior, estado_anterior = antes
+    if (comision_anterior, estado_anterior) == (instance.comision_id, instance.estado):
+        return
+    if estado_anterior not in ESTADOS_CONTABILIZADOS and instance.estado not in ESTADOS_CONTABILIZADOS:
+        return
+    if Asistencia.objects.filter(inscripcion=instance).exists():
+        recalcular_resumen({comision_anterior, instance.comision_id})
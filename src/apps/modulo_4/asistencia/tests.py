@@ -1,12 +1,15 @@
 from datetime import date
+from io import StringIO
+from unittest.mock import patch
 
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 
 from apps.modulo_1.usuario.models import Persona, Usuario
 from apps.modulo_1.roles.models import Estudiante
 from apps.modulo_2.inscripciones.models import Inscripcion
 from apps.modulo_3.cursos.models import Curso, Comision, PoloCreativo
-from apps.modulo_4.asistencia.models import Asistencia, RegistroAsistencia
+from apps.modulo_4.asistencia.models import Asistencia, RegistroAsistencia, ResumenAsistenciaComision
 
 
 class AsistenciaProgramacionTests(TestCase):
@@ -87,3 +90,236 @@ class AsistenciaProgramacionTests(TestCase):
         inscripcion = Inscripcion.objects.create(estudiante=self.estudiante, comision=comision)
         Asistencia.objects.create(inscripcion=inscripcion, fecha_clase=date(2025, 1, 1), presente=True)
         self.assertEqual(comision.get_total_clases_programadas(), 3)
+
+
+class AgregacionIncrementalTests(TestCase):
+    def setUp(self):
+        self.polo = PoloCreativo.objects.create(
+            nombre='Polo Test',
+            ciudad='Ushuaia',
+            direccion='Test 123',
+            activo=True,
+        )
+        self.curso = Curso.objects.create(nombre='Curso Test')
+        self.comision = Comision.objects.create(
+            fk_id_curso=self.curso,
+            fk_id_polo=self.polo,
+            dias_horarios='Lunes y Miércoles 18:00 - 21:00',
+            fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 1, 8),
+        )
+        self.inscripciones = [self._inscribir(self.comision, f'6500000{i}') for i in range(5)]
+
+    def _inscribir(self, comision, dni):
+        persona = Persona.objects.create(dni=dni, nombre='Ana', apellido=dni, correo=f'{dni}@test.com')
+        usuario = Usuario.objects.create(persona=persona, contrasena='x')
+        estudiante = Estudiante.objects.create(usuario=usuario, nivel_estudios='SE', institucion_actual='Colegio')
+        return Inscripcion.objects.create(estudiante=estudiante, comision=comision)
+
+    def test_cambio_presente_aplica_delta_sobre_contador(self):
+        inscripcion = self.inscripciones[0]
+        asistencia = Asistencia.objects.create(inscripcion=inscripcion, fecha_clase=date(2025, 1, 1), presente=True)
+        registro = RegistroAsistencia.objects.get(inscripcion=inscripcion)
+        self.assertEqual(registro.clases_asistidas, 1)
+        self.assertEqual(registro.total_clases, 3)
+
+        asistencia = Asistencia.objects.get(pk=asistencia.pk)
+        asistencia.presente = False
+        asistencia.save()
+        registro.refresh_from_db()
+        self.assertEqual(registro.clases_asistidas, 0)
+
+        Asistencia.objects.create(inscripcion=inscripcion, fecha_clase=date(2025, 1, 6), presente=True)
+        Asistencia.objects.get(pk=asistencia.pk).delete()
+        registro.refresh_from_db()
+        self.assertEqual(registro.clases_asistidas, 1)
+
+    def test_lote_aplica_toma_completa_una_sola_vez(self):
+        from apps.modulo_4.asistencia.agregacion import lote_asistencias
+
+        with lote_asistencias():
+            for inscripcion in self.inscripciones:
+                Asistencia.objects.create(inscripcion=inscripcion, fecha_clase=date(2025, 1, 1), presente=True)
+            self.assertEqual(
+                RegistroAsistencia.objects.filter(inscripcion__in=self.inscripciones, clases_asistidas=1).count(),
+                0,
+            )
+
+        self.assertEqual(
+            RegistroAsistencia.objects.filter(inscripcion__in=self.inscripciones, clases_asistidas=1).count(),
+            5,
+        )
+        registro = RegistroAsistencia.objects.get(inscripcion=self.inscripciones[0])
+        self.assertEqual(registro.total_clases, 3)
+
+    def test_fecha_nueva_sin_programacion_actualiza_toda_la_comision(self):
+        comision = Comision.objects.create(
+            fk_id_curso=self.curso,
+            fk_id_polo=self.polo,
+            dias_horarios='A coordinar',
+        )
+        inscripcion_a = self._inscribir(comision, '66000001')
+        inscripcion_b = self._inscribir(comision, '66000002')
+
+        Asistencia.objects.create(inscripcion=inscripcion_a, fecha_clase=date(2025, 1, 1), presente=True)
+        Asistencia.objects.create(inscripcion=inscripcion_a, fecha_clase=date(2025, 1, 2), presente=True)
+
+        registro_b = RegistroAsistencia.objects.get(inscripcion=inscripcion_b)
+        self.assertEqual(registro_b.total_clases, 2)
+        self.assertEqual(registro_b.clases_asistidas, 0)
+
+    def test_recalcular_registros_reconcilia_contadores(self):
+        from apps.modulo_4.asistencia.agregacion import recalcular_registros
+
+        inscripcion = self.inscripciones[0]
+        Asistencia.objects.create(inscripcion=inscripcion, fecha_clase=date(2025, 1, 1), presente=True)
+        RegistroAsistencia.objects.filter(inscripcion=inscripcion).update(clases_asistidas=7)
+
+        recalcular_registros(Inscripcion.objects.filter(pk=inscripcion.pk))
+        self.assertEqual(RegistroAsistencia.objects.get(inscripcion=inscripcion).clases_asistidas, 1)
+
+    def _resumen(self, fecha):
+        fila = ResumenAsistenciaComision.objects.get(comision=self.comision, fecha=fecha)
+        return fila.inscritos, fila.presentes, fila.ausentes
+
+    def test_resumen_diario_sigue_tomas_cambios_y_estado_de_inscripcion(self):
+        from django.core.management import call_command
+
+        from apps.modulo_4.asistencia.toma import guardar_toma_asistencia
+
+        lunes = date(2025, 1, 6)
+        guardar_toma_asistencia(
+            self.comision,
+            [(inscripcion.id, indice < 3, '') for indice, inscripcion in enumerate(self.inscripciones)],
+            lunes,
+        )
+        self.assertEqual(self._resumen(lunes), (5, 3, 2))
+
+        asistencia = Asistencia.objects.get(inscripcion=self.inscripciones[4], fecha_clase=lunes)
+        asistencia.presente = True
+        asistencia.save()
+        self.assertEqual(self._resumen(lunes), (5, 4, 1))
+
+        inscripcion = Inscripcion.objects.get(pk=self.inscripciones[0].pk)
+        inscripcion.estado = 'cancelada'
+        inscripcion.save()
+        self.assertEqual(self._resumen(lunes), (4, 3, 1))
+
+        Asistencia.objects.filter(fecha_clase=lunes).delete()
+        self.assertFalse(ResumenAsistenciaComision.objects.exists())
+
+        Asistencia.objects.create(inscripcion=self.inscripciones[1], fecha_clase=lunes, presente=True)
+        ResumenAsistenciaComision.objects.update(presentes=0, inscritos=9)
+        call_command('recalcular_resumen_asistencia', '--comision', str(self.comision.pk), stdout=StringIO())
+        self.assertEqual(self._resumen(lunes), (1, 1, 0))
+
+    def test_repetir_una_toma_no_suma_dos_veces_la_misma_clase(self):
+        from apps.modulo_4.asistencia.toma import guardar_toma_asistencia
+
+        lunes = date(2025, 1, 6)
+        registros = [(inscripcion.id, True, '') for inscripcion in self.inscripciones]
+        self.assertEqual(guardar_toma_asistencia(self.comision, registros, lunes), (5, 0))
+        self.assertEqual(guardar_toma_asistencia(self.comision, registros, lunes), (0, 5))
+
+        self.assertEqual(
+            set(RegistroAsistencia.objects.filter(inscripcion__in=self.inscripciones).values_list('clases_asistidas', flat=True)),
+            {1},
+        )
+
+    def test_clase_futura_se_rechaza_hasta_que_llega_su_fecha(self):
+        from apps.modulo_4.asistencia.toma import guardar_toma_asistencia
+
+        class Hoy(date):
+            valor = date(2025, 1, 3)
+
+            @classmethod
+            def today(cls):
+                return cls.valor
+
+        lunes = date(2025, 1, 6)
+        registros = [(inscripcion.id, True, '') for inscripcion in self.inscripciones]
+        with patch('apps.modulo_4.asistencia.models.date', Hoy), patch('apps.modulo_4.asistencia.agregacion.date', Hoy):
+            with self.assertRaises(ValidationError):
+                guardar_toma_asistencia(self.comision, registros, lunes)
+            with self.assertRaises(ValidationError):
+                Asistencia.objects.create(inscripcion=self.inscripciones[0], fecha_clase=lunes, presente=True)
+            self.assertFalse(Asistencia.objects.exists())
+
+            Hoy.valor = lunes
+            self.assertEqual(guardar_toma_asistencia(self.comision, registros, lunes), (5, 0))
+        self.assertEqual(
+            set(RegistroAsistencia.objects.filter(inscripcion__in=self.inscripciones).values_list('clases_asistidas', flat=True)),
+            {1},
+        )
+
+    def test_ultimas_clases_lee_las_mas_recientes_de_cada_comision(self):
+        from apps.modulo_4.asistencia.resumen import ultimas_clases
+
+        for fecha, presentes in ((date(2025, 1, 1), 5), (date(2025, 1, 6), 2), (date(2025, 1, 8), 4)):
+            for indice, inscripcion in enumerate(self.inscripciones):
+                Asistencia.objects.create(inscripcion=inscripcion, fecha_clase=fecha, presente=indice < presentes)
+
+        with self.assertNumQueries(1):
+            series = ultimas_clases([self.comision.pk], cantidad=2)
+        self.assertEqual(
+            [(clase.fecha, clase.porcentaje) for clase in series[self.comision.pk]],
+            [(date(2025, 1, 6), 40), (date(2025, 1, 8), 80)],
+        )
+
+
+class ProgresoEstudianteServicioTests(TestCase):
+    def setUp(self):
+        self.curso = Curso.objects.create(nombre='Curso Progreso')
+        self.persona = Persona.objects.create(dni='67000001', nombre='Ana', apellido='Progreso', correo='ana.progreso@test.com')
+        usuario = Usuario.objects.create(persona=self.persona, contrasena='x')
+        self.estudiante = Estudiante.objects.create(usuario=usuario, nivel_estudios='SE', institucion_actual='Colegio')
+
+    def _inscribir(self, **datos_comision):
+        comision = Comision.objects.create(fk_id_curso=self.curso, publicada=True, **datos_comision)
+        return Inscripcion.objects.create(estudiante=self.estudiante, comision=comision, estado='confirmado')
+
+    def test_progreso_se_lee_en_una_consulta_sin_escribir(self):
+        from apps.modulo_4.asistencia.progreso import progreso_estudiante
+
+        hoy = date(2025, 1, 15)
+        en_curso = self._inscribir(
+            dias_horarios='Lunes y Miércoles 18:00 - 21:00',
+            fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 1, 31),
+        )
+        for fecha in (date(2025, 1, 1), date(2025, 1, 6), date(2025, 1, 8)):
+            Asistencia.objects.create(inscripcion=en_curso, fecha_clase=fecha, presente=True)
+        finalizada = self._inscribir(
+            dias_horarios='Miércoles 10:00 - 12:00',
+            fecha_inicio=date(2024, 12, 4),
+            fecha_fin=date(2024, 12, 11),
+        )
+        Asistencia.objects.create(inscripcion=finalizada, fecha_clase=date(2024, 12, 4), presente=True)
+        Asistencia.objects.create(inscripcion=finalizada, fecha_clase=date(2024, 12, 11), presente=True)
+        registros_antes = list(RegistroAsistencia.objects.order_by('pk').values())
+
+        with self.assertNumQueries(1):
+            progresos = {progreso.inscripcion.pk: progreso for progreso in progreso_estudiante(self.estudiante, hoy=hoy)}
+
+        progreso = progresos[en_curso.pk]
+        # Lunes y miércoles del 1 al 15 de enero: 5 clases dictadas de 9
+        self.assertEqual((progreso.total_clases, progreso.clases_a_la_fecha, progreso.asistidas), (9, 5, 3))
+        self.assertEqual(progreso.porcentaje, 60)
+        self.assertEqual(progreso.proxima_clase, date(2025, 1, 15))
+        self.assertFalse(progreso.cumple_certificado)
+        self.assertTrue(progresos[finalizada.pk].cumple_certificado)
+        self.assertTrue(progresos[finalizada.pk].completado)
+        self.assertEqual(list(RegistroAsistencia.objects.order_by('pk').values()), registros_antes)
+
+    def test_comision_sin_programacion_cuenta_fechas_registradas(self):
+        from apps.modulo_4.asistencia.progreso import progreso_estudiante
+
+        inscripcion = self._inscribir(dias_horarios='A coordinar')
+        Asistencia.objects.create(inscripcion=inscripcion, fecha_clase=date(2025, 1, 2), presente=True)
+        Asistencia.objects.create(inscripcion=inscripcion, fecha_clase=date(2025, 1, 9), presente=False)
+        RegistroAsistencia.objects.filter(inscripcion=inscripcion).delete()
+
+        with self.assertNumQueries(3):
+            progreso, = progreso_estudiante(self.estudiante, hoy=date(2025, 1, 20))
+        self.assertEqual((progreso.total_clases, progreso.asistidas, progreso.porcentaje), (2, 1, 50))
+        self.assertFalse(RegistroAsistencia.objects.filter(inscripcion=inscripcion).exists())
@@ -0,0 +1,100 @@
+"""
+Escritura masiva de una toma de asistencia (todas las inscripciones de una comisión en una fecha).
+"""
+from datetime import date
+
+from django.db import connection, transaction
+
+from apps.modulo_2.inscripciones.models import Inscripcion
+
+from .agregacion import LoteAsistencias
+from .models import Asistencia
+
+
+CAMPOS_ACTUALIZABLES = ['presente', 'observaciones', 'registrado_por']
+
+
+def _parse_fecha(fecha_clase):
+    if isinstance(fecha_clase, date):
+        return fecha_clase
+    return date.fromisoformat(str(fecha_clase).strip())
+
+
+def guardar_toma_asistencia(comision, registros, fecha_clase, registrado_por=None):
+    """
+    Guarda la asistencia de varias inscripciones de una misma comisión para una fecha.
+
+    ``registros`` es una lista de tuplas (inscripcion_id, presente, observaciones).
+    La fecha se valida una sola vez contra el calendario de la comisión, las filas se
+    insertan/actualizan con un único upsert y los RegistroAsistencia afectados se
+    actualizan en una sola pasada. Retorna (creados, actualizados).
+    """
+    fecha_clase = _parse_fecha(fecha_clase)
+    Asistencia.validar_fecha_para_comision(comision, fecha_clase)
+
+    registros = list(registros)
+    if not registros:
+        return 0, 0
+
+    inscripcion_ids = [inscripcion_id for inscripcion_id, _, _ in registros]
+
+    with transaction.atomic():
+        # Se bloquean las inscripciones antes de leer el estado previo: las filas que todavía no
+        # existen no se pueden bloquear, y dos tomas simultáneas de la misma fecha las verían
+        # como nuevas y sumarían dos veces la misma clase asistida
+        list(
+            Inscripcion.objects.select_for_update()
+            .filter(pk__in=inscripcion_ids)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        existentes = {
+            fila['inscripcion_id']: fila
+            for fila in Asistencia.objects.select_for_update().filter(
+                inscripcion_id__in=inscripcion_ids,
+                fecha_clase=fecha_clase,
+            ).values('id_asistencia', 'inscripcion_id', 'presente')
+        }
+
+        filas = [
+            Asistencia(
+                inscripcion_id=inscripcion_id,
+                fecha_clase=fecha_clase,
+                presente=presente,
+                observaciones=observaciones,
+                registrado_por=registrado_por,
+            )
+            for inscripcion_id, presente, observaciones in registros
+        ]
+
+        if connection.features.supports_update_conflicts_with_target:
+            Asistencia.objects.bulk_create(
+                filas,
+                update_conflicts=True,
+                unique_fields=['inscripcion', 'fecha_clase'],
+                update_fields=CAMPOS_ACTUALIZABLES,
+            )
+        else:
+            nuevas = []
+            actualizadas = []
+            for fila in filas:
+                previa = existentes.get(fila.inscripcion_id)
+                if previa is None:
+                    nuevas.append(fila)
+                else:
+                    fila.id_asistencia = previa['id_asistencia']
+                    actualizadas.append(fila)
+            if nuevas:
+                Asistencia.objects.bulk_create(nuevas)
+            if actualizadas:
+                Asistencia.objects.bulk_update(actualizadas, CAMPOS_ACTUALIZABLES)
+
+        lote = LoteAsistencias()
+        for fila in filas:
+            previa = existentes.get(fila.inscripcion_id)
+            antes = (fecha_clase, previa['presente']) if previa else None
+            lote.registrar(fila.inscripcion_id, comision.id_comision, antes, (fecha_clase, fila.presente))
+        lote.aplicar()
+
+    actualizados = len(existentes)
+    return len(filas) - actualizados, actualizados
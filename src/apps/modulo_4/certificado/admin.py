@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import CertificadoEmitido
+
+
+@admin.register(CertificadoEmitido)
+class CertificadoEmitidoAdmin(admin.ModelAdmin):
+    list_display = ('id', 'inscripcion', 'nombre_archivo', 'generado_el')
+    readonly_fields = ('hash_contenido', 'generado_el')
+    raw_id_fields = ('inscripcion',)
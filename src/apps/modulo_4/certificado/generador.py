@@ -0,0 +1,230 @@
+"""
+Motor de certificados PDF.
+
+* La plantilla (``img/plantilla.png``) se decodifica una sola vez por proceso y en
+  cada documento se dibuja como un form XObject: en un lote de N páginas la imagen
+  se incrusta una vez y cada página solo la referencia.
+* Los estilos de texto se arman una vez por proceso.
+* Cada certificado emitido queda guardado (``CertificadoEmitido``) con el hash de su
+  contenido; se vuelve a generar solo si cambian el nombre, el DNI, el curso, la
+  plantilla o ``VERSION_DISENO``.
+* ``generar_lote`` arma todos los certificados de una comisión en un PDF de varias
+  páginas o en un ZIP con un PDF por estudiante.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+
+from apps.modulo_2.inscripciones.models import Inscripcion
+from apps.modulo_4.asistencia.progreso import progreso_inscripciones
+
+from .models import CertificadoEmitido
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+    from reportlab.platypus import Frame, Paragraph
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+
+# Incrementar al cambiar el diseño: invalida los certificados ya emitidos
+VERSION_DISENO = 1
+
+FORMATO_PDF = 'pdf'
+FORMATO_ZIP = 'zip'
+
+# Tamaño en píxeles de plantilla.png, las posiciones del texto se expresan sobre él
+_IMG_W = 1091
+_IMG_H = 789
+_FORM_PLANTILLA = 'plantilla_certificado'
+
+
+def ruta_plantilla():
+    ruta = os.path.join(settings.STATIC_ROOT or settings.STATICFILES_DIRS[0], 'img', 'plantilla.png')
+    if not os.path.exists(ruta):
+        ruta = os.path.join(settings.BASE_DIR, 'stc', 'img', 'plantilla.png')
+    return ruta
+
+
+def firma_plantilla():
+    """Identifica la versión de la plantilla en disco (cambia si se reemplaza el archivo)"""
+    ruta = ruta_plantilla()
+    try:
+        stat = os.stat(ruta)
+    except OSError:
+        return ''
+    return f'{stat.st_mtime_ns}-{stat.st_size}'
+
+
+@lru_cache(maxsize=2)
+def _imagen_plantilla(ruta, firma):
+    # ``firma`` forma parte de la clave del cache: si la plantilla cambia se vuelve a leer
+    return ImageReader(ruta)
+
+
+@lru_cache(maxsize=1)
+def _estilos():
+    styles = getSampleStyleSheet()
+    nombre = ParagraphStyle(
+        'CertName',
+        parent=styles['Normal'],
+        fontSize=26,
+        textColor=colors.HexColor('#333333'),
+        alignment=TA_CENTER,
+        leading=30,
+        fontName='Helvetica-Bold'
+    )
+    cuerpo = ParagraphStyle(
+        'CertBody',
+        parent=styles['Normal'],
+        fontSize=15.5,
+        textColor=colors.HexColor('#4b5563'),
+        alignment=TA_JUSTIFY,
+        leading=22
+    )
+    return nombre, cuerpo
+
+
+def datos_certificado(inscripcion):
+    """Datos que se imprimen en el certificado"""
+    persona = inscripcion.estudiante.usuario.persona
+    return {
+        'nombre': persona.nombre_completo,
+        'dni': persona.dni,
+        'curso': inscripcion.comision.fk_id_curso.nombre,
+    }
+
+
+def hash_contenido(datos, firma=None):
+    firma = firma_plantilla() if firma is None else firma
+    contenido = json.dumps([VERSION_DISENO, firma, datos], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def nombre_archivo(datos):
+    return f"Certificado_{datos['curso'].replace(' ', '_')}_{datos['dni']}.pdf"
+
+
+def _nuevo_documento(destino):
+    page_width, page_height = landscape(A4)
+    pdf = canvas.Canvas(destino, pagesize=(page_width, page_height))
+    ruta = ruta_plantilla()
+    pdf.beginForm(_FORM_PLANTILLA)
+    if os.path.exists(ruta):
+        pdf.drawImage(_imagen_plantilla(ruta, firma_plantilla()), 0, 0, width=page_width, height=page_height, mask='auto')
+    pdf.endForm()
+    return pdf
+
+
+def _dibujar_pagina(pdf, datos):
+    page_width, page_height = pdf._pagesize
+
+    def frame_from_top(x, top, w, h):
+        return (
+            x / _IMG_W * page_width,
+            page_height - (top + h) / _IMG_H * page_height,
+            w / _IMG_W * page_width,
+            h / _IMG_H * page_height,
+        )
+
+    pdf.doForm(_FORM_PLANTILLA)
+    estilo_nombre, estilo_cuerpo = _estilos()
+
+    name_frame = Frame(*frame_from_top(140, 230, 810, 60), showBoundary=0)
+    body_frame = Frame(*frame_from_top(140, 310, 810, 140), showBoundary=0)
+
+    name_para = Paragraph(f"{datos['nombre']}, D.N.I {datos['dni']}", estilo_nombre)
+    body_text = (
+        f"ha asistido y aprobado el curso de <b>{datos['curso']}</b>, desarrollado en el marco de las actividades de "
+        "formación de los Polos Creativos, dependiente de la Agencia de Innovación de la Provincia de "
+        "Tierra del Fuego, Antártida e Islas del Atlántico Sur."
+    )
+    name_frame.addFromList([name_para], pdf)
+    body_frame.addFromList([Paragraph(body_text, estilo_cuerpo)], pdf)
+    pdf.showPage()
+
+
+def renderizar(lista_datos, destino):
+    """Escribe en ``destino`` (ruta o archivo binario) un PDF con una página por certificado"""
+    pdf = _nuevo_documento(destino)
+    for datos in lista_datos:
+        _dibujar_pagina(pdf, datos)
+    pdf.save()
+
+
+def _con_relaciones(inscripciones):
+    return inscripciones.select_related('estudiante__usuario__persona', 'comision__fk_id_curso')
+
+
+def obtener_certificado(inscripcion):
+    """
+    Certificado emitido de la inscripción; se genera (o regenera, si cambió el
+    contenido) solo cuando hace falta.
+    """
+    datos = datos_certificado(inscripcion)
+    hash_actual = hash_contenido(datos)
+    emitido = CertificadoEmitido.objects.filter(inscripcion=inscripcion).first()
+    if emitido is not None and emitido.hash_contenido == hash_actual and emitido.archivo:
+        return emitido
+
+    with tempfile.TemporaryFile() as temporal:
+        renderizar([datos], temporal)
+        temporal.seek(0)
+        with transaction.atomic():
+            emitido = CertificadoEmitido.objects.select_for_update().filter(inscripcion=inscripcion).first()
+            if emitido is not None and emitido.hash_contenido == hash_actual and emitido.archivo:
+                # Otro proceso lo generó mientras tanto
+                return emitido
+            anterior = emitido.archivo.name if emitido is not None and emitido.archivo else None
+            emitido = emitido or CertificadoEmitido(inscripcion=inscripcion)
+            emitido.hash_contenido = hash_actual
+            emitido.nombre_archivo = nombre_archivo(datos)
+            emitido.archivo.save(f'{inscripcion.pk}_{hash_actual[:16]}.pdf', File(temporal), save=False)
+            emitido.save()
+            if anterior and anterior != emitido.archivo.name:
+                transaction.on_commit(lambda: emitido.archivo.storage.delete(anterior))
+    return emitido
+
+
+def inscripciones_certificables(comision):
+    """
+    Inscripciones confirmadas de la comisión que cumplen el requisito de asistencia, con
+    la misma habilitación que la descarga individual (``progreso_inscripciones``).
+    """
+    inscripciones = _con_relaciones(
+        Inscripcion.objects.filter(comision=comision, estado='confirmado')
+    ).order_by('estudiante__usuario__persona__apellido', 'estudiante__usuario__persona__nombre')
+    return [progreso.inscripcion for progreso in progreso_inscripciones(inscripciones) if progreso.cumple_certificado]
+
+
+def generar_lote(comision, destino, formato=FORMATO_PDF):
+    """
+    Genera todos los certificados de la comisión en ``destino`` (ruta o archivo binario):
+    un PDF de varias páginas o un ZIP con un PDF por estudiante (que además quedan emitidos).
+    Retorna la cantidad de certificados.
+    """
+    inscripciones = inscripciones_certificables(comision)
+    if formato == FORMATO_ZIP:
+        with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_DEFLATED) as archivo_zip:
+            for inscripcion in inscripciones:
+                emitido = obtener_certificado(inscripcion)
+                with emitido.archivo.open('rb') as pdf:
+                    archivo_zip.writestr(emitido.nombre_archivo, pdf.read())
+    elif formato == FORMATO_PDF:
+        renderizar([datos_certificado(inscripcion) for inscripcion in inscripciones], destino)
+    else:
+        raise ValueError(f'Formato de lote desconocido: {formato}')
+    return len(inscripciones)
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.modulo_3.cursos.models import Comision
+from apps.modulo_4.certificado.generador import (
+    FORMATO_PDF,
+    FORMATO_ZIP,
+    REPORTLAB_AVAILABLE,
+    generar_lote,
+    inscripciones_certificables,
+    obtener_certificado,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera en lote los certificados de una comisión (PDF de varias páginas o ZIP). '
+        'Sin --comision emite los certificados pendientes de todas las comisiones finalizadas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comision', type=int, help='ID de la comisión')
+        parser.add_argument(
+            '--formato',
+            choices=[FORMATO_PDF, FORMATO_ZIP],
+            default=FORMATO_PDF,
+            help='pdf: un documento con una página por estudiante; zip: un PDF por estudiante',
+        )
+        parser.add_argument('--salida', help='Archivo de salida (por defecto certificados_comision_<id>.<formato>)')
+
+    def handle(self, *args, **options):
+        if not REPORTLAB_AVAILABLE:
+            raise CommandError('reportlab no está instalado.')
+
+        if options['comision'] is None:
+            emitidos = 0
+            for comision in Comision.objects.filter(estado='Finalizada').order_by('id_comision'):
+                for inscripcion in inscripciones_certificables(comision):
+                    obtener_certificado(inscripcion)
+                    emitidos += 1
+            self.stdout.write(f'Certificados verificados/emitidos: {emitidos}')
+            return
+
+        try:
+            comision = Comision.objects.get(pk=options['comision'])
+        except Comision.DoesNotExist:
+            raise CommandError(f"No existe la comisión {options['comision']}")
+
+        salida = options['salida'] or f"certificados_comision_{comision.pk}.{options['formato']}"
+        total = generar_lote(comision, salida, options['formato'])
+        self.stdout.write(self.style.SUCCESS(f'{total} certificado(s) generados en {salida}'))
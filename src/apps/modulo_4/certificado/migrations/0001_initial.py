@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:38
+
+import apps.modulo_4.certificado.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('inscripciones', '0002_alter_inscripcion_estado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificadoEmitido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash_contenido', models.CharField(max_length=64, verbose_name='Hash del contenido')),
+                ('archivo', models.FileField(max_length=255, storage=apps.modulo_4.certificado.models.AlmacenamientoCertificados(), upload_to='%Y/%m/')),
+                ('nombre_archivo', models.CharField(max_length=255)),
+                ('generado_el', models.DateTimeField(auto_now=True, verbose_name='Generado el')),
+                ('inscripcion', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='certificado_emitido', to='inscripciones.inscripcion', verbose_name='Inscripción')),
+            ],
+            options={
+                'verbose_name': 'Certificado emitido',
+                'verbose_name_plural': 'Certificados emitidos',
+            },
+        ),
+    ]
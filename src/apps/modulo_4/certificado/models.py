@@ -1,3 +1,49 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
 
-# Create your models here.
+
+class AlmacenamientoCertificados(FileSystemStorage):
+    """
+    Certificados emitidos en CERTIFICADOS_ROOT, fuera de MEDIA_ROOT: no tienen URL
+    pública y solo se descargan desde la vista autenticada. La ubicación se lee del
+    setting en cada uso.
+    """
+
+    @property
+    def base_location(self):
+        return settings.CERTIFICADOS_ROOT
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    def url(self, name):
+        raise ValueError('Los certificados no tienen URL pública')
+
+
+class CertificadoEmitido(models.Model):
+    """
+    PDF ya generado del certificado de una inscripción. ``hash_contenido`` resume los
+    datos impresos (nombre, DNI, curso), la plantilla y la versión del diseño: mientras
+    no cambie, el archivo se reutiliza tal cual (y sirve de ETag).
+    """
+    inscripcion = models.OneToOneField(
+        'inscripciones.Inscripcion',
+        on_delete=models.CASCADE,
+        related_name='certificado_emitido',
+        verbose_name="Inscripción",
+    )
+    hash_contenido = models.CharField(max_length=64, verbose_name="Hash del contenido")
+    archivo = models.FileField(storage=AlmacenamientoCertificados(), upload_to='%Y/%m/', max_length=255)
+    nombre_archivo = models.CharField(max_length=255)
+    generado_el = models.DateTimeField(auto_now=True, verbose_name="Generado el")
+
+    class Meta:
+        verbose_name = "Certificado emitido"
+        verbose_name_plural = "Certificados emitidos"
+
+    def __str__(self):
+        return self.nombre_archivo
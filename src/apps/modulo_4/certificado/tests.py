@@ -1,8 +1,13 @@
+import io
+import tempfile
+import zipfile
 from datetime import date
+from pathlib import Path
 from unittest.mock import patch
 
+from django.contrib.auth.models import User
 from django.contrib.messages import get_messages
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from apps.modulo_1.roles.models import Estudiante
@@ -10,6 +15,8 @@ from apps.modulo_1.usuario.models import Persona, Usuario
 from apps.modulo_2.inscripciones.models import Inscripcion
 from apps.modulo_3.cursos.models import Comision, Curso, PoloCreativo
 from apps.modulo_4.asistencia.models import Asistencia, RegistroAsistencia
+from apps.modulo_4.certificado import generador
+from apps.modulo_4.certificado.models import CertificadoEmitido
 
 
 class CertificadosTests(TestCase):
@@ -102,3 +109,106 @@ class CertificadosTests(TestCase):
         self.assertEqual(response.status_code, 200)
         mensajes = [m.message for m in get_messages(response.wsgi_request)]
         self.assertIn('❌ No cumples con el requisito mínimo de 80% de asistencia para obtener el certificado.', mensajes)
+
+
+class GeneradorCertificadosTests(TestCase):
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+        ajustes = override_settings(CERTIFICADOS_ROOT=Path(self.directorio.name))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.curso = Curso.objects.create(nombre='Robótica', estado='Abierto', orden=1)
+        self.comision = Comision.objects.create(
+            fk_id_curso=self.curso,
+            dias_horarios='Lunes 18:00 - 21:00',
+            fecha_inicio=date(2025, 1, 6),
+            fecha_fin=date(2025, 1, 6),
+            estado='Finalizada',
+            cupo_maximo=10,
+        )
+        self.inscripciones = [self._inscribir(dni, apellido) for dni, apellido in (('83000001', 'Bravo'), ('83000002', 'Alfa'))]
+
+    def _inscribir(self, dni, apellido, aprobado=True):
+        persona = Persona.objects.create(dni=dni, nombre='Estudiante', apellido=apellido, correo=f'{dni}@test.com')
+        usuario = Usuario.objects.create(persona=persona, contrasena='pw')
+        estudiante = Estudiante.objects.create(usuario=usuario, nivel_estudios='SE', institucion_actual='Colegio')
+        inscripcion = Inscripcion.objects.create(estudiante=estudiante, comision=self.comision, estado='confirmado')
+        RegistroAsistencia.objects.update_or_create(
+            inscripcion=inscripcion, defaults={'cumple_requisito_certificado': aprobado},
+        )
+        return inscripcion
+
+    def test_certificado_emitido_se_reutiliza_y_se_regenera_si_cambia_el_nombre(self):
+        inscripcion = self.inscripciones[0]
+        emitido = generador.obtener_certificado(inscripcion)
+        with emitido.archivo.open('rb') as archivo:
+            self.assertTrue(archivo.read().startswith(b'%PDF'))
+
+        with patch.object(generador, 'renderizar') as renderizar:
+            self.assertEqual(generador.obtener_certificado(inscripcion).archivo.name, emitido.archivo.name)
+        renderizar.assert_not_called()
+
+        persona = inscripcion.estudiante.usuario.persona
+        persona.nombre = 'Renombrada'
+        persona.save()
+        inscripcion.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            nuevo = generador.obtener_certificado(inscripcion)
+        self.assertNotEqual(nuevo.hash_contenido, emitido.hash_contenido)
+        self.assertEqual(CertificadoEmitido.objects.count(), 1)
+        self.assertFalse(nuevo.archivo.storage.exists(emitido.archivo.name))
+
+    def test_lote_pdf_y_zip_incluyen_solo_aprobados(self):
+        self._inscribir('83000003', 'Charlie', aprobado=False)
+
+        pdf = io.BytesIO()
+        self.assertEqual(generador.generar_lote(self.comision, pdf, generador.FORMATO_PDF), 2)
+        contenido = pdf.getvalue()
+        self.assertEqual(contenido.count(b'/Type /Page\n'), 2)
+        # La plantilla se incrusta una sola vez como form XObject compartido por las páginas
+        self.assertEqual(contenido.count(b'/Subtype /Form'), 1)
+
+        archivo_zip = io.BytesIO()
+        self.assertEqual(generador.generar_lote(self.comision, archivo_zip, generador.FORMATO_ZIP), 2)
+        with zipfile.ZipFile(archivo_zip) as leido:
+            self.assertEqual(sorted(leido.namelist()), ['Certificado_Robótica_83000001.pdf', 'Certificado_Robótica_83000002.pdf'])
+        self.assertEqual(CertificadoEmitido.objects.count(), 2)
+
+    def test_lote_incluye_inscripcion_sin_registro_que_cumple(self):
+        inscripcion = self._inscribir('83000004', 'Delta')
+        Asistencia.objects.create(inscripcion=inscripcion, fecha_clase=date(2025, 1, 6), presente=True)
+        RegistroAsistencia.objects.filter(inscripcion=inscripcion).delete()
+        sin_asistencia = self._inscribir('83000005', 'Eco')
+        RegistroAsistencia.objects.filter(inscripcion=sin_asistencia).delete()
+
+        self.assertEqual(
+            generador.inscripciones_certificables(self.comision),
+            [self.inscripciones[1], self.inscripciones[0], inscripcion],
+        )
+        self.assertEqual(generador.generar_lote(self.comision, io.BytesIO(), generador.FORMATO_PDF), 3)
+
+    def test_descarga_sin_registro_usa_el_progreso_calculado(self):
+        inscripcion = self._inscribir('83000004', 'Delta')
+        Asistencia.objects.create(inscripcion=inscripcion, fecha_clase=date(2025, 1, 6), presente=True)
+        # Inscripción anterior al registro mantenido por escritura: mi_progreso la habilita igual
+        RegistroAsistencia.objects.filter(inscripcion=inscripcion).delete()
+        self.client.force_login(User.objects.create_user(username='83000004', password='pw'))
+
+        response = self.client.get(reverse('usuario:descargar_certificado', args=[inscripcion.id]), secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    def test_descarga_responde_304_con_el_mismo_etag(self):
+        dni = self.inscripciones[0].estudiante.usuario.persona.dni
+        self.client.force_login(User.objects.create_user(username=dni, password='pw'))
+        url = reverse('usuario:descargar_certificado', args=[self.inscripciones[0].id])
+
+        response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        etag = response.headers['ETag']
+
+        response = self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EstadisticaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.modulo_5.estadistica'
+
+    def ready(self):
+        import apps.modulo_5.estadistica.signals
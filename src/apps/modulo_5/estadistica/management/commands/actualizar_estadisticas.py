@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.modulo_3.cursos.models import Comision
+from apps.modulo_5.estadistica.materializacion import actualizar_estadisticas
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las estadísticas precalculadas por comisión (pendientes o todas)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Recalcula todas las comisiones, no solo las desactualizadas',
+        )
+
+    def handle(self, *args, **options):
+        comision_ids = None
+        if options['todas']:
+            comision_ids = Comision.objects.values_list('id_comision', flat=True)
+
+        total = actualizar_estadisticas(comision_ids)
+        self.stdout.write(f'Comisiones recalculadas: {total}')
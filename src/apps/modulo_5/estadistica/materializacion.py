@@ -0,0 +1,241 @@
+"""
+Materialización de estadísticas por comisión (EstadisticaComision).
+
+Las señales de Inscripcion, Comision, Persona y RegistroAsistencia marcan como
+desactualizadas las filas de las comisiones afectadas y, al confirmarse la
+transacción, las recalculan en lotes chicos. ``actualizar_estadisticas`` recalcula
+las filas desactualizadas y las faltantes (carga inicial o lo que haya quedado
+pendiente), con una consulta agregada por dimensión para todo el lote.
+
+Las edades no se guardan: cada comisión guarda sus inscripciones por fecha de
+nacimiento (NacimientoComision) y los rangos etarios se resuelven al leer, así
+una fila calculada no queda vieja al cambiar el día.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+
+from apps.modulo_2.inscripciones.models import Inscripcion
+from apps.modulo_3.cursos.models import Comision
+
+from .models import EstadisticaComision, NacimientoComision
+
+
+# (clave, edad desde la que empieza el rango); las fechas de nacimiento vacías van a no_informada
+RANGOS_EDAD = [
+    ('menor_6', 0),
+    ('rango_6_9', 6),
+    ('rango_10_12', 10),
+    ('rango_13_16', 13),
+    ('rango_17_18', 17),
+    ('rango_19_24', 19),
+    ('rango_25_34', 25),
+    ('rango_35_plus', 35),
+]
+CLAVE_EDAD_NO_INFORMADA = 'no_informada'
+CLAVES_EDAD = [clave for clave, _ in RANGOS_EDAD] + [CLAVE_EDAD_NO_INFORMADA]
+
+GENEROS = [
+    ('M', 'genero_m'),
+    ('F', 'genero_f'),
+    ('O', 'genero_o'),
+    ('P', 'genero_p'),
+]
+
+CAMPOS_ESTADO = {
+    'pre_inscripto': 'total_pre_inscriptos',
+    'confirmado': 'total_confirmados',
+    'lista_espera': 'total_lista_espera',
+    'cancelada': 'total_canceladas',
+}
+
+CAMPOS_CALCULADOS = (
+    ['curso', 'polo', 'fecha_inicio']
+    + list(CAMPOS_ESTADO.values())
+    + ['registros_asistencia', 'completados', 'asistencia_0_49', 'asistencia_50_74', 'asistencia_75_100',
+       'suma_porcentaje_asistencia']
+    + [campo for _, campo in GENEROS]
+    + ['genero_sin_dato', 'desactualizada', 'calculada_el']
+)
+
+LOTE = 200
+# Al confirmar un cambio se recalculan pocas comisiones por transacción
+LOTE_AL_CONFIRMAR = 20
+
+
+_CAMPO_GENERO = dict(GENEROS)
+
+
+def _nacidos_hasta(hoy, edad):
+    """Última fecha de nacimiento con ``edad`` años cumplidos a ``hoy``"""
+    try:
+        return hoy.replace(year=hoy.year - edad)
+    except ValueError:
+        # 29 de febrero en un año no bisiesto
+        return hoy.replace(year=hoy.year - edad, day=28)
+
+
+def anotar_edades(estadisticas, hoy=None):
+    """
+    Anota cada EstadisticaComision con sus inscripciones confirmadas por rango etario a
+    ``hoy`` (un atributo por clave de CLAVES_EDAD, None si no tiene), en la misma consulta.
+    """
+    hoy = hoy or date.today()
+    fecha = 'nacimientos__fecha_nacimiento'
+    rangos = {}
+    for indice, (clave, desde) in enumerate(RANGOS_EDAD):
+        filtro = Q(**{f'{fecha}__isnull': False})
+        if desde:
+            filtro &= Q(**{f'{fecha}__lte': _nacidos_hasta(hoy, desde)})
+        if indice + 1 < len(RANGOS_EDAD):
+            filtro &= Q(**{f'{fecha}__gt': _nacidos_hasta(hoy, RANGOS_EDAD[indice + 1][1])})
+        rangos[clave] = Sum('nacimientos__total', filter=filtro)
+    rangos[CLAVE_EDAD_NO_INFORMADA] = Sum('nacimientos__total', filter=Q(**{f'{fecha}__isnull': True}))
+    return estadisticas.annotate(**rangos)
+
+
+def edades_por_comision(comision_ids, hoy=None):
+    """Inscripciones confirmadas por rango etario a ``hoy``: ``{comision_id: {clave: total}}``"""
+    filas = anotar_edades(EstadisticaComision.objects.filter(comision_id__in=comision_ids), hoy)
+    return {
+        fila.comision_id: {clave: getattr(fila, clave) or 0 for clave in CLAVES_EDAD}
+        for fila in filas
+    }
+
+
+def marcar_desactualizadas(comision_ids):
+    """Marca las filas de las comisiones indicadas y las recalcula al confirmar la transacción"""
+    comision_ids = {comision_id for comision_id in comision_ids if comision_id is not None}
+    if not comision_ids:
+        return
+    EstadisticaComision.objects.filter(comision_id__in=comision_ids, desactualizada=False).update(desactualizada=True)
+    # robust: un error al recalcular no afecta al request que ya confirmó; la fila queda pendiente
+    transaction.on_commit(lambda: recalcular_marcadas(comision_ids), robust=True)
+
+
+def recalcular_marcadas(comision_ids):
+    """Recalcula las comisiones indicadas que sigan pendientes (otra transacción pudo recalcularlas ya)"""
+    return actualizar_estadisticas(comisiones_pendientes().filter(id_comision__in=comision_ids), lote=LOTE_AL_CONFIRMAR)
+
+
+def comisiones_pendientes():
+    """Ids de comisiones sin fila o marcadas como desactualizadas"""
+    return Comision.objects.filter(
+        Q(estadistica__isnull=True) | Q(estadistica__desactualizada=True)
+    ).values_list('id_comision', flat=True)
+
+
+def hay_pendientes():
+    return comisiones_pendientes().exists()
+
+
+def _calcular_lote(comisiones, hoy):
+    ids = [comision.id_comision for comision in comisiones]
+    filas = {
+        comision.id_comision: EstadisticaComision(
+            comision_id=comision.id_comision,
+            curso_id=comision.fk_id_curso_id,
+            polo_id=comision.fk_id_polo_id,
+            fecha_inicio=comision.fecha_inicio,
+            desactualizada=False,
+            calculada_el=hoy,
+        )
+        for comision in comisiones
+    }
+
+    for row in Inscripcion.objects.filter(comision_id__in=ids).values('comision_id', 'estado').annotate(total=Count('id')).order_by():
+        campo = CAMPOS_ESTADO.get(row['estado'])
+        if campo:
+            setattr(filas[row['comision_id']], campo, row['total'])
+
+    confirmadas = Inscripcion.objects.filter(comision_id__in=ids, estado='confirmado').order_by()
+
+    registros = confirmadas.filter(registro_asistencia__isnull=False).values('comision_id').annotate(
+        registros=Count('registro_asistencia'),
+        completados=Count('registro_asistencia', filter=Q(registro_asistencia__cumple_requisito_certificado=True)),
+        rango_0_49=Count('registro_asistencia', filter=Q(registro_asistencia__porcentaje_asistencia__lt=50)),
+        rango_50_74=Count('registro_asistencia', filter=Q(
+            registro_asistencia__porcentaje_asistencia__gte=50,
+            registro_asistencia__porcentaje_asistencia__lt=75,
+        )),
+        rango_75_100=Count('registro_asistencia', filter=Q(registro_asistencia__porcentaje_asistencia__gte=75)),
+        suma=Sum('registro_asistencia__porcentaje_asistencia'),
+    )
+    for row in registros:
+        fila = filas[row['comision_id']]
+        fila.registros_asistencia = row['registros']
+        fila.completados = row['completados']
+        fila.asistencia_0_49 = row['rango_0_49']
+        fila.asistencia_50_74 = row['rango_50_74']
+        fila.asistencia_75_100 = row['rango_75_100']
+        fila.suma_porcentaje_asistencia = row['suma'] or Decimal('0')
+
+    for row in confirmadas.values('comision_id', 'estudiante__usuario__persona__genero').annotate(total=Count('id')):
+        campo = _CAMPO_GENERO.get(row['estudiante__usuario__persona__genero'], 'genero_sin_dato')
+        fila = filas[row['comision_id']]
+        setattr(fila, campo, getattr(fila, campo) + row['total'])
+
+    nacimientos = [
+        NacimientoComision(
+            estadistica_id=row['comision_id'],
+            fecha_nacimiento=row['estudiante__usuario__persona__fecha_nacimiento'],
+            total=row['total'],
+        )
+        for row in confirmadas.values('comision_id', 'estudiante__usuario__persona__fecha_nacimiento').annotate(total=Count('id'))
+    ]
+
+    return list(filas.values()), nacimientos
+
+
+def _guardar(filas, nacimientos):
+    _guardar_filas(filas)
+    NacimientoComision.objects.filter(estadistica_id__in=[fila.comision_id for fila in filas]).delete()
+    NacimientoComision.objects.bulk_create(nacimientos)
+
+
+def _guardar_filas(filas):
+    if connection.features.supports_update_conflicts_with_target:
+        EstadisticaComision.objects.bulk_create(
+            filas,
+            update_conflicts=True,
+            unique_fields=['comision'],
+            update_fields=CAMPOS_CALCULADOS,
+        )
+        return
+
+    existentes = set(
+        EstadisticaComision.objects.filter(comision_id__in=[fila.comision_id for fila in filas])
+        .values_list('comision_id', flat=True)
+    )
+    nuevas = [fila for fila in filas if fila.comision_id not in existentes]
+    actualizadas = [fila for fila in filas if fila.comision_id in existentes]
+    if nuevas:
+        EstadisticaComision.objects.bulk_create(nuevas)
+    if actualizadas:
+        EstadisticaComision.objects.bulk_update(actualizadas, CAMPOS_CALCULADOS)
+
+
+def actualizar_estadisticas(comision_ids=None, hoy=None, lote=LOTE):
+    """
+    Recalcula las estadísticas de las comisiones indicadas, o de las pendientes si no se indican,
+    de a ``lote`` comisiones por transacción. Retorna la cantidad de comisiones recalculadas.
+    """
+    hoy = hoy or date.today()
+    if comision_ids is None:
+        comision_ids = comisiones_pendientes()
+    comision_ids = sorted(set(comision_ids))
+
+    total = 0
+    for inicio in range(0, len(comision_ids), lote):
+        comisiones = list(
+            Comision.objects.filter(id_comision__in=comision_ids[inicio:inicio + lote])
+            .only('id_comision', 'fk_id_curso_id', 'fk_id_polo_id', 'fecha_inicio')
+        )
+        if not comisiones:
+            continue
+        with transaction.atomic():
+            _guardar(*_calcular_lote(comisiones, hoy))
+        total += len(comisiones)
+    return total
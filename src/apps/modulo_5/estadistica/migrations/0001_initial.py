@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('cursos', '0007_comision_contadores_cupo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaComision',
+            fields=[
+                ('comision', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='estadistica', serialize=False, to='cursos.comision', verbose_name='Comisión')),
+                ('fecha_inicio', models.DateField(blank=True, db_index=True, null=True, verbose_name='Fecha de Inicio')),
+                ('total_pre_inscriptos', models.PositiveIntegerField(default=0, verbose_name='Pre-Inscriptos')),
+                ('total_confirmados', models.PositiveIntegerField(default=0, verbose_name='Confirmados')),
+                ('total_lista_espera', models.PositiveIntegerField(default=0, verbose_name='En Lista de Espera')),
+                ('total_canceladas', models.PositiveIntegerField(default=0, verbose_name='Canceladas')),
+                ('registros_asistencia', models.PositiveIntegerField(default=0, verbose_name='Registros de Asistencia')),
+                ('completados', models.PositiveIntegerField(default=0, verbose_name='Cumplen Requisito de Certificado')),
+                ('asistencia_0_49', models.PositiveIntegerField(default=0, verbose_name='Asistencia 0-49%')),
+                ('asistencia_50_74', models.PositiveIntegerField(default=0, verbose_name='Asistencia 50-74%')),
+                ('asistencia_75_100', models.PositiveIntegerField(default=0, verbose_name='Asistencia 75-100%')),
+                ('suma_porcentaje_asistencia', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Suma de % de Asistencia')),
+                ('edad_menor_6', models.PositiveIntegerField(default=0)),
+                ('edad_6_9', models.PositiveIntegerField(default=0)),
+                ('edad_10_12', models.PositiveIntegerField(default=0)),
+                ('edad_13_16', models.PositiveIntegerField(default=0)),
+                ('edad_17_18', models.PositiveIntegerField(default=0)),
+                ('edad_19_24', models.PositiveIntegerField(default=0)),
+                ('edad_25_34', models.PositiveIntegerField(default=0)),
+                ('edad_35_plus', models.PositiveIntegerField(default=0)),
+                ('edad_no_informada', models.PositiveIntegerField(default=0)),
+                ('genero_m', models.PositiveIntegerField(default=0)),
+                ('genero_f', models.PositiveIntegerField(default=0)),
+                ('genero_o', models.PositiveIntegerField(default=0)),
+                ('genero_p', models.PositiveIntegerField(default=0)),
+                ('genero_sin_dato', models.PositiveIntegerField(default=0)),
+                ('desactualizada', models.BooleanField(db_index=True, default=True, verbose_name='Desactualizada')),
+                ('calculada_el', models.DateField(blank=True, null=True, verbose_name='Calculada el')),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas', to='cursos.curso', verbose_name='Curso')),
+                ('polo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='estadisticas', to='cursos.polocreativo', verbose_name='Polo Creativo')),
+            ],
+            options={
+                'verbose_name': 'Estadística de Comisión',
+                'verbose_name_plural': 'Estadísticas de Comisiones',
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def marcar_para_recalcular(apps, schema_editor):
+    # Las filas existentes no tienen nacimientos: se recalculan con actualizar_estadisticas
+    EstadisticaComision = apps.get_model('estadistica', 'EstadisticaComision')
+    EstadisticaComision.objects.all().update(desactualizada=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estadistica', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='estadisticacomision',
+            name='edad_10_12',
+        ),
+        migrations.RemoveField(
+            model_name='estadisticacomision',
+            name='edad_13_16',
+        ),
+        migrations.RemoveField(
+            model_name='estadisticacomision',
+            name='edad_17_18',
+        ),
+        migrations.RemoveField(
+            model_name='estadisticacomision',
+            name='edad_19_24',
+        ),
+        migrations.RemoveField(
+            model_name='estadisticacomision',
+            name='edad_25_34',
+        ),
+        migrations.RemoveField(
+            model_name='estadisticacomision',
+            name='edad_35_plus',
+        ),
+        migrations.RemoveField(
+            model_name='estadisticacomision',
+            name='edad_6_9',
+        ),
+        migrations.RemoveField(
+            model_name='estadisticacomision',
+            name='edad_menor_6',
+        ),
+        migrations.RemoveField(
+            model_name='estadisticacomision',
+            name='edad_no_informada',
+        ),
+        migrations.CreateModel(
+            name='NacimientoComision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_nacimiento', models.DateField(blank=True, null=True, verbose_name='Fecha de Nacimiento')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Inscripciones')),
+                ('estadistica', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nacimientos', to='estadistica.estadisticacomision', verbose_name='Estadística')),
+            ],
+            options={
+                'verbose_name': 'Nacimientos de Comisión',
+                'verbose_name_plural': 'Nacimientos de Comisiones',
+            },
+        ),
+        migrations.RunPython(marcar_para_recalcular, migrations.RunPython.noop),
+    ]
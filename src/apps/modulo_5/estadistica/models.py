@@ -1,3 +1,81 @@
 from django.db import models
 
-# Create your models here.
+from apps.modulo_3.cursos.models import Comision, Curso, PoloCreativo
+
+
+class EstadisticaComision(models.Model):
+    """
+    Resumen precalculado de inscripciones, asistencia y demografía de una comisión.
+    Cada fila lleva el curso, el polo y la fecha de inicio de la comisión para que
+    el panel de estadísticas agregue cualquier rango de fechas sumando filas.
+    """
+    comision = models.OneToOneField(
+        Comision,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='estadistica',
+        verbose_name="Comisión",
+    )
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='estadisticas', verbose_name="Curso")
+    polo = models.ForeignKey(
+        PoloCreativo,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='estadisticas',
+        verbose_name="Polo Creativo",
+    )
+    fecha_inicio = models.DateField(blank=True, null=True, db_index=True, verbose_name="Fecha de Inicio")
+
+    # Inscripciones por estado
+    total_pre_inscriptos = models.PositiveIntegerField(default=0, verbose_name="Pre-Inscriptos")
+    total_confirmados = models.PositiveIntegerField(default=0, verbose_name="Confirmados")
+    total_lista_espera = models.PositiveIntegerField(default=0, verbose_name="En Lista de Espera")
+    total_canceladas = models.PositiveIntegerField(default=0, verbose_name="Canceladas")
+
+    # Asistencia de inscripciones confirmadas
+    registros_asistencia = models.PositiveIntegerField(default=0, verbose_name="Registros de Asistencia")
+    completados = models.PositiveIntegerField(default=0, verbose_name="Cumplen Requisito de Certificado")
+    asistencia_0_49 = models.PositiveIntegerField(default=0, verbose_name="Asistencia 0-49%")
+    asistencia_50_74 = models.PositiveIntegerField(default=0, verbose_name="Asistencia 50-74%")
+    asistencia_75_100 = models.PositiveIntegerField(default=0, verbose_name="Asistencia 75-100%")
+    suma_porcentaje_asistencia = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Suma de % de Asistencia")
+
+    # Género de inscripciones confirmadas
+    genero_m = models.PositiveIntegerField(default=0)
+    genero_f = models.PositiveIntegerField(default=0)
+    genero_o = models.PositiveIntegerField(default=0)
+    genero_p = models.PositiveIntegerField(default=0)
+    genero_sin_dato = models.PositiveIntegerField(default=0)
+
+    desactualizada = models.BooleanField(default=True, db_index=True, verbose_name="Desactualizada")
+    calculada_el = models.DateField(blank=True, null=True, verbose_name="Calculada el")
+
+    class Meta:
+        verbose_name = "Estadística de Comisión"
+        verbose_name_plural = "Estadísticas de Comisiones"
+
+    def __str__(self):
+        return f"Estadística Comisión #{self.comision_id}"
+
+
+class NacimientoComision(models.Model):
+    """
+    Inscripciones confirmadas de una comisión por fecha de nacimiento. Los rangos
+    etarios se resuelven al leer, con la fecha del día, así la fila no envejece.
+    """
+    estadistica = models.ForeignKey(
+        EstadisticaComision,
+        on_delete=models.CASCADE,
+        related_name='nacimientos',
+        verbose_name="Estadística",
+    )
+    fecha_nacimiento = models.DateField(blank=True, null=True, verbose_name="Fecha de Nacimiento")
+    total = models.PositiveIntegerField(default=0, verbose_name="Inscripciones")
+
+    class Meta:
+        verbose_name = "Nacimientos de Comisión"
+        verbose_name_plural = "Nacimientos de Comisiones"
+
+    def __str__(self):
+        return f"Comisión #{self.estadistica_id} - {self.fecha_nacimiento or 'sin fecha'}: {self.total}"
@@ -0,0 +1,43 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.modulo_1.usuario.models import Persona
+from apps.modulo_2.inscripciones.models import Inscripcion
+from apps.modulo_3.cursos.models import Comision
+
+from .materializacion import marcar_desactualizadas
+
+
+@receiver(pre_save, sender=Inscripcion)
+def marcar_comision_anterior(sender, instance, **kwargs):
+    # Si la inscripción cambia de comisión, la comisión de origen también queda desactualizada
+    if instance.estado_original and instance.estado_original[0] != instance.comision_id:
+        marcar_desactualizadas([instance.estado_original[0]])
+
+
+@receiver(post_save, sender=Inscripcion)
+@receiver(post_delete, sender=Inscripcion)
+def marcar_por_inscripcion(sender, instance, **kwargs):
+    marcar_desactualizadas([instance.comision_id])
+
+
+@receiver(post_save, sender=Comision)
+def marcar_por_comision(sender, instance, **kwargs):
+    # Una comisión nueva no tiene fila todavía: se crea al confirmar
+    marcar_desactualizadas([instance.pk])
+
+
+@receiver(post_save, sender=Persona)
+def marcar_por_persona(sender, instance, created, **kwargs):
+    if created:
+        return
+    marcar_desactualizadas(
+        Inscripcion.objects.filter(estudiante__usuario__persona=instance).values_list('comision_id', flat=True)
+    )
+
+
+@receiver(post_save, sender='asistencia.RegistroAsistencia')
+def marcar_por_registro_asistencia(sender, instance, **kwargs):
+    marcar_desactualizadas(
+        Inscripcion.objects.filter(pk=instance.inscripcion_id).values_list('comision_id', flat=True)
+    )
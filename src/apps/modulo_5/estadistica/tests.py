@@ -1,7 +1,8 @@
 from datetime import date
 
-from io import BytesIO
+from io import BytesIO, StringIO
 
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 from openpyxl import load_workbook
@@ -58,9 +59,10 @@ class EstadisticaAdminTests(TestCase):
         response = self.client.get(reverse('administracion:exportar_estadisticas_estudiantes_curso'), secure=True)
         self.assertEqual(response.status_code, 200)
         self.assertIn('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', response['Content-Type'])
-        self.assertTrue(response.content.startswith(b'PK'))
+        contenido = response.getvalue()
+        self.assertTrue(contenido.startswith(b'PK'))
 
-        wb = load_workbook(filename=BytesIO(response.content))
+        wb = load_workbook(filename=BytesIO(contenido))
         self.assertIn('Estudiantes por Curso', wb.sheetnames)
         self.assertIn('Detalle Estudiantes', wb.sheetnames)
 
@@ -69,3 +71,114 @@ class EstadisticaAdminTests(TestCase):
         self.assertEqual(ws.cell(row=2, column=1).value, curso.nombre)
         self.assertEqual(ws.cell(row=2, column=2).value, 1)
         self.assertEqual(ws.cell(row=2, column=3).value, 1)
+
+    def test_estadisticas_leen_filas_precalculadas_y_el_comando_las_actualiza(self):
+        import json
+
+        from apps.modulo_5.estadistica.models import EstadisticaComision
+
+        curso = Curso.objects.create(nombre='Curso Snapshot', estado='Abierto', orden=11)
+        comision = Comision.objects.create(
+            fk_id_curso=curso,
+            dias_horarios='Miércoles 10:00 - 12:00',
+            fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 1, 1),
+            cupo_maximo=10,
+        )
+        Comision.objects.create(
+            fk_id_curso=curso,
+            dias_horarios='Miércoles 10:00 - 12:00',
+            fecha_inicio=date(2024, 1, 3),
+            fecha_fin=date(2024, 1, 3),
+            cupo_maximo=10,
+        )
+
+        inscripciones = []
+        for i, (genero, nacimiento) in enumerate([('F', date(2010, 6, 1)), ('M', None), (None, date(1980, 1, 1))]):
+            persona = Persona.objects.create(
+                dni=f'8500000{i}', nombre='Est', apellido=str(i), correo=f's{i}@test.com',
+                genero=genero, fecha_nacimiento=nacimiento,
+            )
+            usuario = Usuario.objects.create(persona=persona, contrasena='pw')
+            estudiante = Estudiante.objects.create(usuario=usuario, nivel_estudios='SE', institucion_actual='Colegio')
+            inscripciones.append(Inscripcion.objects.create(
+                estudiante=estudiante, comision=comision, estado='pre_inscripto' if i == 2 else 'confirmado',
+            ))
+        Asistencia.objects.create(inscripcion=inscripciones[0], fecha_clase=date(2025, 1, 1), presente=True)
+
+        call_command('actualizar_estadisticas', stdout=StringIO())
+        params = {'fecha_desde': '2025-01-01', 'fecha_hasta': '2025-12-31'}
+        response = self.client.get(reverse('administracion:estadisticas'), params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['estadisticas_desactualizadas'])
+        self.assertEqual(response.context['total_inscripciones'], 2)
+        self.assertEqual(response.context['total_cursos'], 1)
+
+        rangos = json.loads(response.context['asistencia_rangos_json'])
+        self.assertEqual(rangos['global']['rango_75_100'], 1)
+        self.assertEqual(rangos['global']['sin_registro'], 0)
+        self.assertEqual([c['id'] for c in rangos['comisiones']], [comision.id_comision])
+
+        edades = json.loads(response.context['edad_rangos_json'])
+        self.assertEqual(edades['global']['no_informada'], 1)
+        self.assertEqual(sum(edades['global'].values()), 2)
+
+        generos = {g['nombre']: g['cantidad'] for g in json.loads(response.context['genero_grafico_json'])}
+        self.assertEqual((generos['Femenino'], generos['Masculino']), (1, 1))
+
+        estados = {e['nombre']: e['cantidad'] for e in json.loads(response.context['inscripciones_estado_json'])}
+        self.assertEqual(estados, {'Confirmado': 2, 'Pre-Inscripto': 1})
+
+        inscripciones[1].estado = 'cancelada'
+        with self.captureOnCommitCallbacks() as callbacks:
+            inscripciones[1].save()
+        self.assertTrue(EstadisticaComision.objects.get(comision=comision).desactualizada)
+
+        # La vista no recalcula: hasta que se confirma el cambio muestra las cifras anteriores con el aviso
+        response = self.client.get(reverse('administracion:estadisticas'), params, secure=True)
+        self.assertTrue(response.context['estadisticas_desactualizadas'])
+        self.assertContains(response, 'Estadísticas desactualizadas')
+        estados = {e['nombre']: e['cantidad'] for e in json.loads(response.context['inscripciones_estado_json'])}
+        self.assertEqual(estados, {'Confirmado': 2, 'Pre-Inscripto': 1})
+        self.assertTrue(EstadisticaComision.objects.get(comision=comision).desactualizada)
+
+        for callback in callbacks:
+            callback()
+        response = self.client.get(reverse('administracion:estadisticas'), params, secure=True)
+        self.assertFalse(response.context['estadisticas_desactualizadas'])
+        estados = {e['nombre']: e['cantidad'] for e in json.loads(response.context['inscripciones_estado_json'])}
+        self.assertEqual(estados, {'Cancelada': 1, 'Confirmado': 1, 'Pre-Inscripto': 1})
+
+    def test_cambios_se_recalculan_al_confirmar_y_las_edades_no_envejecen(self):
+        from apps.modulo_5.estadistica.materializacion import edades_por_comision, hay_pendientes
+        from apps.modulo_5.estadistica.models import EstadisticaComision
+
+        curso = Curso.objects.create(nombre='Curso Edades', estado='Abierto', orden=12)
+        with self.captureOnCommitCallbacks(execute=True):
+            comision = Comision.objects.create(
+                fk_id_curso=curso,
+                dias_horarios='Miércoles 10:00 - 12:00',
+                fecha_inicio=date(2025, 1, 1),
+                fecha_fin=date(2025, 1, 1),
+                cupo_maximo=10,
+            )
+        self.assertFalse(EstadisticaComision.objects.get(comision=comision).desactualizada)
+
+        persona = Persona.objects.create(
+            dni='85000010', nombre='Est', apellido='Edad', correo='edad@test.com', fecha_nacimiento=date(2010, 6, 1),
+        )
+        usuario = Usuario.objects.create(persona=persona, contrasena='pw')
+        estudiante = Estudiante.objects.create(usuario=usuario, nivel_estudios='SE', institucion_actual='Colegio')
+        with self.captureOnCommitCallbacks(execute=True):
+            Inscripcion.objects.create(estudiante=estudiante, comision=comision, estado='confirmado')
+        self.assertFalse(hay_pendientes())
+
+        # Sin recalcular, la misma fila da la edad de cada día
+        self.assertEqual(edades_por_comision([comision.pk], hoy=date(2027, 5, 31))[comision.pk]['rango_13_16'], 1)
+        self.assertEqual(edades_por_comision([comision.pk], hoy=date(2027, 6, 1))[comision.pk]['rango_17_18'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            persona.fecha_nacimiento = None
+            persona.save()
+        self.assertFalse(hay_pendientes())
+        self.assertEqual(edades_por_comision([comision.pk])[comision.pk]['no_informada'], 1)
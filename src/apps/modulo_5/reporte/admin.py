@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import TrabajoExportacion
+
+
+@admin.register(TrabajoExportacion)
+class TrabajoExportacionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'tipo', 'estado', 'filas_procesadas', 'total_filas', 'intentos', 'creado_el', 'finalizado_el', 'expira_el')
+    list_filter = ('estado', 'tipo')
+    readonly_fields = ('clave', 'creado_el', 'iniciado_el', 'latido', 'finalizado_el')
+    filter_horizontal = ('solicitantes',)
@@ -0,0 +1,178 @@
+"""
+Cola de exportaciones en segundo plano sobre la base de datos (sin broker externo).
+
+* ``encolar`` registra un pedido o reutiliza uno idéntico (misma clave) que siga
+  pendiente, en proceso o con el archivo vigente.
+* ``tomar_siguiente`` reclama el pendiente más antiguo con un UPDATE condicional,
+  así varios procesos ``procesar_exportaciones`` pueden convivir sin bloquearse.
+* ``ejecutar`` genera el archivo con las definiciones de
+  ``apps.modulo_6.administracion.reportes`` e informa el avance cada
+  ``FILAS_POR_AVANCE`` filas (ese guardado también sirve de latido). Los datos del
+  archivo se leen de la réplica si hay una configurada (``core.replica``).
+* ``recuperar_abandonados`` devuelve a la cola los trabajos cuyo proceso dejó de
+  dar señales y ``purgar_vencidos`` elimina archivos y registros vencidos.
+"""
+import hashlib
+import json
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.modulo_6.administracion import exportacion, reportes
+from core.replica import lecturas_en_replica
+
+from .models import TrabajoExportacion
+
+
+FILAS_POR_AVANCE = 500
+
+
+def clave_trabajo(tipo, parametros):
+    """Hash estable del tipo y los parámetros (independiente del orden de las claves)"""
+    contenido = json.dumps([tipo, parametros], sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def _retencion():
+    return timedelta(hours=settings.EXPORTACIONES_RETENCION_HORAS)
+
+
+def trabajos_reutilizables(clave, ahora=None):
+    ahora = ahora or timezone.now()
+    return TrabajoExportacion.objects.filter(clave=clave).filter(
+        Q(estado__in=[TrabajoExportacion.ESTADO_PENDIENTE, TrabajoExportacion.ESTADO_EN_PROCESO])
+        | Q(estado=TrabajoExportacion.ESTADO_COMPLETADO, expira_el__gt=ahora)
+    )
+
+
+def encolar(tipo, parametros, usuario=None):
+    """
+    Encola una exportación y suma al usuario a sus solicitantes. Retorna ``(trabajo, creado)``;
+    ``creado`` es False cuando se reutilizó un trabajo con los mismos parámetros.
+    """
+    clave = clave_trabajo(tipo, parametros)
+    with transaction.atomic():
+        trabajo = trabajos_reutilizables(clave).select_for_update().order_by('-creado_el').first()
+        creado = trabajo is None
+        if creado:
+            trabajo = TrabajoExportacion.objects.create(tipo=tipo, parametros=parametros, clave=clave)
+        if usuario is not None and usuario.is_authenticated:
+            trabajo.solicitantes.add(usuario)
+    return trabajo, creado
+
+
+def tomar_siguiente(ahora=None):
+    """Reclama el trabajo pendiente más antiguo. Retorna el trabajo o None si la cola está vacía."""
+    ahora = ahora or timezone.now()
+    candidatos = (
+        TrabajoExportacion.objects.filter(estado=TrabajoExportacion.ESTADO_PENDIENTE)
+        .order_by('creado_el', 'id')
+        .values_list('id', flat=True)[:10]
+    )
+    for trabajo_id in list(candidatos):
+        # Si otro proceso lo tomó primero el UPDATE no afecta filas y se prueba con el siguiente
+        tomado = TrabajoExportacion.objects.filter(
+            pk=trabajo_id, estado=TrabajoExportacion.ESTADO_PENDIENTE,
+        ).update(
+            estado=TrabajoExportacion.ESTADO_EN_PROCESO,
+            iniciado_el=ahora,
+            latido=ahora,
+            intentos=F('intentos') + 1,
+            filas_procesadas=0,
+        )
+        if tomado:
+            return TrabajoExportacion.objects.get(pk=trabajo_id)
+    return None
+
+
+def _con_avance(trabajo, filas, contador):
+    for fila in filas:
+        yield fila
+        contador[0] += 1
+        if contador[0] % FILAS_POR_AVANCE == 0:
+            TrabajoExportacion.objects.filter(pk=trabajo.pk).update(
+                filas_procesadas=contador[0],
+                latido=timezone.now(),
+            )
+
+
+def ejecutar(trabajo):
+    """Genera el archivo de un trabajo ya reclamado. Retorna el trabajo actualizado."""
+    try:
+        definicion = reportes.obtener_definicion(trabajo.tipo)
+        if definicion is None:
+            raise ValueError(f'Tipo de exportación desconocido: {trabajo.tipo}')
+
+        with lecturas_en_replica():
+            nombre_archivo, hojas = definicion.construir(trabajo.parametros)
+            trabajo.total_filas = sum(hoja.contar() for hoja in hojas)
+            TrabajoExportacion.objects.filter(pk=trabajo.pk).update(total_filas=trabajo.total_filas, latido=timezone.now())
+
+            contador = [0]
+            for hoja in hojas:
+                hoja.filas = _con_avance(trabajo, hoja.filas, contador)
+
+            with tempfile.TemporaryFile() as temporal:
+                exportacion.escribir(definicion.formato, temporal, hojas)
+                temporal.seek(0)
+                trabajo.archivo.save(nombre_archivo, File(temporal), save=False)
+
+        trabajo.estado = TrabajoExportacion.ESTADO_COMPLETADO
+        trabajo.nombre_archivo = nombre_archivo
+        trabajo.filas_procesadas = contador[0]
+        trabajo.mensaje_error = ''
+    except Exception as e:
+        trabajo.estado = TrabajoExportacion.ESTADO_ERROR
+        trabajo.mensaje_error = f'{type(e).__name__}: {e}'
+
+    ahora = timezone.now()
+    trabajo.finalizado_el = ahora
+    trabajo.latido = ahora
+    trabajo.expira_el = ahora + _retencion()
+    trabajo.save(update_fields=[
+        'estado', 'archivo', 'nombre_archivo', 'filas_procesadas', 'total_filas',
+        'mensaje_error', 'finalizado_el', 'latido', 'expira_el',
+    ])
+    return trabajo
+
+
+def recuperar_abandonados(ahora=None):
+    """
+    Trabajos "en proceso" sin actividad durante EXPORTACIONES_TIMEOUT_MINUTOS (proceso caído):
+    vuelven a la cola o, si agotaron los intentos, quedan con error.
+    Retorna la cantidad de trabajos afectados.
+    """
+    ahora = ahora or timezone.now()
+    abandonados = TrabajoExportacion.objects.filter(
+        estado=TrabajoExportacion.ESTADO_EN_PROCESO,
+        latido__lt=ahora - timedelta(minutes=settings.EXPORTACIONES_TIMEOUT_MINUTOS),
+    )
+    fallidos = abandonados.filter(intentos__gte=settings.EXPORTACIONES_MAX_INTENTOS).update(
+        estado=TrabajoExportacion.ESTADO_ERROR,
+        mensaje_error='El proceso de exportación se interrumpió demasiadas veces.',
+        finalizado_el=ahora,
+        expira_el=ahora + _retencion(),
+    )
+    reencolados = abandonados.update(estado=TrabajoExportacion.ESTADO_PENDIENTE, filas_procesadas=0)
+    return fallidos + reencolados
+
+
+def purgar_vencidos(ahora=None):
+    """Elimina los trabajos finalizados cuya retención venció, junto con sus archivos"""
+    ahora = ahora or timezone.now()
+    vencidos = list(
+        TrabajoExportacion.objects.filter(
+            estado__in=[TrabajoExportacion.ESTADO_COMPLETADO, TrabajoExportacion.ESTADO_ERROR],
+            expira_el__lte=ahora,
+        )
+    )
+    for trabajo in vencidos:
+        if trabajo.archivo:
+            trabajo.archivo.delete(save=False)
+    TrabajoExportacion.objects.filter(pk__in=[trabajo.pk for trabajo in vencidos]).delete()
+    return len(vencidos)
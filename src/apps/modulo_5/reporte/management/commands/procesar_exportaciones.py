@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.modulo_5.reporte.cola import ejecutar, purgar_vencidos, recuperar_abandonados, tomar_siguiente
+from apps.modulo_5.reporte.models import TrabajoExportacion
+
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de exportaciones en segundo plano (worker local, sin broker externo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesa los trabajos pendientes y termina (útil para cron)',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=5.0,
+            help='Segundos de espera cuando la cola está vacía (por defecto 5)',
+        )
+        parser.add_argument(
+            '--max-trabajos',
+            type=int,
+            default=0,
+            help='Termina después de procesar esta cantidad de trabajos (0 = sin límite)',
+        )
+
+    def _mantenimiento(self):
+        recuperados = recuperar_abandonados()
+        purgados = purgar_vencidos()
+        if recuperados:
+            self.stdout.write(f'Trabajos abandonados recuperados: {recuperados}')
+        if purgados:
+            self.stdout.write(f'Exportaciones vencidas eliminadas: {purgados}')
+
+    def handle(self, *args, **options):
+        procesados = 0
+        ultimo_mantenimiento = None
+
+        try:
+            while True:
+                close_old_connections()
+                ahora = time.monotonic()
+                if ultimo_mantenimiento is None or ahora - ultimo_mantenimiento >= 60:
+                    self._mantenimiento()
+                    ultimo_mantenimiento = ahora
+
+                trabajo = tomar_siguiente()
+                if trabajo is None:
+                    if options['una_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                    continue
+
+                self.stdout.write(f'Procesando {trabajo.tipo} #{trabajo.pk}...')
+                ejecutar(trabajo)
+                procesados += 1
+                if trabajo.estado == TrabajoExportacion.ESTADO_COMPLETADO:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'  {trabajo.nombre_archivo} ({trabajo.filas_procesadas} filas)'
+                    ))
+                else:
+                    self.stdout.write(self.style.ERROR(f'  Error: {trabajo.mensaje_error}'))
+
+                if options['max_trabajos'] and procesados >= options['max_trabajos']:
+                    break
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(f'Trabajos procesados: {procesados}')
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:26
+
+import apps.modulo_5.reporte.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoExportacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=50, verbose_name='Tipo de Exportación')),
+                ('parametros', models.JSONField(blank=True, default=dict, verbose_name='Parámetros')),
+                ('clave', models.CharField(db_index=True, max_length=64, verbose_name='Clave de Deduplicación')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completado', 'Completado'), ('error', 'Error')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('filas_procesadas', models.PositiveIntegerField(default=0, verbose_name='Filas Procesadas')),
+                ('total_filas', models.PositiveIntegerField(default=0, verbose_name='Total de Filas')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('mensaje_error', models.TextField(blank=True, default='', verbose_name='Error')),
+                ('archivo', models.FileField(blank=True, null=True, storage=apps.modulo_5.reporte.models.AlmacenamientoExportaciones(), upload_to='%Y/%m/', verbose_name='Archivo')),
+                ('nombre_archivo', models.CharField(blank=True, default='', max_length=255, verbose_name='Nombre del Archivo')),
+                ('creado_el', models.DateTimeField(auto_now_add=True, verbose_name='Creado el')),
+                ('iniciado_el', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado el')),
+                ('latido', models.DateTimeField(blank=True, null=True, verbose_name='Última Actividad')),
+                ('finalizado_el', models.DateTimeField(blank=True, null=True, verbose_name='Finalizado el')),
+                ('expira_el', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Expira el')),
+                ('solicitantes', models.ManyToManyField(blank=True, related_name='trabajos_exportacion', to=settings.AUTH_USER_MODEL, verbose_name='Solicitantes')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Exportación',
+                'verbose_name_plural': 'Trabajos de Exportación',
+                'ordering': ['-creado_el'],
+                'indexes': [models.Index(fields=['estado', 'creado_el'], name='reporte_trabajo_cola_idx')],
+            },
+        ),
+    ]
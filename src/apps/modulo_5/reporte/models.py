@@ -1,3 +1,99 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
 
-# Create your models here.
+
+class AlmacenamientoExportaciones(FileSystemStorage):
+    """
+    Archivos de exportación en EXPORTACIONES_ROOT, fuera de MEDIA_ROOT: no tienen URL
+    pública y solo se descargan desde la vista autenticada. La ubicación se lee del
+    setting en cada uso.
+    """
+
+    @property
+    def base_location(self):
+        return settings.EXPORTACIONES_ROOT
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    def url(self, name):
+        raise ValueError('Las exportaciones no tienen URL pública')
+
+
+class TrabajoExportacion(models.Model):
+    """
+    Exportación encolada para generarse en segundo plano (comando ``procesar_exportaciones``).
+    ``clave`` identifica el tipo y los parámetros: dos pedidos iguales comparten el mismo trabajo
+    mientras esté pendiente, en proceso o con el archivo todavía vigente; cada usuario que lo
+    pidió queda en ``solicitantes`` y puede seguirlo y descargarlo.
+    """
+    ESTADO_PENDIENTE = 'pendiente'
+    ESTADO_EN_PROCESO = 'en_proceso'
+    ESTADO_COMPLETADO = 'completado'
+    ESTADO_ERROR = 'error'
+
+    ESTADOS = [
+        (ESTADO_PENDIENTE, 'Pendiente'),
+        (ESTADO_EN_PROCESO, 'En proceso'),
+        (ESTADO_COMPLETADO, 'Completado'),
+        (ESTADO_ERROR, 'Error'),
+    ]
+
+    tipo = models.CharField(max_length=50, verbose_name="Tipo de Exportación")
+    parametros = models.JSONField(default=dict, blank=True, verbose_name="Parámetros")
+    clave = models.CharField(max_length=64, db_index=True, verbose_name="Clave de Deduplicación")
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=ESTADO_PENDIENTE, verbose_name="Estado")
+    solicitantes = models.ManyToManyField(
+        settings.AUTH_USER_MODEL,
+        blank=True,
+        related_name='trabajos_exportacion',
+        verbose_name="Solicitantes",
+    )
+
+    filas_procesadas = models.PositiveIntegerField(default=0, verbose_name="Filas Procesadas")
+    total_filas = models.PositiveIntegerField(default=0, verbose_name="Total de Filas")
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    mensaje_error = models.TextField(blank=True, default='', verbose_name="Error")
+
+    archivo = models.FileField(
+        upload_to='%Y/%m/',
+        storage=AlmacenamientoExportaciones(),
+        blank=True,
+        null=True,
+        verbose_name="Archivo",
+    )
+    nombre_archivo = models.CharField(max_length=255, blank=True, default='', verbose_name="Nombre del Archivo")
+
+    creado_el = models.DateTimeField(auto_now_add=True, verbose_name="Creado el")
+    iniciado_el = models.DateTimeField(blank=True, null=True, verbose_name="Iniciado el")
+    latido = models.DateTimeField(blank=True, null=True, verbose_name="Última Actividad")
+    finalizado_el = models.DateTimeField(blank=True, null=True, verbose_name="Finalizado el")
+    expira_el = models.DateTimeField(blank=True, null=True, db_index=True, verbose_name="Expira el")
+
+    class Meta:
+        verbose_name = "Trabajo de Exportación"
+        verbose_name_plural = "Trabajos de Exportación"
+        ordering = ['-creado_el']
+        indexes = [
+            models.Index(fields=['estado', 'creado_el'], name='reporte_trabajo_cola_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.get_estado_display()})"
+
+    @property
+    def progreso(self):
+        """Porcentaje estimado (0-100) a partir de las filas procesadas"""
+        if self.estado == self.ESTADO_COMPLETADO:
+            return 100
+        if not self.total_filas:
+            return 0
+        return min(int(self.filas_procesadas * 100 / self.total_filas), 99)
+
+    @property
+    def finalizado(self):
+        return self.estado in (self.ESTADO_COMPLETADO, self.ESTADO_ERROR)
@@ -1,13 +1,20 @@
-from datetime import date
-from io import BytesIO
+import os
+import tempfile
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
 
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from openpyxl import load_workbook
 
 from apps.modulo_1.roles.models import Rol, UsuarioRol
 from apps.modulo_1.usuario.models import Persona, Usuario
 from apps.modulo_5.reporte.apps import ReporteConfig
+from apps.modulo_5.reporte.cola import ejecutar, encolar, purgar_vencidos, recuperar_abandonados, tomar_siguiente
+from apps.modulo_5.reporte.models import TrabajoExportacion
 
 
 class ReporteSmokeTests(TestCase):
@@ -35,10 +42,86 @@ class ReporteExportTests(TestCase):
         response = self.client.get(reverse('administracion:exportar_usuarios_excel'), secure=True)
         self.assertEqual(response.status_code, 200)
         self.assertIn('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', response['Content-Type'])
-        self.assertTrue(response.content.startswith(b'PK'))
+        contenido = response.getvalue()
+        self.assertTrue(contenido.startswith(b'PK'))
 
-        wb = load_workbook(filename=BytesIO(response.content))
+        wb = load_workbook(filename=BytesIO(contenido))
         self.assertIn('Usuarios del Sistema', wb.sheetnames)
         ws = wb['Usuarios del Sistema']
         self.assertEqual(ws.cell(row=1, column=1).value, 'DNI')
         self.assertEqual(ws.cell(row=2, column=1).value, self.persona.dni)
+
+
+class ColaExportacionesTests(TestCase):
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+        ajustes = override_settings(EXPORTACIONES_ROOT=Path(self.directorio.name))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.password = 'pw'
+        self.persona = Persona.objects.create(
+            dni='86000000',
+            nombre='Beto',
+            apellido='Admin',
+            correo='beto@test.com',
+            fecha_nacimiento=date(1990, 1, 1),
+            ciudad_residencia='Ushuaia',
+        )
+        self.usuario = Usuario.objects.create(persona=self.persona, contrasena=self.password)
+        rol = Rol.objects.create(nombre='Administrador', descripcion='Admin', jerarquia=1)
+        UsuarioRol.objects.create(usuario_id=self.usuario, rol_id=rol)
+        self.assertTrue(self.client.login(username=self.persona.dni, password=self.password))
+
+    def test_solicitud_duplicada_reutiliza_el_trabajo(self):
+        url = reverse('reporte:solicitar_exportacion', args=['usuarios'])
+        self.client.post(url, secure=True)
+        response = self.client.post(url, secure=True)
+
+        self.assertRedirects(response, reverse('reporte:mis_exportaciones'), fetch_redirect_response=False)
+        self.assertEqual(TrabajoExportacion.objects.count(), 1)
+        trabajo = TrabajoExportacion.objects.get()
+        self.assertEqual(trabajo.estado, TrabajoExportacion.ESTADO_PENDIENTE)
+        self.assertEqual(list(trabajo.solicitantes.values_list('username', flat=True)), [self.persona.dni])
+
+    def test_worker_genera_archivo_descargable(self):
+        self.client.post(reverse('reporte:solicitar_exportacion', args=['usuarios']), secure=True)
+        call_command('procesar_exportaciones', '--una-vez', stdout=StringIO())
+
+        trabajo = TrabajoExportacion.objects.get()
+        self.assertEqual(trabajo.estado, TrabajoExportacion.ESTADO_COMPLETADO)
+        self.assertEqual(trabajo.filas_procesadas, 1)
+        self.assertEqual(trabajo.progreso, 100)
+
+        estado = self.client.get(reverse('reporte:estado_exportacion', args=[trabajo.pk]), secure=True).json()
+        self.assertEqual(estado['url_descarga'], reverse('reporte:descargar_exportacion', args=[trabajo.pk]))
+
+        response = self.client.get(estado['url_descarga'], secure=True)
+        self.assertEqual(response.status_code, 200)
+        wb = load_workbook(filename=BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(wb['Usuarios del Sistema'].cell(row=2, column=1).value, self.persona.dni)
+
+        # Un trabajo completado y vigente también se reutiliza
+        _, creado = encolar('usuarios', {}, None)
+        self.assertFalse(creado)
+
+    def test_abandonados_y_vencidos(self):
+        trabajo, _ = encolar('usuarios', {})
+        tomado = tomar_siguiente()
+        self.assertEqual(tomado.pk, trabajo.pk)
+        self.assertIsNone(tomar_siguiente())
+
+        TrabajoExportacion.objects.filter(pk=trabajo.pk).update(latido=timezone.now() - timedelta(hours=2))
+        self.assertEqual(recuperar_abandonados(), 1)
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, TrabajoExportacion.ESTADO_PENDIENTE)
+
+        trabajo = ejecutar(tomar_siguiente())
+        ruta = trabajo.archivo.path
+        self.assertTrue(os.path.exists(ruta))
+
+        self.assertEqual(purgar_vencidos(), 0)
+        self.assertEqual(purgar_vencidos(ahora=trabajo.expira_el + timedelta(seconds=1)), 1)
+        self.assertFalse(TrabajoExportacion.objects.exists())
+        self.assertFalse(os.path.exists(ruta))
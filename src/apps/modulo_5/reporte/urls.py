@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+app_name = 'reporte'
+
+urlpatterns = [
+    path('', views.mis_exportaciones, name='mis_exportaciones'),
+    path('solicitar/<str:tipo>/', views.solicitar_exportacion, name='solicitar_exportacion'),
+    path('<int:trabajo_id>/estado/', views.estado_exportacion, name='estado_exportacion'),
+    path('<int:trabajo_id>/descargar/', views.descargar_exportacion, name='descargar_exportacion'),
+]
@@ -1,3 +1,104 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
 
-# Create your views here.
+from apps.modulo_6.administracion import reportes
+
+from .cola import encolar
+from .models import TrabajoExportacion
+
+
+def _trabajos_del_usuario(user):
+    return TrabajoExportacion.objects.filter(solicitantes=user).exclude(
+        estado=TrabajoExportacion.ESTADO_COMPLETADO, expira_el__lte=timezone.now(),
+    )
+
+
+def _estado_json(trabajo):
+    datos = {
+        'id': trabajo.pk,
+        'estado': trabajo.estado,
+        'estado_display': trabajo.get_estado_display(),
+        'progreso': trabajo.progreso,
+        'filas_procesadas': trabajo.filas_procesadas,
+        'total_filas': trabajo.total_filas,
+        'mensaje_error': trabajo.mensaje_error,
+        'url_descarga': None,
+    }
+    if trabajo.estado == TrabajoExportacion.ESTADO_COMPLETADO and trabajo.archivo:
+        datos['url_descarga'] = reverse('reporte:descargar_exportacion', args=[trabajo.pk])
+    return datos
+
+
+@login_required
+@require_POST
+def solicitar_exportacion(request, tipo):
+    """Encola una exportación para generarla en segundo plano"""
+    definicion = reportes.obtener_definicion(tipo)
+    if definicion is None:
+        raise Http404('Tipo de exportación desconocido')
+    if not definicion.permitida(request.user):
+        messages.error(request, '❌ No tienes permiso para generar esta exportación.')
+        return redirect('dashboard')
+
+    try:
+        parametros = definicion.parametros(request)
+    except reportes.ParametrosInvalidos as e:
+        messages.error(request, str(e))
+        return redirect(request.META.get('HTTP_REFERER') or 'reporte:mis_exportaciones')
+
+    trabajo, creado = encolar(tipo, parametros, request.user)
+    if creado:
+        messages.success(request, f'✅ Exportación "{definicion.titulo}" encolada. Podrás descargarla cuando termine.')
+    elif trabajo.estado == TrabajoExportacion.ESTADO_COMPLETADO:
+        messages.success(request, f'✅ Ya hay una exportación "{definicion.titulo}" lista para descargar.')
+    else:
+        messages.success(request, f'✅ Ya hay una exportación "{definicion.titulo}" en curso con los mismos parámetros.')
+    return redirect('reporte:mis_exportaciones')
+
+
+@login_required
+def mis_exportaciones(request):
+    """Listado de exportaciones solicitadas por el usuario, con su progreso"""
+    trabajos = list(_trabajos_del_usuario(request.user)[:50])
+    for trabajo in trabajos:
+        definicion = reportes.obtener_definicion(trabajo.tipo)
+        trabajo.titulo = definicion.titulo if definicion else trabajo.tipo
+
+    context = {
+        'trabajos': trabajos,
+        'hay_en_curso': any(not trabajo.finalizado for trabajo in trabajos),
+        'retencion_horas': settings.EXPORTACIONES_RETENCION_HORAS,
+    }
+    return render(request, 'reporte/mis_exportaciones.html', context)
+
+
+@login_required
+def estado_exportacion(request, trabajo_id):
+    """Estado y progreso de un trabajo (JSON, para el refresco de la página)"""
+    trabajo = get_object_or_404(_trabajos_del_usuario(request.user), pk=trabajo_id)
+    return JsonResponse(_estado_json(trabajo))
+
+
+@login_required
+def descargar_exportacion(request, trabajo_id):
+    """Descarga el archivo generado, si sigue vigente y el usuario conserva el permiso"""
+    trabajo = get_object_or_404(
+        _trabajos_del_usuario(request.user),
+        pk=trabajo_id,
+        estado=TrabajoExportacion.ESTADO_COMPLETADO,
+    )
+    definicion = reportes.obtener_definicion(trabajo.tipo)
+    if definicion is None or not definicion.permitida(request.user) or not trabajo.archivo:
+        raise Http404('Exportación no disponible')
+
+    try:
+        archivo = trabajo.archivo.open('rb')
+    except FileNotFoundError:
+        raise Http404('El archivo de la exportación ya no está disponible')
+    return FileResponse(archivo, as_attachment=True, filename=trabajo.nombre_archivo)
@@ -1,5 +1,4 @@
-from apps.modulo_1.usuario.models import Usuario
-from apps.modulo_1.roles.models import UsuarioRol, Docente, Estudiante
+from apps.modulo_1.roles.perfil import obtener_perfil
 
 
 def admin_context(request):
@@ -12,34 +11,27 @@ def admin_context(request):
         'es_estudiante': False,
         'es_empresa': False,
     }
-    
+
     if request.user.is_authenticated:
-        es_admin_django = request.user.is_staff or request.user.is_superuser
+        perfil = obtener_perfil(request.user)
+        es_admin_django = perfil.es_staff
         if es_admin_django:
             context['es_admin_completo'] = True
             context['tipo_usuario'] = 'Administrador'
             context['puede_ver_asistencias'] = True
-        try:
-            usuario = Usuario.objects.get(persona__dni=request.user.username)
-        except Usuario.DoesNotExist:
-            usuario = None
-
-        if usuario is not None:
-            roles = UsuarioRol.objects.filter(usuario_id=usuario).values_list('rol_id__nombre', flat=True)
 
-            if 'Empresa' in roles or hasattr(usuario, 'empresa'):
+        if perfil.tiene_usuario:
+            if perfil.es_empresa:
                 context['es_empresa'] = True
 
-            if Estudiante.objects.filter(usuario=usuario).exists():
+            if perfil.es_estudiante:
                 context['es_estudiante'] = True
                 if not context['tipo_usuario']:
                     context['tipo_usuario'] = 'Estudiante'
 
-            if Docente.objects.filter(id_persona=usuario.persona).exists():
+            if perfil.es_docente:
                 context['es_docente'] = True
-                from apps.modulo_3.cursos.models import ComisionDocente
-                tiene_comisiones = ComisionDocente.objects.filter(fk_id_docente=usuario).exists()
-                if tiene_comisiones and not es_admin_django:
+                if perfil.comisiones_docente and not es_admin_django:
                     context['tipo_usuario'] = 'Docente'
                     context['puede_ver_asistencias'] = True
 
@@ -47,13 +39,13 @@ def admin_context(request):
                 context['tipo_usuario'] = 'Empresa'
 
             if not es_admin_django:
-                if 'Mesa de Entrada' in roles:
+                if perfil.es_mesa_entrada:
                     context['tipo_usuario'] = 'Mesa de Entrada'
                     context['es_admin_completo'] = False
                     context['puede_ver_asistencias'] = True
-                elif 'Administrador' in roles:
+                elif perfil.es_rol_admin:
                     context['tipo_usuario'] = 'Administrador'
                     context['es_admin_completo'] = True
                     context['puede_ver_asistencias'] = True
-    
+
     return context
@@ -0,0 +1,615 @@
+"""
+Datos sintéticos con volúmenes de producción (comando ``generar_datos_prueba``).
+
+Genera polos, cursos, comisiones con ``dias_horarios`` como los que carga Mesa de Entrada,
+personas con usuario y rol (estudiantes, tutores de los menores, docentes, responsables
+de empresas y personal), inscripciones en todos los estados con listas de espera, años de
+asistencia y empresas con planes y turnos. Todo se inserta con ``bulk_create`` y sale de
+un ``random.Random(semilla)``: la misma semilla y la misma fecha generan los mismos datos.
+
+``bulk_create`` no pasa por ``save()`` ni por las señales, así que al final se reconstruye
+lo que ellas mantienen (contadores de cupo, registros y resumen de asistencia, índice de
+búsqueda, estadísticas) con las mismas funciones que los comandos de reconciliación, y se
+invalidan los caches de catálogo, agenda y perfiles.
+"""
+import random
+import time
+import unicodedata
+from dataclasses import dataclass, fields, replace
+from datetime import date, datetime, time as hora, timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.modulo_1.roles.models import Docente, Estudiante, Rol, Tutor, TutorEstudiante, UsuarioRol
+from apps.modulo_1.usuario.busqueda import terminos
+from apps.modulo_1.usuario.models import Persona, TerminoBusquedaPersona, Usuario
+from apps.modulo_2.inscripciones.models import Inscripcion
+from apps.modulo_3.cursos.models import Comision, ComisionDocente, Curso, PoloCreativo
+from apps.modulo_3.docentes.models import Docente as DocentePerfil
+from apps.modulo_4.asistencia.models import Asistencia
+from apps.modulo_7.empresas.models import Empresa, MiembroEmpresa, PlanHorarioEmpresa, TurnoEmpresa
+
+
+class DatosExistentes(Exception):
+    """Ya hay personas con el prefijo de DNI elegido"""
+
+
+@dataclass
+class ConfiguracionDatos:
+    polos: int = 8
+    cursos: int = 60
+    comisiones: int = 3000
+    estudiantes: int = 150000
+    docentes: int = 300
+    empresas: int = 200
+    anios: int = 3
+    semilla: int = 42
+    prefijo_dni: str = '9'
+    contrasena: str = 'prueba123'
+    lote: int = 5000
+    hoy: date = None
+
+    VOLUMENES = ('polos', 'cursos', 'comisiones', 'estudiantes', 'docentes', 'empresas')
+
+    def escalada(self, factor):
+        """Copia con los volúmenes multiplicados por ``factor`` (al menos uno de cada uno)"""
+        return replace(self, **{nombre: max(1, round(getattr(self, nombre) * factor)) for nombre in self.VOLUMENES})
+
+    @classmethod
+    def desde_opciones(cls, opciones):
+        base = cls().escalada(opciones.get('escala') or 1)
+        return replace(base, **{
+            campo.name: opciones[campo.name]
+            for campo in fields(cls)
+            if opciones.get(campo.name) is not None
+        })
+
+
+NOMBRES = (
+    'Sofía', 'Martina', 'Valentina', 'Catalina', 'Emilia', 'Julieta', 'Camila', 'Lucía', 'Morena', 'Abril',
+    'Florencia', 'Agustina', 'Milagros', 'Delfina', 'Malena', 'Paula', 'Carla', 'Rocío', 'Ana', 'Mariana',
+    'Mateo', 'Benjamín', 'Santiago', 'Thiago', 'Joaquín', 'Lautaro', 'Tomás', 'Bautista', 'Felipe', 'Lorenzo',
+    'Facundo', 'Nicolás', 'Agustín', 'Franco', 'Ignacio', 'Matías', 'Gonzalo', 'Juan', 'Martín', 'Diego',
+)
+APELLIDOS = (
+    'González', 'Rodríguez', 'Gómez', 'Fernández', 'López', 'Díaz', 'Martínez', 'Pérez', 'García', 'Sánchez',
+    'Romero', 'Sosa', 'Álvarez', 'Torres', 'Ruiz', 'Ramírez', 'Flores', 'Acosta', 'Benítez', 'Medina',
+    'Suárez', 'Herrera', 'Aguirre', 'Pereyra', 'Gutiérrez', 'Giménez', 'Molina', 'Silva', 'Castro', 'Rojas',
+    'Ojeda', 'Ponce', 'Vera', 'Cabrera', 'Ríos', 'Morales', 'Luna', 'Paz', 'Quiroga', 'Vargas',
+)
+BARRIOS = {
+    'Ushuaia': ('Centro', 'Andorra', 'Barrio 640 Viviendas', 'Río Pipo', 'Bahía Golondrina', 'Las Raíces'),
+    'Rio Grande': ('Centro', 'Chacra II', 'Chacra IV', 'Chacra XIII', 'Margen Sur', 'Austral'),
+    'Tolhuin': ('Centro', 'Lago Khami', 'Barrio Provincial'),
+}
+CIUDADES = ('Ushuaia', 'Rio Grande', 'Tolhuin')
+PESOS_CIUDADES = (45, 45, 10)
+TEMAS_CURSOS = (
+    'Robótica', 'Programación con Python', 'Diseño Gráfico', 'Fotografía', 'Guitarra', 'Canto', 'Cerámica',
+    'Teatro', 'Producción Musical', 'Videojuegos', 'Animación 3D', 'Impresión 3D', 'Edición de Video',
+    'Ilustración Digital', 'Marketing Digital', 'Carpintería', 'Electrónica', 'Cocina', 'Danza', 'Escritura Creativa',
+)
+NIVELES_CURSOS = ('Inicial', 'Intermedio', 'Avanzado')
+DIAS = ('Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado')
+INICIOS = ('9:00', '10:00', '14:00', '16:00', '16:30', '17:00', '18:00', '18:30', '19:00')
+RUBROS = ('Software', 'Audiovisual', 'Diseño', 'Videojuegos', 'Música', 'Indumentaria', 'Gastronomía', 'Turismo')
+INSTITUCIONES = ('Escuela Provincial', 'Colegio Nacional', 'Colegio Técnico', 'Universidad Nacional de TDF', 'CENS')
+
+
+def _ascii(texto):
+    normalizado = unicodedata.normalize('NFKD', texto)
+    return ''.join(ch for ch in normalizado if not unicodedata.combining(ch)).lower().replace(' ', '')
+
+
+def _insertar(modelo, objetos, lote):
+    """``bulk_create`` que deja el pk en cada objeto aunque la base no lo devuelva"""
+    if not objetos:
+        return objetos
+    ultimo = modelo.objects.aggregate(ultimo=Max('pk'))['ultimo'] or 0
+    modelo.objects.bulk_create(objetos, batch_size=lote)
+    if objetos[0].pk is None:
+        pks = modelo.objects.filter(pk__gt=ultimo).order_by('pk').values_list('pk', flat=True)
+        for objeto, pk in zip(objetos, pks):
+            objeto.pk = pk
+    return objetos
+
+
+def _texto_dias(dias):
+    nombres = [DIAS[dia] if i == 0 else DIAS[dia].lower() for i, dia in enumerate(dias)]
+    if len(nombres) == 1:
+        return nombres[0]
+    return f"{', '.join(nombres[:-1])} y {nombres[-1]}"
+
+
+def _sumar_minutos(texto_hora, minutos):
+    horas, mins = (int(parte) for parte in texto_hora.split(':'))
+    total = horas * 60 + mins + minutos
+    return f'{total // 60}:{total % 60:02d}'
+
+
+class _Generador:
+    def __init__(self, configuracion, informar):
+        self.config = configuracion
+        self.rng = random.Random(configuracion.semilla)
+        self.hoy = configuracion.hoy or date.today()
+        self.informar = informar
+        self.resumen = {}
+        self.siguiente_dni = 0
+        self.roles = {}
+
+    # ---------------------------------------------------------------- personas
+
+    def _dni(self):
+        dni = f'{self.config.prefijo_dni}{self.siguiente_dni:07d}'
+        self.siguiente_dni += 1
+        return dni
+
+    def _persona(self, edad_minima, edad_maxima, ciudad=None):
+        nombre = self.rng.choice(NOMBRES)
+        apellido = self.rng.choice(APELLIDOS)
+        if self.rng.random() < 0.3:
+            apellido = f'{apellido} {self.rng.choice(APELLIDOS)}'
+        ciudad = ciudad or self.rng.choices(CIUDADES, PESOS_CIUDADES)[0]
+        dni = self._dni()
+        return Persona(
+            dni=dni,
+            nombre=nombre,
+            apellido=apellido,
+            correo=f'{_ascii(nombre)}.{_ascii(apellido)}{dni[-5:]}@gmail.com',
+            telefono=f'2901{self.rng.randint(400000, 699999)}' if ciudad == 'Ushuaia' else f'2964{self.rng.randint(400000, 699999)}',
+            fecha_nacimiento=self.hoy - timedelta(days=self.rng.randint(edad_minima * 365, edad_maxima * 365 + 364)),
+            genero=self.rng.choices('MFOP', (48, 48, 2, 2))[0],
+            ciudad_residencia=ciudad,
+            zona_residencia=self.rng.choice(BARRIOS[ciudad]),
+            domicilio=f'{self.rng.choice(APELLIDOS)} {self.rng.randint(10, 3000)}',
+            autorizacion_imagen=self.rng.random() < 0.8,
+            autorizacion_voz=self.rng.random() < 0.7,
+        )
+
+    def _edad(self, persona):
+        nacimiento = persona.fecha_nacimiento
+        return self.hoy.year - nacimiento.year - ((self.hoy.month, self.hoy.day) < (nacimiento.month, nacimiento.day))
+
+    def _usuarios(self, personas, rol):
+        """Inserta personas con su Usuario y su rol; retorna los usuarios"""
+        _insertar(Persona, personas, self.config.lote)
+        usuarios = _insertar(Usuario, [
+            Usuario(
+                persona_id=persona.pk,
+                contrasena=self.config.contrasena,
+                permiso_imagen=persona.autorizacion_imagen,
+                permiso_voz=persona.autorizacion_voz,
+            )
+            for persona in personas
+        ], self.config.lote)
+        UsuarioRol.objects.bulk_create(
+            [UsuarioRol(usuario_id_id=usuario.pk, rol_id=self.roles[rol]) for usuario in usuarios],
+            batch_size=self.config.lote,
+        )
+        self._contar('personas', len(personas))
+        return usuarios
+
+    def _contar(self, clave, cantidad):
+        self.resumen[clave] = self.resumen.get(clave, 0) + cantidad
+
+    # ---------------------------------------------------------------- etapas
+
+    def _etapa(self, nombre, funcion):
+        inicio = time.monotonic()
+        with transaction.atomic():
+            funcion()
+        self.informar(f'{nombre}: {time.monotonic() - inicio:.1f} s')
+
+    def generar(self):
+        if Persona.objects.filter(dni__startswith=self.config.prefijo_dni).exists():
+            raise DatosExistentes(
+                f'Ya hay personas con DNI que empieza con {self.config.prefijo_dni}: '
+                'usá otro --prefijo-dni o limpiá los datos de prueba.'
+            )
+        self.previos = {
+            modelo: modelo.objects.aggregate(ultimo=Max('pk'))['ultimo'] or 0
+            for modelo in (Comision, Inscripcion, Persona)
+        }
+        self._etapa('Roles y personal', self._roles_y_personal)
+        self._etapa('Polos, cursos y comisiones', self._catalogo)
+        self._etapa('Docentes', self._docentes)
+        self._etapa('Estudiantes y tutores', self._estudiantes)
+        self._etapa('Inscripciones y asistencias', self._inscripciones)
+        self._etapa('Empresas y turnos', self._empresas)
+        self._etapa('Datos derivados', self._derivados)
+        return self.resumen
+
+    def _roles_y_personal(self):
+        for nombre, descripcion, jerarquia in (
+            ('Administrador', 'Rol para administradores', 1),
+            ('Mesa de Entrada', 'Rol para personal de mesa de entrada', 2),
+            ('Docente', 'Rol para docentes', 2),
+            ('Estudiante', 'Rol para estudiantes', 3),
+            ('Empresa', 'Rol para empresas', 3),
+        ):
+            self.roles[nombre], _ = Rol.objects.get_or_create(
+                nombre=nombre, defaults={'descripcion': descripcion, 'jerarquia': jerarquia},
+            )
+        administrador = self._persona(30, 50, 'Ushuaia')
+        self._usuarios([administrador], 'Administrador')
+        mesa_entrada = [self._persona(25, 55, ciudad) for ciudad in CIUDADES]
+        self._usuarios(mesa_entrada, 'Mesa de Entrada')
+        self.resumen['dni_administrador'] = administrador.dni
+        self.resumen['dni_mesa_entrada'] = [persona.dni for persona in mesa_entrada]
+
+    def _catalogo(self):
+        polos = _insertar(PoloCreativo, [
+            PoloCreativo(
+                nombre=f'Polo Creativo {CIUDADES[i % 3]} {i // 3 + 1}',
+                ciudad=CIUDADES[i % 3],
+                direccion=f'{self.rng.choice(APELLIDOS)} {self.rng.randint(100, 2000)}',
+                telefono=f'2901{self.rng.randint(420000, 449999)}',
+                email=f'polo{i + 1}@polocreativo.gob.ar',
+                activo=self.rng.random() < 0.95,
+            )
+            for i in range(self.config.polos)
+        ], self.config.lote)
+
+        cursos = []
+        for i in range(self.config.cursos):
+            tema = TEMAS_CURSOS[i % len(TEMAS_CURSOS)]
+            nivel = NIVELES_CURSOS[(i // len(TEMAS_CURSOS)) % len(NIVELES_CURSOS)]
+            edad_minima = self.rng.choice((8, 12, 14, 16, 18))
+            cursos.append(Curso(
+                nombre=f'{tema} {nivel}' if i < len(TEMAS_CURSOS) * len(NIVELES_CURSOS) else f'{tema} {nivel} {i}',
+                descripcion=f'Curso de {tema.lower()}, nivel {nivel.lower()}.',
+                edad_minima=edad_minima,
+                edad_maxima=self.rng.choice((17, 25, 35, 99)),
+                requisitos='' if nivel == 'Inicial' else f'Haber cursado {tema} Inicial',
+                estado='Abierto' if self.rng.random() < 0.9 else 'Cerrado',
+                orden=i,
+            ))
+        _insertar(Curso, cursos, self.config.lote)
+
+        comisiones = []
+        for _ in range(self.config.comisiones):
+            comisiones.append(self._comision(self.rng.choice(cursos), self.rng.choice(polos)))
+        self.comisiones = _insertar(Comision, comisiones, self.config.lote)
+        self._contar('polos', len(polos))
+        self._contar('cursos', len(cursos))
+        self._contar('comisiones', len(comisiones))
+
+    def _comision(self, curso, polo):
+        if self.rng.random() < 0.15:
+            dias = [5]
+            inicio = self.rng.choice(('9:00', '10:00', '14:00'))
+        else:
+            dias = sorted(self.rng.sample(range(5), self.rng.choice((1, 2, 2, 2, 3))))
+            inicio = self.rng.choice(INICIOS)
+        fin = _sumar_minutos(inicio, self.rng.choice((90, 120, 120, 180)))
+        separador = self.rng.choice((' – ', ' de '))
+        dias_horarios = f'{_texto_dias(dias)}{separador}{inicio} a {fin} hs'
+
+        # Una cuarta parte es la oferta próxima (inscripción abierta); el resto, historia
+        if self.rng.random() < 0.25:
+            fecha_inicio = self.hoy + timedelta(days=self.rng.randint(1, 90))
+        else:
+            fecha_inicio = self.hoy - timedelta(days=self.rng.randint(0, self.config.anios * 365))
+        fecha_fin = fecha_inicio + timedelta(weeks=self.rng.randint(8, 20))
+        if fecha_fin < self.hoy:
+            estado = 'Finalizada'
+        elif fecha_inicio <= self.hoy:
+            estado = 'En proceso'
+        else:
+            estado = 'Abierta' if self.rng.random() < 0.85 else 'Cerrada'
+
+        modalidad = self.rng.choices(('Presencial', 'Virtual', 'Hibrido'), (85, 10, 5))[0]
+        comision = Comision(
+            fk_id_curso=curso,
+            fk_id_polo=None if modalidad == 'Virtual' else polo,
+            modalidad=modalidad,
+            dias_horarios=dias_horarios,
+            lugar='Aula virtual' if modalidad == 'Virtual' else f'Aula {self.rng.randint(1, 6)}',
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            cupo_maximo=self.rng.choice((15, 20, 25, 30)),
+            estado=estado,
+            publicada=True,
+        )
+        comision.compilar_calendario()
+        return comision
+
+    def _docentes(self):
+        usuarios = self._usuarios([self._persona(25, 65) for _ in range(self.config.docentes)], 'Docente')
+        Docente.objects.bulk_create([
+            Docente(id_persona_id=usuario.persona_id, especialidad=self.rng.choice(TEMAS_CURSOS), experiencia='')
+            for usuario in usuarios
+        ], batch_size=self.config.lote)
+        DocentePerfil.objects.bulk_create([
+            DocentePerfil(usuario_id=usuario.pk, especialidad=self.rng.choice(TEMAS_CURSOS))
+            for usuario in usuarios
+        ], batch_size=self.config.lote)
+
+        asignaciones = []
+        for comision in self.comisiones:
+            for usuario in self.rng.sample(usuarios, min(len(usuarios), 1 if self.rng.random() < 0.85 else 2)):
+                asignaciones.append(ComisionDocente(fk_id_comision_id=comision.pk, fk_id_docente_id=usuario.pk))
+        ComisionDocente.objects.bulk_create(asignaciones, batch_size=self.config.lote)
+        self._contar('docentes', len(usuarios))
+
+    def _estudiantes(self):
+        self.estudiantes = []
+        self.usuarios_estudiantes = []
+        menores = []
+        for desde in range(0, self.config.estudiantes, self.config.lote):
+            cantidad = min(self.config.lote, self.config.estudiantes - desde)
+            personas = []
+            for _ in range(cantidad):
+                edad = self.rng.choices(((8, 15), (16, 25), (26, 65)), (30, 35, 35))[0]
+                personas.append(self._persona(*edad))
+            usuarios = self._usuarios(personas, 'Estudiante')
+            estudiantes = _insertar(Estudiante, [
+                Estudiante(
+                    usuario_id=usuario.pk,
+                    nivel_estudios=self._nivel_estudios(persona),
+                    institucion_actual=self.rng.choice(INSTITUCIONES),
+                )
+                for persona, usuario in zip(personas, usuarios)
+            ], self.config.lote)
+            self.estudiantes.extend(estudiante.pk for estudiante in estudiantes)
+            self.usuarios_estudiantes.extend(usuario.pk for usuario in usuarios)
+            menores.extend(
+                (estudiante.pk, persona)
+                for persona, estudiante in zip(personas, estudiantes)
+                if self._edad(persona) < 16
+            )
+        self._contar('estudiantes', len(self.estudiantes))
+        self._tutores(menores)
+
+    def _nivel_estudios(self, persona):
+        edad = self._edad(persona)
+        if edad < 13:
+            return 'PI'
+        if edad < 18:
+            return 'SI'
+        return self.rng.choice(('SE', 'SE', 'UI', 'UN', 'OT'))
+
+    def _tutores(self, menores):
+        """Un tutor por familia de uno a tres menores (los hermanos comparten apellido)"""
+        for desde in range(0, len(menores), self.config.lote):
+            bloque = menores[desde:desde + self.config.lote]
+            familias = []
+            i = 0
+            while i < len(bloque):
+                tamanio = self.rng.choices((1, 2, 3), (70, 22, 8))[0]
+                familias.append(bloque[i:i + tamanio])
+                i += tamanio
+
+            personas = []
+            for familia in familias:
+                persona = self._persona(28, 60, familia[0][1].ciudad_residencia)
+                persona.apellido = familia[0][1].apellido.split(' ')[0]
+                personas.append(persona)
+            _insertar(Persona, personas, self.config.lote)
+            usuarios = _insertar(Usuario, [
+                Usuario(persona_id=persona.pk, contrasena=self.config.contrasena) for persona in personas
+            ], self.config.lote)
+            tutores = _insertar(Tutor, [
+                Tutor(
+                    usuario_id=usuario.pk,
+                    tipo_tutor='PE',
+                    telefono_contacto=persona.telefono,
+                    disponibilidad_horaria=self.rng.choice(('Mañana', 'Tarde', 'Noche')),
+                )
+                for persona, usuario in zip(personas, usuarios)
+            ], self.config.lote)
+            TutorEstudiante.objects.bulk_create([
+                TutorEstudiante(
+                    tutor_id=tutor.pk,
+                    estudiante_id=estudiante_id,
+                    parentesco=self.rng.choices(('madre', 'padre', 'tutor_legal', 'abuelo'), (50, 35, 10, 5))[0],
+                )
+                for tutor, familia in zip(tutores, familias)
+                for estudiante_id, _ in familia
+            ], batch_size=self.config.lote)
+            self._contar('personas', len(personas))
+            self._contar('tutores', len(tutores))
+
+    def _inscripciones(self):
+        lote_comisiones = max(1, self.config.lote // 40)
+        for desde in range(0, len(self.comisiones), lote_comisiones):
+            comisiones = self.comisiones[desde:desde + lote_comisiones]
+            inscripciones = []
+            for comision in comisiones:
+                inscripciones.extend(self._inscripciones_comision(comision))
+            _insertar(Inscripcion, inscripciones, self.config.lote)
+            self._contar('inscripciones', len(inscripciones))
+
+            por_comision = {comision.pk: comision for comision in comisiones}
+            asistencias = []
+            for inscripcion in inscripciones:
+                if inscripcion.estado == 'confirmado':
+                    asistencias.extend(self._asistencias(por_comision[inscripcion.comision_id], inscripcion))
+                if len(asistencias) >= self.config.lote:
+                    Asistencia.objects.bulk_create(asistencias, batch_size=self.config.lote)
+                    self._contar('asistencias', len(asistencias))
+                    asistencias = []
+            Asistencia.objects.bulk_create(asistencias, batch_size=self.config.lote)
+            self._contar('asistencias', len(asistencias))
+
+    def _inscripciones_comision(self, comision):
+        cupo = comision.cupo_maximo
+        demanda = int(cupo * self.rng.uniform(0.3, 1.7))
+        canceladas = int(demanda * self.rng.uniform(0, 0.12))
+        ocupadas = min(demanda, cupo)
+        en_espera = max(demanda - cupo, 0) if comision.estado in ('Abierta', 'Cerrada', 'En proceso') else 0
+        if comision.estado == 'Abierta':
+            confirmadas = int(ocupadas * self.rng.uniform(0.4, 0.9))
+        else:
+            confirmadas = ocupadas
+
+        estados = (
+            ['confirmado'] * confirmadas
+            + ['pre_inscripto'] * (ocupadas - confirmadas)
+            + ['lista_espera'] * en_espera
+            + ['cancelada'] * canceladas
+        )
+        elegidos = self.rng.sample(self.estudiantes, min(len(estados), len(self.estudiantes)))
+        inscripciones = []
+        orden = 0
+        for estado, estudiante_id in zip(estados, elegidos):
+            if estado == 'lista_espera':
+                orden += 1
+            inscripciones.append(Inscripcion(
+                estudiante_id=estudiante_id,
+                comision_id=comision.pk,
+                estado=estado,
+                orden_lista_espera=orden if estado == 'lista_espera' else None,
+                observaciones_salud='Celíaco' if self.rng.random() < 0.02 else None,
+            ))
+        return inscripciones
+
+    def _asistencias(self, comision, inscripcion):
+        if not hasattr(comision, '_fechas_dictadas'):
+            hasta = min(comision.fecha_fin, self.hoy - timedelta(days=1))
+            comision._fechas_dictadas = comision.get_fechas_clase_programadas(hasta=hasta) if hasta >= comision.fecha_inicio else []
+        constancia = self.rng.uniform(0.5, 0.98)
+        abandono = len(comision._fechas_dictadas)
+        if self.rng.random() < 0.1:
+            abandono = self.rng.randint(0, abandono)
+        return [
+            Asistencia(
+                inscripcion_id=inscripcion.pk,
+                fecha_clase=fecha,
+                presente=i < abandono and self.rng.random() < constancia,
+                registrado_por='Docente',
+            )
+            for i, fecha in enumerate(comision._fechas_dictadas)
+        ]
+
+    def _empresas(self):
+        personas = [self._persona(25, 60) for _ in range(self.config.empresas)]
+        responsables = self._usuarios(personas, 'Empresa')
+        ahora = timezone.now()
+        empresas = []
+        for i, (persona, responsable) in enumerate(zip(personas, responsables)):
+            rubro = self.rng.choice(RUBROS)
+            estado = self.rng.choices(('aprobada', 'pendiente', 'rechazada'), (75, 15, 10))[0]
+            empresas.append(Empresa(
+                responsable_id=responsable.pk,
+                nombre=f'{persona.apellido.split(" ")[0]} {rubro} {i + 1}',
+                condicion_fiscal=self.rng.choice([clave for clave, _ in Empresa.CONDICIONES_FISCALES]),
+                cuit=f'30-{self.rng.randint(10000000, 99999999)}-{self.rng.randint(0, 9)}',
+                cantidad_miembros=self.rng.randint(1, 8),
+                rubro=rubro,
+                descripcion=f'Emprendimiento de {rubro.lower()} de Tierra del Fuego.',
+                acepto_terminos=True,
+                estado=estado,
+                motivo_rechazo='Documentación incompleta' if estado == 'rechazada' else None,
+                aprobado_en=ahora if estado == 'aprobada' else None,
+                rechazado_en=ahora if estado == 'rechazada' else None,
+            ))
+        _insertar(Empresa, empresas, self.config.lote)
+
+        miembros = []
+        for empresa in empresas:
+            for usuario_id in self.rng.sample(self.usuarios_estudiantes, min(self.rng.randint(0, 4), len(self.usuarios_estudiantes))):
+                miembros.append(MiembroEmpresa(
+                    empresa_id=empresa.pk,
+                    usuario_id=usuario_id,
+                    rol=self.rng.choice(('Socio/a', 'Diseño', 'Desarrollo', 'Ventas')),
+                    es_socio=self.rng.random() < 0.4,
+                ))
+        MiembroEmpresa.objects.bulk_create(miembros, batch_size=self.config.lote)
+
+        planes = []
+        for empresa in empresas:
+            if empresa.estado != 'aprobada':
+                continue
+            for _ in range(self.rng.randint(1, 3)):
+                fecha_inicio = self.hoy - timedelta(days=self.rng.randint(-30, self.config.anios * 365))
+                desde = self.rng.choice((9, 10, 14, 15))
+                planes.append(PlanHorarioEmpresa(
+                    empresa_id=empresa.pk,
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=fecha_inicio + timedelta(weeks=self.rng.randint(4, 16)),
+                    hora_desde=hora(desde),
+                    hora_hasta=hora(desde + self.rng.choice((2, 3, 4))),
+                    dias_semana=','.join(str(dia) for dia in sorted(self.rng.sample(range(5), self.rng.randint(1, 3)))),
+                ))
+        _insertar(PlanHorarioEmpresa, planes, self.config.lote)
+
+        turnos = []
+        for plan in planes:
+            dias = {int(dia) for dia in plan.dias_semana.split(',')}
+            fecha = plan.fecha_inicio
+            while fecha <= plan.fecha_fin:
+                if fecha.weekday() in dias:
+                    pasado = fecha < self.hoy
+                    turnos.append(TurnoEmpresa(
+                        empresa_id=plan.empresa_id,
+                        plan_id=plan.pk,
+                        fecha=fecha,
+                        hora_desde=plan.hora_desde,
+                        hora_hasta=plan.hora_hasta,
+                        estado_asistencia=(self.rng.choices(('presente', 'ausente'), (85, 15))[0] if pasado else None),
+                        marcado_en=(
+                            timezone.make_aware(datetime.combine(fecha, plan.hora_hasta)) if pasado else None
+                        ),
+                    ))
+                fecha += timedelta(days=1)
+        TurnoEmpresa.objects.bulk_create(turnos, batch_size=self.config.lote, ignore_conflicts=True)
+        self._contar('empresas', len(empresas))
+        self._contar('turnos', len(turnos))
+
+    # ---------------------------------------------------------------- derivados
+
+    def _derivados(self):
+        from apps.modulo_2.inscripciones.contadores import reconciliar_contadores
+        from apps.modulo_3.cursos.agenda import actualizar_agenda_rangos
+        from apps.modulo_3.cursos.catalogo import invalidar_catalogo
+        from apps.modulo_1.roles.perfil import invalidar_perfiles
+        from apps.modulo_4.asistencia.agregacion import recalcular_registros
+        from apps.modulo_4.asistencia.resumen import recalcular_resumen
+        from apps.modulo_5.estadistica.materializacion import actualizar_estadisticas
+
+        comisiones = Comision.objects.filter(pk__gt=self.previos[Comision])
+        reconciliar_contadores(comisiones)
+
+        confirmadas = Inscripcion.objects.filter(pk__gt=self.previos[Inscripcion], estado='confirmado')
+        ids = list(confirmadas.order_by('pk').values_list('pk', flat=True))
+        for desde in range(0, len(ids), self.config.lote):
+            bloque = ids[desde:desde + self.config.lote]
+            recalcular_registros(confirmadas.filter(pk__gte=bloque[0], pk__lte=bloque[-1]))
+
+        comision_ids = [comision.pk for comision in self.comisiones]
+        for desde in range(0, len(comision_ids), 200):
+            recalcular_resumen(comision_ids[desde:desde + 200])
+
+        personas = (
+            Persona.objects.filter(pk__gt=self.previos[Persona])
+            .values_list('pk', 'nombre', 'apellido', 'dni', 'correo')
+            .iterator(chunk_size=self.config.lote)
+        )
+        nuevos = []
+        for persona_id, *datos in personas:
+            nuevos.extend(
+                TerminoBusquedaPersona(persona_id=persona_id, campo=campo, termino=termino)
+                for campo, termino in terminos(*datos)
+            )
+            if len(nuevos) >= self.config.lote:
+                TerminoBusquedaPersona.objects.bulk_create(nuevos, batch_size=self.config.lote)
+                nuevos = []
+        TerminoBusquedaPersona.objects.bulk_create(nuevos, batch_size=self.config.lote)
+
+        actualizar_estadisticas(comision_ids, hoy=self.hoy)
+
+        transaction.on_commit(invalidar_catalogo)
+        # Todos los días: se descartan y se rearma la ventana próxima
+        transaction.on_commit(lambda: actualizar_agenda_rangos([(None, None)]))
+        transaction.on_commit(invalidar_perfiles)
+
+
+def generar_datos(configuracion, informar=None):
+    """
+    Genera el conjunto de datos de ``configuracion`` y retorna un resumen con las
+    cantidades creadas. ``informar(texto)`` recibe el avance de cada etapa.
+    """
+    return _Generador(configuracion, informar or (lambda texto: None)).generar()
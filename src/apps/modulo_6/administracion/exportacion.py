@@ -0,0 +1,179 @@
+"""
+Motor de exportación CSV/XLSX para el panel de administración.
+
+Las filas se generan a partir de querysets recorridos con ``.iterator(chunk_size=...)``
+y se escriben a medida que se consumen, sin armar el archivo completo en memoria:
+
+* CSV: ``StreamingHttpResponse`` que codifica cada fila al vuelo.
+* XLSX: libro de openpyxl en modo ``write_only`` (las hojas se vuelcan a disco a
+  medida que se escriben) con estilos con nombre compartidos; el archivo final se
+  envía en bloques con ``FileResponse``. El formato zip de XLSX no permite emitir
+  bytes antes de cerrar el libro, por eso se usa un archivo temporal.
+
+``escribir`` vuelca las mismas hojas a un archivo cualquiera; lo usa la cola de
+exportaciones en segundo plano (``apps.modulo_5.reporte``).
+"""
+import csv
+import io
+import tempfile
+from datetime import datetime
+
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+from openpyxl.utils import get_column_letter
+
+
+CHUNK_SIZE = 2000
+
+FORMATO_CSV = 'csv'
+FORMATO_XLSX = 'xlsx'
+
+CONTENT_TYPE_CSV = 'text/csv; charset=utf-8'
+CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def iterar(queryset, chunk_size=CHUNK_SIZE):
+    """Recorre el queryset en bloques sin cachear los resultados"""
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def marca_tiempo():
+    return datetime.now().strftime('%Y%m%d_%H%M%S')
+
+
+class _Eco:
+    """Buffer mínimo para csv.writer: devuelve lo escrito en lugar de guardarlo"""
+
+    def write(self, value):
+        return value
+
+
+def respuesta_csv(nombre_archivo, encabezados, filas):
+    """StreamingHttpResponse con un CSV generado fila por fila"""
+    writer = csv.writer(_Eco())
+
+    def generar():
+        yield writer.writerow(encabezados)
+        for fila in filas:
+            yield writer.writerow(fila)
+
+    response = StreamingHttpResponse(generar(), content_type=CONTENT_TYPE_CSV)
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return response
+
+
+def _estilos():
+    encabezado = NamedStyle(name='exportacion_encabezado')
+    encabezado.fill = PatternFill(start_color="6366f1", end_color="6366f1", fill_type="solid")
+    encabezado.font = Font(bold=True, color="FFFFFF", size=12)
+    encabezado.alignment = Alignment(horizontal="center", vertical="center")
+
+    fila_par = NamedStyle(name='exportacion_fila_par')
+    fila_par.fill = PatternFill(start_color="f8fafc", end_color="f8fafc", fill_type="solid")
+
+    etiqueta = NamedStyle(name='exportacion_etiqueta')
+    etiqueta.font = Font(bold=True)
+
+    return encabezado, fila_par, etiqueta
+
+
+class HojaExportacion:
+    """
+    Definición de una hoja: título, encabezados, anchos de columna y filas.
+    ``filas`` puede ser un generador; se consume una sola vez al escribir el libro.
+    ``preambulo`` son pares (etiqueta, valor) que se escriben antes de los encabezados.
+    ``total`` (entero o función sin argumentos, p. ej. ``queryset.count``) es la
+    cantidad de filas esperada; solo se consulta para informar el progreso.
+    """
+
+    def __init__(self, titulo, encabezados, filas, anchos=None, preambulo=None, total=None):
+        self.titulo = titulo
+        self.encabezados = encabezados
+        self.filas = filas
+        self.anchos = anchos or []
+        self.preambulo = preambulo or []
+        self.total = total
+
+    def contar(self):
+        if callable(self.total):
+            self.total = self.total()
+        return self.total or 0
+
+
+def _escribir_hoja(libro, hoja):
+    ws = libro.create_sheet(hoja.titulo)
+    for numero, ancho in enumerate(hoja.anchos, 1):
+        ws.column_dimensions[get_column_letter(numero)].width = ancho
+
+    def celda(valor, estilo=None):
+        c = WriteOnlyCell(ws, value=valor)
+        if estilo:
+            c.style = estilo
+        return c
+
+    numero_fila = 0
+    if hoja.preambulo:
+        for etiqueta, valor in hoja.preambulo:
+            ws.append([celda(etiqueta, 'exportacion_etiqueta'), valor])
+            numero_fila += 1
+        ws.append([])
+        numero_fila += 1
+
+    ws.append([celda(valor, 'exportacion_encabezado') for valor in hoja.encabezados])
+    numero_fila += 1
+
+    for fila in hoja.filas:
+        numero_fila += 1
+        if numero_fila % 2 == 0:
+            ws.append([celda(valor, 'exportacion_fila_par') for valor in fila])
+        else:
+            ws.append(list(fila))
+
+
+def escribir_xlsx(archivo, hojas):
+    """Escribe las hojas como libro XLSX en un archivo binario abierto"""
+    libro = Workbook(write_only=True)
+    for estilo in _estilos():
+        libro.add_named_style(estilo)
+    for hoja in hojas:
+        _escribir_hoja(libro, hoja)
+    libro.save(archivo)
+
+
+def escribir_csv(archivo, hojas):
+    """Escribe las hojas como CSV (una tras otra) en un archivo binario abierto"""
+    texto = io.TextIOWrapper(archivo, encoding='utf-8', newline='')
+    writer = csv.writer(texto)
+    for hoja in hojas:
+        writer.writerow(hoja.encabezados)
+        writer.writerows(hoja.filas)
+    texto.flush()
+    texto.detach()
+
+
+def escribir(formato, archivo, hojas):
+    if formato == FORMATO_CSV:
+        escribir_csv(archivo, hojas)
+    else:
+        escribir_xlsx(archivo, hojas)
+
+
+def respuesta_xlsx(nombre_archivo, hojas):
+    """FileResponse con un libro XLSX escrito en modo write_only"""
+    archivo = tempfile.TemporaryFile()
+    escribir_xlsx(archivo, hojas)
+    archivo.seek(0)
+
+    response = FileResponse(archivo, content_type=CONTENT_TYPE_XLSX)
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return response
+
+
+def respuesta(formato, nombre_archivo, hojas):
+    """Respuesta de descarga directa: CSV en streaming o XLSX desde archivo temporal"""
+    if formato == FORMATO_CSV:
+        hoja = hojas[0]
+        return respuesta_csv(nombre_archivo, hoja.encabezados, hoja.filas)
+    return respuesta_xlsx(nombre_archivo, hojas)
@@ -0,0 +1,72 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.modulo_6.administracion.datos_prueba import ConfiguracionDatos, DatosExistentes, generar_datos
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera datos sintéticos con volúmenes de producción (polos, cursos, comisiones, personas, '
+        'inscripciones, asistencias y empresas) para medir el rendimiento en local'
+    )
+
+    def add_arguments(self, parser):
+        por_defecto = ConfiguracionDatos()
+        parser.add_argument(
+            '--escala',
+            type=float,
+            default=1.0,
+            help='Multiplica todos los volúmenes por defecto (p.ej. 0.01 para una carga rápida)',
+        )
+        for nombre in ConfiguracionDatos.VOLUMENES:
+            parser.add_argument(
+                f'--{nombre}',
+                type=int,
+                default=None,
+                help=f'Cantidad de {nombre} (por defecto {getattr(por_defecto, nombre)} x escala)',
+            )
+        parser.add_argument('--anios', type=int, default=None, help=f'Años de historia (por defecto {por_defecto.anios})')
+        parser.add_argument('--semilla', type=int, default=None, help=f'Semilla del generador (por defecto {por_defecto.semilla})')
+        parser.add_argument(
+            '--hoy',
+            type=date.fromisoformat,
+            default=None,
+            help='Fecha de referencia AAAA-MM-DD (por defecto hoy); con la misma semilla y fecha los datos son idénticos',
+        )
+        parser.add_argument(
+            '--prefijo-dni',
+            default=None,
+            help=f'Primer dígito de los DNI generados (por defecto {por_defecto.prefijo_dni}); no debe estar en uso',
+        )
+        parser.add_argument(
+            '--contrasena',
+            default=None,
+            help=f'Contraseña de todos los usuarios generados (por defecto {por_defecto.contrasena})',
+        )
+        parser.add_argument('--lote', type=int, default=None, help=f'Filas por inserción (por defecto {por_defecto.lote})')
+
+    def handle(self, *args, **options):
+        configuracion = ConfiguracionDatos.desde_opciones(options)
+        if configuracion.lote < 1 or not configuracion.prefijo_dni.isdigit() or len(configuracion.prefijo_dni) != 1:
+            raise CommandError('--lote debe ser mayor a cero y --prefijo-dni un único dígito.')
+
+        self.stdout.write(
+            'Generando: ' + ', '.join(f'{nombre} {getattr(configuracion, nombre)}' for nombre in ConfiguracionDatos.VOLUMENES)
+            + f', {configuracion.anios} años, semilla {configuracion.semilla}'
+        )
+        inicio = time.monotonic()
+        try:
+            resumen = generar_datos(configuracion, informar=self.stdout.write)
+        except DatosExistentes as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f'Datos generados en {time.monotonic() - inicio:.1f} s'))
+        for clave in ('polos', 'cursos', 'comisiones', 'personas', 'estudiantes', 'tutores', 'docentes',
+                      'inscripciones', 'asistencias', 'empresas', 'turnos'):
+            self.stdout.write(f'  {clave}: {resumen.get(clave, 0)}')
+        self.stdout.write(
+            f"Ingreso de prueba: administrador DNI {resumen['dni_administrador']}, mesa de entrada "
+            f"{', '.join(resumen['dni_mesa_entrada'])}; contraseña {configuracion.contrasena}"
+        )
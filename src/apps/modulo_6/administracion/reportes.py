@@ -0,0 +1,416 @@
+"""
+Definiciones de las exportaciones del panel de administración.
+
+Cada exportación se describe una sola vez (permiso, parámetros y constructor de
+hojas) y se sirve de dos formas con el mismo código:
+
+* descarga directa desde las vistas ``exportar_*``;
+* trabajo en segundo plano encolado en ``apps.modulo_5.reporte`` y procesado
+  por el comando ``procesar_exportaciones``.
+
+Los parámetros son datos serializables a JSON (se guardan en el trabajo y
+definen su clave de deduplicación). El filtro por ciudad de Mesa de Entrada se
+resuelve en el servidor al leer la solicitud, nunca lo envía el cliente.
+"""
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from apps.modulo_1.roles.matriz import anotar_roles, texto_roles
+from apps.modulo_1.roles.models import Estudiante
+from apps.modulo_1.roles.perfil import obtener_perfil
+from apps.modulo_1.usuario.models import Persona
+from apps.modulo_2.inscripciones.models import Inscripcion
+from apps.modulo_3.cursos.models import Comision, Curso
+from apps.modulo_4.asistencia.models import Asistencia
+
+from . import exportacion
+
+
+class ParametrosInvalidos(Exception):
+    """La solicitud no trae los parámetros que necesita la exportación"""
+
+
+class DefinicionExportacion:
+    """
+    ``permiso`` es el nombre de la propiedad de ``PerfilRoles`` que habilita la exportación.
+    ``parametros(request)`` retorna el dict de parámetros; ``construir(parametros)``
+    retorna ``(nombre_archivo, hojas)``.
+    """
+
+    def __init__(self, tipo, titulo, formato, permiso, construir, parametros=None):
+        self.tipo = tipo
+        self.titulo = titulo
+        self.formato = formato
+        self.permiso = permiso
+        self.construir = construir
+        self.parametros = parametros or (lambda request: {})
+
+    def permitida(self, user):
+        if not user.is_authenticated:
+            return False
+        return bool(getattr(obtener_perfil(user), self.permiso))
+
+
+def _safe_xlsx_title(value):
+    if not value:
+        return "Hoja"
+
+    invalid = set('[]:*?/\\')
+    cleaned = ''.join('_' if c in invalid else c for c in str(value))
+    cleaned = cleaned.strip().strip("'")
+
+    if not cleaned:
+        cleaned = "Hoja"
+
+    return cleaned[:31]
+
+
+def _safe_filename_part(value, max_len=50):
+    if not value:
+        return "archivo"
+
+    cleaned = ''.join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in str(value))
+    cleaned = cleaned.strip().replace(' ', '_')
+
+    if not cleaned:
+        cleaned = "archivo"
+
+    return cleaned[:max_len]
+
+
+def _marca_tiempo_local():
+    return timezone.localtime(timezone.now()).strftime('%Y%m%d_%H%M%S')
+
+
+def _valor_solicitud(request, nombre):
+    return request.GET.get(nombre) or request.POST.get(nombre)
+
+
+# ==================== INSCRIPCIONES (CSV) ====================
+
+def _parametros_inscripciones(request):
+    return {'ciudad': (obtener_perfil(request.user).ciudad_mesa_entrada or '').strip()}
+
+
+def _construir_inscripciones(parametros):
+    inscripciones = Inscripcion.objects.all().select_related(
+        'estudiante__usuario__persona',
+        'comision__fk_id_curso',
+        'comision__fk_id_polo',
+    )
+
+    # Filtrar por ciudad si es Mesa de Entrada.
+    # Incluye comisiones virtuales "globales" (Virtual sin polo), pero SOLO si el estudiante
+    # pertenece a la misma ciudad_residencia de la Mesa de Entrada.
+    ciudad_mesa_entrada = parametros.get('ciudad') or ''
+    if ciudad_mesa_entrada:
+        ciudades_match = Persona.ciudad_variantes(ciudad_mesa_entrada)
+        inscripciones = inscripciones.filter(
+            Q(comision__fk_id_polo__ciudad=ciudad_mesa_entrada)
+            |
+            (
+                Q(comision__modalidad='Virtual', comision__fk_id_polo__isnull=True)
+                & Q(estudiante__usuario__persona__ciudad_residencia__in=ciudades_match)
+            )
+        )
+
+    filas = (
+        [
+            insc.id,
+            insc.estudiante.usuario.persona.nombre_completo,
+            insc.estudiante.usuario.persona.dni,
+            insc.comision.fk_id_curso.nombre,
+            f"#{insc.comision.id_comision}",
+            insc.fecha_hora_inscripcion.strftime('%d/%m/%Y %H:%M'),
+            insc.get_estado_display(),
+            insc.observaciones_salud or ''
+        ]
+        for insc in exportacion.iterar(inscripciones)
+    )
+    hoja = exportacion.HojaExportacion(
+        "Inscripciones",
+        ['ID', 'Estudiante', 'DNI', 'Curso', 'Comisión', 'Fecha Inscripción', 'Estado', 'Observaciones Salud'],
+        filas,
+        total=inscripciones.count,
+    )
+    return f'inscripciones_{exportacion.marca_tiempo()}.csv', [hoja]
+
+
+# ==================== ESTUDIANTES (CSV) ====================
+
+def _construir_estudiantes(parametros):
+    estudiantes = Estudiante.objects.select_related('usuario__persona').annotate(
+        total_confirmadas=Count('inscripciones', filter=Q(inscripciones__estado='confirmado')),
+    ).order_by('id')
+
+    def filas():
+        for est in exportacion.iterar(estudiantes):
+            persona = est.usuario.persona
+            yield [
+                persona.dni,
+                persona.nombre,
+                persona.apellido,
+                persona.correo,
+                persona.telefono or '',
+                persona.edad or '',
+                persona.ciudad_residencia or '',
+                est.get_nivel_estudios_display(),
+                est.total_confirmadas
+            ]
+
+    hoja = exportacion.HojaExportacion(
+        "Estudiantes",
+        ['DNI', 'Nombre', 'Apellido', 'Email', 'Teléfono', 'Edad', 'Ciudad', 'Nivel Estudios', 'Total Inscripciones'],
+        filas(),
+        total=Estudiante.objects.count,
+    )
+    return f'estudiantes_{exportacion.marca_tiempo()}.csv', [hoja]
+
+
+# ==================== USUARIOS (XLSX) ====================
+
+def _construir_usuarios(parametros):
+    # Roles resueltos en la misma consulta: el número de consultas no depende de la cantidad de usuarios
+    personas = anotar_roles(
+        Persona.objects.filter(usuario__isnull=False).distinct()
+    ).order_by('apellido', 'nombre')
+
+    def filas():
+        for persona in exportacion.iterar(personas):
+            yield [
+                persona.dni,
+                persona.nombre,
+                persona.apellido,
+                persona.correo,
+                persona.telefono or '',
+                persona.fecha_nacimiento.strftime('%d/%m/%Y') if persona.fecha_nacimiento else '',
+                persona.edad if persona.edad else '',
+                persona.get_genero_display() if persona.genero else '',
+                persona.ciudad_residencia or '',
+                texto_roles(persona),
+                'Activo' if persona.usuario_activo else 'Inactivo'
+            ]
+
+    hoja = exportacion.HojaExportacion(
+        "Usuarios del Sistema",
+        ['DNI', 'Nombre', 'Apellido', 'Email', 'Teléfono', 'Fecha Nacimiento',
+         'Edad', 'Género', 'Ciudad', 'Roles', 'Estado'],
+        filas(),
+        anchos=[15, 20, 20, 30, 15, 15, 8, 10, 15, 25, 12],
+        total=Persona.objects.filter(usuario__isnull=False).distinct().count,
+    )
+    return f"usuarios_{exportacion.marca_tiempo()}.xlsx", [hoja]
+
+
+# ==================== ESTADÍSTICAS (XLSX) ====================
+
+def _construir_estadisticas_estudiantes_curso(parametros):
+    confirmadas = Q(comision__inscripciones__estado='confirmado')
+    cursos_con_alumnos = list(
+        Curso.objects.annotate(
+            total_alumnos=Count('comision__inscripciones', filter=confirmadas),
+            completados=Count(
+                'comision__inscripciones',
+                filter=confirmadas & Q(comision__inscripciones__registro_asistencia__cumple_requisito_certificado=True),
+            ),
+        ).filter(total_alumnos__gt=0).order_by('-total_alumnos').values('id_curso', 'nombre', 'total_alumnos', 'completados')
+    )
+
+    def filas_resumen():
+        for curso in cursos_con_alumnos:
+            total = curso['total_alumnos']
+            completados = curso['completados']
+            porcentaje = (completados / total * 100) if total > 0 else 0
+            yield [curso['nombre'], total, completados, total - completados, f"{porcentaje:.2f}%"]
+
+    # El detalle respeta el orden de la hoja de resumen con una sola consulta
+    orden_cursos = Case(
+        *[When(comision__fk_id_curso_id=curso['id_curso'], then=Value(pos)) for pos, curso in enumerate(cursos_con_alumnos)],
+        output_field=IntegerField(),
+    )
+    detalle = Inscripcion.objects.filter(
+        estado='confirmado',
+        comision__fk_id_curso_id__in=[curso['id_curso'] for curso in cursos_con_alumnos],
+    ).select_related(
+        'estudiante__usuario__persona', 'comision__fk_id_curso', 'registro_asistencia',
+    ).annotate(orden_curso=orden_cursos).order_by('orden_curso', 'orden_lista_espera', '-fecha_hora_inscripcion', 'id')
+
+    def filas_detalle():
+        if not cursos_con_alumnos:
+            return
+        for inscripcion in exportacion.iterar(detalle):
+            registro = getattr(inscripcion, 'registro_asistencia', None)
+            estado = "Completado" if registro and registro.cumple_requisito_certificado else "En Proceso"
+            porcentaje_asist = registro.porcentaje_asistencia if registro else 0
+            yield [
+                inscripcion.comision.fk_id_curso.nombre,
+                inscripcion.comision.id_comision,
+                inscripcion.estudiante.usuario.persona.nombre_completo,
+                inscripcion.estudiante.usuario.persona.dni,
+                estado,
+                f"{porcentaje_asist:.2f}%"
+            ]
+
+    hojas = [
+        exportacion.HojaExportacion(
+            "Estudiantes por Curso",
+            ['Curso', 'Total Alumnos', 'Completados', 'En Proceso', '% Completados'],
+            filas_resumen(),
+            anchos=[40, 15, 15, 15, 15],
+            total=len(cursos_con_alumnos),
+        ),
+        exportacion.HojaExportacion(
+            "Detalle Estudiantes",
+            ['Curso', 'Comisión', 'Estudiante', 'DNI', 'Estado', '% Asistencia'],
+            filas_detalle(),
+            anchos=[30, 10, 30, 15, 15, 15],
+            total=sum(curso['total_alumnos'] for curso in cursos_con_alumnos),
+        ),
+    ]
+    return f"estadisticas_estudiantes_curso_{exportacion.marca_tiempo()}.xlsx", hojas
+
+
+# ==================== ASISTENCIAS (XLSX) ====================
+
+def _parametros_asistencias_curso(request):
+    curso_id = _valor_solicitud(request, 'curso_id')
+    if not curso_id:
+        raise ParametrosInvalidos('❌ Por favor, selecciona un curso.')
+    curso = get_object_or_404(Curso, id_curso=curso_id)
+    return {'curso_id': curso.id_curso}
+
+
+def _construir_asistencias_curso(parametros):
+    curso = get_object_or_404(Curso, id_curso=parametros['curso_id'])
+
+    asistencias = Asistencia.objects.filter(
+        inscripcion__comision__fk_id_curso=curso,
+        inscripcion__estado='confirmado',
+    ).select_related('inscripcion__estudiante__usuario__persona').order_by(
+        'inscripcion__comision_id',
+        'inscripcion__orden_lista_espera',
+        '-inscripcion__fecha_hora_inscripcion',
+        'inscripcion_id',
+        '-fecha_clase',
+    )
+
+    def filas():
+        for asistencia in exportacion.iterar(asistencias):
+            persona = asistencia.inscripcion.estudiante.usuario.persona
+            yield [
+                asistencia.inscripcion.comision_id,
+                persona.nombre_completo,
+                persona.dni,
+                asistencia.fecha_clase.strftime('%d/%m/%Y'),
+                'Sí' if asistencia.presente else 'No',
+                asistencia.observaciones or '',
+                asistencia.registrado_por or ''
+            ]
+
+    hoja = exportacion.HojaExportacion(
+        _safe_xlsx_title(f"Asistencias - {curso.nombre}"),
+        ['Comisión', 'Estudiante', 'DNI', 'Fecha Clase', 'Presente', 'Observaciones', 'Registrado por'],
+        filas(),
+        anchos=[12, 30, 15, 15, 10, 30, 20],
+        total=asistencias.count,
+    )
+    filename = f"asistencias_curso_{_safe_filename_part(curso.nombre, max_len=20)}_{_marca_tiempo_local()}.xlsx"
+    return filename, [hoja]
+
+
+def _parametros_asistencias_comision(request):
+    comision_id = _valor_solicitud(request, 'comision_id')
+    if not comision_id:
+        raise ParametrosInvalidos('❌ Por favor, selecciona una comisión.')
+    comision = get_object_or_404(Comision, id_comision=comision_id)
+    return {'comision_id': comision.id_comision}
+
+
+def _construir_asistencias_comision(parametros):
+    comision = get_object_or_404(
+        Comision.objects.select_related('fk_id_curso', 'fk_id_polo'),
+        id_comision=parametros['comision_id'],
+    )
+
+    preambulo = [
+        ("Curso:", comision.fk_id_curso.nombre),
+        ("Comisión:", f"#{comision.id_comision}"),
+    ]
+    if comision.fk_id_polo:
+        preambulo.append(("Polo:", comision.fk_id_polo.nombre))
+
+    asistencias = Asistencia.objects.filter(
+        inscripcion__comision=comision,
+        inscripcion__estado='confirmado',
+    ).select_related('inscripcion__estudiante__usuario__persona').order_by(
+        'inscripcion__estudiante__usuario__persona__apellido',
+        'inscripcion_id',
+        '-fecha_clase',
+    )
+
+    def filas():
+        for asistencia in exportacion.iterar(asistencias):
+            persona = asistencia.inscripcion.estudiante.usuario.persona
+            yield [
+                persona.nombre_completo,
+                persona.dni,
+                asistencia.fecha_clase.strftime('%d/%m/%Y'),
+                'Sí' if asistencia.presente else 'No',
+                asistencia.observaciones or '',
+                asistencia.registrado_por or '',
+                timezone.localtime(asistencia.fecha_registro).strftime('%d/%m/%Y %H:%M') if asistencia.fecha_registro else ''
+            ]
+
+    hoja = exportacion.HojaExportacion(
+        f"Comisión {comision.id_comision}",
+        ['Estudiante', 'DNI', 'Fecha Clase', 'Presente', 'Observaciones', 'Registrado por', 'Fecha Registro'],
+        filas(),
+        anchos=[30, 15, 15, 10, 30, 20, 20],
+        preambulo=preambulo,
+        total=asistencias.count,
+    )
+    return f"asistencias_comision_{comision.id_comision}_{_marca_tiempo_local()}.xlsx", [hoja]
+
+
+DEFINICIONES = {
+    definicion.tipo: definicion
+    for definicion in [
+        DefinicionExportacion(
+            'inscripciones', 'Inscripciones (CSV)', exportacion.FORMATO_CSV, 'es_admin',
+            _construir_inscripciones, _parametros_inscripciones,
+        ),
+        DefinicionExportacion(
+            'estudiantes', 'Estudiantes (CSV)', exportacion.FORMATO_CSV, 'es_admin_o_mesa',
+            _construir_estudiantes,
+        ),
+        DefinicionExportacion(
+            'usuarios', 'Usuarios del sistema', exportacion.FORMATO_XLSX, 'es_admin_completo',
+            _construir_usuarios,
+        ),
+        DefinicionExportacion(
+            'estadisticas_estudiantes_curso', 'Estadísticas de estudiantes por curso', exportacion.FORMATO_XLSX, 'es_admin',
+            _construir_estadisticas_estudiantes_curso,
+        ),
+        DefinicionExportacion(
+            'asistencias_curso', 'Asistencias por curso', exportacion.FORMATO_XLSX, 'es_admin',
+            _construir_asistencias_curso, _parametros_asistencias_curso,
+        ),
+        DefinicionExportacion(
+            'asistencias_comision', 'Asistencias por comisión', exportacion.FORMATO_XLSX, 'es_admin',
+            _construir_asistencias_comision, _parametros_asistencias_comision,
+        ),
+    ]
+}
+
+
+def obtener_definicion(tipo):
+    """Retorna la definición del tipo indicado o None si no existe"""
+    return DEFINICIONES.get(tipo)
+
+
+def descargar(request, tipo):
+    """Respuesta de descarga directa para las vistas ``exportar_*``"""
+    definicion = DEFINICIONES[tipo]
+    nombre_archivo, hojas = definicion.construir(definicion.parametros(request))
+    return exportacion.respuesta(definicion.formato, nombre_archivo, hojas)
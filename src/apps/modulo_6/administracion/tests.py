@@ -1,15 +1,24 @@
 from datetime import date
+from io import BytesIO, StringIO
 
-from django.db import transaction
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
 
 from apps.modulo_1.roles.models import Estudiante, Rol, UsuarioRol
 from apps.modulo_1.usuario.models import Persona, Usuario
 from apps.modulo_2.inscripciones.models import Inscripcion
-from apps.modulo_3.cursos.models import Comision, Curso, PoloCreativo
+from apps.modulo_3.cursos.models import AgendaDia, Comision, Curso, PoloCreativo
 from apps.modulo_4.asistencia.models import Asistencia
+from apps.modulo_4.asistencia.resumen import recalcular_resumen
 from apps.modulo_6.administracion.views import _normalizar_cupos_y_espera
+from core.consultas import PresupuestoConsultasMixin
 
 
 class NormalizacionCuposTests(TestCase):
@@ -63,6 +72,38 @@ class NormalizacionCuposTests(TestCase):
         self.assertEqual(moved.orden_lista_espera, 1)
         self.assertIsNone(kept.orden_lista_espera)
 
+    def test_rebalanceo_compacta_lista_espera_y_ajusta_contadores(self):
+        espera_1 = Inscripcion.objects.create(
+            estudiante=self._crear_estudiante('33333333'), comision=self.comision, estado='lista_espera', orden_lista_espera=3,
+        )
+        espera_2 = Inscripcion.objects.create(
+            estudiante=self._crear_estudiante('44444444'), comision=self.comision, estado='lista_espera', orden_lista_espera=7,
+        )
+        primera = Inscripcion.objects.create(estudiante=self._crear_estudiante('55555555'), comision=self.comision, estado='pre_inscripto')
+        segunda = Inscripcion.objects.create(estudiante=self._crear_estudiante('66666666'), comision=self.comision, estado='pre_inscripto')
+
+        call_command('rebalancear_listas_espera', stdout=StringIO())
+
+        ordenes = dict(Inscripcion.objects.filter(comision=self.comision).values_list('id', 'orden_lista_espera'))
+        self.assertEqual(ordenes, {espera_1.id: 1, espera_2.id: 2, primera.id: None, segunda.id: 3})
+        self.comision.refresh_from_db()
+        self.assertEqual((self.comision.total_preinscriptos, self.comision.total_lista_espera), (1, 3))
+
+    def test_panel_inscripciones_get_no_modifica_inscripciones(self):
+        from django.contrib.auth.models import User
+
+        i1 = Inscripcion.objects.create(estudiante=self._crear_estudiante('77777777'), comision=self.comision, estado='pre_inscripto')
+        i2 = Inscripcion.objects.create(estudiante=self._crear_estudiante('88888888'), comision=self.comision, estado='pre_inscripto')
+        staff = User.objects.create_user(username='staff', password='x', is_staff=True)
+        self.client.force_login(staff)
+
+        response = self.client.get(reverse('administracion:panel_inscripciones'), secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(Inscripcion.objects.filter(id__in=[i1.id, i2.id]).values_list('estado', flat=True)),
+            {'pre_inscripto'},
+        )
+
 
 class InscribirEstudianteAdminTests(TestCase):
     def setUp(self):
@@ -261,6 +302,19 @@ class InscribirEstudianteAdminTests(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertTrue(response.url.startswith(reverse('login')))
 
+    def test_api_buscar_estudiantes_usa_indice_sin_acentos(self):
+        estudiante = self._crear_estudiante('12300000')
+        persona = estudiante.usuario.persona
+        persona.apellido = 'Muñoz'
+        persona.save()
+
+        response = self.client.get(reverse('administracion:api_buscar_estudiantes'), {'q': 'MUNOZ nomb'}, secure=True)
+        self.assertEqual([e['dni'] for e in response.json()['estudiantes']], ['12300000'])
+
+        Inscripcion.objects.create(estudiante=estudiante, comision=self.comision_ushuaia, estado='confirmado')
+        response = self.client.get(reverse('administracion:panel_inscripciones'), {'q': '12.300'}, secure=True)
+        self.assertEqual([i.estudiante_id for i in response.context['inscripciones']], [estudiante.pk])
+
     def test_admin_puede_ver_panel_cursos(self):
         response = self.client.get(reverse('administracion:panel_cursos'), secure=True)
         self.assertEqual(response.status_code, 200)
@@ -313,7 +367,7 @@ class InscribirEstudianteAdminTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
 
-        csv_text = response.content.decode('utf-8')
+        csv_text = response.getvalue().decode('utf-8')
         self.assertIn('10101010', csv_text)
         self.assertNotIn('20202020', csv_text)
 
@@ -321,7 +375,7 @@ class InscribirEstudianteAdminTests(TestCase):
         response = self.client.get(reverse('administracion:exportar_usuarios_excel'), secure=True)
         self.assertEqual(response.status_code, 200)
         self.assertIn('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', response['Content-Type'])
-        self.assertTrue(response.content.startswith(b'PK'))
+        self.assertTrue(response.getvalue().startswith(b'PK'))
 
         self.client.logout()
         mesa_password = 'mesapass'
@@ -333,6 +387,31 @@ class InscribirEstudianteAdminTests(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertTrue(response.url.startswith(reverse('login')))
 
+    def test_gestion_usuarios_resuelve_roles_en_consultas_constantes(self):
+        url = reverse('administracion:gestion_usuarios')
+        self.client.get(url, secure=True)
+        with CaptureQueriesContext(connection) as base:
+            self.client.get(url, secure=True)
+
+        self._crear_estudiante('12000001')
+        mesa = self._crear_usuario(dni='12000002', password='pw', ciudad='Ushuaia')
+        self._asignar_rol(mesa, nombre_rol='Mesa de Entrada', jerarquia=2)
+        self.client.get(url, secure=True)  # el perfil del admin se recalcula tras los cambios de roles
+        with CaptureQueriesContext(connection) as con_mas_usuarios:
+            response = self.client.get(url, secure=True)
+        self.assertEqual(len(con_mas_usuarios), len(base))
+
+        roles = {fila['persona'].dni: fila['roles'] for fila in response.context['usuarios']}
+        self.assertEqual(roles['12000001'], 'Estudiante')
+        self.assertEqual(roles['12000002'], 'Mesa de Entrada')
+        self.assertEqual(roles['90000000'], 'Administrador')
+
+        response = self.client.get(url, {'q': '1200000'}, secure=True, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(
+            {u['dni']: u['roles'] for u in response.json()['usuarios']},
+            {'12000001': 'Estudiante', '12000002': 'Mesa de Entrada'},
+        )
+
     def test_exportar_asistencias_por_curso_xlsx(self):
         estudiante = self._crear_estudiante('30303030')
         inscripcion = Inscripcion.objects.create(estudiante=estudiante, comision=self.comision_ushuaia, estado='confirmado')
@@ -347,7 +426,7 @@ class InscribirEstudianteAdminTests(TestCase):
         response = self.client.get(url, secure=True)
         self.assertEqual(response.status_code, 200)
         self.assertIn('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', response['Content-Type'])
-        self.assertTrue(response.content.startswith(b'PK'))
+        self.assertTrue(response.getvalue().startswith(b'PK'))
 
     def test_exportar_asistencias_por_comision_xlsx(self):
         estudiante = self._crear_estudiante('40404040')
@@ -363,4 +442,231 @@ class InscribirEstudianteAdminTests(TestCase):
         response = self.client.get(url, secure=True)
         self.assertEqual(response.status_code, 200)
         self.assertIn('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', response['Content-Type'])
-        self.assertTrue(response.content.startswith(b'PK'))
+        contenido = response.getvalue()
+        self.assertTrue(contenido.startswith(b'PK'))
+
+        wb = load_workbook(filename=BytesIO(contenido))
+        ws = wb.active
+        self.assertEqual(ws.cell(row=5, column=1).value, 'Estudiante')
+        self.assertEqual(ws.cell(row=6, column=2).value, '40404040')
+        self.assertEqual(ws.cell(row=6, column=4).value, 'No')
+
+    def test_exportar_asistencias_por_comision_consultas_constantes(self):
+        url = reverse('administracion:exportar_asistencias_comision') + f'?comision_id={self.comision_ushuaia.id_comision}'
+
+        def consultas_exportacion():
+            cache.clear()  # mismas condiciones en cada medición (usuario y perfil sin cachear)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url, secure=True)
+                response.getvalue()
+            return len(ctx.captured_queries)
+
+        inscripcion = Inscripcion.objects.create(
+            estudiante=self._crear_estudiante('41414141'), comision=self.comision_ushuaia, estado='confirmado',
+        )
+        Asistencia.objects.create(inscripcion=inscripcion, fecha_clase=date(2025, 1, 1), presente=True)
+        consultas_exportacion()  # la sesión de force_login recibe su marca de renovación en el primer request
+        base = consultas_exportacion()
+
+        for i in range(5):
+            inscripcion = Inscripcion.objects.create(
+                estudiante=self._crear_estudiante(f'4242424{i}'), comision=self.comision_ushuaia, estado='confirmado',
+            )
+            Asistencia.objects.create(inscripcion=inscripcion, fecha_clase=date(2025, 1, 1), presente=True)
+        self.assertEqual(consultas_exportacion(), base)
+
+    def test_panel_asistencia_guarda_toma_completa(self):
+        from apps.modulo_4.asistencia.models import RegistroAsistencia
+
+        inscripciones = [
+            Inscripcion.objects.create(
+                estudiante=self._crear_estudiante(f'5050505{i}'),
+                comision=self.comision_ushuaia,
+                estado='confirmado',
+            )
+            for i in range(3)
+        ]
+        Asistencia.objects.create(inscripcion=inscripciones[0], fecha_clase=date(2025, 1, 1), presente=True)
+
+        data = {
+            'comision_id': self.comision_ushuaia.id_comision,
+            'guardar_asistencia': '1',
+            'fecha_clase': '2025-01-01',
+            f'presente_{inscripciones[1].id}': 'on',
+            f'observacion_{inscripciones[2].id}': 'Llegó tarde',
+        }
+        response = self.client.post(reverse('administracion:panel_asistencia'), data, secure=True)
+        self.assertEqual(response.status_code, 302)
+
+        presentes = dict(
+            Asistencia.objects.filter(fecha_clase=date(2025, 1, 1)).values_list('inscripcion_id', 'presente')
+        )
+        self.assertEqual(presentes, {inscripciones[0].id: False, inscripciones[1].id: True, inscripciones[2].id: False})
+        self.assertEqual(
+            Asistencia.objects.get(inscripcion=inscripciones[2]).observaciones,
+            'Llegó tarde',
+        )
+        asistidas = dict(
+            RegistroAsistencia.objects.filter(inscripcion__in=inscripciones).values_list('inscripcion_id', 'clases_asistidas')
+        )
+        self.assertEqual(asistidas, {inscripciones[0].id: 0, inscripciones[1].id: 1, inscripciones[2].id: 0})
+
+    def test_panel_asistencia_rechaza_fecha_fuera_de_calendario(self):
+        estudiante = self._crear_estudiante('60606060')
+        Inscripcion.objects.create(estudiante=estudiante, comision=self.comision_ushuaia, estado='confirmado')
+
+        data = {
+            'comision_id': self.comision_ushuaia.id_comision,
+            'guardar_asistencia': '1',
+            'fecha_clase': '2025-01-02',
+        }
+        response = self.client.post(reverse('administracion:panel_asistencia'), data, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Asistencia.objects.exists())
+
+
+class PresupuestoConsultasVistasTests(PresupuestoConsultasMixin, TestCase):
+    """Techo de consultas de las vistas más usadas, con datos que delatarían un N+1"""
+
+    def setUp(self):
+        polos = [
+            PoloCreativo.objects.create(nombre=f'Polo {ciudad}', ciudad=ciudad, direccion='Test 123', activo=True)
+            for ciudad in ('Ushuaia', 'Rio Grande')
+        ]
+        self.cursos = []
+        comisiones = []
+        for i in range(3):
+            curso = Curso.objects.create(nombre=f'Curso {i}', estado='Abierto', orden=i)
+            self.cursos.append(curso)
+            for polo in polos:
+                comisiones.append(Comision.objects.create(
+                    fk_id_curso=curso,
+                    fk_id_polo=polo,
+                    dias_horarios='Miércoles 10:00 - 12:00',
+                    fecha_inicio=date(2025, 1, 1),
+                    fecha_fin=date(2025, 12, 1),
+                    estado='Abierta',
+                    cupo_maximo=20,
+                ))
+        self.polo = polos[0]
+        self.comision = comisiones[0]
+
+        for i in range(8):
+            estudiante = self._crear_estudiante(f'5000000{i}')
+            for comision in comisiones[i % 2::2]:
+                inscripcion = Inscripcion.objects.create(estudiante=estudiante, comision=comision, estado='confirmado')
+                for dia in (1, 8):
+                    Asistencia.objects.create(inscripcion=inscripcion, fecha_clase=date(2025, 1, dia), presente=dia == 1)
+
+        admin = self._crear_usuario('90000000')
+        rol = Rol.objects.create(nombre='Administrador', descripcion='Administrador', jerarquia=1)
+        UsuarioRol.objects.create(usuario_id=admin, rol_id=rol)
+        self.assertTrue(self.client.login(username='90000000', password='pw'))
+        cache.clear()
+
+    def _crear_usuario(self, dni):
+        persona = Persona.objects.create(
+            dni=dni,
+            nombre='Nombre',
+            apellido=dni,
+            correo=f'{dni}@test.com',
+            ciudad_residencia='Ushuaia',
+            fecha_nacimiento=date(2000, 1, 1),
+        )
+        return Usuario.objects.create(persona=persona, contrasena='pw')
+
+    def _crear_estudiante(self, dni):
+        return Estudiante.objects.create(usuario=self._crear_usuario(dni), nivel_estudios='SE', institucion_actual='Colegio')
+
+    def _assert_vista(self, url, maximo):
+        self.client.get(url, secure=True)  # la sesión de force_login recibe su marca de renovación
+        cache.clear()  # usuario y perfil sin cachear: el peor caso de cada request
+        with self.assertPresupuestoConsultas(maximo):
+            response = self.client.get(url, secure=True)
+            if response.streaming:
+                response.getvalue()
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_paneles(self):
+        # Un miércoles con clases fuera de la ventana construida: la agenda se calcula sin escribir
+        self._assert_vista(reverse('dashboard_admin') + '?fecha=2025-01-08', 21)
+        self.assertFalse(AgendaDia.objects.exists())
+        self._assert_vista(reverse('administracion:estadisticas'), 12)
+        self._assert_vista(reverse('administracion:panel_inscripciones'), 8)
+        self._assert_vista(reverse('administracion:gestion_usuarios'), 7)
+
+    def test_presentes_hoy_cuenta_solo_inscripciones_confirmadas(self):
+        hoy = timezone.now().date()
+        inscripciones = list(Inscripcion.objects.filter(comision=self.comision)[:2])
+        # Sin validar el calendario (ni la fecha local, que según la hora va detrás del día del dashboard)
+        Asistencia.objects.bulk_create([
+            Asistencia(inscripcion=inscripcion, fecha_clase=hoy, presente=True) for inscripcion in inscripciones
+        ])
+        recalcular_resumen([self.comision.pk])
+        inscripciones[1].estado = 'cancelada'
+        inscripciones[1].save()
+
+        response = self.client.get(reverse('dashboard_admin'), secure=True)
+        self.assertEqual(response.context['asistencias_hoy'], 1)
+
+    def test_exportaciones(self):
+        curso_id, comision_id = self.cursos[0].id_curso, self.comision.id_comision
+        self._assert_vista(reverse('administracion:exportar_inscripciones'), 5)
+        self._assert_vista(reverse('administracion:exportar_estudiantes'), 5)
+        self._assert_vista(reverse('administracion:exportar_usuarios_excel'), 5)
+        self._assert_vista(reverse('administracion:exportar_estadisticas_estudiantes_curso'), 6)
+        self._assert_vista(reverse('administracion:exportar_asistencias_curso') + f'?curso_id={curso_id}', 7)
+        self._assert_vista(reverse('administracion:exportar_asistencias_comision') + f'?comision_id={comision_id}', 7)
+
+    def test_consultas_publicas_y_api(self):
+        self._assert_vista(reverse('api_estudiantes_por_curso') + f'?curso_id={self.cursos[0].id_curso}', 7)
+        self._assert_vista(reverse('cursos_por_polo', args=[self.polo.id_polo]), 6)
+        response = self._assert_vista(reverse('administracion:api_buscar_estudiantes') + '?q=nombre', 5)
+        self.assertEqual([e['inscripciones'] for e in response.json()['estudiantes']], [3] * 8)
+
+
+class GenerarDatosPruebaTests(TestCase):
+    VOLUMENES = {'polos': 2, 'cursos': 3, 'comisiones': 12, 'estudiantes': 120, 'docentes': 4, 'empresas': 2}
+
+    def _generar(self, prefijo_dni):
+        call_command(
+            'generar_datos_prueba', prefijo_dni=prefijo_dni, hoy=date(2025, 6, 2), stdout=StringIO(), **self.VOLUMENES,
+        )
+
+    def test_genera_volumenes_y_datos_derivados_consistentes(self):
+        from apps.modulo_2.inscripciones.contadores import reconciliar_contadores
+        from apps.modulo_4.asistencia.models import RegistroAsistencia
+
+        self._generar('7')
+
+        self.assertEqual(Comision.objects.count(), 12)
+        self.assertEqual(Estudiante.objects.count(), 120)
+        self.assertTrue(UsuarioRol.objects.filter(usuario_id__persona__dni='70000000', rol_id__nombre='Administrador').exists())
+        self.assertEqual(
+            set(Inscripcion.objects.values_list('estado', flat=True).distinct()),
+            {estado for estado, _ in Inscripcion.ESTADOS},
+        )
+        self.assertTrue(Asistencia.objects.exists())
+        self.assertEqual(reconciliar_contadores(corregir=False), [])
+        self.assertEqual(
+            RegistroAsistencia.objects.count(),
+            Inscripcion.objects.filter(estado='confirmado').count(),
+        )
+
+    def test_misma_semilla_genera_los_mismos_datos(self):
+        self._generar('7')
+        self._generar('8')
+
+        def datos(prefijo):
+            personas = Persona.objects.filter(dni__startswith=prefijo).order_by('dni')
+            return [(p.dni[1:], p.nombre, p.apellido) for p in personas]
+
+        self.assertEqual(datos('7'), datos('8'))
+        horarios = list(Comision.objects.order_by('id_comision').values_list('dias_horarios', flat=True))
+        self.assertEqual(horarios[:12], horarios[12:])
+
+    def test_no_regenera_sobre_datos_existentes(self):
+        self._generar('7')
+        with self.assertRaises(CommandError):
+            self._generar('7')
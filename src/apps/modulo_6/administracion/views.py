@@ -2,113 +2,44 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import get_user_model
 from django.contrib import messages
-from django.db.models import Count, Q, F, Max, Prefetch
+from django.db.models import Count, Q, F, Prefetch, Sum
 from django.db import transaction, models
-from django.http import HttpResponse
-from django.utils import timezone
-import csv
-from datetime import datetime
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.utils import get_column_letter
 
 from apps.modulo_3.cursos.models import Curso, Comision, PoloCreativo, Material, ComisionDocente
 from apps.modulo_2.inscripciones.models import Inscripcion
 from apps.modulo_1.roles.models import Estudiante, Docente, Rol, UsuarioRol
+from apps.modulo_1.roles.matriz import anotar_roles, texto_roles
+from apps.modulo_1.roles.perfil import obtener_perfil
 from apps.modulo_1.usuario.models import Persona, Usuario
-from apps.modulo_4.asistencia.models import Asistencia
+from apps.modulo_1.usuario.busqueda import buscar as buscar_personas, filtro_personas
+from apps.modulo_4.asistencia.models import Asistencia, ResumenAsistenciaComision
+from apps.modulo_4.asistencia.resumen import fechas_con_asistencia
+from apps.modulo_4.asistencia.toma import guardar_toma_asistencia
+from apps.modulo_2.inscripciones.espera import rebalancear_lista_espera
 from apps.modulo_3.cursos.forms import MaterialForm
+from apps.modulo_6.administracion import reportes
+from core.replica import usar_replica
 from datetime import date
 
 
-def _safe_xlsx_title(value):
-    if not value:
-        return "Hoja"
-
-    invalid = set('[]:*?/\\')
-    cleaned = ''.join('_' if c in invalid else c for c in str(value))
-    cleaned = cleaned.strip().strip("'")
-
-    if not cleaned:
-        cleaned = "Hoja"
-
-    return cleaned[:31]
-
-
-def _safe_filename_part(value, max_len=50):
-    if not value:
-        return "archivo"
-
-    cleaned = ''.join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in str(value))
-    cleaned = cleaned.strip().replace(' ', '_')
-
-    if not cleaned:
-        cleaned = "archivo"
-
-    return cleaned[:max_len]
-
-
 def es_admin(user):
     """Verifica si el usuario es administrador, mesa de entrada o docente con cursos asignados"""
     if not user.is_authenticated:
         return False
-    
-    # Verificar si es staff o superuser (administrador Django)
-    if user.is_staff or user.is_superuser:
-        return True
-    
-    # Verificar si tiene rol de Administrador o Mesa de Entrada
-    try:
-        usuario = Usuario.objects.get(persona__dni=user.username)
-        roles = UsuarioRol.objects.filter(usuario_id=usuario).values_list('rol_id__nombre', flat=True)
-        # DEBUG
-        # print(f"DEBUG es_admin: User={user.username}, Roles={list(roles)}")
-        if 'Administrador' in roles or 'Mesa de Entrada' in roles:
-            return True
-        
-        # Verificar si es docente con comisiones asignadas
-        from apps.modulo_3.cursos.models import ComisionDocente
-        if Docente.objects.filter(id_persona=usuario.persona).exists():
-            tiene_comisiones = ComisionDocente.objects.filter(fk_id_docente=usuario).exists()
-            if tiene_comisiones:
-                return True
-    except Usuario.DoesNotExist:
-        pass
-    
-    return False
+    return obtener_perfil(user).es_admin
 
 
 def es_admin_o_mesa(user):
     if not user.is_authenticated:
         return False
-
-    if user.is_staff or user.is_superuser:
-        return True
-
-    try:
-        usuario = Usuario.objects.get(persona__dni=user.username)
-        roles = UsuarioRol.objects.filter(usuario_id=usuario).values_list('rol_id__nombre', flat=True)
-        return 'Administrador' in roles or 'Mesa de Entrada' in roles
-    except Usuario.DoesNotExist:
-        return False
+    return obtener_perfil(user).es_admin_o_mesa
 
 
 def es_admin_completo(user):
     """Verifica si el usuario es administrador completo (puede crear usuarios)"""
     if not user.is_authenticated:
         return False
-    
-    # Verificar si es staff o superuser (administrador Django)
-    if user.is_staff or user.is_superuser:
-        return True
-    
-    # Verificar si tiene rol de Administrador (no Mesa de Entrada)
-    try:
-        usuario = Usuario.objects.get(persona__dni=user.username)
-        roles = UsuarioRol.objects.filter(usuario_id=usuario).values_list('rol_id__nombre', flat=True)
-        return 'Administrador' in roles
-    except Usuario.DoesNotExist:
-        return False
+    return obtener_perfil(user).es_admin_completo
 
 
 @login_required
@@ -431,59 +362,11 @@ def get_mesa_entrada_ciudad(user):
     Retorna la ciudad del usuario si es Mesa de Entrada y NO es Administrador/Superuser.
     Si es Admin/Superuser o no es Mesa de Entrada, retorna None.
     """
-    if user.is_staff or user.is_superuser:
-        return None
-        
-    try:
-        usuario = Usuario.objects.get(persona__dni=user.username)
-        roles = UsuarioRol.objects.filter(usuario_id=usuario).values_list('rol_id__nombre', flat=True)
-        
-        if 'Administrador' in roles:
-            return None
-            
-        if 'Mesa de Entrada' in roles:
-            return Persona.normalizar_ciudad(usuario.persona.ciudad_residencia)
-            
-    except Usuario.DoesNotExist:
-        pass
-        
-    return None
+    return obtener_perfil(user).ciudad_mesa_entrada
 
 
 def _normalizar_cupos_y_espera(comision_locked):
-    confirmados_count = Inscripcion.objects.filter(comision=comision_locked, estado='confirmado').count()
-    cupos_para_preinscriptos = max(comision_locked.cupo_maximo - confirmados_count, 0)
-
-    pre_qs = Inscripcion.objects.select_for_update().filter(
-        comision=comision_locked,
-        estado='pre_inscripto'
-    ).order_by('fecha_hora_inscripcion', 'id')
-    pre_ids = list(pre_qs.values_list('id', flat=True))
-
-    if len(pre_ids) <= cupos_para_preinscriptos:
-        if pre_ids:
-            Inscripcion.objects.filter(id__in=pre_ids).update(orden_lista_espera=None)
-        return
-
-    keep_ids = pre_ids[:cupos_para_preinscriptos]
-    move_ids = pre_ids[cupos_para_preinscriptos:]
-
-    if keep_ids:
-        Inscripcion.objects.filter(id__in=keep_ids).update(orden_lista_espera=None)
-
-    max_orden = Inscripcion.objects.filter(
-        comision=comision_locked,
-        estado='lista_espera'
-    ).aggregate(Max('orden_lista_espera'))['orden_lista_espera__max'] or 0
-
-    inscripciones_a_mover = list(
-        Inscripcion.objects.select_for_update().filter(id__in=move_ids).order_by('fecha_hora_inscripcion', 'id')
-    )
-    for idx, insc in enumerate(inscripciones_a_mover, start=1):
-        insc.estado = 'lista_espera'
-        insc.orden_lista_espera = max_orden + idx
-    if inscripciones_a_mover:
-        Inscripcion.objects.bulk_update(inscripciones_a_mover, ['estado', 'orden_lista_espera'])
+    return rebalancear_lista_espera(comision_locked)
 
 
 @login_required
@@ -492,27 +375,6 @@ def panel_inscripciones(request):
     """Panel de gestión de inscripciones con búsqueda y filtros"""
     # Filtrar por ciudad si es Mesa de Entrada
     ciudad_mesa_entrada = get_mesa_entrada_ciudad(request.user)
-    comisiones_scope = Comision.objects.all()
-    if ciudad_mesa_entrada:
-        comisiones_scope = comisiones_scope.filter(
-            Q(fk_id_polo__ciudad=ciudad_mesa_entrada) |
-            Q(modalidad='Virtual', fk_id_polo__isnull=True)
-        )
-
-    comisiones_con_exceso = comisiones_scope.annotate(
-        confirmados_count=Count('inscripciones', filter=Q(inscripciones__estado='confirmado')),
-        preinscriptos_count=Count('inscripciones', filter=Q(inscripciones__estado='pre_inscripto')),
-    ).filter(
-        preinscriptos_count__gt=0
-    ).filter(
-        Q(confirmados_count__gte=F('cupo_maximo')) |
-        Q(preinscriptos_count__gt=F('cupo_maximo') - F('confirmados_count'))
-    ).values_list('id_comision', flat=True)
-
-    for comision_id in comisiones_con_exceso:
-        with transaction.atomic():
-            comision_locked = Comision.objects.select_for_update().get(id_comision=comision_id)
-            _normalizar_cupos_y_espera(comision_locked)
 
     inscripciones_base = Inscripcion.objects.all().select_related(
         'estudiante__usuario__persona',
@@ -533,9 +395,7 @@ def panel_inscripciones(request):
     busqueda = request.GET.get('q')
     if busqueda:
         inscripciones_base = inscripciones_base.filter(
-            Q(estudiante__usuario__persona__nombre__icontains=busqueda) |
-            Q(estudiante__usuario__persona__apellido__icontains=busqueda) |
-            Q(estudiante__usuario__persona__dni__icontains=busqueda) |
+            filtro_personas(busqueda, 'estudiante__usuario__persona') |
             Q(comision__fk_id_curso__nombre__icontains=busqueda)
         )
 
@@ -558,9 +418,7 @@ def panel_inscripciones(request):
     comisiones_disponibles = Comision.objects.filter(
         estado='Abierta'
     ).annotate(
-        inscritos_count_annotated=Count('inscripciones', filter=~Q(inscripciones__estado__in=['lista_espera', 'cancelada']))
-    ).annotate(
-        cupos_disponibles_calc=F('cupo_maximo') - F('inscritos_count_annotated')
+        cupos_disponibles_calc=F('cupo_maximo') - F('total_confirmados') - F('total_preinscriptos')
     ).filter(
         cupos_disponibles_calc__gt=0
     ).select_related('fk_id_curso', 'fk_id_polo').order_by('fk_id_curso__nombre', 'id_comision')
@@ -653,6 +511,7 @@ def inscribir_estudiante_admin(request):
                         else:
                             inscripcion_locked.estado = 'confirmado'
                             inscripcion_locked.save(update_fields=['estado'])
+                        _normalizar_cupos_y_espera(comision_locked)
 
                     messages.success(request, f'✅ Inscripción confirmada exitosamente para {estudiante.usuario.persona.nombre_completo}.')
                     return redirect(redirect_url)
@@ -674,6 +533,7 @@ def inscribir_estudiante_admin(request):
                         inscripcion_locked.estado = 'confirmado'
                         inscripcion_locked.orden_lista_espera = None
                         inscripcion_locked.save(update_fields=['estado', 'orden_lista_espera'])
+                        _normalizar_cupos_y_espera(comision_locked)
 
                     messages.success(request, f'✅ Inscripción confirmada exitosamente para {estudiante.usuario.persona.nombre_completo}.')
                     return redirect(redirect_url)
@@ -720,8 +580,9 @@ def inscribir_estudiante_admin(request):
                     comision=comision_locked,
                     estado='confirmado'
                 )
+                _normalizar_cupos_y_espera(comision_locked)
             
-            messages.success(request, f'✅ Estudiante {estudiante.usuario.persona.nombre_completo} inscrito exitosamente en {comision.fk_id_curso.nombre} (Comisión #{comision.id_comision}). Cupos restantes: {comision.cupos_disponibles}')
+            messages.success(request, f'✅ Estudiante {estudiante.usuario.persona.nombre_completo} inscrito exitosamente en {comision.fk_id_curso.nombre} (Comisión #{comision.id_comision}). Cupos restantes: {comision_locked.cupos_disponibles}')
             return redirect(redirect_url)
             
         except Exception as e:
@@ -776,48 +637,10 @@ def cancelar_inscripcion_admin(request, inscripcion_id):
 
 @login_required
 @user_passes_test(es_admin)
+@usar_replica
 def exportar_inscripciones(request):
     """Exportar inscripciones a CSV"""
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="inscripciones_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['ID', 'Estudiante', 'DNI', 'Curso', 'Comisión', 'Fecha Inscripción', 'Estado', 'Observaciones Salud'])
-
-    inscripciones = Inscripcion.objects.all().select_related(
-        'estudiante__usuario__persona',
-        'comision__fk_id_curso',
-        'comision__fk_id_polo',
-    )
-
-    # Filtrar por ciudad si es Mesa de Entrada.
-    # Incluye comisiones virtuales "globales" (Virtual sin polo), pero SOLO si el estudiante
-    # pertenece a la misma ciudad_residencia de la Mesa de Entrada.
-    ciudad_mesa_entrada = (get_mesa_entrada_ciudad(request.user) or '').strip()
-    if ciudad_mesa_entrada:
-        ciudades_match = Persona.ciudad_variantes(ciudad_mesa_entrada)
-        inscripciones = inscripciones.filter(
-            Q(comision__fk_id_polo__ciudad=ciudad_mesa_entrada)
-            |
-            (
-                Q(comision__modalidad='Virtual', comision__fk_id_polo__isnull=True)
-                & Q(estudiante__usuario__persona__ciudad_residencia__in=ciudades_match)
-            )
-        )
-
-    for insc in inscripciones:
-        writer.writerow([
-            insc.id,
-            insc.estudiante.usuario.persona.nombre_completo,
-            insc.estudiante.usuario.persona.dni,
-            insc.comision.fk_id_curso.nombre,
-            f"#{insc.comision.id_comision}",
-            insc.fecha_hora_inscripcion.strftime('%d/%m/%Y %H:%M'),
-            insc.get_estado_display(),
-            insc.observaciones_salud or ''
-        ])
-
-    return response
+    return reportes.descargar(request, 'inscripciones')
 
 
 @login_required
@@ -829,12 +652,7 @@ def buscador_estudiantes(request):
     # Búsqueda
     q = request.GET.get('q')
     if q:
-        estudiantes = estudiantes.filter(
-            Q(usuario__persona__nombre__icontains=q) |
-            Q(usuario__persona__apellido__icontains=q) |
-            Q(usuario__persona__dni__icontains=q) |
-            Q(usuario__persona__correo__icontains=q)
-        )
+        estudiantes = buscar_personas(estudiantes, q, 'usuario__persona')
     
     context = {
         'estudiantes': estudiantes,
@@ -845,33 +663,10 @@ def buscador_estudiantes(request):
 
 @login_required
 @user_passes_test(es_admin_o_mesa)
+@usar_replica
 def exportar_estudiantes(request):
     """Exportar estudiantes a CSV"""
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="estudiantes_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['DNI', 'Nombre', 'Apellido', 'Email', 'Teléfono', 'Edad', 'Ciudad', 'Nivel Estudios', 'Total Inscripciones'])
-    
-    estudiantes = Estudiante.objects.all().select_related('usuario__persona')
-    
-    for est in estudiantes:
-        persona = est.usuario.persona
-        total_insc = est.inscripciones.filter(estado='confirmado').count()
-        
-        writer.writerow([
-            persona.dni,
-            persona.nombre,
-            persona.apellido,
-            persona.correo,
-            persona.telefono or '',
-            persona.edad or '',
-            persona.ciudad_residencia or '',
-            est.get_nivel_estudios_display(),
-            total_insc
-        ])
-    
-    return response
+    return reportes.descargar(request, 'estudiantes')
 
 
 @login_required
@@ -912,11 +707,14 @@ def crear_polo(request):
 
 @login_required
 @user_passes_test(es_admin_completo)
+@usar_replica
 def estadisticas_detalladas(request):
     """Panel de estadísticas detalladas con gráficos"""
-    from apps.modulo_4.asistencia.models import RegistroAsistencia
-    from django.db.models import Avg, Count, DecimalField, Q, Value, Max
-    from django.db.models.functions import Coalesce
+    from apps.modulo_5.estadistica.materializacion import (
+        CAMPOS_ESTADO, CLAVES_EDAD, GENEROS, anotar_edades, hay_pendientes,
+    )
+    from apps.modulo_5.estadistica.models import EstadisticaComision
+    from django.db.models import Count, Q, Max
     from datetime import date as dt_date
 
     # Filtros de fecha (por inicio de comisión)
@@ -933,37 +731,32 @@ def estadisticas_detalladas(request):
     fecha_desde = _parse_fecha(fecha_desde_raw)
     fecha_hasta = _parse_fecha(fecha_hasta_raw)
 
-    # --- 1. Filtrado de Inscripciones Activas (Base para todo lo demás) ---
-    inscripciones_qs = Inscripcion.objects.filter(estado='confirmado')
+    # Las cifras por comisión salen de EstadisticaComision. La vista solo lee: las filas se
+    # recalculan al confirmarse cada cambio; el aviso indica que todavía quedan pendientes
+    estadisticas_desactualizadas = hay_pendientes()
 
-    # Filtros para Comisiones
-    filtro_comision = Q()
+    filas_qs = EstadisticaComision.objects.all()
     if fecha_desde:
-        filtro_comision &= Q(comision__fecha_inicio__gte=fecha_desde)
+        filas_qs = filas_qs.filter(fecha_inicio__gte=fecha_desde)
     if fecha_hasta:
-        filtro_comision &= Q(comision__fecha_inicio__lte=fecha_hasta)
+        filas_qs = filas_qs.filter(fecha_inicio__lte=fecha_hasta)
+    # Los rangos etarios se resuelven a hoy desde las fechas de nacimiento guardadas
+    filas = list(
+        anotar_edades(filas_qs).select_related('curso', 'polo').order_by('curso__nombre', 'comision_id')
+    )
 
-    # Aplicamos filtro de fechas a las inscripciones
-    if fecha_desde or fecha_hasta:
-        inscripciones_qs = inscripciones_qs.filter(filtro_comision)
+    def _sumar(campos, filas_a_sumar):
+        return {campo: sum(getattr(fila, campo) for fila in filas_a_sumar) for campo in campos}
+
+    # --- 1. Estadísticas Generales (Calculadas con filtro) ---
+    total_inscripciones = sum(fila.total_confirmados for fila in filas)
 
-    # --- 2. Estadísticas Generales (Calculadas con filtro) ---
-    total_inscripciones = inscripciones_qs.count()
-    
-    # Total Cursos: Cursos que tienen comisiones en el rango (o todos si no hay filtro)
-    cursos_qs = Curso.objects.all()
     if fecha_desde or fecha_hasta:
-        cursos_filter = Q()
-        if fecha_desde:
-            cursos_filter &= Q(comision__fecha_inicio__gte=fecha_desde)
-        if fecha_hasta:
-            cursos_filter &= Q(comision__fecha_inicio__lte=fecha_hasta)
-        cursos_qs = cursos_qs.filter(cursos_filter).distinct()
-        total_cursos = cursos_qs.count()
+        total_cursos = len({fila.curso_id for fila in filas})
     else:
-        total_cursos = cursos_qs.count()
+        total_cursos = Curso.objects.count()
 
-    # Total Estudiantes: Estudiantes con inscripciones confirmadas en el rango (o todos si no hay filtro)
+    # Los estudiantes distintos no se pueden sumar por comisión: se cuentan sobre las inscripciones
     estudiantes_qs = Estudiante.objects.all()
     if fecha_desde or fecha_hasta:
         est_filter = Q(inscripciones__estado='confirmado')
@@ -972,12 +765,9 @@ def estadisticas_detalladas(request):
         if fecha_hasta:
             est_filter &= Q(inscripciones__comision__fecha_inicio__lte=fecha_hasta)
         estudiantes_qs = estudiantes_qs.filter(est_filter).distinct()
-        total_estudiantes = estudiantes_qs.count()
-    else:
-        total_estudiantes = estudiantes_qs.count()
+    total_estudiantes = estudiantes_qs.count()
 
-    # --- 3. Cursos con cantidad de alumnos (respetando filtros) ---
-    # Construimos el filtro para el Count dinámicamente
+    # --- 2. Cursos con cantidad de alumnos (respetando filtros) ---
     filtro_count = Q(comision__inscripciones__estado='confirmado')
     if fecha_desde:
         filtro_count &= Q(comision__fecha_inicio__gte=fecha_desde)
@@ -1005,273 +795,87 @@ def estadisticas_detalladas(request):
                 'nombre': curso.nombre,
                 'cantidad': curso.total_alumnos
             })
-    
-    # Estadísticas de asistencia
-    promedio_asistencia = 0
-    total_completados = 0
-    total_en_proceso = int(total_inscripciones)
-    total_registros_asistencia = 0
-    cobertura_asistencia = 0
-
-    # Usamos inscripciones_qs que ya tiene el filtro aplicado
-    inscripciones_confirmadas_qs = inscripciones_qs.order_by()
-
-    rangos_global = {
-        'rango_0_49': 0,
-        'rango_50_74': 0,
-        'rango_75_100': 0,
-    }
 
-    regs_por_curso_map = {}
-    regs_por_comision_map = {}
+    # --- 3. Asistencia por rangos ---
+    campos_asistencia = ['total_confirmados', 'registros_asistencia', 'completados',
+                         'asistencia_0_49', 'asistencia_50_74', 'asistencia_75_100']
+    totales = _sumar(campos_asistencia, filas)
+    total_completados = totales['completados']
+    total_en_proceso = max(total_inscripciones - total_completados, 0)
+    total_registros_asistencia = totales['registros_asistencia']
+    cobertura_asistencia = (total_registros_asistencia / total_inscripciones * 100) if total_inscripciones > 0 else 0
 
-    try:
-        promedio_asistencia = inscripciones_confirmadas_qs.aggregate(
-            avg=Avg(
-                Coalesce(
-                    'registro_asistencia__porcentaje_asistencia',
-                    Value(0, output_field=DecimalField(max_digits=5, decimal_places=2)),
-                )
-            )
-        )['avg'] or 0
-
-        total_completados = RegistroAsistencia.objects.filter(
-            inscripcion__estado='confirmado',
-            cumple_requisito_certificado=True,
-        ).count()
-        total_en_proceso = inscripciones_confirmadas_qs.exclude(
-            registro_asistencia__cumple_requisito_certificado=True
-        ).count()
-
-        total_registros_asistencia = RegistroAsistencia.objects.filter(
-            inscripcion__estado='confirmado',
-        ).count()
-        cobertura_asistencia = (total_registros_asistencia / total_inscripciones * 100) if total_inscripciones > 0 else 0
-
-        registros_confirmados_qs = RegistroAsistencia.objects.filter(inscripcion__estado='confirmado').order_by()
-
-        rangos_global = registros_confirmados_qs.aggregate(
-            rango_0_49=Count('id', filter=Q(porcentaje_asistencia__lt=50)),
-            rango_50_74=Count('id', filter=Q(porcentaje_asistencia__gte=50, porcentaje_asistencia__lt=75)),
-            rango_75_100=Count('id', filter=Q(porcentaje_asistencia__gte=75)),
-        )
-
-        regs_por_curso = list(
-            registros_confirmados_qs.values(
-                'inscripcion__comision__fk_id_curso_id',
-            ).annotate(
-                rango_0_49=Count('id', filter=Q(porcentaje_asistencia__lt=50)),
-                rango_50_74=Count('id', filter=Q(porcentaje_asistencia__gte=50, porcentaje_asistencia__lt=75)),
-                rango_75_100=Count('id', filter=Q(porcentaje_asistencia__gte=75)),
-            )
-        )
-
-        regs_por_comision = list(
-            registros_confirmados_qs.values(
-                'inscripcion__comision_id',
-            ).annotate(
-                rango_0_49=Count('id', filter=Q(porcentaje_asistencia__lt=50)),
-                rango_50_74=Count('id', filter=Q(porcentaje_asistencia__gte=50, porcentaje_asistencia__lt=75)),
-                rango_75_100=Count('id', filter=Q(porcentaje_asistencia__gte=75)),
-            )
-        )
-
-        regs_por_curso_map = {
-            row.get('inscripcion__comision__fk_id_curso_id'): row
-            for row in regs_por_curso
-            if row.get('inscripcion__comision__fk_id_curso_id') is not None
-        }
-        regs_por_comision_map = {
-            row.get('inscripcion__comision_id'): row
-            for row in regs_por_comision
-            if row.get('inscripcion__comision_id') is not None
+    def _rangos(valores):
+        return {
+            'total_inscripciones': int(valores['total_confirmados']),
+            'sin_registro': int(max(valores['total_confirmados'] - valores['registros_asistencia'], 0)),
+            'rango_0_49': int(valores['asistencia_0_49']),
+            'rango_50_74': int(valores['asistencia_50_74']),
+            'rango_75_100': int(valores['asistencia_75_100']),
         }
-    except Exception:
-        pass
 
-    insc_por_curso = list(
-        inscripciones_confirmadas_qs.values(
-            'comision__fk_id_curso_id',
-            'comision__fk_id_curso__nombre',
-        ).annotate(total_inscripciones=Count('id')).order_by('comision__fk_id_curso__nombre')
-    )
-
-    insc_por_comision = list(
-        inscripciones_confirmadas_qs.values(
-            'comision_id',
-            'comision__fk_id_curso_id',
-        ).annotate(total_inscripciones=Count('id'))
-    )
+    filas_con_confirmados = [fila for fila in filas if fila.total_confirmados]
+    filas_por_curso = {}
+    for fila in filas_con_confirmados:
+        filas_por_curso.setdefault(fila.curso_id, []).append(fila)
 
     por_curso = {}
     cursos_opciones = []
-    for row in insc_por_curso:
-        curso_id = row.get('comision__fk_id_curso_id')
-        nombre = row.get('comision__fk_id_curso__nombre') or ''
-        total_insc = int(row.get('total_inscripciones') or 0)
-
-        regs = regs_por_curso_map.get(curso_id, {})
-        r0 = int(regs.get('rango_0_49') or 0)
-        r1 = int(regs.get('rango_50_74') or 0)
-        r2 = int(regs.get('rango_75_100') or 0)
-        total_regs = r0 + r1 + r2
-
-        por_curso[str(curso_id)] = {
-            'total_inscripciones': total_insc,
-            'sin_registro': max(total_insc - total_regs, 0),
-            'rango_0_49': r0,
-            'rango_50_74': r1,
-            'rango_75_100': r2,
-        }
-        if curso_id is not None:
-            cursos_opciones.append({'id': int(curso_id), 'nombre': nombre})
+    for curso_id, filas_curso in filas_por_curso.items():
+        por_curso[str(curso_id)] = _rangos(_sumar(campos_asistencia, filas_curso))
+        cursos_opciones.append({'id': int(curso_id), 'nombre': filas_curso[0].curso.nombre or ''})
 
     por_comision = {}
-    comision_ids = []
-    for row in insc_por_comision:
-        comision_id = row.get('comision_id')
-        curso_id = row.get('comision__fk_id_curso_id')
-        total_insc = int(row.get('total_inscripciones') or 0)
-
-        regs = regs_por_comision_map.get(comision_id, {})
-        r0 = int(regs.get('rango_0_49') or 0)
-        r1 = int(regs.get('rango_50_74') or 0)
-        r2 = int(regs.get('rango_75_100') or 0)
-        total_regs = r0 + r1 + r2
-
-        por_comision[str(comision_id)] = {
-            'curso_id': int(curso_id) if curso_id is not None else None,
-            'total_inscripciones': total_insc,
-            'sin_registro': max(total_insc - total_regs, 0),
-            'rango_0_49': r0,
-            'rango_50_74': r1,
-            'rango_75_100': r2,
-        }
-
-        if comision_id is not None:
-            comision_ids.append(int(comision_id))
-
     comisiones_opciones = []
-    if comision_ids:
-        comisiones_qs = Comision.objects.filter(
-            id_comision__in=comision_ids,
-        ).select_related('fk_id_curso', 'fk_id_polo').order_by('fk_id_curso__nombre', 'id_comision')
-
-        for comision in comisiones_qs:
-            curso = getattr(comision, 'fk_id_curso', None)
-            polo = getattr(comision, 'fk_id_polo', None)
-            curso_nombre = getattr(curso, 'nombre', '') or ''
-            ciudad = getattr(polo, 'ciudad', '') or ''
-
-            label = f"{curso_nombre} - Comisión #{comision.id_comision}"
-            if ciudad:
-                label = f"{label} ({ciudad})"
-
-            comisiones_opciones.append({
-                'id': int(comision.id_comision),
-                'curso_id': int(getattr(curso, 'id_curso', None) or 0),
-                'label': label,
-            })
+    for fila in filas_con_confirmados:
+        por_comision[str(fila.comision_id)] = dict(
+            _rangos(_sumar(campos_asistencia, [fila])),
+            curso_id=int(fila.curso_id),
+        )
+
+        label = f"{fila.curso.nombre or ''} - Comisión #{fila.comision_id}"
+        ciudad = getattr(fila.polo, 'ciudad', '') or ''
+        if ciudad:
+            label = f"{label} ({ciudad})"
+        comisiones_opciones.append({
+            'id': int(fila.comision_id),
+            'curso_id': int(fila.curso_id),
+            'label': label,
+        })
 
     asistencia_rangos = {
-        'global': {
-            'total_inscripciones': int(total_inscripciones),
-            'sin_registro': int(max(total_inscripciones - total_registros_asistencia, 0)),
-            'rango_0_49': int(rangos_global.get('rango_0_49') or 0),
-            'rango_50_74': int(rangos_global.get('rango_50_74') or 0),
-            'rango_75_100': int(rangos_global.get('rango_75_100') or 0),
-        },
+        'global': _rangos(totales),
         'por_curso': por_curso,
         'por_comision': por_comision,
         'cursos': cursos_opciones,
         'comisiones': comisiones_opciones,
     }
 
-    def nuevo_contador_edad():
-        return {
-            'menor_6': 0,
-            'rango_6_9': 0,
-            'rango_10_12': 0,
-            'rango_13_16': 0,
-            'rango_17_18': 0,
-            'rango_19_24': 0,
-            'rango_25_34': 0,
-            'rango_35_plus': 0,
-            'no_informada': 0,
-        }
-
-    edad_global = nuevo_contador_edad()
-    edad_por_curso = {}
-    edad_por_comision = {}
-
-    hoy = dt_date.today()
-    filas_edad = inscripciones_confirmadas_qs.values_list(
-        'estudiante__usuario__persona__fecha_nacimiento',
-        'comision__fk_id_curso_id',
-        'comision_id',
-    )
-
-    for fecha_nac, curso_id, comision_id in filas_edad:
-        if not fecha_nac:
-            bucket = 'no_informada'
-        else:
-            edad = hoy.year - fecha_nac.year - ((hoy.month, hoy.day) < (fecha_nac.month, fecha_nac.day))
-            if edad < 6:
-                bucket = 'menor_6'
-            elif edad <= 9:
-                bucket = 'rango_6_9'
-            elif edad <= 12:
-                bucket = 'rango_10_12'
-            elif edad <= 16:
-                bucket = 'rango_13_16'
-            elif edad <= 18:
-                bucket = 'rango_17_18'
-            elif edad <= 24:
-                bucket = 'rango_19_24'
-            elif edad <= 34:
-                bucket = 'rango_25_34'
-            else:
-                bucket = 'rango_35_plus'
-
-        edad_global[bucket] = int(edad_global.get(bucket) or 0) + 1
-
-        if curso_id is not None:
-            key_curso = str(curso_id)
-            if key_curso not in edad_por_curso:
-                edad_por_curso[key_curso] = nuevo_contador_edad()
-            edad_por_curso[key_curso][bucket] = int(edad_por_curso[key_curso].get(bucket) or 0) + 1
-
-        if comision_id is not None:
-            key_comision = str(comision_id)
-            if key_comision not in edad_por_comision:
-                edad_por_comision[key_comision] = nuevo_contador_edad()
-            edad_por_comision[key_comision][bucket] = int(edad_por_comision[key_comision].get(bucket) or 0) + 1
+    # --- 4. Rangos etarios ---
+    def _edades(filas_a_sumar):
+        return {clave: int(sum(getattr(fila, clave) or 0 for fila in filas_a_sumar)) for clave in CLAVES_EDAD}
 
     edad_rangos = {
-        'global': edad_global,
-        'por_curso': edad_por_curso,
-        'por_comision': edad_por_comision,
+        'global': _edades(filas),
+        'por_curso': {str(curso_id): _edades(filas_curso) for curso_id, filas_curso in filas_por_curso.items()},
+        'por_comision': {str(fila.comision_id): _edades([fila]) for fila in filas_con_confirmados},
         'cursos': cursos_opciones,
         'comisiones': comisiones_opciones,
     }
 
     # Estado Inscripciones
-    insc_estado_filter = Q()
-    if fecha_desde:
-        insc_estado_filter &= Q(comision__fecha_inicio__gte=fecha_desde)
-    if fecha_hasta:
-        insc_estado_filter &= Q(comision__fecha_inicio__lte=fecha_hasta)
-    
-    inscripciones_estado_raw = list(
-        Inscripcion.objects.filter(insc_estado_filter).values('estado').annotate(total=Count('id')).order_by('estado')
-    )
+    totales_estado = _sumar(CAMPOS_ESTADO.values(), filas)
+    inscripciones_estado_raw = [
+        {'estado': estado, 'total': totales_estado[CAMPOS_ESTADO[estado]]}
+        for estado in sorted(CAMPOS_ESTADO)
+        if totales_estado[CAMPOS_ESTADO[estado]]
+    ]
 
     # ESTIMACIÓN DE ELIMINADOS FÍSICOS (Solicitado por usuario)
     # Calculamos la diferencia entre el ID máximo y la cantidad de registros
     # para estimar cuántos registros fueron borrados físicamente.
-    max_id = Inscripcion.objects.aggregate(m=Max('id'))['m'] or 0
-    total_reales = Inscripcion.objects.count()
-    eliminados_estimados = max(0, max_id - total_reales)
+    totales_ids = Inscripcion.objects.aggregate(m=Max('id'), total=Count('id'))
+    eliminados_estimados = max(0, (totales_ids['m'] or 0) - totales_ids['total'])
 
     if eliminados_estimados > 0:
         found_cancelada = False
@@ -1297,46 +901,20 @@ def estadisticas_detalladas(request):
         for row in inscripciones_estado_raw
     ]
 
-    # Generos (filtrado manual para evitar subquery compleja)
-    estudiantes_filter = Q(inscripciones__estado='confirmado')
-    if fecha_desde:
-        estudiantes_filter &= Q(inscripciones__comision__fecha_inicio__gte=fecha_desde)
-    if fecha_hasta:
-        estudiantes_filter &= Q(inscripciones__comision__fecha_inicio__lte=fecha_hasta)
-
-    generos_raw = list(
-        Estudiante.objects.filter(estudiantes_filter).values('usuario__persona__genero').annotate(
-            total=Count('id'),
-        )
-    )
-
+    # Generos
     etiquetas_genero = {
         'M': 'Masculino',
         'F': 'Femenino',
         'O': 'Otro',
         'P': 'Prefiero no decirlo',
     }
-
-    genero_orden = ['M', 'F', 'O', 'P']
-    genero_contadores = {k: 0 for k in genero_orden}
-    sin_dato = 0
-
-    for row in generos_raw:
-        key = row.get('usuario__persona__genero')
-        total = int(row.get('total') or 0)
-        if not key:
-            sin_dato += total
-            continue
-        if key in genero_contadores:
-            genero_contadores[key] += total
-        else:
-            sin_dato += total
+    totales_genero = _sumar([campo for _, campo in GENEROS] + ['genero_sin_dato'], filas)
 
     datos_genero = []
-    for key in genero_orden:
-        datos_genero.append({'nombre': etiquetas_genero.get(key, key), 'cantidad': int(genero_contadores.get(key) or 0)})
-    if sin_dato:
-        datos_genero.append({'nombre': 'Sin dato', 'cantidad': int(sin_dato)})
+    for key, campo in GENEROS:
+        datos_genero.append({'nombre': etiquetas_genero.get(key, key), 'cantidad': int(totales_genero[campo])})
+    if totales_genero['genero_sin_dato']:
+        datos_genero.append({'nombre': 'Sin dato', 'cantidad': int(totales_genero['genero_sin_dato'])})
 
     from datetime import timedelta as dt_timedelta
     import re
@@ -1377,16 +955,15 @@ def estadisticas_detalladas(request):
         inicio_series = hoy - dt_timedelta(days=7 * semanas_atras)
 
         filas_asistencia = list(
-            Asistencia.objects.filter(
-                fecha_clase__gte=inicio_series,
-                inscripcion__estado__in=['confirmado', 'aprobada'],
+            ResumenAsistenciaComision.objects.filter(
+                fecha__gte=inicio_series,
             ).values(
-                'fecha_clase',
-                'inscripcion__comision__fk_id_polo__ciudad',
+                'fecha',
+                'comision__fk_id_polo__ciudad',
             ).annotate(
-                presentes=Count('pk', filter=Q(presente=True)),
-                total=Count('pk'),
-            ).order_by('fecha_clase')
+                presentes=Sum('presentes'),
+                total=Sum('inscritos'),
+            ).order_by('fecha')
         )
 
         semanas_set = set()
@@ -1394,11 +971,11 @@ def estadisticas_detalladas(request):
         acumulado_semanal = {}
 
         for row in filas_asistencia:
-            fecha = row.get('fecha_clase')
+            fecha = row.get('fecha')
             if not fecha:
                 continue
             semana_inicio = fecha - dt_timedelta(days=fecha.weekday())
-            polo_ciudad = row.get('inscripcion__comision__fk_id_polo__ciudad') or 'Sin polo'
+            polo_ciudad = row.get('comision__fk_id_polo__ciudad') or 'Sin polo'
             key = (polo_ciudad, semana_inicio)
 
             presentes = int(row.get('presentes') or 0)
@@ -1430,20 +1007,15 @@ def estadisticas_detalladas(request):
             ],
         }
 
-        estados_no_demanda = ['cancelada', 'rechazada']
-
         comisiones_stats = Comision.objects.select_related('fk_id_curso', 'fk_id_polo').annotate(
-            confirmados_count=Count('inscripciones', filter=Q(inscripciones__estado__in=['confirmado', 'aprobada']), distinct=True),
-            demanda_count=Count('inscripciones', filter=~Q(inscripciones__estado__in=estados_no_demanda), distinct=True),
-            asistencia_promedio=Avg(
-                'inscripciones__registro_asistencia__porcentaje_asistencia',
-                filter=Q(inscripciones__estado__in=['confirmado', 'aprobada']),
-            ),
-            registros_count=Count(
-                'inscripciones__registro_asistencia',
-                filter=Q(inscripciones__estado__in=['confirmado', 'aprobada']),
-                distinct=True,
+            confirmados_count=F('estadistica__total_confirmados'),
+            demanda_count=(
+                F('estadistica__total_pre_inscriptos')
+                + F('estadistica__total_confirmados')
+                + F('estadistica__total_lista_espera')
             ),
+            registros_count=F('estadistica__registros_asistencia'),
+            asistencia_suma=F('estadistica__suma_porcentaje_asistencia'),
         )
 
         puntos_ocupacion_asistencia = []
@@ -1460,8 +1032,10 @@ def estadisticas_detalladas(request):
 
             ocupacion_pct = round((confirmados / cupo) * 100, 1) if cupo else 0
 
-            asistencia_avg = getattr(com, 'asistencia_promedio', None)
-            asistencia_pct = round(float(asistencia_avg), 1) if asistencia_avg is not None else None
+            registros_count = int(getattr(com, 'registros_count', 0) or 0)
+            asistencia_pct = None
+            if registros_count:
+                asistencia_pct = round(float(com.asistencia_suma or 0) / registros_count, 1)
 
             polo = getattr(com, 'fk_id_polo', None)
             curso = getattr(com, 'fk_id_curso', None)
@@ -1490,7 +1064,7 @@ def estadisticas_detalladas(request):
                 'demanda': demanda,
                 'ocupacion_pct': ocupacion_pct,
                 'asistencia_pct': asistencia_pct,
-                'registros_asistencia': int(getattr(com, 'registros_count', 0) or 0),
+                'registros_asistencia': registros_count,
             })
 
         agregados = {}
@@ -1539,6 +1113,7 @@ def estadisticas_detalladas(request):
     context = {
         'fecha_desde': fecha_desde_raw,
         'fecha_hasta': fecha_hasta_raw,
+        'estadisticas_desactualizadas': estadisticas_desactualizadas,
         'total_cursos': total_cursos,
         'total_estudiantes': total_estudiantes,
         'total_inscripciones': total_inscripciones,
@@ -1572,17 +1147,18 @@ def api_buscar_estudiantes(request):
         return JsonResponse({'estudiantes': []})
     
     # Buscar estudiantes
-    estudiantes = Estudiante.objects.filter(
-        Q(usuario__persona__nombre__icontains=query) |
-        Q(usuario__persona__apellido__icontains=query) |
-        Q(usuario__persona__dni__icontains=query) |
-        Q(usuario__persona__correo__icontains=query)
-    ).select_related('usuario__persona')[:20]  # Limitar a 20 resultados
+    estudiantes = buscar_personas(
+        Estudiante.objects.select_related('usuario__persona').annotate(
+            total_confirmadas=Count('inscripciones', filter=Q(inscripciones__estado='confirmado')),
+        ),
+        query,
+        'usuario__persona',
+    )[:20]  # Limitar a 20 resultados
     
     resultados = []
     for est in estudiantes:
         persona = est.usuario.persona
-        total_insc = Inscripcion.objects.filter(estudiante=est, estado='confirmado').count()
+        total_insc = est.total_confirmadas
         
         resultados.append({
             'dni': persona.dni,
@@ -1702,30 +1278,6 @@ def gestion_usuarios(request):
     """Panel de gestión completa de usuarios con buscador"""
     from django.http import JsonResponse
     
-    # Función auxiliar para obtener roles de una persona
-    def obtener_roles(persona, usuario=None):
-        roles_list = []
-        if usuario:
-            # Verificar Estudiante
-            if Estudiante.objects.filter(usuario=usuario).exists():
-                roles_list.append('Estudiante')
-            # Verificar Empresa
-            if (
-                UsuarioRol.objects.filter(usuario_id=usuario, rol_id__nombre='Empresa').exists()
-                or hasattr(usuario, 'empresa')
-            ):
-                roles_list.append('Empresa')
-            # Verificar Administrador
-            if UsuarioRol.objects.filter(usuario_id=usuario, rol_id__nombre='Administrador').exists():
-                roles_list.append('Administrador')
-            # Verificar Mesa de Entrada
-            if UsuarioRol.objects.filter(usuario_id=usuario, rol_id__nombre='Mesa de Entrada').exists():
-                roles_list.append('Mesa de Entrada')
-        # Verificar Docente (usa id_persona directamente)
-        if Docente.objects.filter(id_persona=persona).exists():
-            roles_list.append('Docente')
-        return ', '.join(roles_list) if roles_list else 'Sin rol'
-    
     ciudad_mesa_entrada = get_mesa_entrada_ciudad(request.user)
 
     def aplicar_filtro_ciudad(qs):
@@ -1749,20 +1301,13 @@ def gestion_usuarios(request):
         personas_qs = Persona.objects.filter(usuario__isnull=False).distinct()
         personas_qs = aplicar_filtro_ciudad(personas_qs)
 
-        personas_qs = personas_qs.filter(
-            Q(nombre__icontains=query) |
-            Q(apellido__icontains=query) |
-            Q(dni__icontains=query) |
-            Q(correo__icontains=query)
-        ).prefetch_related('usuario_set')[:50]
+        # Roles anotados en la misma consulta (sobre el primer usuario de cada persona)
+        personas_qs = anotar_roles(buscar_personas(personas_qs, query))[:50]
 
         resultados = []
         for persona in personas_qs:
-            # Obtener el primer usuario asociado (puede haber varios)
-            usuario = persona.usuario_set.first()
-
-            if usuario:
-                roles = obtener_roles(persona, usuario)
+            if persona.usuario_pk:
+                roles = texto_roles(persona)
                 resultados.append({
                     'id': persona.id,
                     'dni': persona.dni,
@@ -1780,23 +1325,20 @@ def gestion_usuarios(request):
     # Vista normal - Mostrar usuarios paginados al cargar
     from django.core.paginator import Paginator
 
-    personas_qs = Persona.objects.filter(usuario__isnull=False).distinct().prefetch_related('usuario_set').order_by('apellido', 'nombre')
+    personas_qs = Persona.objects.filter(usuario__isnull=False).distinct().order_by('apellido', 'nombre')
     personas_qs = aplicar_filtro_ciudad(personas_qs)
     total_usuarios = personas_qs.count()
 
-    paginator = Paginator(personas_qs, 50)
+    paginator = Paginator(anotar_roles(personas_qs), 50)
     page_obj = paginator.get_page(request.GET.get('page'))
 
     usuarios_list = []
     for persona in page_obj.object_list:
-        usuario = persona.usuario_set.first()
-
-        if usuario:
-            roles = obtener_roles(persona, usuario)
+        if persona.usuario_pk:
             usuarios_list.append({
                 'persona': persona,
-                'usuario': usuario,
-                'roles': roles,
+                'usuario_id': persona.usuario_pk,
+                'roles': texto_roles(persona),
             })
 
     context = {
@@ -2065,98 +1607,10 @@ def eliminar_usuario_admin(request, persona_id):
 
 @login_required
 @user_passes_test(es_admin_completo)
+@usar_replica
 def exportar_usuarios_excel(request):
     """Exportar usuarios a Excel"""
-    # Crear workbook y worksheet
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Usuarios del Sistema"
-    
-    # Estilos para el encabezado
-    header_fill = PatternFill(start_color="6366f1", end_color="6366f1", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    
-    # Encabezados
-    headers = ['DNI', 'Nombre', 'Apellido', 'Email', 'Teléfono', 'Fecha Nacimiento', 
-               'Edad', 'Género', 'Ciudad', 'Roles', 'Estado']
-    
-    # Escribir encabezados con estilo
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-    
-    # Ajustar ancho de columnas
-    column_widths = [15, 20, 20, 30, 15, 15, 8, 10, 15, 25, 12]
-    for col_num, width in enumerate(column_widths, 1):
-        ws.column_dimensions[get_column_letter(col_num)].width = width
-    
-    # Función auxiliar para obtener roles
-    def obtener_roles(persona, usuario=None):
-        roles_list = []
-        if usuario:
-            if Estudiante.objects.filter(usuario=usuario).exists():
-                roles_list.append('Estudiante')
-            if (
-                UsuarioRol.objects.filter(usuario_id=usuario, rol_id__nombre='Empresa').exists()
-                or hasattr(usuario, 'empresa')
-            ):
-                roles_list.append('Empresa')
-            if UsuarioRol.objects.filter(usuario_id=usuario, rol_id__nombre='Administrador').exists():
-                roles_list.append('Administrador')
-            if UsuarioRol.objects.filter(usuario_id=usuario, rol_id__nombre='Mesa de Entrada').exists():
-                roles_list.append('Mesa de Entrada')
-        if Docente.objects.filter(id_persona=persona).exists():
-            roles_list.append('Docente')
-        return ', '.join(roles_list) if roles_list else 'Sin rol'
-    
-    # Obtener todos los usuarios
-    personas = Persona.objects.filter(usuario__isnull=False).distinct().prefetch_related('usuario_set').order_by('apellido', 'nombre')
-    
-    # Escribir datos
-    row_num = 2
-    for persona in personas:
-        usuario = persona.usuario_set.first()
-        if usuario:
-            roles = obtener_roles(persona, usuario)
-            
-            # Datos de la fila
-            row_data = [
-                persona.dni,
-                persona.nombre,
-                persona.apellido,
-                persona.correo,
-                persona.telefono or '',
-                persona.fecha_nacimiento.strftime('%d/%m/%Y') if persona.fecha_nacimiento else '',
-                persona.edad if persona.edad else '',
-                persona.get_genero_display() if persona.genero else '',
-                persona.ciudad_residencia or '',
-                roles,
-                'Activo' if usuario.activo else 'Inactivo'
-            ]
-            
-            # Escribir fila
-            for col_num, value in enumerate(row_data, 1):
-                cell = ws.cell(row=row_num, column=col_num, value=value)
-                # Alternar color de fondo para mejor legibilidad
-                if row_num % 2 == 0:
-                    cell.fill = PatternFill(start_color="f8fafc", end_color="f8fafc", fill_type="solid")
-            
-            row_num += 1
-    
-    # Crear respuesta HTTP
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    filename = f"usuarios_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    # Guardar workbook en la respuesta
-    wb.save(response)
-    
-    return response
+    return reportes.descargar(request, 'usuarios')
 
 
 @login_required
@@ -2164,20 +1618,9 @@ def exportar_usuarios_excel(request):
 def panel_asistencia(request):
     """Panel para seleccionar curso/comisión y ver asistencias"""
     # Verificar si es docente (para filtrar solo sus comisiones)
-    es_docente = False
-    usuario_actual = None
-    comisiones_docente = []
-    
-    try:
-        usuario_actual = Usuario.objects.get(persona__dni=request.user.username)
-        if Docente.objects.filter(id_persona=usuario_actual.persona).exists():
-            es_docente = True
-            from apps.modulo_3.cursos.models import ComisionDocente
-            comisiones_docente = ComisionDocente.objects.filter(
-                fk_id_docente=usuario_actual
-            ).values_list('fk_id_comision_id', flat=True)
-    except Usuario.DoesNotExist:
-        pass
+    perfil = obtener_perfil(request.user)
+    es_docente = perfil.es_docente
+    comisiones_docente = perfil.comisiones_docente if es_docente else ()
     
     # Obtener todas las comisiones
     # Si es docente, solo mostrar sus comisiones asignadas
@@ -2210,13 +1653,8 @@ def panel_asistencia(request):
         
         # Verificar permisos si es docente
         if es_docente:
-             # Verificar que el docente tenga acceso a esta comisión
-            from apps.modulo_3.cursos.models import ComisionDocente
-            tiene_acceso = ComisionDocente.objects.filter(
-                fk_id_docente=usuario_actual,
-                fk_id_comision=comision
-            ).exists()
-            if not tiene_acceso:
+            # Verificar que el docente tenga acceso a esta comisión
+            if comision.id_comision not in comisiones_docente:
                 messages.error(request, '❌ No tienes permiso para ver esta comisión.')
                 return redirect('administracion:panel_asistencia')
         
@@ -2253,29 +1691,21 @@ def panel_asistencia(request):
                 if not nombre_registrador:
                     nombre_registrador = usuario_registro.username
         
-                count_created = 0
-                count_updated = 0
-        
                 try:
-                    with transaction.atomic():
-                        for inscripcion in inscripciones:
-                            presente = request.POST.get(f'presente_{inscripcion.id}') == 'on'
-                            observacion = request.POST.get(f'observacion_{inscripcion.id}', '').strip()
-                            
-                            asistencia, created = Asistencia.objects.update_or_create(
-                                inscripcion=inscripcion,
-                                fecha_clase=fecha_clase,
-                                defaults={
-                                    'presente': presente,
-                                    'observaciones': observacion,
-                                    'registrado_por': nombre_registrador
-                                }
-                            )
-                            
-                            if created:
-                                count_created += 1
-                            else:
-                                count_updated += 1
+                    toma = [
+                        (
+                            inscripcion_id,
+                            request.POST.get(f'presente_{inscripcion_id}') == 'on',
+                            request.POST.get(f'observacion_{inscripcion_id}', '').strip(),
+                        )
+                        for inscripcion_id in inscripciones.values_list('id', flat=True)
+                    ]
+                    count_created, count_updated = guardar_toma_asistencia(
+                        comision,
+                        toma,
+                        fecha_clase,
+                        registrado_por=nombre_registrador,
+                    )
                     
                     messages.success(request, f'✅ Asistencia guardada para el {fecha_clase}. Registros procesados: {count_created + count_updated}.')
                     # Redirigir para limpiar POST
@@ -2295,9 +1725,7 @@ def panel_asistencia(request):
             asistencias_existentes[a.inscripcion_id] = a
 
         # Obtener todas las fechas de clases únicas para esta comisión (para el historial)
-        fechas_clases = list(Asistencia.objects.filter(
-            inscripcion__comision=comision
-        ).values_list('fecha_clase', flat=True).distinct().order_by('-fecha_clase'))
+        fechas_clases = fechas_con_asistencia(comision)
 
         asistencias_historial = Asistencia.objects.filter(
             inscripcion__in=inscripciones,
@@ -2328,22 +1756,12 @@ def crear_editar_asistencia(request, inscripcion_id):
     inscripcion = get_object_or_404(Inscripcion, id=inscripcion_id, estado='confirmado')
     
     # Verificar si es docente
-    es_docente = False
-    try:
-        usuario_actual = Usuario.objects.get(persona__dni=request.user.username)
-        if Docente.objects.filter(id_persona=usuario_actual.persona).exists():
-            es_docente = True
-            # Verificar que el docente tenga acceso a esta comisión
-            from apps.modulo_3.cursos.models import ComisionDocente
-            tiene_acceso = ComisionDocente.objects.filter(
-                fk_id_docente=usuario_actual,
-                fk_id_comision=inscripcion.comision
-            ).exists()
-            if not tiene_acceso:
-                messages.error(request, '❌ No tienes permiso para gestionar asistencias de esta comisión.')
-                return redirect('administracion:panel_asistencia')
-    except Usuario.DoesNotExist:
-        pass
+    perfil = obtener_perfil(request.user)
+    es_docente = perfil.es_docente
+    if es_docente and inscripcion.comision_id not in perfil.comisiones_docente:
+        # Verificar que el docente tenga acceso a esta comisión
+        messages.error(request, '❌ No tienes permiso para gestionar asistencias de esta comisión.')
+        return redirect('administracion:panel_asistencia')
     
     if request.method == 'POST':
         try:
@@ -2413,22 +1831,12 @@ def eliminar_asistencia(request, asistencia_id):
     inscripcion = asistencia.inscripcion  # Guardar referencia antes de eliminar
     
     # Verificar si es docente
-    es_docente = False
-    try:
-        usuario_actual = Usuario.objects.get(persona__dni=request.user.username)
-        if Docente.objects.filter(id_persona=usuario_actual.persona).exists():
-            es_docente = True
-            # Verificar que el docente tenga acceso a esta comisión
-            from apps.modulo_3.cursos.models import ComisionDocente
-            tiene_acceso = ComisionDocente.objects.filter(
-                fk_id_docente=usuario_actual,
-                fk_id_comision=inscripcion.comision
-            ).exists()
-            if not tiene_acceso:
-                messages.error(request, '❌ No tienes permiso para eliminar asistencias de esta comisión.')
-                return redirect('administracion:panel_asistencia')
-    except Usuario.DoesNotExist:
-        pass
+    perfil = obtener_perfil(request.user)
+    es_docente = perfil.es_docente
+    if es_docente and inscripcion.comision_id not in perfil.comisiones_docente:
+        # Verificar que el docente tenga acceso a esta comisión
+        messages.error(request, '❌ No tienes permiso para eliminar asistencias de esta comisión.')
+        return redirect('administracion:panel_asistencia')
     
     if request.method == 'POST':
         try:
@@ -2450,294 +1858,34 @@ def eliminar_asistencia(request, asistencia_id):
 
 @login_required
 @user_passes_test(es_admin)
+@usar_replica
 def exportar_estadisticas_estudiantes_curso(request):
     """Exportar estadísticas de estudiantes por curso a Excel"""
-    from apps.modulo_4.asistencia.models import RegistroAsistencia
-    from django.db.models import Avg
-    
-    # Crear workbook
-    wb = Workbook()
-    
-    # Hoja 1: Resumen por Curso
-    ws1 = wb.active
-    ws1.title = "Estudiantes por Curso"
-    
-    # Estilos
-    header_fill = PatternFill(start_color="6366f1", end_color="6366f1", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    
-    # Encabezados
-    headers = ['Curso', 'Total Alumnos', 'Completados', 'En Proceso', '% Completados']
-    for col_num, header in enumerate(headers, 1):
-        cell = ws1.cell(row=1, column=col_num, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-    
-    # Ajustar ancho de columnas
-    column_widths = [40, 15, 15, 15, 15]
-    for col_num, width in enumerate(column_widths, 1):
-        ws1.column_dimensions[get_column_letter(col_num)].width = width
-    
-    # Obtener cursos con estadísticas
-    cursos_con_alumnos = Curso.objects.annotate(
-        total_alumnos=Count('comision__inscripciones', filter=Q(comision__inscripciones__estado='confirmado'))
-    ).filter(total_alumnos__gt=0).order_by('-total_alumnos')
-    
-    # Escribir datos
-    row_num = 2
-    for curso in cursos_con_alumnos:
-        # Obtener inscripciones del curso
-        inscripciones_curso = Inscripcion.objects.filter(
-            comision__fk_id_curso=curso,
-            estado='confirmado'
-        )
-        
-        # Contar completados (con RegistroAsistencia que cumple requisito)
-        completados = RegistroAsistencia.objects.filter(
-            inscripcion__in=inscripciones_curso,
-            cumple_requisito_certificado=True
-        ).count()
-        
-        en_proceso = inscripciones_curso.count() - completados
-        porcentaje = (completados / curso.total_alumnos * 100) if curso.total_alumnos > 0 else 0
-        
-        row_data = [
-            curso.nombre,
-            curso.total_alumnos,
-            completados,
-            en_proceso,
-            f"{porcentaje:.2f}%"
-        ]
-        
-        for col_num, value in enumerate(row_data, 1):
-            cell = ws1.cell(row=row_num, column=col_num, value=value)
-            if row_num % 2 == 0:
-                cell.fill = PatternFill(start_color="f8fafc", end_color="f8fafc", fill_type="solid")
-        
-        row_num += 1
-    
-    # Hoja 2: Detalle de Estudiantes por Curso
-    ws2 = wb.create_sheet("Detalle Estudiantes")
-    
-    headers_detalle = ['Curso', 'Comisión', 'Estudiante', 'DNI', 'Estado', '% Asistencia']
-    for col_num, header in enumerate(headers_detalle, 1):
-        cell = ws2.cell(row=1, column=col_num, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-    
-    column_widths_detalle = [30, 10, 30, 15, 15, 15]
-    for col_num, width in enumerate(column_widths_detalle, 1):
-        ws2.column_dimensions[get_column_letter(col_num)].width = width
-    
-    row_num = 2
-    for curso in cursos_con_alumnos:
-        inscripciones_curso = Inscripcion.objects.filter(
-            comision__fk_id_curso=curso,
-            estado='confirmado'
-        ).select_related('estudiante__usuario__persona', 'comision')
-        
-        for inscripcion in inscripciones_curso:
-            registro = RegistroAsistencia.objects.filter(inscripcion=inscripcion).first()
-            estado = "Completado" if registro and registro.cumple_requisito_certificado else "En Proceso"
-            porcentaje_asist = registro.porcentaje_asistencia if registro else 0
-            
-            row_data = [
-                curso.nombre,
-                inscripcion.comision.id_comision,
-                inscripcion.estudiante.usuario.persona.nombre_completo,
-                inscripcion.estudiante.usuario.persona.dni,
-                estado,
-                f"{porcentaje_asist:.2f}%"
-            ]
-            
-            for col_num, value in enumerate(row_data, 1):
-                cell = ws2.cell(row=row_num, column=col_num, value=value)
-                if row_num % 2 == 0:
-                    cell.fill = PatternFill(start_color="f8fafc", end_color="f8fafc", fill_type="solid")
-            
-            row_num += 1
-    
-    # Crear respuesta
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    filename = f"estadisticas_estudiantes_curso_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    wb.save(response)
-    return response
+    return reportes.descargar(request, 'estadisticas_estudiantes_curso')
 
 
 @login_required
 @user_passes_test(es_admin)
+@usar_replica
 def exportar_asistencias_por_curso(request):
     """Exportar asistencias agrupadas por curso a Excel"""
-    curso_id = request.GET.get('curso_id')
-    
-    if not curso_id:
-        messages.error(request, '❌ Por favor, selecciona un curso.')
+    try:
+        return reportes.descargar(request, 'asistencias_curso')
+    except reportes.ParametrosInvalidos as e:
+        messages.error(request, str(e))
         return redirect('administracion:panel_asistencia')
-    
-    curso = get_object_or_404(Curso, id_curso=curso_id)
-    
-    # Obtener todas las comisiones del curso
-    comisiones = Comision.objects.filter(
-        fk_id_curso=curso,
-        inscripciones__estado='confirmado'
-    ).distinct()
-    
-    # Crear workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = _safe_xlsx_title(f"Asistencias - {curso.nombre}")
-    
-    # Estilos
-    header_fill = PatternFill(start_color="6366f1", end_color="6366f1", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    
-    # Encabezados
-    headers = ['Comisión', 'Estudiante', 'DNI', 'Fecha Clase', 'Presente', 'Observaciones', 'Registrado por']
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-    
-    # Ajustar ancho de columnas
-    column_widths = [12, 30, 15, 15, 10, 30, 20]
-    for col_num, width in enumerate(column_widths, 1):
-        ws.column_dimensions[get_column_letter(col_num)].width = width
-    
-    # Escribir datos
-    row_num = 2
-    for comision in comisiones:
-        inscripciones = Inscripcion.objects.filter(
-            comision=comision,
-            estado='confirmado'
-        ).select_related('estudiante__usuario__persona').prefetch_related(
-            Prefetch('asistencias', queryset=Asistencia.objects.order_by('-fecha_clase'))
-        )
-        
-        for inscripcion in inscripciones:
-            asistencias = inscripcion.asistencias.all()
-            
-            for asistencia in asistencias:
-                row_data = [
-                    comision.id_comision,
-                    inscripcion.estudiante.usuario.persona.nombre_completo,
-                    inscripcion.estudiante.usuario.persona.dni,
-                    asistencia.fecha_clase.strftime('%d/%m/%Y'),
-                    'Sí' if asistencia.presente else 'No',
-                    asistencia.observaciones or '',
-                    asistencia.registrado_por or ''
-                ]
-                
-                for col_num, value in enumerate(row_data, 1):
-                    cell = ws.cell(row=row_num, column=col_num, value=value)
-                    if row_num % 2 == 0:
-                        cell.fill = PatternFill(start_color="f8fafc", end_color="f8fafc", fill_type="solid")
-                
-                row_num += 1
-    
-    # Crear respuesta
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    filename = f"asistencias_curso_{_safe_filename_part(curso.nombre, max_len=20)}_{timezone.localtime(timezone.now()).strftime('%Y%m%d_%H%M%S')}.xlsx"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    wb.save(response)
-    return response
 
 
 @login_required
 @user_passes_test(es_admin)
+@usar_replica
 def exportar_asistencias_por_comision(request):
     """Exportar asistencias de una comisión específica a Excel"""
-    comision_id = request.GET.get('comision_id')
-    
-    if not comision_id:
-        messages.error(request, '❌ Por favor, selecciona una comisión.')
+    try:
+        return reportes.descargar(request, 'asistencias_comision')
+    except reportes.ParametrosInvalidos as e:
+        messages.error(request, str(e))
         return redirect('administracion:panel_asistencia')
-    
-    comision = get_object_or_404(Comision, id_comision=comision_id)
-    
-    # Crear workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f"Comisión {comision.id_comision}"
-    
-    # Estilos
-    header_fill = PatternFill(start_color="6366f1", end_color="6366f1", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    
-    # Información de la comisión
-    ws.cell(row=1, column=1, value="Curso:").font = Font(bold=True)
-    ws.cell(row=1, column=2, value=comision.fk_id_curso.nombre)
-    ws.cell(row=2, column=1, value="Comisión:").font = Font(bold=True)
-    ws.cell(row=2, column=2, value=f"#{comision.id_comision}")
-    if comision.fk_id_polo:
-        ws.cell(row=3, column=1, value="Polo:").font = Font(bold=True)
-        ws.cell(row=3, column=2, value=comision.fk_id_polo.nombre)
-    
-    # Encabezados (fila 5)
-    headers = ['Estudiante', 'DNI', 'Fecha Clase', 'Presente', 'Observaciones', 'Registrado por', 'Fecha Registro']
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=5, column=col_num, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-    
-    # Ajustar ancho de columnas
-    column_widths = [30, 15, 15, 10, 30, 20, 20]
-    for col_num, width in enumerate(column_widths, 1):
-        ws.column_dimensions[get_column_letter(col_num)].width = width
-    
-    # Obtener inscripciones y asistencias
-    inscripciones = Inscripcion.objects.filter(
-        comision=comision,
-        estado='confirmado'
-    ).select_related('estudiante__usuario__persona').prefetch_related(
-        Prefetch('asistencias', queryset=Asistencia.objects.order_by('-fecha_clase'))
-    ).order_by('estudiante__usuario__persona__apellido')
-    
-    # Escribir datos
-    row_num = 6
-    for inscripcion in inscripciones:
-        asistencias = inscripcion.asistencias.all()
-        
-        for asistencia in asistencias:
-            row_data = [
-                inscripcion.estudiante.usuario.persona.nombre_completo,
-                inscripcion.estudiante.usuario.persona.dni,
-                asistencia.fecha_clase.strftime('%d/%m/%Y'),
-                'Sí' if asistencia.presente else 'No',
-                asistencia.observaciones or '',
-                asistencia.registrado_por or '',
-                timezone.localtime(asistencia.fecha_registro).strftime('%d/%m/%Y %H:%M') if asistencia.fecha_registro else ''
-            ]
-            
-            for col_num, value in enumerate(row_data, 1):
-                cell = ws.cell(row=row_num, column=col_num, value=value)
-                if row_num % 2 == 0:
-                    cell.fill = PatternFill(start_color="f8fafc", end_color="f8fafc", fill_type="solid")
-            
-            row_num += 1
-    
-    # Crear respuesta
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    filename = f"asistencias_comision_{comision.id_comision}_{timezone.localtime(timezone.now()).strftime('%Y%m%d_%H%M%S')}.xlsx"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    wb.save(response)
-    return response
 
 
 # ==================== VISTAS PARA DOCENTES ====================
@@ -2761,7 +1909,12 @@ def mis_cursos_docente(request):
         # Obtener comisiones asignadas al docente
         comisiones_asignadas = ComisionDocente.objects.filter(
             fk_id_docente=usuario
-        ).select_related('fk_id_comision__fk_id_curso', 'fk_id_comision__fk_id_polo').order_by('fk_id_comision__fk_id_curso__nombre')
+        ).select_related('fk_id_comision__fk_id_curso', 'fk_id_comision__fk_id_polo').annotate(
+            total_estudiantes=Count(
+                'fk_id_comision__inscripciones',
+                filter=Q(fk_id_comision__inscripciones__estado='confirmado'),
+            )
+        ).order_by('fk_id_comision__fk_id_curso__nombre')
         
         # Agrupar por curso
         cursos_dict = {}
@@ -2775,15 +1928,9 @@ def mis_cursos_docente(request):
                     'comisiones': []
                 }
             
-            # Contar estudiantes inscritos
-            total_estudiantes = Inscripcion.objects.filter(
-                comision=comision,
-                estado='confirmado'
-            ).count()
-            
             cursos_dict[curso.id_curso]['comisiones'].append({
                 'comision': comision,
-                'total_estudiantes': total_estudiantes,
+                'total_estudiantes': comision_docente.total_estudiantes,
             })
         
         context = {
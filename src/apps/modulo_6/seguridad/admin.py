@@ -1,3 +1,18 @@
 from django.contrib import admin
 
-# Register your models here.
+from .bandeja import reencolar_fallidos
+from .models import CorreoSaliente
+
+
+@admin.register(CorreoSaliente)
+class CorreoSalienteAdmin(admin.ModelAdmin):
+    list_display = ('id', 'asunto', 'estado', 'intentos', 'creado_el', 'disponible_el', 'enviado_el')
+    list_filter = ('estado',)
+    search_fields = ('asunto', 'destinatarios')
+    readonly_fields = ('lote', 'creado_el', 'tomado_el', 'enviado_el', 'ultimo_error')
+    actions = ['reintentar']
+
+    @admin.action(description='Volver a encolar los correos fallidos')
+    def reintentar(self, request, queryset):
+        cantidad = reencolar_fallidos(queryset)
+        self.message_user(request, f'{cantidad} correos vuelven a la bandeja de salida.')
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class SeguridadConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.modulo_6.seguridad'
\ No newline at end of file
+    name = 'apps.modulo_6.seguridad'
+
+    def ready(self):
+        import apps.modulo_6.seguridad.signals
@@ -1,118 +1,124 @@
+from django.conf import settings
 from django.contrib.auth.backends import BaseBackend
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Subquery
+
 from apps.modulo_1.usuario.models import Usuario, Persona
+from core.replica import lecturas_en_primaria
 
 
-class DNIAuthenticationBackend(BaseBackend):
-    """
-    Backend de autenticación personalizado que usa solo DNI y contraseña
-    """
-    def authenticate(self, request, username=None, password=None, **kwargs):
-        username_raw = (username or '').strip()
-        username_clean = Persona.limpiar_dni(username_raw)
-        try:
-            # Buscar el usuario por DNI (primero crudo, luego limpio)
-            try:
-                usuario = Usuario.objects.get(persona__dni=username_raw)
-            except Usuario.DoesNotExist:
-                if username_clean and username_clean != username_raw:
-                    usuario = Usuario.objects.get(persona__dni=username_clean)
-                else:
-                    return None
-            
-            # Verificar la contraseña
-            if usuario.contrasena == password:
-                canonical_username = username_clean or username_raw
-
-                django_user = User.objects.filter(username=canonical_username).first()
-                if django_user is None and canonical_username != username_raw:
-                    django_user = User.objects.filter(username=username_raw).first()
-                    if django_user is not None and not User.objects.filter(username=canonical_username).exclude(pk=django_user.pk).exists():
-                        django_user.username = canonical_username
-                        django_user.save(update_fields=['username'])
-
-                if django_user is None:
-                    django_user = User.objects.create_user(
-                        username=canonical_username,
-                        password=None,
-                        first_name=usuario.persona.nombre,
-                        last_name=usuario.persona.apellido,
-                    )
-
-                django_user.first_name = usuario.persona.nombre
-                django_user.last_name = usuario.persona.apellido
-                django_user.save(update_fields=['first_name', 'last_name'])
-
-                return django_user
-            
-        except Usuario.DoesNotExist:
-            return None
-        
-        return None
-    
-    def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
+_CACHE_KEY = 'seguridad:auth_user:{user_id}'
+_PREFIJO_USER = '_auth_user__'
 
 
+def _clave_cache(user_id):
+    return _CACHE_KEY.format(user_id=user_id)
 
 
-from django.contrib.auth.backends import BaseBackend
-from django.contrib.auth.models import User
-from apps.modulo_1.usuario.models import Usuario, Persona
+def cache_usuarios_activo():
+    return getattr(settings, 'USUARIO_AUTH_CACHE_TTL', 0) > 0
+
+
+def invalidar_usuarios_cache(user_ids):
+    """Descarta del cache de ``get_user`` los usuarios de Django indicados"""
+    if not cache_usuarios_activo():
+        return
+    claves = [_clave_cache(user_id) for user_id in user_ids if user_id is not None]
+    if claves:
+        cache.delete_many(claves)
+
+
+def _usuarios_con_auth_user(candidatos, username):
+    """
+    Usuario + Persona de los DNI candidatos y, en la misma consulta, las columnas del
+    User de Django con ``username`` (subconsultas por la clave única, sin join a Usuario).
+    """
+    campos = [campo.attname for campo in User._meta.concrete_fields]
+    auth_user = User.objects.filter(username=username)
+    return (
+        Usuario.objects.filter(persona__dni__in=candidatos)
+        .select_related('persona')
+        .annotate(**{
+            f'{_PREFIJO_USER}{campo}': Subquery(auth_user.values(campo)[:1])
+            for campo in campos
+        })
+    ), campos
+
+
+def _auth_user_de(usuario, campos):
+    if getattr(usuario, f'{_PREFIJO_USER}id') is None:
+        return None
+    return User.from_db(
+        usuario._state.db,
+        campos,
+        [getattr(usuario, f'{_PREFIJO_USER}{campo}') for campo in campos],
+    )
 
 
 class DNIAuthenticationBackend(BaseBackend):
     """
-    Backend de autenticación personalizado que usa solo DNI y contraseña
+    Backend de autenticación personalizado que usa solo DNI y contraseña.
+
+    El login resuelve Usuario, Persona y el User de Django en una consulta y solo escribe
+    si cambió el nombre; ``get_user`` (una vez por request autenticado) se sirve del cache
+    durante USUARIO_AUTH_CACHE_TTL segundos (0 sin cache compartido) y se invalida al
+    cambiar el User o la Persona (ver signals.py).
     """
     def authenticate(self, request, username=None, password=None, **kwargs):
         username_raw = (username or '').strip()
         username_clean = Persona.limpiar_dni(username_raw)
-        try:
-            # Buscar el usuario por DNI (primero crudo, luego limpio)
-            try:
-                usuario = Usuario.objects.get(persona__dni=username_raw)
-            except Usuario.DoesNotExist:
-                if username_clean and username_clean != username_raw:
-                    usuario = Usuario.objects.get(persona__dni=username_clean)
-                else:
-                    return None
-            
-            # Verificar la contraseña
-            if usuario.contrasena == password:
-                canonical_username = username_clean or username_raw
-
-                django_user = User.objects.filter(username=canonical_username).first()
-                if django_user is None and canonical_username != username_raw:
-                    django_user = User.objects.filter(username=username_raw).first()
-                    if django_user is not None and not User.objects.filter(username=canonical_username).exclude(pk=django_user.pk).exists():
-                        django_user.username = canonical_username
-                        django_user.save(update_fields=['username'])
-
-                if django_user is None:
-                    django_user = User.objects.create_user(
-                        username=canonical_username,
-                        password=None,
-                        first_name=usuario.persona.nombre,
-                        last_name=usuario.persona.apellido,
-                    )
-
-                django_user.first_name = usuario.persona.nombre
-                django_user.last_name = usuario.persona.apellido
-                django_user.save(update_fields=['first_name', 'last_name'])
-
-                return django_user
-            
-        except Usuario.DoesNotExist:
+        if not username_raw:
             return None
-        
-        return None
-    
+        canonical_username = username_clean or username_raw
+
+        # Buscar el usuario por DNI (primero crudo, luego limpio)
+        candidatos = {username_raw, username_clean} - {''}
+        usuarios, campos = _usuarios_con_auth_user(candidatos, canonical_username)
+        encontrados = {}
+        for encontrado in usuarios.order_by('id'):
+            encontrados.setdefault(encontrado.persona.dni, encontrado)
+        usuario = encontrados.get(username_raw) or encontrados.get(username_clean)
+
+        # Verificar la contraseña
+        if usuario is None or usuario.contrasena != password:
+            return None
+
+        persona = usuario.persona
+        django_user = _auth_user_de(usuario, campos)
+        if django_user is None and canonical_username != username_raw:
+            django_user = User.objects.filter(username=username_raw).first()
+            if django_user is not None and not User.objects.filter(username=canonical_username).exclude(pk=django_user.pk).exists():
+                django_user.username = canonical_username
+                django_user.save(update_fields=['username'])
+
+        if django_user is None:
+            return User.objects.create_user(
+                username=canonical_username,
+                password=None,
+                first_name=persona.nombre,
+                last_name=persona.apellido,
+            )
+
+        if (django_user.first_name, django_user.last_name) != (persona.nombre, persona.apellido):
+            django_user.first_name = persona.nombre
+            django_user.last_name = persona.apellido
+            django_user.save(update_fields=['first_name', 'last_name'])
+
+        return django_user
+
     def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
\ No newline at end of file
+        if not cache_usuarios_activo():
+            with lecturas_en_primaria():
+                return User.objects.filter(pk=user_id).first()
+
+        clave = _clave_cache(user_id)
+        django_user = cache.get(clave)
+        if django_user is not None:
+            return django_user
+
+        with lecturas_en_primaria():
+            django_user = User.objects.filter(pk=user_id).first()
+        if django_user is not None:
+            cache.set(clave, django_user, timeout=settings.USUARIO_AUTH_CACHE_TTL)
+        return django_user
@@ -0,0 +1,205 @@
+"""
+Bandeja de salida de correos (outbox transaccional, sin broker externo).
+
+* ``encolar_correo`` solo inserta una fila: se llama dentro de la transacción del cambio
+  que origina el correo, así el mensaje existe si y solo si el cambio se confirmó, y el
+  request no espera a la API de correo.
+* ``tomar_lote`` reclama hasta N pendientes vencidos con un UPDATE condicional marcado
+  con un identificador de lote; varios ``enviar_correos`` pueden convivir sin repetir envíos.
+* ``entregar`` los manda por una sola conexión del EMAIL_BACKEND. Si el backend informa
+  el resultado de cada mensaje (``AIFEmailBackend.resultados``) se envía el lote entero;
+  con el resto de los backends se envía de a uno sobre la misma conexión.
+* Un envío fallido vuelve a la cola con espera exponencial; al llegar a
+  CORREOS_MAX_INTENTOS queda como fallido (no se reintenta solo).
+* ``recuperar_abandonados`` devuelve a la cola los correos de un proceso caído y
+  ``purgar_enviados`` elimina los enviados con la retención vencida.
+
+La entrega es "al menos una vez": si el proceso cae entre el envío y el guardado del
+resultado, ese correo se vuelve a mandar.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CorreoSaliente
+
+
+def encolar_correo(asunto, cuerpo, destinatarios, remitente=None, cuerpo_html=''):
+    """Agrega un correo a la bandeja de salida (un INSERT). Retorna el ``CorreoSaliente``"""
+    ahora = timezone.now()
+    return CorreoSaliente.objects.create(
+        asunto=asunto,
+        cuerpo=cuerpo,
+        cuerpo_html=cuerpo_html or '',
+        remitente=remitente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=list(destinatarios),
+        disponible_el=ahora,
+    )
+
+
+def espera_reintento(intentos):
+    """Espera antes del próximo intento: CORREOS_REINTENTO_SEGUNDOS duplicándose, con tope"""
+    segundos = settings.CORREOS_REINTENTO_SEGUNDOS * (2 ** max(intentos - 1, 0))
+    return timedelta(seconds=min(segundos, settings.CORREOS_REINTENTO_MAX_SEGUNDOS))
+
+
+def tomar_lote(cantidad=50, ahora=None):
+    """Reclama hasta ``cantidad`` correos pendientes cuyo próximo intento ya venció"""
+    ahora = ahora or timezone.now()
+    candidatos = list(
+        CorreoSaliente.objects.filter(
+            estado=CorreoSaliente.ESTADO_PENDIENTE,
+            disponible_el__lte=ahora,
+        ).order_by('disponible_el', 'id').values_list('id', flat=True)[:cantidad]
+    )
+    if not candidatos:
+        return []
+
+    # Los que otro proceso tomó primero ya no están pendientes y el UPDATE no los afecta
+    lote = uuid.uuid4().hex
+    CorreoSaliente.objects.filter(
+        pk__in=candidatos, estado=CorreoSaliente.ESTADO_PENDIENTE,
+    ).update(
+        estado=CorreoSaliente.ESTADO_ENVIANDO,
+        lote=lote,
+        tomado_el=ahora,
+        intentos=F('intentos') + 1,
+    )
+    return list(CorreoSaliente.objects.filter(lote=lote, estado=CorreoSaliente.ESTADO_ENVIANDO).order_by('id'))
+
+
+def _mensaje(correo, conexion):
+    mensaje = EmailMultiAlternatives(
+        correo.asunto,
+        correo.cuerpo,
+        correo.remitente,
+        correo.destinatarios,
+        connection=conexion,
+    )
+    if correo.cuerpo_html:
+        mensaje.attach_alternative(correo.cuerpo_html, 'text/html')
+    return mensaje
+
+
+def _describir(error):
+    return f'{type(error).__name__}: {error}'
+
+
+def _enviar(conexion, mensajes):
+    """Lista de ``(ok, error)`` por mensaje, en el mismo orden"""
+    if isinstance(getattr(conexion, 'resultados', None), list):
+        error_lote = ''
+        try:
+            conexion.send_messages(mensajes)
+        except Exception as e:
+            error_lote = _describir(e)
+        if len(conexion.resultados) == len(mensajes):
+            return [(resultado.ok, resultado.error) for resultado in conexion.resultados]
+        # El backend falló antes de enviar (p. ej. sin token): todo el lote comparte el error
+        return [(False, error_lote or 'El backend no informó resultados')] * len(mensajes)
+
+    resultados = []
+    for mensaje in mensajes:
+        try:
+            enviados = conexion.send_messages([mensaje])
+        except Exception as e:
+            resultados.append((False, _describir(e)))
+        else:
+            resultados.append((True, '') if enviados else (False, 'El backend no envió el mensaje'))
+    return resultados
+
+
+def entregar(correos, conexion=None):
+    """
+    Envía correos ya reclamados por ``tomar_lote`` y registra el resultado de cada uno.
+    Retorna ``(enviados, reintentos, fallidos)``.
+    """
+    if not correos:
+        return 0, 0, 0
+
+    conexion = conexion or get_connection(fail_silently=False)
+    try:
+        abierta_aca = conexion.open()
+    except Exception as e:
+        resultados = [(False, _describir(e))] * len(correos)
+    else:
+        try:
+            resultados = _enviar(conexion, [_mensaje(correo, conexion) for correo in correos])
+        finally:
+            if abierta_aca:
+                conexion.close()
+
+    ahora = timezone.now()
+    enviados, reintentos, fallidos = [], 0, 0
+    for correo, (ok, error) in zip(correos, resultados):
+        if ok:
+            enviados.append(correo.pk)
+            continue
+        correo.ultimo_error = error or 'Error desconocido'
+        correo.lote = ''
+        if correo.intentos >= settings.CORREOS_MAX_INTENTOS:
+            correo.estado = CorreoSaliente.ESTADO_FALLIDO
+            fallidos += 1
+        else:
+            correo.estado = CorreoSaliente.ESTADO_PENDIENTE
+            correo.disponible_el = ahora + espera_reintento(correo.intentos)
+            reintentos += 1
+        correo.save(update_fields=['estado', 'ultimo_error', 'lote', 'disponible_el'])
+
+    if enviados:
+        CorreoSaliente.objects.filter(pk__in=enviados).update(
+            estado=CorreoSaliente.ESTADO_ENVIADO,
+            enviado_el=ahora,
+            ultimo_error='',
+            lote='',
+        )
+    return len(enviados), reintentos, fallidos
+
+
+def procesar_lote(cantidad=50, conexion=None):
+    """Toma y entrega un lote. Retorna ``(tomados, enviados, reintentos, fallidos)``"""
+    correos = tomar_lote(cantidad)
+    return (len(correos), *entregar(correos, conexion))
+
+
+def recuperar_abandonados(ahora=None):
+    """
+    Correos "enviando" desde hace más de CORREOS_TIMEOUT_MINUTOS (proceso caído): vuelven a
+    la cola o, si agotaron los intentos, quedan como fallidos. Retorna la cantidad afectada.
+    """
+    ahora = ahora or timezone.now()
+    abandonados = CorreoSaliente.objects.filter(
+        estado=CorreoSaliente.ESTADO_ENVIANDO,
+        tomado_el__lt=ahora - timedelta(minutes=settings.CORREOS_TIMEOUT_MINUTOS),
+    )
+    fallidos = abandonados.filter(intentos__gte=settings.CORREOS_MAX_INTENTOS).update(
+        estado=CorreoSaliente.ESTADO_FALLIDO,
+        ultimo_error='El proceso de envío se interrumpió demasiadas veces.',
+        lote='',
+    )
+    reencolados = abandonados.update(estado=CorreoSaliente.ESTADO_PENDIENTE, disponible_el=ahora, lote='')
+    return fallidos + reencolados
+
+
+def reencolar_fallidos(correos):
+    """Devuelve a la cola correos fallidos (acción del admin), con los intentos y el error en cero"""
+    return correos.filter(estado=CorreoSaliente.ESTADO_FALLIDO).update(
+        estado=CorreoSaliente.ESTADO_PENDIENTE,
+        intentos=0,
+        ultimo_error='',
+        disponible_el=timezone.now(),
+    )
+
+
+def purgar_enviados(ahora=None):
+    """Elimina los correos enviados hace más de CORREOS_RETENCION_DIAS"""
+    ahora = ahora or timezone.now()
+    eliminados, _ = CorreoSaliente.objects.filter(
+        estado=CorreoSaliente.ESTADO_ENVIADO,
+        enviado_el__lte=ahora - timedelta(days=settings.CORREOS_RETENCION_DIAS),
+    ).delete()
+    return eliminados
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.modulo_6.seguridad.bandeja import procesar_lote, purgar_enviados, recuperar_abandonados
+
+
+class Command(BaseCommand):
+    help = 'Entrega los correos de la bandeja de salida por el EMAIL_BACKEND configurado (worker local)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Entrega los correos pendientes y termina (útil para cron)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=50,
+            help='Correos que se toman por lote (por defecto 50)',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando no hay correos para enviar (por defecto 2)',
+        )
+
+    def _mantenimiento(self):
+        recuperados = recuperar_abandonados()
+        purgados = purgar_enviados()
+        if recuperados:
+            self.stdout.write(f'Correos abandonados recuperados: {recuperados}')
+        if purgados:
+            self.stdout.write(f'Correos enviados eliminados: {purgados}')
+
+    def handle(self, *args, **options):
+        totales = {'enviados': 0, 'reintentos': 0, 'fallidos': 0}
+        ultimo_mantenimiento = None
+
+        try:
+            while True:
+                close_old_connections()
+                ahora = time.monotonic()
+                if ultimo_mantenimiento is None or ahora - ultimo_mantenimiento >= 60:
+                    self._mantenimiento()
+                    ultimo_mantenimiento = ahora
+
+                tomados, enviados, reintentos, fallidos = procesar_lote(max(options['lote'], 1))
+                if not tomados:
+                    if options['una_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                    continue
+
+                totales['enviados'] += enviados
+                totales['reintentos'] += reintentos
+                totales['fallidos'] += fallidos
+                self.stdout.write(f'Lote de {tomados}: {enviados} enviados, {reintentos} a reintentar, {fallidos} fallidos')
+                if fallidos:
+                    self.stdout.write(self.style.ERROR(f'  {fallidos} correos agotaron los intentos'))
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            f"Correos enviados: {totales['enviados']} (reintentos: {totales['reintentos']}, fallidos: {totales['fallidos']})"
+        )
@@ -0,0 +1,179 @@
+import math
+import os
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from core.aif_email_backend import AIFEmailBackend
+from core.aif_simulador import ConfiguracionSimulador, ServidorAIFSimulado, agregar_opciones
+
+
+def _percentil(ordenados, p):
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    if not ordenados:
+        return 0.0
+    return ordenados[max(math.ceil(p / 100 * len(ordenados)) - 1, 0)]
+
+
+@contextmanager
+def _entorno_simulador(url):
+    """Apunta AIFEmailBackend al simulador, con credenciales ficticias y un archivo de token propio"""
+    with tempfile.TemporaryDirectory() as directorio:
+        variables = {
+            'AIF_EMAIL_BASE_URL': url,
+            'AIF_EMAIL_TOKEN_URL': '',
+            'AIF_EMAIL_SEND_URL': '',
+            'AIF_EMAIL_CLIENT_ID': 'simulador',
+            'AIF_EMAIL_CLIENT_SECRET': 'simulador',
+            'AIF_EMAIL_TOKEN_CACHE_FILE': os.path.join(directorio, 'token.json'),
+        }
+        anteriores = {nombre: os.environ.get(nombre) for nombre in variables}
+        os.environ.update(variables)
+        try:
+            yield
+        finally:
+            for nombre, valor in anteriores.items():
+                if valor is None:
+                    os.environ.pop(nombre, None)
+                else:
+                    os.environ[nombre] = valor
+
+
+class Command(BaseCommand):
+    help = (
+        'Envía N correos de prueba por el backend de email y reporta rendimiento, '
+        'percentiles de latencia y reintentos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cantidad', type=int, default=200, help='Correos a enviar (por defecto 200)')
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=50,
+            help='Correos por llamada a send_messages, como `enviar_correos --lote` (por defecto 50)',
+        )
+        parser.add_argument('--workers', type=int, default=None, help='Hilos de envío (AIF_EMAIL_MAX_WORKERS)')
+        parser.add_argument('--reintentos', type=int, default=None, help='Reintentos por mensaje (AIF_EMAIL_MAX_RETRIES)')
+        parser.add_argument('--backoff', type=float, default=None, help='Segundos base del backoff (AIF_EMAIL_RETRY_BACKOFF)')
+        parser.add_argument(
+            '--simulador',
+            action='store_true',
+            help='Levanta el simulador AIF en este proceso y envía por AIFEmailBackend contra él',
+        )
+        parser.add_argument(
+            '--destinatario',
+            default='',
+            help='Destinatario de los correos; obligatorio sin --simulador (se envían de verdad)',
+        )
+        agregar_opciones(parser)
+
+    def handle(self, *args, **options):
+        if not options['simulador'] and not options['destinatario']:
+            raise CommandError('Sin --simulador los correos se envían por el backend real: indicá --destinatario.')
+        if options['cantidad'] < 1 or options['lote'] < 1:
+            raise CommandError('--cantidad y --lote deben ser mayores a cero.')
+
+        opciones_backend = {
+            clave: options[opcion]
+            for clave, opcion in (('max_workers', 'workers'), ('max_retries', 'reintentos'), ('retry_backoff', 'backoff'))
+            if options[opcion] is not None
+        }
+        mensajes = [
+            EmailMessage(
+                f'Prueba de envío {i}',
+                'Mensaje generado por medir_envio_correos.',
+                settings.DEFAULT_FROM_EMAIL,
+                [options['destinatario'] or f'prueba{i}@example.invalid'],
+            )
+            for i in range(options['cantidad'])
+        ]
+
+        if options['simulador']:
+            configuracion = ConfiguracionSimulador.desde_opciones(options)
+            with ServidorAIFSimulado(configuracion=configuracion) as servidor, _entorno_simulador(servidor.url):
+                conexion = AIFEmailBackend(**opciones_backend)
+                medicion = self._medir(conexion, mensajes, options['lote'])
+            self._informar(conexion, medicion)
+            resumen = servidor.resumen()
+            self.stdout.write(
+                f"Simulador: {resumen['conexiones']} conexiones, {resumen['tokens_emitidos']} tokens, "
+                f"{resumen['desconexiones']} desconexiones, respuestas {resumen['respuestas']}"
+            )
+        else:
+            conexion = get_connection(**opciones_backend)
+            self._informar(conexion, self._medir(conexion, mensajes, options['lote']))
+
+    def _medir(self, conexion, mensajes, lote):
+        """Envía en lotes por una conexión abierta y junta latencias, reintentos y errores"""
+        medicion = {
+            'enviados': 0,
+            'latencias': [],
+            'reintentos': 0,
+            'con_reintentos': 0,
+            'errores': Counter(),
+            'por_mensaje': True,
+        }
+        inicio = time.monotonic()
+        conexion.open()
+        try:
+            for desde in range(0, len(mensajes), lote):
+                bloque = mensajes[desde:desde + lote]
+                inicio_lote = time.monotonic()
+                error = None
+                try:
+                    conexion.send_messages(bloque)
+                except Exception as e:
+                    error = e
+                duracion_lote = time.monotonic() - inicio_lote
+
+                resultados = getattr(conexion, 'resultados', None)
+                if isinstance(resultados, list) and len(resultados) == len(bloque):
+                    for resultado in resultados:
+                        medicion['latencias'].append(resultado.duracion)
+                        if resultado.intentos > 1:
+                            medicion['reintentos'] += resultado.intentos - 1
+                            medicion['con_reintentos'] += 1
+                        if resultado.ok:
+                            medicion['enviados'] += 1
+                        else:
+                            medicion['errores'][resultado.status or type(resultado.excepcion).__name__] += 1
+                else:
+                    # El backend no informa cada mensaje: se mide la llamada completa
+                    medicion['por_mensaje'] = False
+                    medicion['latencias'].append(duracion_lote)
+                    if error is None:
+                        medicion['enviados'] += len(bloque)
+                    else:
+                        medicion['errores'][type(error).__name__] += len(bloque)
+        finally:
+            conexion.close()
+        medicion['total'] = len(mensajes)
+        medicion['duracion'] = time.monotonic() - inicio
+        return medicion
+
+    def _informar(self, conexion, medicion):
+        duracion = medicion['duracion']
+        latencias = sorted(medicion['latencias'])
+        fallidos = medicion['total'] - medicion['enviados']
+
+        self.stdout.write(f'Backend: {type(conexion).__module__}.{type(conexion).__name__}')
+        self.stdout.write(f"Mensajes: {medicion['total']} (enviados {medicion['enviados']}, fallidos {fallidos})")
+        self.stdout.write(
+            f"Tiempo total: {duracion:.2f} s, {medicion['enviados'] / duracion if duracion else 0:.1f} mensajes/s"
+        )
+        unidad = 'por mensaje' if medicion['por_mensaje'] else 'por lote'
+        self.stdout.write(
+            f'Latencia {unidad} (ms): '
+            + ', '.join(f'p{p} {_percentil(latencias, p) * 1000:.0f}' for p in (50, 90, 95, 99))
+            + f', máx {(latencias[-1] if latencias else 0) * 1000:.0f}'
+        )
+        if medicion['por_mensaje']:
+            self.stdout.write(f"Reintentos: {medicion['reintentos']} (en {medicion['con_reintentos']} mensajes)")
+        if medicion['errores']:
+            self.stdout.write(self.style.ERROR(f"Errores: {dict(medicion['errores'])}"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.modulo_6.seguridad.sesiones import purgar_sesiones_vencidas
+
+
+class Command(BaseCommand):
+    help = 'Elimina las sesiones vencidas por lotes (sin un DELETE único sobre toda la tabla)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=5000,
+            help='Sesiones eliminadas por sentencia (por defecto 5000)',
+        )
+
+    def handle(self, *args, **options):
+        eliminadas = purgar_sesiones_vencidas(lote=max(options['lote'], 1))
+        self.stdout.write(f'Sesiones vencidas eliminadas: {eliminadas}')
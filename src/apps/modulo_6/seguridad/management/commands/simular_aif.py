@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.aif_simulador import ConfiguracionSimulador, ServidorAIFSimulado, agregar_opciones
+
+
+class Command(BaseCommand):
+    help = 'Levanta un servidor local que imita la API de Notificaciones AIF (para pruebas de carga)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Interfaz en la que escucha (por defecto 127.0.0.1)')
+        parser.add_argument('--puerto', type=int, default=8025, help='Puerto en el que escucha (por defecto 8025)')
+        agregar_opciones(parser)
+
+    def handle(self, *args, **options):
+        configuracion = ConfiguracionSimulador.desde_opciones(options)
+        servidor = ServidorAIFSimulado((options['host'], options['puerto']), configuracion)
+
+        self.stdout.write(self.style.SUCCESS(f'Simulador AIF escuchando en {servidor.url}'))
+        self.stdout.write('Para enviar por el simulador, configurar:')
+        self.stdout.write(f'  AIF_EMAIL_BASE_URL={servidor.url}')
+        self.stdout.write('  AIF_EMAIL_CLIENT_ID=simulador AIF_EMAIL_CLIENT_SECRET=simulador')
+        self.stdout.write('Ctrl+C para terminar.')
+
+        servidor.iniciar()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.detener()
+
+        resumen = servidor.resumen()
+        self.stdout.write(
+            f"Conexiones: {resumen['conexiones']}, tokens emitidos: {resumen['tokens_emitidos']}, "
+            f"desconexiones: {resumen['desconexiones']}, respuestas: {resumen['respuestas']}"
+        )
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorreoSaliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asunto', models.CharField(max_length=255, verbose_name='Asunto')),
+                ('cuerpo', models.TextField(verbose_name='Cuerpo')),
+                ('cuerpo_html', models.TextField(blank=True, default='', verbose_name='Cuerpo HTML')),
+                ('remitente', models.CharField(max_length=255, verbose_name='Remitente')),
+                ('destinatarios', models.JSONField(default=list, verbose_name='Destinatarios')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('fallido', 'Fallido')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('ultimo_error', models.TextField(blank=True, default='', verbose_name='Último Error')),
+                ('lote', models.CharField(blank=True, db_index=True, default='', max_length=32, verbose_name='Lote')),
+                ('creado_el', models.DateTimeField(auto_now_add=True, verbose_name='Creado el')),
+                ('disponible_el', models.DateTimeField(verbose_name='Próximo Intento')),
+                ('tomado_el', models.DateTimeField(blank=True, null=True, verbose_name='Tomado el')),
+                ('enviado_el', models.DateTimeField(blank=True, null=True, verbose_name='Enviado el')),
+            ],
+            options={
+                'verbose_name': 'Correo Saliente',
+                'verbose_name_plural': 'Correos Salientes',
+                'ordering': ['-creado_el'],
+                'indexes': [models.Index(fields=['estado', 'disponible_el'], name='seguridad_correo_cola_idx')],
+            },
+        ),
+    ]
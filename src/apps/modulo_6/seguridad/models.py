@@ -1,3 +1,48 @@
 from django.db import models
 
-# Create your models here.
+
+class CorreoSaliente(models.Model):
+    """
+    Correo en la bandeja de salida. Se guarda en la misma transacción que el cambio que lo
+    origina y lo entrega el comando ``enviar_correos`` por el EMAIL_BACKEND configurado
+    (ver ``apps.modulo_6.seguridad.bandeja``). Los que agotan los intentos quedan como
+    fallidos para revisarlos desde el admin.
+    """
+    ESTADO_PENDIENTE = 'pendiente'
+    ESTADO_ENVIANDO = 'enviando'
+    ESTADO_ENVIADO = 'enviado'
+    ESTADO_FALLIDO = 'fallido'
+
+    ESTADOS = [
+        (ESTADO_PENDIENTE, 'Pendiente'),
+        (ESTADO_ENVIANDO, 'Enviando'),
+        (ESTADO_ENVIADO, 'Enviado'),
+        (ESTADO_FALLIDO, 'Fallido'),
+    ]
+
+    asunto = models.CharField(max_length=255, verbose_name="Asunto")
+    cuerpo = models.TextField(verbose_name="Cuerpo")
+    cuerpo_html = models.TextField(blank=True, default='', verbose_name="Cuerpo HTML")
+    remitente = models.CharField(max_length=255, verbose_name="Remitente")
+    destinatarios = models.JSONField(default=list, verbose_name="Destinatarios")
+
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=ESTADO_PENDIENTE, verbose_name="Estado")
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    ultimo_error = models.TextField(blank=True, default='', verbose_name="Último Error")
+    lote = models.CharField(max_length=32, blank=True, default='', db_index=True, verbose_name="Lote")
+
+    creado_el = models.DateTimeField(auto_now_add=True, verbose_name="Creado el")
+    disponible_el = models.DateTimeField(verbose_name="Próximo Intento")
+    tomado_el = models.DateTimeField(blank=True, null=True, verbose_name="Tomado el")
+    enviado_el = models.DateTimeField(blank=True, null=True, verbose_name="Enviado el")
+
+    class Meta:
+        verbose_name = "Correo Saliente"
+        verbose_name_plural = "Correos Salientes"
+        ordering = ['-creado_el']
+        indexes = [
+            models.Index(fields=['estado', 'disponible_el'], name='seguridad_correo_cola_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} → {', '.join(self.destinatarios)} ({self.get_estado_display()})"
@@ -0,0 +1,96 @@
+"""
+Sesiones deslizantes sin una escritura por request.
+
+* ``SesionDeslizanteMiddleware`` reemplaza a ``SessionMiddleware``: guarda la sesión solo
+  si cambió o si pasaron SESION_RENOVACION_SEGUNDOS desde la última renovación (marca
+  ``_renovada_el`` dentro de la sesión). La expiración sigue siendo SESSION_COOKIE_AGE desde
+  la última renovación, así una sesión activa nunca vence y una inactiva vence entre
+  SESSION_COOKIE_AGE - SESION_RENOVACION_SEGUNDOS y SESSION_COOKIE_AGE después del último uso.
+* ``SessionStore`` (SESSION_ENGINE) es ``cached_db`` con el cache acotado a SESION_CACHE_TTL
+  segundos (0 = sin cache, lectura directa de la base) y una purga de vencidas por lotes
+  (``clearsessions`` y el comando ``purgar_sesiones``).
+"""
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.utils import timezone
+
+
+CLAVE_RENOVACION = '_renovada_el'
+
+
+def purgar_sesiones_vencidas(lote=5000, ahora=None):
+    """Elimina las sesiones vencidas de a ``lote`` filas. Retorna la cantidad eliminada"""
+    modelo = SessionStore.get_model_class()
+    ahora = ahora or timezone.now()
+    eliminadas = 0
+    while True:
+        claves = list(
+            modelo.objects.filter(expire_date__lt=ahora).values_list('session_key', flat=True)[:lote]
+        )
+        if not claves:
+            return eliminadas
+        modelo.objects.filter(session_key__in=claves).delete()
+        eliminadas += len(claves)
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = 'seguridad.sesion'
+
+    def _ttl_cache(self, expiracion):
+        return max(0, min(expiracion, settings.SESION_CACHE_TTL))
+
+    def load(self):
+        if settings.SESION_CACHE_TTL <= 0:
+            return super(CachedDBStore, self).load()
+        try:
+            data = self._cache.get(self.cache_key)
+        except Exception:
+            data = None
+        if data is None:
+            s = self._get_session_from_db()
+            if s is None:
+                return {}
+            data = self.decode(s.session_data)
+            self._cache.set(self.cache_key, data, self._ttl_cache(self.get_expiry_age(expiry=s.expire_date)))
+        return data
+
+    def exists(self, session_key):
+        if settings.SESION_CACHE_TTL <= 0:
+            return super(CachedDBStore, self).exists(session_key)
+        return super().exists(session_key)
+
+    def save(self, must_create=False):
+        super(CachedDBStore, self).save(must_create)
+        if settings.SESION_CACHE_TTL > 0:
+            self._cache.set(self.cache_key, self._session, self._ttl_cache(self.get_expiry_age()))
+
+    # Las variantes async delegan en las sync para respetar SESION_CACHE_TTL
+    async def aload(self):
+        return await sync_to_async(self.load)()
+
+    async def aexists(self, session_key):
+        return await sync_to_async(self.exists)(session_key)
+
+    async def asave(self, must_create=False):
+        await sync_to_async(self.save)(must_create)
+
+    @classmethod
+    def clear_expired(cls):
+        purgar_sesiones_vencidas()
+
+
+class SesionDeslizanteMiddleware(SessionMiddleware):
+    """``SessionMiddleware`` que renueva la expiración como mucho una vez por período"""
+
+    def process_response(self, request, response):
+        sesion = getattr(request, 'session', None)
+        # Solo sesiones que el request ya leyó: no se agrega una lectura ni "Vary: Cookie"
+        if sesion is not None and sesion.accessed and not sesion.is_empty():
+            ahora = int(time.time())
+            if sesion.modified or ahora - (sesion.get(CLAVE_RENOVACION) or 0) >= settings.SESION_RENOVACION_SEGUNDOS:
+                sesion[CLAVE_RENOVACION] = ahora
+        return super().process_response(request, response)
@@ -0,0 +1,31 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.modulo_1.usuario.models import Persona
+
+from .backends import cache_usuarios_activo, invalidar_usuarios_cache
+
+
+def _invalidar(user_ids):
+    if not cache_usuarios_activo():
+        return
+    # Ahora y otra vez al confirmar: un request concurrente puede volver a cachear la fila anterior
+    invalidar_usuarios_cache(user_ids)
+    transaction.on_commit(lambda: invalidar_usuarios_cache(user_ids))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_cache_auth_user(sender, instance, **kwargs):
+    _invalidar([instance.pk])
+
+
+@receiver(post_save, sender=Persona)
+def invalidar_cache_auth_user_por_persona(sender, instance, raw=False, **kwargs):
+    if raw or not cache_usuarios_activo():
+        return
+    user_ids = list(User.objects.filter(username=instance.dni).values_list('pk', flat=True))
+    if user_ids:
+        _invalidar(user_ids)
@@ -1,14 +1,28 @@
 import time
+from datetime import timedelta
+from io import StringIO
 
 from django.contrib.messages import get_messages
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
 from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import call_command
 from django.core.signing import TimestampSigner
+from django.db import connection, transaction
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from urllib.parse import unquote
 
 from apps.modulo_1.usuario.models import Persona, Usuario
+from apps.modulo_6.seguridad import bandeja
 from apps.modulo_6.seguridad.backends import DNIAuthenticationBackend
+from apps.modulo_6.seguridad.models import CorreoSaliente
+from apps.modulo_6.seguridad.sesiones import CLAVE_RENOVACION, SessionStore
 
 
 class SeguridadAuthTests(TestCase):
@@ -31,6 +45,52 @@ class SeguridadAuthTests(TestCase):
         self.assertEqual(django_user.first_name, self.persona.nombre)
         self.assertEqual(django_user.last_name, self.persona.apellido)
 
+    def test_backend_login_repetido_una_consulta_sin_escrituras(self):
+        backend = DNIAuthenticationBackend()
+        creado = backend.authenticate(request=None, username=self.dni, password=self.password)
+
+        with self.assertNumQueries(1):
+            django_user = backend.authenticate(request=None, username=f' {self.dni[:2]}.{self.dni[2:5]}.{self.dni[5:]} ', password=self.password)
+        self.assertEqual((django_user.pk, django_user.username), (creado.pk, self.dni))
+        self.assertEqual(django_user.date_joined, creado.date_joined)
+
+        self.persona.nombre = 'Ana María'
+        self.persona.save()
+        with self.assertNumQueries(2):
+            django_user = backend.authenticate(request=None, username=self.dni, password=self.password)
+        self.assertEqual(User.objects.get(pk=creado.pk).first_name, 'Ana María')
+
+    @override_settings(USUARIO_AUTH_CACHE_TTL=60)
+    def test_get_user_cacheado_se_invalida_al_cambiar_user_o_persona(self):
+        cache.clear()
+        backend = DNIAuthenticationBackend()
+        django_user = backend.authenticate(request=None, username=self.dni, password=self.password)
+
+        with self.assertNumQueries(1):
+            backend.get_user(django_user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(backend.get_user(django_user.pk).username, self.dni)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.persona.apellido = 'Otra'
+            self.persona.save()
+        with self.assertNumQueries(1):
+            backend.get_user(django_user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(pk=django_user.pk).delete()
+        self.assertIsNone(backend.get_user(django_user.pk))
+
+    def test_get_user_sin_cache_compartido_lee_siempre_la_base(self):
+        cache.clear()
+        backend = DNIAuthenticationBackend()
+        django_user = backend.authenticate(request=None, username=self.dni, password=self.password)
+
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(backend.get_user(django_user.pk).username, self.dni)
+        self.assertIsNone(cache.get(f'seguridad:auth_user:{django_user.pk}'))
+
     def test_backend_falla_con_contrasena_incorrecta(self):
         backend = DNIAuthenticationBackend()
         django_user = backend.authenticate(request=None, username=self.dni, password='wrong')
@@ -108,6 +168,10 @@ class PasswordResetTests(TestCase):
         )
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response.url, reverse('login'))
+        # El request solo encola; el envío lo hace el worker
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(CorreoSaliente.objects.get().destinatarios, [self.persona.correo])
+        call_command('enviar_correos', '--una-vez', stdout=StringIO())
         self.assertEqual(len(mail.outbox), 1)
 
         email = mail.outbox[0]
@@ -188,3 +252,109 @@ class PasswordResetTests(TestCase):
         self.assertEqual(response.status_code, 200)
         mensajes = [m.message for m in get_messages(response.wsgi_request)]
         self.assertIn('❌ La contraseña debe tener al menos 6 caracteres.', mensajes)
+
+
+class _BackendConFallas(LocmemEmailBackend):
+    """Rechaza los mensajes cuyo destinatario empieza con 'rebota'"""
+
+    def send_messages(self, messages):
+        if any(destinatario.startswith('rebota') for message in messages for destinatario in message.to):
+            raise ConnectionError('servidor no disponible')
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='apps.modulo_6.seguridad.tests._BackendConFallas',
+    CORREOS_MAX_INTENTOS=2,
+    CORREOS_REINTENTO_SEGUNDOS=60,
+)
+class BandejaSalidaTests(TestCase):
+    def test_encolar_respeta_la_transaccion(self):
+        try:
+            with transaction.atomic():
+                bandeja.encolar_correo('Aviso', 'Hola', ['a@test.com'])
+                raise RuntimeError('rollback')
+        except RuntimeError:
+            pass
+        self.assertFalse(CorreoSaliente.objects.exists())
+
+        with self.assertNumQueries(1):
+            bandeja.encolar_correo('Aviso', 'Hola', ['a@test.com'])
+
+    def test_reintenta_con_espera_y_descarta_al_agotar_intentos(self):
+        bueno = bandeja.encolar_correo('Aviso', 'Hola', ['a@test.com'])
+        malo = bandeja.encolar_correo('Aviso', 'Hola', ['rebota@test.com'])
+
+        self.assertEqual(bandeja.procesar_lote(), (2, 1, 1, 0))
+        self.assertEqual([message.to for message in mail.outbox], [['a@test.com']])
+        bueno.refresh_from_db()
+        malo.refresh_from_db()
+        self.assertEqual(bueno.estado, CorreoSaliente.ESTADO_ENVIADO)
+        self.assertEqual((malo.estado, malo.intentos), (CorreoSaliente.ESTADO_PENDIENTE, 1))
+        self.assertIn('servidor no disponible', malo.ultimo_error)
+        self.assertGreater(malo.disponible_el, timezone.now() + timedelta(seconds=50))
+
+        # Hasta que vence la espera no se vuelve a tomar
+        self.assertEqual(bandeja.tomar_lote(), [])
+        CorreoSaliente.objects.filter(pk=malo.pk).update(disponible_el=timezone.now())
+        self.assertEqual(bandeja.procesar_lote(), (1, 0, 0, 1))
+        malo.refresh_from_db()
+        self.assertEqual((malo.estado, malo.intentos), (CorreoSaliente.ESTADO_FALLIDO, 2))
+
+        self.assertEqual(bandeja.reencolar_fallidos(CorreoSaliente.objects.all()), 1)
+        malo.refresh_from_db()
+        self.assertEqual((malo.estado, malo.intentos, malo.ultimo_error), (CorreoSaliente.ESTADO_PENDIENTE, 0, ''))
+
+    def test_lote_tomado_no_lo_reclama_otro_proceso_y_se_recupera_si_cae(self):
+        correo = bandeja.encolar_correo('Aviso', 'Hola', ['a@test.com'])
+        self.assertEqual(bandeja.tomar_lote(), [correo])
+        self.assertEqual(bandeja.tomar_lote(), [])
+
+        self.assertEqual(bandeja.recuperar_abandonados(ahora=timezone.now() + timedelta(hours=1)), 1)
+        correo.refresh_from_db()
+        self.assertEqual(correo.estado, CorreoSaliente.ESTADO_PENDIENTE)
+
+
+class SesionDeslizanteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='83000000', password=None)
+        self.client.force_login(self.user)
+
+    def _escrituras_de_sesion(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('landing'), secure=True)
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in ctx.captured_queries if 'django_session' in q['sql'] and not q['sql'].startswith('SELECT')]
+
+    def test_no_escribe_en_cada_request_y_renueva_pasado_el_umbral(self):
+        # force_login no pasa por el middleware: la primera respuesta agrega la marca de renovación
+        self.assertEqual(len(self._escrituras_de_sesion()), 1)
+        expiracion = Session.objects.get().expire_date
+        self.assertEqual(self._escrituras_de_sesion(), [])
+        self.assertEqual(Session.objects.get().expire_date, expiracion)
+
+        sesion = self.client.session
+        sesion[CLAVE_RENOVACION] = int(time.time()) - settings.SESION_RENOVACION_SEGUNDOS
+        sesion.save()
+        Session.objects.update(expire_date=expiracion - timedelta(days=1))
+
+        self.assertEqual(len(self._escrituras_de_sesion()), 1)
+        self.assertGreater(Session.objects.get().expire_date, expiracion - timedelta(days=1))
+        self.assertEqual(self._escrituras_de_sesion(), [])
+
+    @override_settings(SESION_CACHE_TTL=60)
+    def test_lectura_desde_cache(self):
+        clave = self.client.session.session_key
+        SessionStore(clave).save()
+        with self.assertNumQueries(0):
+            self.assertEqual(SessionStore(clave).load()['_auth_user_id'], str(self.user.pk))
+
+    def test_purga_vencidas_por_lotes(self):
+        vencida = timezone.now() - timedelta(days=1)
+        Session.objects.bulk_create([
+            Session(session_key=f'vencida{i:032d}', session_data='', expire_date=vencida) for i in range(5)
+        ])
+        salida = StringIO()
+        call_command('purgar_sesiones', '--lote', '2', stdout=salida)
+        self.assertIn('Sesiones vencidas eliminadas: 5', salida.getvalue())
+        self.assertEqual(Session.objects.count(), 1)
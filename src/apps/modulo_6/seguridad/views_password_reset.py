@@ -1,7 +1,6 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
 from django.conf import settings
 from django.urls import reverse
 from django.core.signing import BadSignature, SignatureExpired, TimestampSigner
@@ -9,6 +8,8 @@ from urllib.parse import urlencode
 import sys
 from apps.modulo_1.usuario.models import Usuario, Persona
 
+from .bandeja import encolar_correo
+
 User = get_user_model()
 
 
@@ -65,7 +66,7 @@ def password_reset_request(request):
                 )
                 return render(request, 'registration/password_reset_request.html')
 
-            # Enviar email
+            # Encolar email (lo entrega el comando enviar_correos)
             subject = 'Recuperación de Contraseña - Edu-Polo'
             plain_message = (
                 f"Hola {persona.nombre},\n\n"
@@ -73,24 +74,14 @@ def password_reset_request(request):
                 f"Enlace para restablecerla:\n{reset_link}\n\n"
                 "Si no solicitaste este cambio, ignorá este email.\n"
             )
-            
-            try:
-                send_mail(
-                    subject,
-                    plain_message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [persona.correo],
-                    fail_silently=False,
-                )
-                messages.success(
-                    request,
-                    f'✅ Se ha enviado un email a {persona.correo} con las instrucciones para recuperar tu contraseña. '
-                    'Puede demorar algunos minutos. Revisá también spam/no deseados.',
-                )
-                return redirect('login')
-            except Exception as e:
-                messages.error(request, f'❌ Error al enviar el email: {str(e)}. Por favor, contacta al administrador.')
-                
+            encolar_correo(subject, plain_message, [persona.correo], settings.DEFAULT_FROM_EMAIL)
+            messages.success(
+                request,
+                f'✅ Se ha enviado un email a {persona.correo} con las instrucciones para recuperar tu contraseña. '
+                'Puede demorar algunos minutos. Revisá también spam/no deseados.',
+            )
+            return redirect('login')
+
         except Usuario.DoesNotExist:
             messages.error(request, '❌ No se encontró un usuario con ese DNI.')
         except Exception as e:
@@ -1,15 +1,31 @@
 import base64
+import hashlib
+import http.client
 import json
 import os
+import random
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from email.utils import parseaddr
 from typing import Any
-from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
+from urllib.parse import urlsplit
 
 from django.core.mail.backends.base import BaseEmailBackend
 from django.core.mail.message import EmailMultiAlternatives
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
 
 def _join_url(base: str, path: str) -> str:
     return base.rstrip("/") + "/" + path.lstrip("/")
@@ -27,11 +43,160 @@ def _clean_env_value(value: str) -> str:
     return cleaned
 
 
-_TOKEN_CACHE: dict[str, Any] = {"access": None, "expires_at": 0.0}
+# Cache en memoria del proceso; el archivo de token (ver _TokenCompartido) lo comparte entre workers
+_TOKEN_CACHE: dict[str, Any] = {"access": None, "expires_at": 0.0, "key": None}
+_TOKEN_LOCK = threading.Lock()
+
+# Estados HTTP que se reintentan (además de los errores de red)
+_REINTENTABLES = {408, 425, 429, 500, 502, 503, 504}
+
+# Errores de conexión tras los que se reabre la conexión keep-alive y se reintenta
+_ERRORES_RED = (OSError, http.client.HTTPException)
+
+
+class AIFTransientError(RuntimeError):
+    """Error reintentable (red, 429 o 5xx) que persistió tras agotar los reintentos"""
+
+
+@dataclass
+class ResultadoEnvio:
+    """Resultado del envío de un mensaje (``AIFEmailBackend.resultados``)"""
+
+    message: Any
+    ok: bool
+    status: int | None = None
+    error: str = ""
+    intentos: int = 0
+    duracion: float = 0.0
+    excepcion: BaseException | None = field(default=None, repr=False)
+
+
+@contextmanager
+def _bloqueo_archivo(path: str):
+    """Bloqueo exclusivo entre procesos sobre ``path`` (archivo de lock)"""
+    with open(path, "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class _TokenCompartido:
+    """
+    Token de acceso guardado en un archivo compartido por todos los workers del host.
+    La obtención de un token nuevo se hace con el lock tomado: un solo proceso lo pide y
+    el resto lo lee del archivo.
+    """
+
+    def __init__(self, path: str, key: str):
+        self.path = path
+        self.key = key
+
+    def leer(self) -> tuple[str, float] | None:
+        try:
+            with open(self.path, encoding="utf-8") as token_file:
+                data = json.load(token_file)
+        except (OSError, ValueError):
+            return None
+        if data.get("key") != self.key or not data.get("access"):
+            return None
+        return str(data["access"]), float(data.get("expires_at") or 0)
+
+    def guardar(self, access: str, expires_at: float) -> None:
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(prefix=".aif_token_", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as token_file:
+                json.dump({"key": self.key, "access": access, "expires_at": expires_at}, token_file)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def invalidar(self, access: str) -> None:
+        with self.bloqueo():
+            actual = self.leer()
+            if actual and actual[0] == access:
+                try:
+                    os.unlink(self.path)
+                except OSError:
+                    pass
+
+    def bloqueo(self):
+        return _bloqueo_archivo(self.path + ".lock")
+
+
+class _PoolConexiones:
+    """Conexiones HTTP keep-alive, una por hilo y host, reutilizadas entre requests"""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._local = threading.local()
+        self._todas: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def obtener(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        conexiones = getattr(self._local, "conexiones", None)
+        if conexiones is None:
+            conexiones = self._local.conexiones = {}
+        conexion = conexiones.get((scheme, netloc))
+        if conexion is None:
+            clase = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conexion = clase(netloc, timeout=self.timeout)
+            conexiones[(scheme, netloc)] = conexion
+            with self._lock:
+                self._todas.append(conexion)
+        return conexion
+
+    def descartar(self, scheme: str, netloc: str) -> None:
+        conexiones = getattr(self._local, "conexiones", None) or {}
+        conexion = conexiones.pop((scheme, netloc), None)
+        if conexion is not None:
+            conexion.close()
+
+    def cerrar(self) -> None:
+        with self._lock:
+            conexiones, self._todas = self._todas, []
+        for conexion in conexiones:
+            try:
+                conexion.close()
+            except Exception:
+                pass
+        self._local = threading.local()
 
 
 class AIFEmailBackend(BaseEmailBackend):
-    def __init__(self, fail_silently: bool = False, **kwargs: Any):
+    """
+    Envía los mensajes por la API de notificaciones de AIF.
+
+    * Conexiones HTTP keep-alive reutilizadas (una por hilo) mientras el backend está abierto.
+    * Los mensajes de un ``send_messages`` se envían en paralelo con hasta ``max_workers`` hilos.
+    * 429, 5xx y errores de red se reintentan con backoff exponencial y jitter (respetando
+      ``Retry-After``); un 401 renueva el token una vez.
+    * El resultado de cada mensaje queda en ``self.resultados`` (lista de ``ResultadoEnvio``).
+    * El token se comparte entre procesos mediante un archivo con lock (``AIF_EMAIL_TOKEN_CACHE_FILE``).
+    """
+
+    def __init__(
+        self,
+        fail_silently: bool = False,
+        max_workers: int | None = None,
+        max_retries: int | None = None,
+        retry_backoff: float | None = None,
+        **kwargs: Any,
+    ):
         super().__init__(fail_silently=fail_silently)
 
         base_url = os.environ.get("AIF_EMAIL_BASE_URL") or "https://api-notificaciones.aif.gob.ar"
@@ -54,12 +219,51 @@ class AIFEmailBackend(BaseEmailBackend):
         self.timeout = float(os.environ.get("AIF_EMAIL_TIMEOUT") or "15")
         self.token_ttl_seconds = int(os.environ.get("AIF_EMAIL_TOKEN_TTL_SECONDS") or str(8 * 60 * 60))
 
-    def _http_json(
+        self.max_workers = max(1, int(max_workers or os.environ.get("AIF_EMAIL_MAX_WORKERS") or "8"))
+        self.max_retries = max(0, int(
+            max_retries if max_retries is not None else (os.environ.get("AIF_EMAIL_MAX_RETRIES") or "3")
+        ))
+        self.retry_backoff = float(
+            retry_backoff if retry_backoff is not None else (os.environ.get("AIF_EMAIL_RETRY_BACKOFF") or "0.5")
+        )
+        self.retry_max_backoff = float(os.environ.get("AIF_EMAIL_RETRY_MAX_BACKOFF") or "20")
+
+        token_key = hashlib.sha256(f"{self.token_url}|{self.client_id}".encode("utf-8")).hexdigest()[:16]
+        token_file = _clean_env_value(os.environ.get("AIF_EMAIL_TOKEN_CACHE_FILE") or "") or os.path.join(
+            tempfile.gettempdir(), "edu_polo_aif_token.json"
+        )
+        self._token_compartido = _TokenCompartido(token_file, token_key)
+
+        self._pool: _PoolConexiones | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self.resultados: list[ResultadoEnvio] = []
+
+    # ---- Conexiones ----
+
+    def open(self) -> bool:
+        """Abre el pool de conexiones y los hilos de envío; se reutilizan hasta ``close()``"""
+        if self._pool is not None:
+            return False
+        self._pool = _PoolConexiones(self.timeout)
+        if self.max_workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="aif-email")
+        return True
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._pool is not None:
+            self._pool.cerrar()
+            self._pool = None
+
+    def _http_json_completo(
         self,
         url: str,
         payload: dict[str, Any],
         headers: dict[str, str] | None = None,
-    ) -> tuple[int, dict[str, Any]]:
+    ) -> tuple[int, dict[str, Any], Any]:
+        """POST JSON por una conexión keep-alive. Retorna (status, json, headers de respuesta)."""
         body = json.dumps(payload).encode("utf-8")
         req_headers = {"Content-Type": "application/json", "Accept": "application/json"}
         if self.user_agent:
@@ -67,36 +271,51 @@ class AIFEmailBackend(BaseEmailBackend):
         if headers:
             req_headers.update(headers)
 
-        req = Request(url=url, data=body, headers=req_headers, method="POST")
+        partes = urlsplit(url)
+        path = partes.path or "/"
+        if partes.query:
+            path += "?" + partes.query
 
+        abierto_aca = self.open()
         try:
-            with urlopen(req, timeout=self.timeout) as resp:
-                status = int(getattr(resp, "status", 200))
-                raw = resp.read().decode("utf-8", errors="replace").strip()
-                data = json.loads(raw) if raw else {}
-                return status, data
-        except HTTPError as e:
-            raw = ""
-            try:
-                raw = e.read().decode("utf-8", errors="replace").strip()
-            except Exception:
-                raw = ""
-            try:
-                data = json.loads(raw) if raw else {}
-            except Exception:
-                data = {"detail": raw or str(e)}
-            return int(getattr(e, "code", 500) or 500), data
-        except URLError as e:
-            raise RuntimeError(f"Error de red al llamar API de AIF: {e}") from e
+            for intento in range(2):
+                conexion = self._pool.obtener(partes.scheme, partes.netloc)
+                try:
+                    conexion.request("POST", path, body=body, headers=req_headers)
+                    resp = conexion.getresponse()
+                    raw = resp.read().decode("utf-8", errors="replace").strip()
+                    break
+                except _ERRORES_RED as e:
+                    # Una conexión keep-alive cerrada por el servidor se reabre una vez
+                    self._pool.descartar(partes.scheme, partes.netloc)
+                    if intento:
+                        raise AIFTransientError(f"Error de red al llamar API de AIF: {e}") from e
+            if resp.getheader("Connection", "").lower() == "close":
+                self._pool.descartar(partes.scheme, partes.netloc)
+        finally:
+            if abierto_aca:
+                self.close()
 
-    def _get_access_token(self) -> str:
-        now = time.time()
-        access = _TOKEN_CACHE.get("access")
-        expires_at = float(_TOKEN_CACHE.get("expires_at") or 0)
+        try:
+            data = json.loads(raw) if raw else {}
+        except ValueError:
+            data = {"detail": raw}
+        if not isinstance(data, dict):
+            data = {"detail": data}
+        return int(resp.status), data, resp.headers
+
+    def _http_json(
+        self,
+        url: str,
+        payload: dict[str, Any],
+        headers: dict[str, str] | None = None,
+    ) -> tuple[int, dict[str, Any]]:
+        status, data, _ = self._http_json_completo(url, payload, headers=headers)
+        return status, data
 
-        if access and now < expires_at:
-            return str(access)
+    # ---- Token ----
 
+    def _pedir_token(self) -> tuple[str, float]:
         if not self.client_id or not self.client_secret:
             raise RuntimeError("Faltan credenciales AIF_EMAIL_CLIENT_ID / AIF_EMAIL_CLIENT_SECRET.")
 
@@ -127,10 +346,33 @@ class AIFEmailBackend(BaseEmailBackend):
         if not token:
             raise RuntimeError(f"Respuesta de token AIF sin 'access': {data}")
 
-        _TOKEN_CACHE["access"] = str(token)
-        _TOKEN_CACHE["expires_at"] = now + max(60, self.token_ttl_seconds - 30)
+        return str(token), time.time() + max(60, self.token_ttl_seconds - 30)
+
+    def _get_access_token(self) -> str:
+        key = self._token_compartido.key
+        with _TOKEN_LOCK:
+            now = time.time()
+            if _TOKEN_CACHE.get("key") == key and _TOKEN_CACHE.get("access") and now < float(_TOKEN_CACHE["expires_at"]):
+                return str(_TOKEN_CACHE["access"])
+
+            with self._token_compartido.bloqueo():
+                guardado = self._token_compartido.leer()
+                if guardado and now < guardado[1]:
+                    access, expires_at = guardado
+                else:
+                    access, expires_at = self._pedir_token()
+                    self._token_compartido.guardar(access, expires_at)
+
+            _TOKEN_CACHE.update(access=access, expires_at=expires_at, key=key)
+            return access
+
+    def _invalidar_token(self, access: str) -> None:
+        with _TOKEN_LOCK:
+            if _TOKEN_CACHE.get("access") == access:
+                _TOKEN_CACHE.update(access=None, expires_at=0.0)
+        self._token_compartido.invalidar(access)
 
-        return str(token)
+    # ---- Mensajes ----
 
     def _addr_to_aif(self, addr: str) -> dict[str, str]:
         name, email = parseaddr(addr or "")
@@ -164,69 +406,115 @@ class AIFEmailBackend(BaseEmailBackend):
             payload["content_type"] = mimetype
         return payload
 
+    def _payload(self, message: Any) -> dict[str, Any]:
+        to_list = [self._addr_to_aif(a) for a in (getattr(message, "to", None) or [])]
+        cc_list = [self._addr_to_aif(a) for a in (getattr(message, "cc", None) or [])]
+        bcc_list = [self._addr_to_aif(a) for a in (getattr(message, "bcc", None) or [])]
+
+        subject = (getattr(message, "subject", None) or "").strip()
+        text_body = getattr(message, "body", None) or ""
+
+        html_body = None
+        if isinstance(message, EmailMultiAlternatives):
+            for alt_body, mimetype in (message.alternatives or []):
+                if (mimetype or "").lower() == "text/html":
+                    html_body = alt_body
+                    break
+
+        payload: dict[str, Any] = {
+            "subject": subject,
+            "to": to_list,
+        }
+        if self.profile:
+            payload["profile"] = self.profile
+
+        if html_body is not None:
+            payload["body"] = html_body
+            payload["is_html"] = True
+        else:
+            payload["body"] = text_body
+            payload["is_html"] = False
+
+        if cc_list:
+            payload["cc"] = cc_list
+        if bcc_list:
+            payload["bcc"] = bcc_list
+
+        attachments = getattr(message, "attachments", None) or []
+        if attachments:
+            payload["attachments"] = [self._encode_attachment(a) for a in attachments]
+        return payload
+
+    def _espera(self, intento: int, retry_after: str | None) -> float:
+        """Backoff exponencial con jitter completo; ``Retry-After`` (segundos) manda si es mayor"""
+        espera = random.uniform(0, min(self.retry_max_backoff, self.retry_backoff * (2 ** intento)))
+        try:
+            espera = max(espera, min(float(retry_after), self.retry_max_backoff)) if retry_after else espera
+        except ValueError:
+            pass
+        return espera
+
+    def _enviar(self, message: Any) -> ResultadoEnvio:
+        inicio = time.monotonic()
+        resultado = ResultadoEnvio(message=message, ok=False)
+        try:
+            payload = self._payload(message)
+            token_renovado = False
+            while True:
+                token = self._get_access_token()
+                resultado.intentos += 1
+                try:
+                    status, data, headers = self._http_json_completo(
+                        self.send_url,
+                        payload,
+                        headers={"Authorization": f"Bearer {token}"},
+                    )
+                except AIFTransientError as e:
+                    status, data, headers = None, {"detail": str(e)}, None
+                resultado.status = status
+
+                if status is not None and 200 <= status < 300:
+                    resultado.ok = True
+                    break
+                if status == 401 and not token_renovado:
+                    token_renovado = True
+                    self._invalidar_token(token)
+                    continue
+                if (status is None or status in _REINTENTABLES) and resultado.intentos <= self.max_retries:
+                    time.sleep(self._espera(resultado.intentos - 1, headers.get("Retry-After") if headers else None))
+                    continue
+                if status is None:
+                    raise AIFTransientError(str(data.get("detail")))
+                raise RuntimeError(f"Error AIF al enviar email (HTTP {status}): {data}")
+        except Exception as e:
+            resultado.error = str(e)
+            resultado.excepcion = e
+        resultado.duracion = time.monotonic() - inicio
+        return resultado
+
     def send_messages(self, email_messages):
+        self.resultados = []
         if not email_messages:
             return 0
 
         try:
-            token = self._get_access_token()
+            self._get_access_token()
         except Exception:
             if self.fail_silently:
                 return 0
             raise
 
-        sent = 0
-        for message in email_messages:
-            try:
-                to_list = [self._addr_to_aif(a) for a in (getattr(message, "to", None) or [])]
-                cc_list = [self._addr_to_aif(a) for a in (getattr(message, "cc", None) or [])]
-                bcc_list = [self._addr_to_aif(a) for a in (getattr(message, "bcc", None) or [])]
-
-                subject = (getattr(message, "subject", None) or "").strip()
-                text_body = getattr(message, "body", None) or ""
-
-                html_body = None
-                if isinstance(message, EmailMultiAlternatives):
-                    for alt_body, mimetype in (message.alternatives or []):
-                        if (mimetype or "").lower() == "text/html":
-                            html_body = alt_body
-                            break
-
-                payload: dict[str, Any] = {
-                    "subject": subject,
-                    "to": to_list,
-                }
-                if self.profile:
-                    payload["profile"] = self.profile
-
-                if html_body is not None:
-                    payload["body"] = html_body
-                    payload["is_html"] = True
-                else:
-                    payload["body"] = text_body
-                    payload["is_html"] = False
-
-                if cc_list:
-                    payload["cc"] = cc_list
-                if bcc_list:
-                    payload["bcc"] = bcc_list
-
-                attachments = getattr(message, "attachments", None) or []
-                if attachments:
-                    payload["attachments"] = [self._encode_attachment(a) for a in attachments]
-
-                status, data = self._http_json(
-                    self.send_url,
-                    payload,
-                    headers={"Authorization": f"Bearer {token}"},
-                )
-
-                if status < 200 or status >= 300:
-                    raise RuntimeError(f"Error AIF al enviar email (HTTP {status}): {data}")
-
-                sent += 1
-            except Exception:
-                if not self.fail_silently:
-                    raise
-
-        return sent
+        abierto_aca = self.open()
+        try:
+            if len(email_messages) == 1 or self._executor is None:
+                self.resultados = [self._enviar(message) for message in email_messages]
+            else:
+                self.resultados = list(self._executor.map(self._enviar, email_messages))
+        finally:
+            if abierto_aca:
+                self.close()
+
+        fallidos = [resultado for resultado in self.resultados if not resultado.ok]
+        if fallidos and not self.fail_silently:
+            raise fallidos[0].excepcion
+        return len(self.resultados) - len(fallidos)
@@ -0,0 +1,224 @@
+"""
+Servidor local que imita la API de Notificaciones AIF, para pruebas de carga y tests.
+
+Atiende los mismos endpoints que usa ``AIFEmailBackend`` (token y envío) con HTTP/1.1
+keep-alive, y permite configurar:
+
+* latencia (y variación) de cada envío,
+* proporción de respuestas 503 y de conexiones cortadas sin respuesta,
+* límite de envíos por segundo (token bucket global; el exceso recibe 429 con ``Retry-After``),
+* vencimiento de los tokens emitidos (un token vencido o desconocido recibe 401).
+
+``guion`` fuerza, por asunto, la secuencia de status que se devuelve (para tests).
+Lo usan el comando ``simular_aif`` (servidor en primer plano) y ``medir_envio_correos``.
+"""
+import json
+import math
+import random
+import secrets
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+RUTA_TOKEN = "/api/email/auth/client-token/"
+RUTA_ENVIO = "/api/email/client/email/send/"
+
+
+@dataclass
+class ConfiguracionSimulador:
+    latencia: float = 0.0
+    variacion: float = 0.0
+    tasa_error: float = 0.0
+    tasa_desconexion: float = 0.0
+    limite_por_segundo: float = 0.0
+    token_ttl: float = 0.0
+    semilla: int | None = None
+
+    @classmethod
+    def desde_opciones(cls, options: dict[str, Any]) -> "ConfiguracionSimulador":
+        """Construye la configuración a partir de las opciones de ``agregar_opciones``"""
+        return cls(
+            latencia=options["latencia_ms"] / 1000,
+            variacion=options["variacion_ms"] / 1000,
+            tasa_error=options["tasa_error"],
+            tasa_desconexion=options["tasa_desconexion"],
+            limite_por_segundo=options["limite_por_segundo"],
+            token_ttl=options["token_ttl"],
+            semilla=options["semilla"],
+        )
+
+
+def agregar_opciones(parser) -> None:
+    """Opciones de línea de comandos del simulador (compartidas por los comandos)"""
+    parser.add_argument("--latencia-ms", type=float, default=80.0, help="Demora de cada envío (por defecto 80)")
+    parser.add_argument("--variacion-ms", type=float, default=40.0, help="Variación aleatoria ± de la demora (por defecto 40)")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="Proporción de envíos que responden 503 (0 a 1)")
+    parser.add_argument("--tasa-desconexion", type=float, default=0.0, help="Proporción de envíos que cortan la conexión (0 a 1)")
+    parser.add_argument("--limite-por-segundo", type=float, default=0.0, help="Envíos por segundo antes de responder 429 (0 = sin límite)")
+    parser.add_argument("--token-ttl", type=float, default=0.0, help="Segundos de validez de cada token (0 = no vencen)")
+    parser.add_argument("--semilla", type=int, default=None, help="Semilla de los errores aleatorios (repetibles)")
+
+
+class ServidorAIFSimulado(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, direccion: tuple[str, int] = ("127.0.0.1", 0), configuracion: ConfiguracionSimulador | None = None):
+        super().__init__(direccion, _ManejadorAIF)
+        self.configuracion = configuracion or ConfiguracionSimulador()
+        self.lock = threading.Lock()
+        self._azar = random.Random(self.configuracion.semilla)
+        self._tokens: dict[str, float] = {}
+        self._cupo = max(self.configuracion.limite_por_segundo, 1.0)
+        self._cupo_actualizado = time.monotonic()
+        self._hilo: threading.Thread | None = None
+
+        self.conexiones = 0
+        self.tokens_emitidos = 0
+        self.desconexiones = 0
+        self.respuestas: Counter = Counter()
+        self.enviados: list[tuple[str, str]] = []
+        self.guion: dict[str, list[int]] = {}
+
+    @property
+    def url(self) -> str:
+        host, puerto = self.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self) -> "ServidorAIFSimulado":
+        self._hilo = threading.Thread(target=self.serve_forever, name="aif-simulador", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self) -> None:
+        if self._hilo is not None:
+            self.shutdown()
+            self._hilo = None
+        self.server_close()
+
+    def __enter__(self) -> "ServidorAIFSimulado":
+        return self.iniciar()
+
+    def __exit__(self, *exc_info) -> None:
+        self.detener()
+
+    def resumen(self) -> dict[str, Any]:
+        with self.lock:
+            return {
+                "conexiones": self.conexiones,
+                "tokens_emitidos": self.tokens_emitidos,
+                "desconexiones": self.desconexiones,
+                "respuestas": dict(sorted(self.respuestas.items())),
+            }
+
+    # ---- Lógica de cada endpoint (con self.lock tomado) ----
+
+    def _emitir_token(self) -> str:
+        self.tokens_emitidos += 1
+        token = secrets.token_hex(16)
+        ttl = self.configuracion.token_ttl
+        self._tokens[token] = time.monotonic() + ttl if ttl else math.inf
+        return token
+
+    def _token_valido(self, autorizacion: str) -> bool:
+        token = autorizacion[len("Bearer "):] if autorizacion.startswith("Bearer ") else ""
+        return time.monotonic() < self._tokens.get(token, 0.0)
+
+    def _espera_cupo(self) -> float:
+        """0 si hay cupo (y lo consume); si no, segundos hasta el próximo envío admitido"""
+        limite = self.configuracion.limite_por_segundo
+        if not limite:
+            return 0.0
+        ahora = time.monotonic()
+        self._cupo = min(max(limite, 1.0), self._cupo + (ahora - self._cupo_actualizado) * limite)
+        self._cupo_actualizado = ahora
+        if self._cupo >= 1.0:
+            self._cupo -= 1.0
+            return 0.0
+        return (1.0 - self._cupo) / limite
+
+    def _decidir_envio(self, asunto: str, autorizacion: str) -> tuple[str, int, float]:
+        """(acción, status, demora): acción es 'responder' o 'cortar'"""
+        configuracion = self.configuracion
+        demora = max(0.0, configuracion.latencia + self._azar.uniform(-configuracion.variacion, configuracion.variacion))
+
+        guion = self.guion.get(asunto)
+        if guion:
+            return "responder", guion.pop(0), demora
+        if not self._token_valido(autorizacion):
+            return "responder", 401, 0.0
+        espera = self._espera_cupo()
+        if espera:
+            return "responder", 429, espera
+        if self._azar.random() < configuracion.tasa_desconexion:
+            return "cortar", 0, demora
+        if self._azar.random() < configuracion.tasa_error:
+            return "responder", 503, demora
+        return "responder", 200, demora
+
+
+class _ManejadorAIF(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Encabezados y cuerpo salen en escrituras separadas: sin esto el ACK demorado suma ~40 ms
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.conexiones += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, status: int, data: dict[str, Any], headers: dict[str, str] | None = None) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for nombre, valor in (headers or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        servidor = self.server
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except ValueError:
+            return self._responder(400, {"detail": "JSON inválido"})
+
+        if self.path == RUTA_TOKEN:
+            if not payload.get("client_id") or not payload.get("client_secret"):
+                return self._responder(400, {"detail": "Faltan credenciales"})
+            with servidor.lock:
+                token = servidor._emitir_token()
+            return self._responder(200, {"access": token})
+
+        if self.path != RUTA_ENVIO:
+            return self._responder(404, {"detail": "No encontrado"})
+
+        asunto = payload.get("subject") or ""
+        autorizacion = self.headers.get("Authorization") or ""
+        with servidor.lock:
+            accion, status, demora = servidor._decidir_envio(asunto, autorizacion)
+
+        if status == 429:
+            with servidor.lock:
+                servidor.respuestas[429] += 1
+            return self._responder(429, {"detail": "Demasiadas solicitudes"}, {"Retry-After": str(math.ceil(demora))})
+
+        time.sleep(demora)
+        with servidor.lock:
+            if accion == "cortar":
+                servidor.desconexiones += 1
+            else:
+                servidor.respuestas[status] += 1
+                if status == 200:
+                    servidor.enviados.append((asunto, autorizacion))
+        if accion == "cortar":
+            self.close_connection = True
+            return
+        self._responder(status, {"detail": "ok" if status == 200 else "error"})
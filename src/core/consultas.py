@@ -0,0 +1,162 @@
+"""
+Presupuesto de consultas por vista y detección de N+1.
+
+* ``RegistroConsultas`` cuenta las consultas de todas las conexiones (``default`` y la
+  réplica), el tiempo total en la base y cuántas veces se repite cada consulta (misma
+  SQL sin los valores: una consulta que se repite por fila es el síntoma del N+1).
+* ``PresupuestoConsultasMiddleware`` registra cada request y deja un warning en el log
+  ``core.consultas`` si la vista supera su presupuesto (CONSULTAS_PRESUPUESTOS, por nombre
+  de URL con comodines, o CONSULTAS_PRESUPUESTO) o repite una consulta más de
+  CONSULTAS_REPETIDAS_MAX veces. Con DEBUG agrega los encabezados ``X-Consultas`` y
+  ``Server-Timing``. Se activa con CONSULTAS_MONITOREO (por defecto igual a DEBUG).
+* ``PresupuestoConsultasMixin`` agrega a los tests ``assertPresupuestoConsultas``.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from fnmatch import fnmatchcase
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+_ESPACIOS = re.compile(r'\s+')
+_LISTA_IN = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)', re.IGNORECASE)
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def huella(sql):
+    """La SQL sin valores ni largo de las listas ``IN``: misma huella = misma consulta"""
+    sql = _LITERALES.sub('?', _ESPACIOS.sub(' ', sql).strip())
+    return _LISTA_IN.sub('IN (...)', sql)
+
+
+class RegistroConsultas:
+    def __init__(self):
+        self.total = 0
+        self.segundos = 0.0
+        self.huellas = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.total += 1
+            self.huellas[huella(sql)] += 1
+
+    @contextmanager
+    def instalado(self):
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(self))
+            yield self
+
+    @property
+    def milisegundos(self):
+        return self.segundos * 1000
+
+    def repetidas(self, maximo):
+        """Huellas ejecutadas más de ``maximo`` veces, de la más repetida a la menos"""
+        return [(sql, veces) for sql, veces in self.huellas.most_common() if veces > maximo]
+
+    def describir_repetidas(self, maximo, limite=3):
+        return '; '.join(f'{veces}x {sql[:200]}' for sql, veces in self.repetidas(maximo)[:limite])
+
+
+def presupuesto_vista(nombre_vista):
+    """Máximo de consultas de la vista según CONSULTAS_PRESUPUESTOS (el primer patrón que coincide)"""
+    if nombre_vista:
+        for patron, maximo in settings.CONSULTAS_PRESUPUESTOS.items():
+            if fnmatchcase(nombre_vista, patron):
+                return maximo
+    return settings.CONSULTAS_PRESUPUESTO
+
+
+def _iterar_registrando(contenido, registro, al_terminar):
+    iterador = iter(contenido)
+    try:
+        while True:
+            with registro.instalado():
+                try:
+                    fragmento = next(iterador)
+                except StopIteration:
+                    return
+            yield fragmento
+    finally:
+        al_terminar()
+
+
+class PresupuestoConsultasMiddleware:
+    def __init__(self, get_response):
+        if not settings.CONSULTAS_MONITOREO:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        registro = RegistroConsultas()
+        with registro.instalado():
+            response = self.get_response(request)
+
+        if getattr(response, 'streaming', False) and not getattr(response, 'is_async', False):
+            # Las exportaciones leen mientras se envía el contenido: se evalúa al terminar
+            response.streaming_content = _iterar_registrando(
+                response.streaming_content, registro, lambda: self._evaluar(request, registro),
+            )
+            return response
+
+        self._evaluar(request, registro)
+        if settings.DEBUG:
+            response['X-Consultas'] = f'{registro.total} consultas, {registro.milisegundos:.1f} ms'
+            response['Server-Timing'] = f'db;dur={registro.milisegundos:.1f};desc="{registro.total} consultas"'
+        return response
+
+    def _evaluar(self, request, registro):
+        resolver_match = getattr(request, 'resolver_match', None)
+        nombre_vista = resolver_match.view_name if resolver_match else None
+        maximo = presupuesto_vista(nombre_vista)
+        repetidas = registro.repetidas(settings.CONSULTAS_REPETIDAS_MAX)
+        if registro.total <= maximo and not repetidas:
+            return
+        logger.warning(
+            'Vista %s (%s %s): %d consultas (presupuesto %d), %.1f ms en la base%s',
+            nombre_vista or '-',
+            request.method,
+            request.path,
+            registro.total,
+            maximo,
+            registro.milisegundos,
+            f'; repetidas: {registro.describir_repetidas(settings.CONSULTAS_REPETIDAS_MAX)}' if repetidas else '',
+        )
+
+
+class PresupuestoConsultasMixin:
+    """Mixin de TestCase para fijar el techo de consultas de una vista"""
+
+    @contextmanager
+    def assertPresupuestoConsultas(self, maximo, repetidas=None):
+        """
+        Falla si el bloque ejecuta más de ``maximo`` consultas o repite alguna más de
+        ``repetidas`` veces (por defecto CONSULTAS_REPETIDAS_MAX). Las respuestas en
+        streaming se deben consumir dentro del bloque.
+        """
+        repetidas = settings.CONSULTAS_REPETIDAS_MAX if repetidas is None else repetidas
+        registro = RegistroConsultas()
+        with registro.instalado():
+            yield registro
+        self.assertLessEqual(
+            registro.total,
+            maximo,
+            f'{registro.total} consultas, el presupuesto es {maximo}. '
+            f'Más repetidas: {registro.describir_repetidas(1) or "ninguna"}',
+        )
+        self.assertFalse(
+            registro.repetidas(repetidas),
+            f'Consultas repetidas más de {repetidas} veces (N+1): {registro.describir_repetidas(repetidas)}',
+        )
@@ -0,0 +1,158 @@
+"""
+Lecturas de reportes y exportaciones en una réplica de solo lectura.
+
+Las lecturas van a la réplica (alias ``replica``) solo donde se pide explícitamente:
+
+* ``@usar_replica`` en una vista (si la respuesta es un streaming, también mientras se
+  genera el contenido),
+* ``with lecturas_en_replica():`` en un bloque de código (o como decorador de función),
+* ``queryset.using(alias_lectura())`` en un queryset puntual.
+
+Lo que se guarda en un cache compartido (perfil de roles, usuario autenticado) se calcula
+dentro de ``lecturas_en_primaria()`` para no cachear datos atrasados de la réplica.
+
+Sin réplica configurada todo se lee de ``default``. Tampoco se usa la réplica dentro de
+una transacción sobre ``default`` ni después de que el request escribió. Para que un
+usuario vea sus propios cambios, ``ReplicaMiddleware`` deja una cookie durante
+REPLICA_PEGADO_SEGUNDOS después de cada request que escribió; mientras la tenga, sus
+lecturas siguen en ``default``.
+"""
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+ALIAS_REPLICA = 'replica'
+COOKIE_PEGADO = 'edu_lee_primaria'
+
+# Escrituras que no cuentan para la lectura de los propios cambios
+_APPS_SIN_PEGADO = {'sessions'}
+
+
+class _EstadoRequest:
+    def __init__(self, pegado):
+        self.pegado = pegado
+        self.escribio = False
+
+
+_en_replica = ContextVar('lecturas_en_replica', default=False)
+_estado_request = ContextVar('estado_ruteo_request', default=None)
+
+
+def replica_configurada():
+    return ALIAS_REPLICA in connections.settings
+
+
+def _leer_de_replica():
+    if not _en_replica.get() or not replica_configurada():
+        return False
+    estado = _estado_request.get()
+    if estado is not None and (estado.pegado or estado.escribio):
+        return False
+    return not connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+def alias_lectura():
+    """Alias para un ``queryset.using()`` de reporte: la réplica si corresponde, si no ``default``"""
+    token = _en_replica.set(True)
+    try:
+        return ALIAS_REPLICA if _leer_de_replica() else DEFAULT_DB_ALIAS
+    finally:
+        _en_replica.reset(token)
+
+
+class lecturas_en_replica(ContextDecorator):
+    """Dentro del bloque, las lecturas (sin ``using`` explícito) van a la réplica"""
+
+    def __enter__(self):
+        self._token = _en_replica.set(True)
+        return self
+
+    def __exit__(self, *exc_info):
+        _en_replica.reset(self._token)
+        return False
+
+
+class lecturas_en_primaria(lecturas_en_replica):
+    """Dentro del bloque, las lecturas vuelven a ``default`` aunque se esté en una vista de réplica"""
+
+    def __enter__(self):
+        self._token = _en_replica.set(False)
+        return self
+
+
+def _iterar_en_replica(contenido):
+    # El contexto se abre por cada fragmento para no quedar activo entre un yield y otro
+    iterador = iter(contenido)
+    while True:
+        with lecturas_en_replica():
+            try:
+                fragmento = next(iterador)
+            except StopIteration:
+                return
+        yield fragmento
+
+
+def usar_replica(vista):
+    """Decorador de vistas de solo lectura (reportes, exportaciones, APIs de consulta)"""
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        with lecturas_en_replica():
+            response = vista(request, *args, **kwargs)
+        if getattr(response, 'streaming', False) and not getattr(response, 'is_async', False):
+            response.streaming_content = _iterar_en_replica(response.streaming_content)
+        return response
+    return envoltura
+
+
+class RouterReplica:
+    """Router de DATABASE_ROUTERS: escrituras y lecturas sin marcar siempre a ``default``"""
+
+    def db_for_read(self, model, **hints):
+        return ALIAS_REPLICA if _leer_de_replica() else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        estado = _estado_request.get()
+        if estado is not None and model._meta.app_label not in _APPS_SIN_PEGADO:
+            estado.escribio = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, ALIAS_REPLICA}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación, no por migrate
+        if db == ALIAS_REPLICA:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Registra si el request escribió y mantiene la cookie de lectura de los propios cambios"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        estado = _EstadoRequest(pegado=COOKIE_PEGADO in request.COOKIES)
+        token = _estado_request.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado_request.reset(token)
+
+        if estado.escribio and replica_configurada():
+            response.set_cookie(
+                COOKIE_PEGADO,
+                '1',
+                max_age=settings.REPLICA_PEGADO_SEGUNDOS,
+                secure=settings.SESSION_COOKIE_SECURE or None,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -88,7 +88,11 @@ else:
 # Configuración de Sesión
 SESSION_COOKIE_AGE = 1209600  # 2 semanas en segundos
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
-SESSION_SAVE_EVERY_REQUEST = True  # Renovar sesión en cada petición
+# La sesión se renueva sin escribir en cada petición (apps.modulo_6.seguridad.sesiones):
+# se guarda si cambió o si pasaron SESION_RENOVACION_SEGUNDOS desde la última renovación.
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_ENGINE = 'apps.modulo_6.seguridad.sesiones'
+SESION_RENOVACION_SEGUNDOS = int(os.environ.get('SESION_RENOVACION_SEGUNDOS') or '3600')
 
 CSRF_COOKIE_HTTPONLY = False
 CSRF_USE_SESSIONS = False
@@ -127,7 +131,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.consultas.PresupuestoConsultasMiddleware',
+    'core.replica.ReplicaMiddleware',
+    'apps.modulo_6.seguridad.sesiones.SesionDeslizanteMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -218,6 +224,80 @@ else:
     if os.environ.get('DISABLE_SERVER_SIDE_CURSORS', '') == '1':
         DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
 
+# Réplica de solo lectura para reportes y exportaciones (ver core/replica.py).
+# Se configura con REPLICA_DATABASE_URL o con DB_REPLICA_NAME / DB_REPLICA_HOST (lo que no
+# se indique, p.ej. usuario o puerto, se toma de la base principal). Sin réplica todo se
+# lee de default. En los tests la réplica apunta a la base de test de default.
+_replica_url = os.environ.get('REPLICA_DATABASE_URL')
+if _replica_url and dj_database_url:
+    DATABASES['replica'] = dj_database_url.parse(
+        _replica_url,
+        conn_max_age=600,
+        conn_health_checks=True,
+    )
+elif os.environ.get('DB_REPLICA_NAME') or os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        **{
+            clave: os.environ[f'DB_REPLICA_{clave}']
+            for clave in ('NAME', 'HOST', 'PORT', 'USER', 'PASSWORD')
+            if os.environ.get(f'DB_REPLICA_{clave}')
+        },
+    }
+if 'replica' in DATABASES:
+    if DATABASES['default'].get('DISABLE_SERVER_SIDE_CURSORS'):
+        DATABASES['replica']['DISABLE_SERVER_SIDE_CURSORS'] = True
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['core.replica.RouterReplica']
+# Segundos que un usuario sigue leyendo de default después de escribir
+REPLICA_PEGADO_SEGUNDOS = int(os.environ.get('REPLICA_PEGADO_SEGUNDOS') or '5')
+
+# Días de agenda del dashboard (desde hoy) que se mantienen construidos; los demás se
+# calculan al leerlos, sin guardarlos
+AGENDA_DIAS_CONSTRUIDOS = int(os.environ.get('AGENDA_DIAS_CONSTRUIDOS') or '14')
+
+# Presupuesto de consultas por vista (ver core/consultas.py). Con el monitoreo activo se
+# registra en el log core.consultas cada request que supera el presupuesto de su vista o
+# repite una misma consulta más de CONSULTAS_REPETIDAS_MAX veces (N+1).
+CONSULTAS_MONITOREO = os.environ.get('CONSULTAS_MONITOREO', '1' if DEBUG else '0') == '1'
+CONSULTAS_PRESUPUESTO = int(os.environ.get('CONSULTAS_PRESUPUESTO') or '40')
+CONSULTAS_REPETIDAS_MAX = int(os.environ.get('CONSULTAS_REPETIDAS_MAX') or '5')
+# Presupuestos por nombre de URL (admite comodines); gana el primer patrón que coincide
+CONSULTAS_PRESUPUESTOS = {
+    'administracion:exportar_*': 15,
+    'api_estudiantes_por_curso': 15,
+    'cursos_por_polo': 10,
+    'lista_polos': 10,
+}
+
+
+# Cache
+# Por defecto se usa memoria local por proceso y los caches con invalidación (catálogo,
+# perfiles de roles, usuario autenticado, sesiones) quedan desactivados (TTL 0). Con varios
+# workers hace falta un cache compartido para activarlos (p.ej.
+# CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache y
+# CACHE_LOCATION=/var/tmp/edu_polo_cache) para que las invalidaciones lleguen a todos.
+_cache_backend = (os.environ.get('CACHE_BACKEND') or '').strip()
+CACHES = {
+    'default': {
+        'BACKEND': _cache_backend or 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': (os.environ.get('CACHE_LOCATION') or 'edu-polo').strip(),
+    }
+}
+
+# Segundos que se conserva el catálogo público (datos y página para anónimos) en cache
+CATALOGO_CACHE_TTL = int(os.environ.get('CATALOGO_CACHE_TTL') or ('3600' if _cache_backend else '0'))
+# Segundos que se conserva el perfil de roles de un usuario en cache. Con el cache local por
+# proceso queda en 0 (solo se memoiza por request): un cambio de roles no llegaría a los demás workers.
+PERFIL_ROLES_CACHE_TTL = int(os.environ.get('PERFIL_ROLES_CACHE_TTL') or ('300' if _cache_backend else '0'))
+# Segundos que se conserva el User de Django en cache para la autenticación de cada request.
+# Con el cache local por proceso queda en 0: un cambio del usuario no llegaría a los demás workers.
+USUARIO_AUTH_CACHE_TTL = int(os.environ.get('USUARIO_AUTH_CACHE_TTL') or ('60' if _cache_backend else '0'))
+# Segundos que una sesión se lee del cache antes de volver a la base. Con el cache local por
+# proceso queda en 0: un logout en un worker no llegaría a los demás.
+SESION_CACHE_TTL = int(os.environ.get('SESION_CACHE_TTL') or ('300' if _cache_backend else '0'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -263,6 +343,19 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Exportaciones en segundo plano (apps.modulo_5.reporte). Los archivos se guardan fuera
+# de MEDIA_ROOT: contienen datos personales y solo se descargan desde la vista autenticada.
+EXPORTACIONES_ROOT = Path(os.environ.get('EXPORTACIONES_ROOT') or (BASE_DIR / 'exportaciones'))
+# Horas que se conserva un archivo generado antes de eliminarlo
+EXPORTACIONES_RETENCION_HORAS = int(os.environ.get('EXPORTACIONES_RETENCION_HORAS') or '24')
+# Minutos sin actividad tras los cuales un trabajo "en proceso" se considera abandonado
+EXPORTACIONES_TIMEOUT_MINUTOS = int(os.environ.get('EXPORTACIONES_TIMEOUT_MINUTOS') or '30')
+EXPORTACIONES_MAX_INTENTOS = int(os.environ.get('EXPORTACIONES_MAX_INTENTOS') or '3')
+
+# Certificados PDF emitidos (apps.modulo_4.certificado). Se generan una vez y se reutilizan
+# mientras no cambien los datos impresos; también fuera de MEDIA_ROOT.
+CERTIFICADOS_ROOT = Path(os.environ.get('CERTIFICADOS_ROOT') or (BASE_DIR / 'certificados'))
+
 # WhiteNoise para servir archivos estáticos en producción
 if IS_PRODUCTION:
     STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
@@ -299,6 +392,16 @@ else:
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@edupolo.com')
 SERVER_EMAIL = DEFAULT_FROM_EMAIL
 
+# Bandeja de salida (apps.modulo_6.seguridad.bandeja): los correos se encolan en la base y
+# los entrega el comando ``enviar_correos``.
+CORREOS_MAX_INTENTOS = int(os.environ.get('CORREOS_MAX_INTENTOS') or '5')
+# Espera antes del primer reintento; se duplica en cada intento hasta el tope
+CORREOS_REINTENTO_SEGUNDOS = int(os.environ.get('CORREOS_REINTENTO_SEGUNDOS') or '60')
+CORREOS_REINTENTO_MAX_SEGUNDOS = int(os.environ.get('CORREOS_REINTENTO_MAX_SEGUNDOS') or '3600')
+# Minutos "enviando" tras los cuales un correo se considera abandonado por un proceso caído
+CORREOS_TIMEOUT_MINUTOS = int(os.environ.get('CORREOS_TIMEOUT_MINUTOS') or '15')
+CORREOS_RETENCION_DIAS = int(os.environ.get('CORREOS_RETENCION_DIAS') or '7')
+
 PUBLIC_BASE_URL = (os.environ.get('PUBLIC_BASE_URL') or '').strip().strip("`\"'").rstrip('/')
 if IS_PRODUCTION and not PUBLIC_BASE_URL:
     _public_host = next((h.strip() for h in ALLOWED_HOSTS if h.strip() and h.strip() != '*'), '')
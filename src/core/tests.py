@@ -0,0 +1,233 @@
+import os
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.db import connections, router
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import aif_email_backend
+from core.aif_email_backend import AIFEmailBackend
+from core.aif_simulador import ConfiguracionSimulador, ServidorAIFSimulado
+from core.consultas import PresupuestoConsultasMixin, huella
+from core.replica import (
+    ALIAS_REPLICA, COOKIE_PEGADO, ReplicaMiddleware, alias_lectura, lecturas_en_primaria,
+    lecturas_en_replica, usar_replica,
+)
+
+
+class AIFEmailBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.servidor = ServidorAIFSimulado().iniciar()
+        self.addCleanup(self.servidor.detener)
+
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        entorno = mock.patch.dict(os.environ, {
+            'AIF_EMAIL_BASE_URL': self.servidor.url,
+            'AIF_EMAIL_CLIENT_ID': 'cliente',
+            'AIF_EMAIL_CLIENT_SECRET': 'secreto',
+            'AIF_EMAIL_TOKEN_CACHE_FILE': os.path.join(directorio.name, 'token.json'),
+        })
+        entorno.start()
+        self.addCleanup(entorno.stop)
+        self._olvidar_token_en_memoria()
+
+    def _olvidar_token_en_memoria(self):
+        aif_email_backend._TOKEN_CACHE.update(access=None, expires_at=0.0, key=None)
+
+    def _mensajes(self, cantidad, prefijo='Aviso'):
+        return [EmailMessage(f'{prefijo} {i}', 'Hola', 'noreply@test.com', [f'e{i}@test.com']) for i in range(cantidad)]
+
+    def test_envio_concurrente_reutiliza_conexiones_y_token_compartido(self):
+        backend = AIFEmailBackend(max_workers=4, retry_backoff=0)
+        self.assertEqual(backend.send_messages(self._mensajes(40)), 40)
+        self.assertEqual(len(self.servidor.enviados), 40)
+        self.assertTrue(all(resultado.ok and resultado.intentos == 1 for resultado in backend.resultados))
+        # Una conexión para el token y una por hilo de envío, no una por mensaje
+        self.assertLessEqual(self.servidor.conexiones, 5)
+
+        # Otro proceso (sin cache en memoria) reutiliza el token del archivo compartido
+        self._olvidar_token_en_memoria()
+        AIFEmailBackend(retry_backoff=0).send_messages(self._mensajes(1))
+        self.assertEqual(self.servidor.tokens_emitidos, 1)
+
+    def test_reintenta_429_y_5xx_y_reporta_resultado_por_mensaje(self):
+        self.servidor.guion = {'Aviso 0': [503, 429], 'Aviso 1': [400], 'Aviso 2': [503, 503, 503, 503]}
+        backend = AIFEmailBackend(max_workers=3, max_retries=3, retry_backoff=0, fail_silently=True)
+
+        self.assertEqual(backend.send_messages(self._mensajes(4)), 2)
+        resultados = {resultado.message.subject: resultado for resultado in backend.resultados}
+        self.assertEqual((resultados['Aviso 0'].ok, resultados['Aviso 0'].intentos), (True, 3))
+        self.assertEqual((resultados['Aviso 1'].ok, resultados['Aviso 1'].status, resultados['Aviso 1'].intentos), (False, 400, 1))
+        self.assertEqual((resultados['Aviso 2'].ok, resultados['Aviso 2'].intentos), (False, 4))
+        self.assertTrue(resultados['Aviso 3'].ok)
+
+        self.servidor.guion = {'Aviso 0': [400]}
+        with self.assertRaisesMessage(RuntimeError, 'HTTP 400'):
+            AIFEmailBackend(retry_backoff=0).send_messages(self._mensajes(1))
+
+    def test_token_rechazado_se_renueva_una_vez(self):
+        backend = AIFEmailBackend(retry_backoff=0)
+        backend.send_messages(self._mensajes(1))
+        primer_token = self.servidor.enviados[-1][1]
+        self.servidor.guion = {'Aviso 0': [401]}
+
+        self.assertEqual(backend.send_messages(self._mensajes(1)), 1)
+        self.assertEqual(self.servidor.tokens_emitidos, 2)
+        self.assertNotEqual(self.servidor.enviados[-1][1], primer_token)
+
+    def test_token_vencido_en_el_simulador_se_renueva(self):
+        self.servidor.configuracion.token_ttl = 0.05
+        backend = AIFEmailBackend(retry_backoff=0)
+        backend.send_messages(self._mensajes(1))
+        self.servidor.configuracion.token_ttl = 0
+        time.sleep(0.1)
+
+        self.assertEqual(backend.send_messages(self._mensajes(1)), 1)
+        self.assertEqual(self.servidor.respuestas[401], 1)
+        self.assertEqual(self.servidor.tokens_emitidos, 2)
+
+
+class SimuladorAIFTests(SimpleTestCase):
+    def test_limite_por_segundo_responde_429_con_retry_after(self):
+        configuracion = ConfiguracionSimulador(limite_por_segundo=2)
+        with ServidorAIFSimulado(configuracion=configuracion) as servidor, tempfile.TemporaryDirectory() as directorio:
+            with mock.patch.dict(os.environ, {
+                'AIF_EMAIL_BASE_URL': servidor.url,
+                'AIF_EMAIL_CLIENT_ID': 'cliente',
+                'AIF_EMAIL_CLIENT_SECRET': 'secreto',
+                'AIF_EMAIL_TOKEN_CACHE_FILE': os.path.join(directorio, 'token.json'),
+            }):
+                backend = AIFEmailBackend(max_workers=1, max_retries=0, fail_silently=True)
+                mensajes = [EmailMessage(f'Aviso {i}', 'Hola', 'noreply@test.com', ['a@test.com']) for i in range(3)]
+                self.assertEqual(backend.send_messages(mensajes), 2)
+
+        self.assertEqual(backend.resultados[2].status, 429)
+        self.assertEqual(servidor.resumen()['respuestas'], {200: 2, 429: 1})
+
+    def test_medir_envio_correos_con_simulador(self):
+        salida = StringIO()
+        call_command(
+            'medir_envio_correos', '--simulador', '--cantidad', '30', '--lote', '10', '--workers', '4',
+            '--latencia-ms', '0', '--variacion-ms', '0', '--tasa-error', '0.3', '--backoff', '0',
+            '--reintentos', '10', '--semilla', '7',
+            stdout=salida,
+        )
+        informe = salida.getvalue()
+        self.assertIn('Mensajes: 30 (enviados 30, fallidos 0)', informe)
+        self.assertRegex(informe, r'Latencia por mensaje \(ms\): p50 \d+, p90 \d+, p95 \d+, p99 \d+')
+        self.assertRegex(informe, r'Reintentos: [1-9]\d* ')
+        self.assertIn('503:', informe)
+
+
+class ReplicaTests(SimpleTestCase):
+    """Solo resuelve alias (``queryset.db``), no abre conexiones a la réplica"""
+
+    def setUp(self):
+        configurada = mock.patch.dict(connections.settings, {ALIAS_REPLICA: connections.settings['default']})
+        configurada.start()
+        self.addCleanup(configurada.stop)
+        self.factory = RequestFactory()
+
+    def _por_middleware(self, vista, cookies=None):
+        request = self.factory.get('/')
+        request.COOKIES.update(cookies or {})
+        return ReplicaMiddleware(vista)(request)
+
+    def test_solo_lee_de_la_replica_donde_se_pide(self):
+        self.assertEqual(User.objects.all().db, 'default')
+        with lecturas_en_replica():
+            self.assertEqual(User.objects.all().db, ALIAS_REPLICA)
+            self.assertEqual(alias_lectura(), ALIAS_REPLICA)
+            with lecturas_en_primaria():
+                self.assertEqual(User.objects.all().db, 'default')
+        self.assertEqual(alias_lectura(), ALIAS_REPLICA)
+        self.assertEqual(router.db_for_write(User), 'default')
+
+    def test_sin_replica_o_en_transaccion_lee_de_default(self):
+        with lecturas_en_replica():
+            with mock.patch.object(connections['default'], 'in_atomic_block', True):
+                self.assertEqual(User.objects.all().db, 'default')
+            with mock.patch.dict(connections.settings):
+                del connections.settings[ALIAS_REPLICA]
+                self.assertEqual(User.objects.all().db, 'default')
+
+    def test_no_migra_la_replica(self):
+        self.assertFalse(router.allow_migrate(ALIAS_REPLICA, 'auth', model_name='user'))
+        self.assertTrue(router.allow_migrate('default', 'auth', model_name='user'))
+
+    def test_despues_de_escribir_lee_de_default_y_deja_cookie(self):
+        alias = []
+
+        @usar_replica
+        def vista(request):
+            alias.append(User.objects.all().db)
+            router.db_for_write(User)
+            alias.append(User.objects.all().db)
+            return HttpResponse()
+
+        response = self._por_middleware(vista)
+        self.assertEqual(alias, [ALIAS_REPLICA, 'default'])
+        self.assertIn(COOKIE_PEGADO, response.cookies)
+        self.assertEqual(response.cookies[COOKIE_PEGADO]['max-age'], settings.REPLICA_PEGADO_SEGUNDOS)
+
+        alias.clear()
+        response = self._por_middleware(vista, cookies={COOKIE_PEGADO: '1'})
+        self.assertEqual(alias, ['default', 'default'])
+
+    def test_lectura_sin_escrituras_no_deja_cookie(self):
+        response = self._por_middleware(usar_replica(lambda request: HttpResponse(User.objects.all().db)))
+        self.assertEqual(response.content, ALIAS_REPLICA.encode())
+        self.assertNotIn(COOKIE_PEGADO, response.cookies)
+
+    def test_streaming_se_genera_en_la_replica(self):
+        @usar_replica
+        def vista(request):
+            return StreamingHttpResponse(User.objects.all().db for _ in range(2))
+
+        response = self._por_middleware(vista)
+        self.assertEqual(User.objects.all().db, 'default')
+        self.assertEqual(b''.join(response.streaming_content), (ALIAS_REPLICA * 2).encode())
+        self.assertEqual(User.objects.all().db, 'default')
+
+
+@override_settings(CONSULTAS_MONITOREO=True, CONSULTAS_REPETIDAS_MAX=3)
+class PresupuestoConsultasTests(PresupuestoConsultasMixin, TestCase):
+    def test_huella_ignora_valores_y_largo_de_listas_in(self):
+        self.assertEqual(
+            huella('SELECT  "a" FROM "t"\n WHERE "id" IN (%s, %s, %s) AND "x" = \'y\' LIMIT 21'),
+            huella('SELECT "a" FROM "t" WHERE "id" IN (%s) AND "x" = \'z\' LIMIT 1'),
+        )
+
+    def test_detecta_consultas_repetidas(self):
+        with self.assertRaisesMessage(AssertionError, 'N+1'):
+            with self.assertPresupuestoConsultas(10):
+                for pk in range(4):
+                    User.objects.filter(pk=pk).first()
+
+        with self.assertRaisesMessage(AssertionError, 'el presupuesto es 2'):
+            with self.assertPresupuestoConsultas(2):
+                for pk in range(3):
+                    User.objects.filter(pk=pk).first()
+
+    @override_settings(DEBUG=True, CONSULTAS_PRESUPUESTOS={'lista_polos': 0})
+    def test_middleware_informa_vista_fuera_de_presupuesto(self):
+        with self.assertLogs('core.consultas', level='WARNING') as logs:
+            response = self.client.get(reverse('lista_polos'), secure=True)
+        self.assertIn('Vista lista_polos (GET /', logs.output[0])
+        self.assertIn('(presupuesto 0)', logs.output[0])
+        self.assertRegex(response['X-Consultas'], r'^\d+ consultas, [\d.]+ ms$')
+        self.assertTrue(response['Server-Timing'].startswith('db;dur='))
+
+    def test_middleware_sin_excesos_no_informa(self):
+        with self.assertNoLogs('core.consultas', level='WARNING'):
+            response = self.client.get(reverse('lista_polos'), secure=True)
+        self.assertNotIn('X-Consultas', response)